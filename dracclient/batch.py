@@ -0,0 +1,130 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Batches of operations buffered within a scope and sent when it is left.
+"""
+
+import logging
+import threading
+
+from dracclient import exceptions
+from dracclient.resources import bios
+
+LOG = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+def get_batch(client):
+    """Returns the batch open by the current thread for a client
+
+    :param client: an instance of WSManClient
+    :returns: an OperationBatch object, or None if no batch is open
+    """
+    return getattr(_local, 'batches', {}).get(id(client))
+
+
+class OperationBatch(object):
+    """Operations buffered until the batch is closed
+
+    The batch is open within a with statement, for the thread entering it.
+    The BIOS settings set during that time are merged and set by a single
+    SetAttributes call, validated against a single listing of the BIOS
+    settings, when the with statement is left. Nothing is sent if it is left
+    because of an exception.
+    """
+
+    def __init__(self, client):
+        """Creates OperationBatch object
+
+        :param client: an instance of WSManClient
+        """
+        self.client = client
+        # shared by the buffered calls, updated when the batch is flushed
+        self.result = {'commit_required': False}
+        self._bios_settings = {}
+        self._depth = 0
+
+    def __len__(self):
+        return len(self._bios_settings)
+
+    def set_bios_settings(self, settings):
+        """Buffers BIOS settings to set
+
+        :param settings: a dictionary containing the proposed values, with
+                         each key being the name of attribute and the value
+                         being the proposed value.
+        :returns: a dictionary containing the commit_required key, set when
+                  the batch is flushed to a boolean value indicating whether
+                  a config job must be created for the values of the batch to
+                  be applied.
+        :raises: InvalidParameterValue if an attribute was already given a
+                 different value in the batch
+        """
+        conflicts = dict(
+            (name, (self._bios_settings[name], value))
+            for (name, value) in settings.items()
+            if (name in self._bios_settings and
+                str(self._bios_settings[name]) != str(value)))
+        if conflicts:
+            msg = ('Conflicting values of BIOS attributes in the batch: '
+                   '%(conflicts)r' % {'conflicts': conflicts})
+            raise exceptions.InvalidParameterValue(reason=msg)
+
+        self._bios_settings.update(settings)
+        return self.result
+
+    def flush(self):
+        """Sends the buffered operations
+
+        :returns: a dictionary containing the commit_required key with a
+                  boolean value indicating whether a config job must be
+                  created for the values of the batch to be applied.
+        :raises: WSManRequestFailure on request failures
+        :raises: WSManInvalidResponse when receiving invalid response
+        :raises: DRACOperationFailed on error reported back by the DRAC
+                 interface
+        :raises: DRACUnexpectedReturnValue on return value mismatch
+        :raises: InvalidParameterValue on invalid BIOS attribute
+        """
+        settings = self._bios_settings
+        self._bios_settings = {}
+        if settings:
+            LOG.debug('Setting %(count)d BIOS attributes of %(host)s',
+                      {'count': len(settings), 'host': self.client.host})
+            bios_cfg = bios.BIOSConfiguration(self.client)
+            self.result.update(bios_cfg.set_bios_settings(settings))
+
+        return self.result
+
+    def __enter__(self):
+        batches = getattr(_local, 'batches', None)
+        if batches is None:
+            batches = _local.batches = {}
+
+        batches[id(self.client)] = self
+        self._depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._depth -= 1
+        if self._depth:
+            # nested scope, the outermost one flushes the batch
+            return
+
+        del _local.batches[id(self.client)]
+        if exc_type is None:
+            self.flush()
+        else:
+            self._bios_settings = {}
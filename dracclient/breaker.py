@@ -0,0 +1,165 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Circuit breakers failing the requests to unreachable DRACs immediately.
+"""
+
+import threading
+import time
+import weakref
+
+from dracclient import constants
+from dracclient import exceptions
+
+# states of a circuit breaker
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+_breakers = weakref.WeakValueDictionary()
+_breakers_lock = threading.Lock()
+
+
+class CircuitBreaker(object):
+    """Circuit breaker of the requests sent to a DRAC
+
+    The breaker is closed as long as the DRAC answers. It opens after
+    failure_threshold consecutive requests failed, and the requests are then
+    failed without being sent. Once reset_timeout seconds have passed, the
+    breaker is half-open and a single probe request is let through. The
+    breaker closes if it succeeds, and opens again otherwise.
+    """
+
+    def __init__(self, host, failure_threshold,
+                 reset_timeout=(
+                     constants.DEFAULT_BREAKER_RESET_TIMEOUT_SEC)):
+        """Creates CircuitBreaker object
+
+        :param host: hostname or IP of the DRAC interface
+        :param failure_threshold: number of consecutive failed requests
+                                  opening the breaker
+        :param reset_timeout: number of seconds the breaker stays open before
+                              letting a probe request through
+        """
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        """State of the breaker: CLOSED, OPEN or HALF_OPEN"""
+        opened_at = self._opened_at
+        if opened_at is None:
+            return CLOSED
+        elif time.time() - opened_at < self.reset_timeout:
+            return OPEN
+        else:
+            return HALF_OPEN
+
+    def before_request(self):
+        """Checks whether a request can be sent to the DRAC
+
+        Every request allowed must be followed by a call to record.
+
+        :raises: DRACCircuitOpen if the breaker is open, or if it is half-open
+                 and the probe request was already let through
+        """
+        with self._lock:
+            state = self.state
+            if state == CLOSED:
+                return
+
+            if state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return
+
+            raise exceptions.DRACCircuitOpen(host=self.host,
+                                             failures=self.failures)
+
+    def record(self, success):
+        """Records the outcome of a request allowed by before_request
+
+        :param success: whether the DRAC answered the request
+        :returns: the state of the breaker if it changed, None otherwise
+        """
+        with self._lock:
+            old_state = self.state
+            self._probing = False
+            if success:
+                self.failures = 0
+                self._opened_at = None
+            else:
+                self.failures += 1
+                if (old_state != CLOSED or
+                        self.failures >= self.failure_threshold):
+                    self._opened_at = time.time()
+
+            state = self.state
+            if state != old_state:
+                return state
+
+    def reset(self):
+        """Closes the breaker"""
+        with self._lock:
+            self.failures = 0
+            self._opened_at = None
+            self._probing = False
+
+
+def get_circuit_breaker(host, port, failure_threshold,
+                        reset_timeout=(
+                            constants.DEFAULT_BREAKER_RESET_TIMEOUT_SEC)):
+    """Returns the circuit breaker shared by the clients of a DRAC
+
+    The breaker lives as long as a client references it. The thresholds
+    passed by the client creating it apply to all the clients of the DRAC.
+
+    :param host: hostname or IP of the DRAC interface
+    :param port: port of the DRAC interface
+    :param failure_threshold: number of consecutive failed requests opening
+                              the breaker
+    :param reset_timeout: number of seconds the breaker stays open before
+                          letting a probe request through
+    :returns: a CircuitBreaker object
+    """
+    key = (host, int(port))
+    with _breakers_lock:
+        breaker = _breakers.get(key)
+        if breaker is None:
+            breaker = CircuitBreaker(host, failure_threshold, reset_timeout)
+            _breakers[key] = breaker
+
+    return breaker
+
+
+def get_circuit_state(host, port=443):
+    """Returns the state of the circuit breaker of a DRAC
+
+    Schedulers can use it to skip the DRACs known to be unreachable without
+    creating clients for them.
+
+    :param host: hostname or IP of the DRAC interface
+    :param port: port of the DRAC interface
+    :returns: CLOSED, OPEN or HALF_OPEN. CLOSED when no client of the DRAC
+              uses a circuit breaker.
+    """
+    breaker = _breakers.get((host, int(port)))
+    if breaker is None:
+        return CLOSED
+
+    return breaker.state
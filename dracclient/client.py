@@ -15,32 +15,173 @@
 Wrapper for pywsman.Client
 """
 
+import copy
+import importlib
 import logging
+import threading
 import time
 
 from dracclient import constants
 from dracclient import exceptions
-from dracclient.resources import bios
-from dracclient.resources import idrac_card
-from dracclient.resources import inventory
-from dracclient.resources import job
-from dracclient.resources import lifecycle_controller
-from dracclient.resources import raid
-from dracclient.resources import system
+from dracclient import limits
 from dracclient.resources import uris
 from dracclient import utils
 from dracclient import wsman
 
 IDRAC_IS_READY = "LC061"
 
+# fragments of the messages of the operations rejected because the Lifecycle
+# Controller is busy or not ready, matched case-insensitively
+IDRAC_NOT_READY_MESSAGES = ('lifecycle controller is currently in use',
+                            'lifecycle controller is not ready',
+                            'lifecycle controller is busy',
+                            'remote services api is not ready')
+
 LOG = logging.getLogger(__name__)
 
 
+class _LazyManager(object):
+    """Resource manager of a DRACClient created on first access
+
+    The module of the resource manager is only imported at that time, so that
+    clients using a few resources don't pay for the others.
+    """
+
+    def __init__(self, attr_name, module_name, class_name):
+        self.attr_name = attr_name
+        self.module_name = module_name
+        self.class_name = class_name
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+
+        module = importlib.import_module(self.module_name)
+        manager = getattr(module, self.class_name)(instance.client)
+        # shadows the descriptor for the later accesses
+        instance.__dict__[self.attr_name] = manager
+        return manager
+
+
+class _Call(object):
+    """Call in flight, shared by the threads issuing it"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.followers = 0
+        self.result = None
+        self.error = None
+        self.interrupted = False
+
+
+class _SingleFlight(object):
+    """Coalesces identical calls issued at the same time
+
+    The first thread issuing a call runs it, and the threads issuing the same
+    call while it is in flight wait for its outcome instead of running it
+    again. Calls are only coalesced while in flight, nothing is cached.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func, copy_result=None):
+        """Runs a call, or waits for the identical call in flight
+
+        :param key: key identifying identical calls
+        :param func: callable running the call
+        :param copy_result: callable returning a copy of the result, so that
+                            every thread gets its own copy of a mutable
+                            result. If None, the result is shared.
+        :returns: the result of the call
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.followers += 1
+
+        if not leader:
+            call.done.wait()
+            if call.interrupted:
+                # the signals interrupting the leader, e.g. KeyboardInterrupt,
+                # are not spread to the followers, which issue the call again
+                return self.do(key, func, copy_result)
+            if call.error is not None:
+                # every follower raises its own copy, so that the tracebacks
+                # of the threads don't pile up on a shared exception
+                raise _copy_error(call.error)
+            if copy_result is None:
+                return call.result
+            return copy_result(call.result)
+
+        try:
+            result = func()
+        except Exception as ex:
+            call.error = ex
+            raise
+        except BaseException:
+            call.interrupted = True
+            raise
+        else:
+            # no follower joins the call once it is removed
+            self._remove(key, call)
+            if call.followers and copy_result is not None:
+                # the followers copy a pristine copy of the result, as the
+                # leader may modify the result in the meantime
+                call.result = copy_result(result)
+            else:
+                call.result = result
+            return result
+        finally:
+            self._remove(key, call)
+            call.done.set()
+
+    def _remove(self, key, call):
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+
+
+def _copy_error(error):
+    """Returns a copy of an exception, without its traceback"""
+    clone = type(error).__new__(type(error), *error.args)
+    clone.__dict__.update(getattr(error, '__dict__', {}))
+    return clone
+
+
 class DRACClient(object):
     """Client for managing DRAC nodes"""
 
     BIOS_DEVICE_FQDD = 'BIOS.Setup.1-1'
 
+    _job_mgmt = _LazyManager('_job_mgmt', 'dracclient.resources.job',
+                             'JobManagement')
+    _power_mgmt = _LazyManager('_power_mgmt', 'dracclient.resources.bios',
+                               'PowerManagement')
+    _boot_mgmt = _LazyManager('_boot_mgmt', 'dracclient.resources.bios',
+                              'BootManagement')
+    _bios_cfg = _LazyManager('_bios_cfg', 'dracclient.resources.bios',
+                             'BIOSConfiguration')
+    _lifecycle_mgmt = _LazyManager(
+        '_lifecycle_mgmt', 'dracclient.resources.lifecycle_controller',
+        'LifecycleControllerManagement')
+    _lifecycle_cfg = _LazyManager(
+        '_lifecycle_cfg', 'dracclient.resources.lifecycle_controller',
+        'LCConfiguration')
+    _idrac_cfg = _LazyManager('_idrac_cfg', 'dracclient.resources.idrac_card',
+                              'iDRACCardConfiguration')
+    _raid_mgmt = _LazyManager('_raid_mgmt', 'dracclient.resources.raid',
+                              'RAIDManagement')
+    _system_cfg = _LazyManager('_system_cfg', 'dracclient.resources.system',
+                               'SystemConfiguration')
+    _inventory_mgmt = _LazyManager('_inventory_mgmt',
+                                   'dracclient.resources.inventory',
+                                   'InventoryManagement')
+
     def __init__(
             self, host, username, password, port=443, path='/wsman',
             protocol='https',
@@ -48,7 +189,12 @@ class DRACClient(object):
             ssl_retry_delay=constants.DEFAULT_WSMAN_SSL_ERROR_RETRY_DELAY_SEC,
             ready_retries=constants.DEFAULT_IDRAC_IS_READY_RETRIES,
             ready_retry_delay=(
-                constants.DEFAULT_IDRAC_IS_READY_RETRY_DELAY_SEC)):
+                constants.DEFAULT_IDRAC_IS_READY_RETRY_DELAY_SEC),
+            max_concurrency=None,
+            adaptive_concurrency=False, breaker_threshold=None,
+            breaker_reset_timeout=constants.DEFAULT_BREAKER_RESET_TIMEOUT_SEC,
+            rate_limit=None, rate_burst=None, optimistic_ready=False,
+            idempotent=False):
         """Creates client object
 
         :param host: hostname or IP of the DRAC interface
@@ -64,19 +210,40 @@ class DRACClient(object):
                               ready
         :param ready_retry_delay: number of seconds to wait between
                                   checks if the iDRAC is ready
+        :param max_concurrency: maximum number of concurrent requests sent to
+                                the DRAC by all the clients of the process,
+                                or None for no limit
+        :param adaptive_concurrency: whether the concurrency limit should
+                                     adapt to the errors and latency of the
+                                     DRAC, starting from max_concurrency, or
+                                     from 4 if None
+        :param breaker_threshold: number of consecutive failed requests after
+                                  which the requests to the DRAC fail
+                                  immediately, or None to always send them
+        :param breaker_reset_timeout: number of seconds after which a request
+                                      is sent again to a DRAC whose requests
+                                      fail immediately
+        :param rate_limit: maximum number of requests per second sent to the
+                           DRAC by all the clients of the process, or None for
+                           no limit
+        :param rate_burst: number of requests that can be sent to the DRAC at
+                           once, by default the requests of one second
+        :param optimistic_ready: whether to send the requests without checking
+                                 first if the iDRAC is ready, and to only wait
+                                 for it and retry when a request is rejected
+                                 because it is not ready
+        :param idempotent: whether the power, boot order, BIOS and disk
+                           conversion operations should first read the state
+                           they change, and return without changing anything
+                           when it already is the requested one
         """
         self.client = WSManClient(host, username, password, port, path,
                                   protocol, ssl_retries, ssl_retry_delay,
-                                  ready_retries, ready_retry_delay)
-        self._job_mgmt = job.JobManagement(self.client)
-        self._power_mgmt = bios.PowerManagement(self.client)
-        self._boot_mgmt = bios.BootManagement(self.client)
-        self._bios_cfg = bios.BIOSConfiguration(self.client)
-        self._lifecycle_cfg = lifecycle_controller.LCConfiguration(self.client)
-        self._idrac_cfg = idrac_card.iDRACCardConfiguration(self.client)
-        self._raid_mgmt = raid.RAIDManagement(self.client)
-        self._system_cfg = system.SystemConfiguration(self.client)
-        self._inventory_mgmt = inventory.InventoryManagement(self.client)
+                                  ready_retries, ready_retry_delay,
+                                  max_concurrency, adaptive_concurrency,
+                                  breaker_threshold, breaker_reset_timeout,
+                                  rate_limit, rate_burst, optimistic_ready,
+                                  idempotent)
 
     def get_power_state(self):
         """Returns the current power state of the node
@@ -90,19 +257,66 @@ class DRACClient(object):
         """
         return self._power_mgmt.get_power_state()
 
-    def set_power_state(self, target_state):
+    def set_power_state(self, target_state, wait=False, timeout=None):
         """Turns the server power on/off or do a reboot
 
+        Its requests have high priority unless another priority class was set
+        with dracclient.limits.priority. The polls waiting for the power state
+        don't.
+
         :param target_state: target power state. Valid options are: 'POWER_ON',
                              'POWER_OFF' and 'REBOOT'.
+        :param wait: indicates whether to wait until the node reaches the
+                     target power state, as wait_for_power_state does. It
+                     can't be set for 'REBOOT'.
+        :param timeout: maximum number of seconds to wait for the power state.
+                        If None, DEFAULT_POWER_WAIT_TIMEOUT_SEC is used.
+        :returns: in idempotent mode, a dictionary containing the changed key
+                  with a boolean value indicating whether a power state change
+                  was requested. None otherwise.
         :raises: WSManRequestFailure on request failures
         :raises: WSManInvalidResponse when receiving invalid response
         :raises: DRACOperationFailed on error reported back by the DRAC
-                 interface
+                 interface, or on timeout waiting for the power state
         :raises: DRACUnexpectedReturnValue on return value mismatch
+        :raises: InvalidParameterValue on invalid target power state, or on
+                 'REBOOT' when waiting
+        """
+        # checked before the power state is changed
+        self._power_mgmt.check_power_state(target_state, wait)
+
+        with limits.priority(limits.get_priority(limits.PRIORITY_HIGH)):
+            result = self._power_mgmt.set_power_state(target_state)
+
+        if wait and (result is None or result['changed']):
+            self._power_mgmt.wait_for_power_state(target_state, timeout)
+
+        return result
+
+    def wait_for_power_state(self, target_state, timeout=None, interval=None):
+        """Waits until the node reaches a power state
+
+        Each poll is a single read of the power state, which doesn't wait for
+        the iDRAC to be ready. The interval between the polls doubles after
+        each poll, up to DEFAULT_POWER_POLL_MAX_INTERVAL_SEC seconds.
+
+        :param target_state: target power state. Valid options are: 'POWER_ON'
+                             and 'POWER_OFF'. A node may remain powered on
+                             while it reboots, so 'REBOOT' can't be waited
+                             for.
+        :param timeout: maximum number of seconds to wait for the power state.
+                        If None, DEFAULT_POWER_WAIT_TIMEOUT_SEC is used.
+        :param interval: number of seconds before the second poll. If None,
+                         DEFAULT_POWER_POLL_INTERVAL_SEC is used.
+        :returns: the power state reached
+        :raises: WSManRequestFailure on request failures
+        :raises: WSManInvalidResponse when receiving invalid response
+        :raises: DRACOperationFailed on error reported back by the DRAC
+                 interface or timeout
         :raises: InvalidParameterValue on invalid target power state
         """
-        self._power_mgmt.set_power_state(target_state)
+        return self._power_mgmt.wait_for_power_state(target_state, timeout,
+                                                     interval)
 
     def list_boot_modes(self):
         """Returns the list of boot modes
@@ -131,18 +345,25 @@ class DRACClient(object):
     def change_boot_device_order(self, boot_mode, boot_device_list):
         """Changes the boot device sequence for a boot mode
 
+        Its requests have high priority unless another priority class was set
+        with dracclient.limits.priority.
+
         :param boot_mode: boot mode for which the boot device list is to be
                           changed
         :param boot_device_list: a list of boot device ids in an order
                                  representing the desired boot sequence
+        :returns: in idempotent mode, a dictionary containing the changed key
+                  with a boolean value indicating whether the boot sequence
+                  was changed. None otherwise.
         :raises: WSManRequestFailure on request failures
         :raises: WSManInvalidResponse when receiving invalid response
         :raises: DRACOperationFailed on error reported back by the DRAC
                  interface
         :raises: DRACUnexpectedReturnValue on return value mismatch
         """
-        return self._boot_mgmt.change_boot_device_order(boot_mode,
-                                                        boot_device_list)
+        with limits.priority(limits.get_priority(limits.PRIORITY_HIGH)):
+            return self._boot_mgmt.change_boot_device_order(boot_mode,
+                                                            boot_device_list)
 
     def list_bios_settings(self, by_name=True):
         """List the BIOS configuration settings
@@ -165,23 +386,62 @@ class DRACClient(object):
 
         To be more precise, it sets the pending_value parameter for each of the
         attributes passed in. For the values to be applied, a config job must
-        be created and the node must be rebooted.
+        be created and the node must be rebooted. Within a batch, the settings
+        are only set when the batch is closed.
 
         :param settings: a dictionary containing the proposed values, with
                          each key being the name of attribute and the value
                          being the proposed value.
         :returns: a dictionary containing the commit_needed key with a boolean
                   value indicating whether a config job must be created for the
-                  values to be applied.
+                  values to be applied. In idempotent mode, it also contains
+                  the changed key with a boolean value indicating whether any
+                  attribute was set. Within a batch, the dictionary is shared
+                  by the calls and only updated when the batch is closed.
         :raises: WSManRequestFailure on request failures
         :raises: WSManInvalidResponse when receiving invalid response
         :raises: DRACOperationFailed on error reported back by the DRAC
                  interface
         :raises: DRACUnexpectedReturnValue on return value mismatch
-        :raises: InvalidParameterValue on invalid BIOS attribute
+        :raises: InvalidParameterValue on invalid BIOS attribute, or on a
+                 value conflicting with the one set earlier in the batch
         """
+        from dracclient import batch as operation_batch
+
+        active_batch = operation_batch.get_batch(self.client)
+        if active_batch is not None:
+            return active_batch.set_bios_settings(settings)
+
         return self._bios_cfg.set_bios_settings(settings)
 
+    def reconcile_bios(self, desired, reboot=False):
+        """Brings the BIOS configuration to the desired state
+
+        Only the attributes whose pending value, or current value if nothing
+        is pending, differs from the desired one are set, using a single
+        SetAttributes call. At most one config job is created to apply them.
+        A host that is already compliant is not written to at all.
+
+        :param desired: a dictionary containing the desired values, with each
+                        key being the name of attribute and the value being
+                        the desired value.
+        :param reboot: indicates whether a RebootJob should also be created or
+                       not, when a config job is created
+        :returns: a dictionary containing the changed key with a boolean value
+                  indicating whether anything was written, the job_id key with
+                  the id of the config job applying the changes or None, and
+                  the attributes key with a dictionary mapping the name of
+                  each attribute to its outcome: 'unchanged', 'pending' if the
+                  desired value is already waiting to be applied, or 'set'.
+        :raises: WSManRequestFailure on request failures
+        :raises: WSManInvalidResponse when receiving invalid response
+        :raises: DRACOperationFailed on error reported back by the DRAC
+                 interface
+        :raises: DRACUnexpectedReturnValue on return value mismatch
+        :raises: InvalidParameterValue on invalid BIOS attribute
+        """
+        return self._bios_cfg.reconcile_bios_settings(desired, reboot)
+
     def list_idrac_settings(self):
         """List the iDRAC configuration settings
 
@@ -196,6 +456,29 @@ class DRACClient(object):
         """
         return self._idrac_cfg.list_idrac_settings()
 
+    def set_idrac_settings(self, settings):
+        """Sets the iDRAC configuration
+
+        To be more precise, it sets the pending_value parameter for each of the
+        attributes passed in. The unchanged attributes are skipped and the
+        others are set with a single SetAttributes call per iDRAC card.
+
+        :param settings: a dictionary containing the proposed values, with
+                         each key being the InstanceID of the attribute, as
+                         returned by list_idrac_settings, and the value
+                         being the proposed value.
+        :returns: a dictionary containing the commit_required key with a
+                  boolean value indicating whether a config job must be
+                  created for the values to be applied.
+        :raises: WSManRequestFailure on request failures
+        :raises: WSManInvalidResponse when receiving invalid response
+        :raises: DRACOperationFailed on error reported back by the DRAC
+                 interface or on invalid values
+        :raises: DRACUnexpectedReturnValue on return value mismatch
+        :raises: InvalidParameterValue on unknown attribute or invalid values
+        """
+        return self._idrac_cfg.set_idrac_settings(settings)
+
     def list_lifecycle_settings(self):
         """List the Lifecycle Controller configuration settings
 
@@ -209,6 +492,29 @@ class DRACClient(object):
         """
         return self._lifecycle_cfg.list_lifecycle_settings()
 
+    def set_lifecycle_settings(self, settings):
+        """Sets the Lifecycle Controller configuration
+
+        To be more precise, it sets the pending_value parameter for each of the
+        attributes passed in. The unchanged attributes are skipped and the
+        others are set with a single SetAttributes call.
+
+        :param settings: a dictionary containing the proposed values, with
+                         each key being the InstanceID of the attribute, as
+                         returned by list_lifecycle_settings, and the value
+                         being the proposed value.
+        :returns: a dictionary containing the commit_required key with a
+                  boolean value indicating whether a config job must be
+                  created for the values to be applied.
+        :raises: WSManRequestFailure on request failures
+        :raises: WSManInvalidResponse when receiving invalid response
+        :raises: DRACOperationFailed on error reported back by the DRAC
+                 interface or on invalid values
+        :raises: DRACUnexpectedReturnValue on return value mismatch
+        :raises: InvalidParameterValue on unknown attribute or invalid values
+        """
+        return self._lifecycle_cfg.set_lifecycle_settings(settings)
+
     def list_system_settings(self):
         """List the System configuration settings
 
@@ -222,6 +528,29 @@ class DRACClient(object):
         """
         return self._system_cfg.list_system_settings()
 
+    def set_system_settings(self, settings):
+        """Sets the System configuration
+
+        To be more precise, it sets the pending_value parameter for each of the
+        attributes passed in. The unchanged attributes are skipped and the
+        others are set with a single SetAttributes call per system.
+
+        :param settings: a dictionary containing the proposed values, with
+                         each key being the InstanceID of the attribute, as
+                         returned by list_system_settings, and the value
+                         being the proposed value.
+        :returns: a dictionary containing the commit_required key with a
+                  boolean value indicating whether a config job must be
+                  created for the values to be applied.
+        :raises: WSManRequestFailure on request failures
+        :raises: WSManInvalidResponse when receiving invalid response
+        :raises: DRACOperationFailed on error reported back by the DRAC
+                 interface or on invalid values
+        :raises: DRACUnexpectedReturnValue on return value mismatch
+        :raises: InvalidParameterValue on unknown attribute or invalid values
+        """
+        return self._system_cfg.set_system_settings(settings)
+
     def list_jobs(self, only_unfinished=False):
         """Returns a list of jobs from the job queue
 
@@ -235,6 +564,20 @@ class DRACClient(object):
         """
         return self._job_mgmt.list_jobs(only_unfinished)
 
+    def count_jobs(self, only_unfinished=False):
+        """Returns the number of jobs in the job queue
+
+        The jobs are not listed when the DRAC provides an estimate of their
+        number.
+
+        :param only_unfinished: indicates whether only unfinished jobs should
+                                be counted
+        :returns: the number of jobs
+        :raises: WSManRequestFailure on request failures
+        :raises: WSManInvalidResponse when receiving invalid response
+        """
+        return self._job_mgmt.count_jobs(only_unfinished)
+
     def get_job(self, job_id):
         """Returns a job from the job queue
 
@@ -247,6 +590,57 @@ class DRACClient(object):
         """
         return self._job_mgmt.get_job(job_id)
 
+    def wait_for_jobs(self, job_ids, timeout=None, interval=None):
+        """Waits until all the jobs are finished
+
+        :param job_ids: ids of the jobs
+        :param timeout: maximum number of seconds to wait for the jobs. If
+                        None, DEFAULT_JOB_WAIT_TIMEOUT_SEC is used.
+        :param interval: number of seconds between polls. If None,
+                         DEFAULT_JOB_POLL_INTERVAL_SEC is used.
+        :returns: a list of Job objects in the order of job_ids
+        :raises: WSManRequestFailure on request failures
+        :raises: WSManInvalidResponse when receiving invalid response
+        :raises: DRACOperationFailed on error reported back by the DRAC
+                 interface or timeout
+        """
+        return self._job_mgmt.wait_for_jobs(job_ids, timeout, interval)
+
+    def plan(self):
+        """Returns a plan of changes to apply with a single reboot
+
+        BIOS settings, boot order and RAID changes recorded in the plan are
+        set and committed by its apply method. The config jobs are created
+        with a reboot attached to the last one only, so that all of them are
+        run during the same reboot.
+
+        :returns: an ApplyPlan object
+        """
+        from dracclient import plan as apply_plan
+
+        return apply_plan.ApplyPlan(self.client)
+
+    def batch(self):
+        """Returns a batch of operations, to be used in a with statement
+
+        Within the with statement, the set_bios_settings calls of the current
+        thread are buffered. They are merged and set by a single
+        SetAttributes call when the with statement is left, and the result is
+        then available in the result attribute of the batch. Conflicting
+        values of an attribute are rejected when set, and nothing is sent if
+        the with statement is left because of an exception. Within an open
+        batch, the batch itself is returned.
+
+        :returns: an OperationBatch object
+        """
+        from dracclient import batch as operation_batch
+
+        active_batch = operation_batch.get_batch(self.client)
+        if active_batch is None:
+            active_batch = operation_batch.OperationBatch(self.client)
+
+        return active_batch
+
     def create_config_job(self, resource_uri, cim_creation_class_name,
                           cim_name, target,
                           cim_system_creation_class_name='DCIM_ComputerSystem',
@@ -356,8 +750,23 @@ class DRACClient(object):
         :raises: DRACOperationFailed on error reported back by the DRAC
                  interface
         """
-        return lifecycle_controller.LifecycleControllerManagement(
-            self.client).get_version()
+        return self._lifecycle_mgmt.get_version()
+
+    def get_capabilities(self, refresh=False):
+        """Returns the capabilities of the node
+
+        The capabilities are read once and cached for the lifetime of the
+        client.
+
+        :param refresh: indicates whether the capabilities should be read
+                        again from the node, even if already cached
+        :returns: a Capabilities object
+        :raises: WSManRequestFailure on request failures
+        :raises: WSManInvalidResponse when receiving invalid response
+        :raises: DRACOperationFailed on error reported back by the DRAC
+                 interface
+        """
+        return self._lifecycle_mgmt.get_capabilities(refresh)
 
     def list_raid_controllers(self):
         """Returns the list of RAID controllers
@@ -370,6 +779,18 @@ class DRACClient(object):
         """
         return self._raid_mgmt.list_raid_controllers()
 
+    def count_raid_controllers(self):
+        """Returns the number of RAID controllers
+
+        They are not listed when the DRAC provides an estimate of their
+        number.
+
+        :returns: the number of RAID controllers
+        :raises: WSManRequestFailure on request failures
+        :raises: WSManInvalidResponse when receiving invalid response
+        """
+        return self._raid_mgmt.count_raid_controllers()
+
     def list_virtual_disks(self):
         """Returns the list of RAID arrays
 
@@ -381,6 +802,18 @@ class DRACClient(object):
         """
         return self._raid_mgmt.list_virtual_disks()
 
+    def count_virtual_disks(self):
+        """Returns the number of virtual disks
+
+        They are not listed when the DRAC provides an estimate of their
+        number.
+
+        :returns: the number of virtual disks
+        :raises: WSManRequestFailure on request failures
+        :raises: WSManInvalidResponse when receiving invalid response
+        """
+        return self._raid_mgmt.count_virtual_disks()
+
     def list_physical_disks(self):
         """Returns the list of physical disks
 
@@ -392,6 +825,131 @@ class DRACClient(object):
         """
         return self._raid_mgmt.list_physical_disks()
 
+    def count_physical_disks(self):
+        """Returns the number of physical disks
+
+        They are not listed when the DRAC provides an estimate of their
+        number.
+
+        :returns: the number of physical disks
+        :raises: WSManRequestFailure on request failures
+        :raises: WSManInvalidResponse when receiving invalid response
+        """
+        return self._raid_mgmt.count_physical_disks()
+
+    def get_raid_topology(self):
+        """Returns the RAID controllers, physical and virtual disks together
+
+        The three views are listed concurrently into an immutable snapshot
+        indexing them by RAID controller, disk id and RAID status.
+
+        :returns: a RAIDTopology object
+        :raises: WSManRequestFailure on request failures
+        :raises: WSManInvalidResponse when receiving invalid response
+        :raises: DRACOperationFailed on error reported back by the DRAC
+                 interface
+        """
+        return self._raid_mgmt.get_raid_topology()
+
+    def solve_raid_layout(self, raid_level, size_mb=None, raid_controller=None,
+                          media_type=None, interface_type=None,
+                          disk_name=None, include_non_raid=False,
+                          topology=None):
+        """Computes the virtual disks to create for a logical layout
+
+        Physical disks are only combined when they are on the same RAID
+        controller and of the same media and interface types.
+
+        :param raid_level: RAID level of the virtual disks
+        :param size_mb: size of the single virtual disk to create in
+                        megabytes. If None, the matching disks of each RAID
+                        controller are used up.
+        :param raid_controller: id of the RAID controller to use, or None for
+                                any
+        :param media_type: media type of the physical disks to use, 'hdd' or
+                           'ssd', or None for any
+        :param interface_type: interface type of the physical disks to use,
+                               e.g. 'sas', or None for any
+        :param disk_name: name of the virtual disks (optional)
+        :param include_non_raid: indicates whether the physical disks in
+                                 non-RAID mode can be used, once converted
+        :param topology: a RAIDTopology object. If None, the topology is
+                         listed.
+        :returns: a RAIDLayout object
+        :raises: WSManRequestFailure on request failures
+        :raises: WSManInvalidResponse when receiving invalid response
+        :raises: DRACOperationFailed on error reported back by the DRAC
+                 interface
+        :raises: InvalidParameterValue if no layout fits the request
+        """
+        return self._raid_mgmt.solve_raid_layout(
+            raid_level, size_mb=size_mb, raid_controller=raid_controller,
+            media_type=media_type, interface_type=interface_type,
+            disk_name=disk_name, include_non_raid=include_non_raid,
+            topology=topology)
+
+    def apply_raid_layout(self, layout, reboot=True, timeout=None,
+                          interval=None):
+        """Applies a RAID layout with one config job per RAID controller
+
+        The virtual disks can only be created on disks in RAID mode. The
+        disks to convert are converted first, by config jobs run during a
+        first reboot and waited for, then the virtual disks are created.
+
+        :param layout: a RAIDLayout object, as returned by solve_raid_layout
+        :param reboot: indicates whether a RebootJob should be created along
+                       with the last config job or not. Converting disks
+                       requires a reboot.
+        :param timeout: maximum number of seconds to wait for the conversion
+                        jobs. If None, DEFAULT_JOB_WAIT_TIMEOUT_SEC is used.
+        :param interval: number of seconds between polls of the conversion
+                         jobs. If None, DEFAULT_JOB_POLL_INTERVAL_SEC is used.
+        :returns: a list of the ids of the created jobs, in the order they
+                  were created
+        :raises: WSManRequestFailure on request failures
+        :raises: WSManInvalidResponse when receiving invalid response
+        :raises: DRACOperationFailed on error reported back by the DRAC
+                 interface, on failed conversion jobs or timeout
+        :raises: DRACUnexpectedReturnValue on return value mismatch
+        :raises: InvalidParameterValue on invalid input parameter, or if
+                 disks must be converted without reboot
+        """
+        from dracclient.resources import job
+
+        job_ids = []
+        if layout.conversions:
+            if not reboot:
+                msg = ('Converting the physical disks of a RAID layout '
+                       'requires a reboot')
+                raise exceptions.InvalidParameterValue(reason=msg)
+
+            conversion_plan = layout.add_conversions_to_plan(self.plan())
+            conversion_job_ids = conversion_plan.apply(reboot=True)
+            if conversion_job_ids:
+                job_ids.extend(conversion_job_ids)
+                job.check_jobs(conversion_plan.wait(timeout, interval))
+
+        if layout.virtual_disks:
+            job_ids.extend(layout.add_virtual_disks_to_plan(
+                self.plan()).apply(reboot=reboot))
+
+        return job_ids
+
+    def get_raid_validator(self):
+        """Returns a validator of RAID operations for the current state
+
+        The RAID controllers, physical disks and virtual disks are listed
+        once. The validator then checks RAID operations, or a whole plan of
+        them, without sending any request.
+
+        :returns: a RAIDValidator object
+        :raises: WSManRequestFailure on request failures
+        :raises: WSManInvalidResponse when receiving invalid response
+        :raises: DRACOperationFailed on error reported back by the DRAC
+                 interface
+        """
+        return self._raid_mgmt.get_raid_validator()
+
     def convert_physical_disks(self, raid_controller, physical_disks,
                                raid_enable=True):
         """Changes the operational mode of a physical disk.
@@ -406,7 +964,9 @@ class DRACClient(object):
                listed disks
         :returns: a dictionary containing the commit_required key with a
                   boolean value indicating whether a config job must be
-                  created for the values to be applied.
+                  created for the values to be applied. In idempotent mode,
+                  it also contains the changed key with a boolean value
+                  indicating whether any disk was converted.
         """
         return self._raid_mgmt.convert_physical_disks(
             physical_disks, raid_enable)
@@ -565,6 +1125,23 @@ class DRACClient(object):
 
         return self.client.wait_until_idrac_is_ready(retries, retry_delay)
 
+    def close(self):
+        """Closes the connections to the DRAC
+
+        The client remains usable, new connections are opened as needed.
+        """
+        self.client.close()
+
+    def get_circuit_state(self):
+        """Returns the state of the circuit breaker of the DRAC
+
+        :returns: 'closed' while the requests are sent to the DRAC, 'open'
+                  while they fail immediately, 'half_open' while a probe
+                  request can be sent, or None if the circuit breaker is
+                  disabled
+        """
+        return self.client.circuit_state
+
 
 class WSManClient(wsman.Client):
     """Wrapper for wsman.Client that can wait until iDRAC is ready
@@ -579,7 +1156,12 @@ class WSManClient(wsman.Client):
             ssl_retry_delay=constants.DEFAULT_WSMAN_SSL_ERROR_RETRY_DELAY_SEC,
             ready_retries=constants.DEFAULT_IDRAC_IS_READY_RETRIES,
             ready_retry_delay=(
-                constants.DEFAULT_IDRAC_IS_READY_RETRY_DELAY_SEC)):
+                constants.DEFAULT_IDRAC_IS_READY_RETRY_DELAY_SEC),
+            max_concurrency=None,
+            adaptive_concurrency=False, breaker_threshold=None,
+            breaker_reset_timeout=constants.DEFAULT_BREAKER_RESET_TIMEOUT_SEC,
+            rate_limit=None, rate_burst=None, optimistic_ready=False,
+            idempotent=False):
         """Creates client object
 
         :param host: hostname or IP of the DRAC interface
@@ -595,19 +1177,60 @@ class WSManClient(wsman.Client):
                               ready
         :param ready_retry_delay: number of seconds to wait between
                                   checks if the iDRAC is ready
+        :param max_concurrency: maximum number of concurrent requests sent to
+                                the DRAC by all the clients of the process,
+                                or None for no limit
+        :param adaptive_concurrency: whether the concurrency limit should
+                                     adapt to the errors and latency of the
+                                     DRAC, starting from max_concurrency, or
+                                     from 4 if None
+        :param breaker_threshold: number of consecutive failed requests after
+                                  which the requests to the DRAC fail
+                                  immediately, or None to always send them
+        :param breaker_reset_timeout: number of seconds after which a request
+                                      is sent again to a DRAC whose requests
+                                      fail immediately
+        :param rate_limit: maximum number of requests per second sent to the
+                           DRAC by all the clients of the process, or None for
+                           no limit
+        :param rate_burst: number of requests that can be sent to the DRAC at
+                           once, by default the requests of one second
+        :param optimistic_ready: whether to send the requests without checking
+                                 first if the iDRAC is ready, and to only wait
+                                 for it and retry when a request is rejected
+                                 because it is not ready
+        :param idempotent: whether the power, boot order, BIOS and disk
+                           conversion operations should first read the state
+                           they change, and return without changing anything
+                           when it already is the requested one
         """
         super(WSManClient, self).__init__(host, username, password,
                                           port, path, protocol, ssl_retries,
-                                          ssl_retry_delay)
+                                          ssl_retry_delay, max_concurrency,
+                                          adaptive_concurrency,
+                                          breaker_threshold,
+                                          breaker_reset_timeout, rate_limit,
+                                          rate_burst)
 
         self._ready_retries = ready_retries
         self._ready_retry_delay = ready_retry_delay
+        self._optimistic_ready = optimistic_ready
+        self.idempotent = idempotent
+        # capabilities of the node, cached by LifecycleControllerManagement
+        self.capabilities = None
+        # identical reads in flight are only sent once
+        self._reads = _SingleFlight()
 
     def enumerate(self, resource_uri, optimization=True, max_elems=100,
                   auto_pull=True, filter_query=None, filter_dialect='cql',
-                  wait_for_idrac=True):
+                  count_estimate=False, wait_for_idrac=True):
         """Executes enumerate operation over WS-Man
 
+        Identical enumerations issued while one is in flight wait for its
+        response instead of being sent again, and get their own copy of it.
+        In optimistic ready mode, the readiness of the iDRAC is only checked
+        when it rejects the enumeration.
+
         :param resource_uri: URI of resource to enumerate
         :param optimization: flag to enable enumeration optimization. If
                              disabled, the enumeration returns only an
@@ -618,6 +1241,10 @@ class WSManClient(wsman.Client):
         :param filter_query: filter query string
         :param filter_dialect: filter dialect. Valid options are: 'cql' and
                                'wql'.
+        :param count_estimate: flag to request an estimate of the total number
+                               of items, returned in the
+                               TotalItemsCountEstimate header of the response
+                               if supported
         :param wait_for_idrac: indicates whether or not to wait for the
             iDRAC to be ready to accept commands before issuing the
             command
@@ -625,17 +1252,72 @@ class WSManClient(wsman.Client):
         :raises: WSManRequestFailure on request failures
         :raises: WSManInvalidResponse when receiving invalid response
         """
-        if wait_for_idrac:
-            self.wait_until_idrac_is_ready()
-
-        return super(WSManClient, self).enumerate(resource_uri, optimization,
-                                                  max_elems, auto_pull,
-                                                  filter_query, filter_dialect)
+        key = ('enumerate', resource_uri, optimization, max_elems, auto_pull,
+               filter_query, filter_dialect, count_estimate)
+        return self._when_ready(
+            lambda: self._reads.do(
+                key,
+                lambda: super(WSManClient, self).enumerate(
+                    resource_uri, optimization, max_elems, auto_pull,
+                    filter_query, filter_dialect, count_estimate),
+                copy.deepcopy),
+            wait_for_idrac)
+
+    def count(self, resource_uri, key_property, condition=None,
+              wait_for_idrac=True):
+        """Returns the number of instances of a resource
+
+        The DRAC is asked for an estimate of the number of instances, which
+        does not pull them. When its firmware does not provide one, the
+        instances are enumerated with only their key property and counted.
+
+        :param resource_uri: URI of resource to count
+        :param key_property: name of a property of the instances, the only
+                             one enumerated when no estimate is provided
+        :param condition: CQL condition the instances must match. If None,
+                          all the instances are counted.
+        :param wait_for_idrac: indicates whether or not to wait for the
+            iDRAC to be ready to accept commands before issuing the
+            command
+        :returns: the number of instances
+        :raises: WSManRequestFailure on request failures
+        :raises: WSManInvalidResponse when receiving invalid response
+        """
+        class_name = resource_uri.rsplit('/', 1)[-1]
+        filter_query = None
+        where_clause = ''
+        if condition is not None:
+            where_clause = ' where %s' % condition
+            filter_query = 'select * from %s%s' % (class_name, where_clause)
+
+        estimate = self._when_ready(
+            lambda: self.estimate_count(resource_uri, filter_query),
+            wait_for_idrac)
+        if estimate is not None:
+            return estimate
+
+        LOG.debug('No estimate of the number of %(class_name)s instances '
+                  'from %(host)s, enumerating them',
+                  {'class_name': class_name, 'host': self.host})
+        doc = self.enumerate(
+            resource_uri,
+            filter_query='select %s from %s%s' % (key_property, class_name,
+                                                  where_clause),
+            wait_for_idrac=False)
+
+        items = doc.find('.//{%s}Items' % wsman.NS_WSMAN)
+        if items is None:
+            return 0
+
+        return len(items)
 
     def invoke(self, resource_uri, method, selectors=None, properties=None,
                expected_return_value=None, wait_for_idrac=True):
         """Invokes a remote WS-Man method
 
+        In optimistic ready mode, the readiness of the iDRAC is only checked
+        when it rejects the invocation, which is then sent again.
+
         :param resource_uri: URI of the resource
         :param method: name of the method to invoke
         :param selectors: dictionary of selectors
@@ -654,15 +1336,19 @@ class WSManClient(wsman.Client):
                  interface
         :raises: DRACUnexpectedReturnValue on return value mismatch
         """
-        if wait_for_idrac:
-            self.wait_until_idrac_is_ready()
-
         if selectors is None:
             selectors = {}
 
         if properties is None:
             properties = {}
 
+        return self._when_ready(
+            lambda: self._invoke(resource_uri, method, selectors, properties,
+                                 expected_return_value),
+            wait_for_idrac)
+
+    def _invoke(self, resource_uri, method, selectors, properties,
+                expected_return_value):
         resp = super(WSManClient, self).invoke(resource_uri, method, selectors,
                                                properties)
 
@@ -680,11 +1366,33 @@ class WSManClient(wsman.Client):
 
         return resp
 
+    def _when_ready(self, request, wait_for_idrac):
+        if not wait_for_idrac:
+            return request()
+
+        if not self._optimistic_ready:
+            self.wait_until_idrac_is_ready()
+            return request()
+
+        try:
+            return request()
+        except (exceptions.DRACOperationFailed,
+                exceptions.WSManInvalidResponse) as ex:
+            if not _is_not_ready_error(ex):
+                raise
+
+            LOG.debug('The iDRAC rejected a request because it is not '
+                      'ready: %(error)s', {'error': ex})
+
+        self.wait_until_idrac_is_ready()
+        return request()
+
     def is_idrac_ready(self):
         """Indicates if the iDRAC is ready to accept commands
 
            Returns a boolean indicating if the iDRAC is ready to accept
-           commands.
+           commands. Checks issued while one is in flight wait for its
+           outcome instead of being sent again.
 
         :returns: Boolean indicating iDRAC readiness
         :raises: WSManRequestFailure on request failures
@@ -694,6 +1402,9 @@ class WSManClient(wsman.Client):
         :raises: DRACUnexpectedReturnValue on return value mismatch
         """
 
+        return self._reads.do(('is_idrac_ready',), self._is_idrac_ready)
+
+    def _is_idrac_ready(self):
         selectors = {'SystemCreationClassName': 'DCIM_ComputerSystem',
                      'SystemName': 'DCIM:ComputerSystem',
                      'CreationClassName': 'DCIM_LCService',
@@ -753,3 +1464,17 @@ class WSManClient(wsman.Client):
             err_msg = "Timed out waiting for the iDRAC to become ready"
             LOG.error(err_msg)
             raise exceptions.DRACOperationFailed(drac_messages=err_msg)
+
+
+def _is_not_ready_error(error):
+    """Indicates if an error signals that the iDRAC is not ready
+
+    :param error: a DRACOperationFailed or WSManInvalidResponse object
+    :returns: Boolean indicating whether the request failed because the iDRAC
+              is not ready, and can be sent again once it is
+    """
+    if isinstance(error, exceptions.WSManInvalidResponse):
+        return error.kwargs.get('status_code') == 503
+
+    message = str(error).lower()
+    return any(fragment in message for fragment in IDRAC_NOT_READY_MESSAGES)
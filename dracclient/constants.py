@@ -20,11 +20,44 @@ DEFAULT_IDRAC_IS_READY_RETRY_DELAY_SEC = 10
 DEFAULT_WSMAN_SSL_ERROR_RETRIES = 3
 DEFAULT_WSMAN_SSL_ERROR_RETRY_DELAY_SEC = 0
 
+# initial number of concurrent Web Services Management requests per DRAC when
+# the limit adapts to the DRAC
+DEFAULT_WSMAN_MAX_CONCURRENCY = 4
+DEFAULT_WSMAN_ADAPTIVE_MAX_CONCURRENCY = 16
+# number of high priority requests served in a row while low priority requests
+# are waiting for the concurrency limit
+DEFAULT_WSMAN_MAX_OVERTAKES = 4
+
+# circuit breaker constants
+DEFAULT_BREAKER_RESET_TIMEOUT_SEC = 60
+
+# shared client registry constants
+DEFAULT_CLIENT_REGISTRY_MAX_SIZE = 1024
+DEFAULT_CLIENT_REGISTRY_IDLE_TIMEOUT_SEC = 900
+
+# job polling constants
+DEFAULT_JOB_WAIT_TIMEOUT_SEC = 3600
+DEFAULT_JOB_POLL_INTERVAL_SEC = 10
+
+# power state polling constants, the interval doubles after each poll up to
+# the maximum
+DEFAULT_POWER_WAIT_TIMEOUT_SEC = 600
+DEFAULT_POWER_POLL_INTERVAL_SEC = 2
+DEFAULT_POWER_POLL_MAX_INTERVAL_SEC = 30
+
+# fleet constants
+DEFAULT_FLEET_MAX_CONCURRENCY = 64
+
 # power states
 POWER_ON = 'POWER_ON'
 POWER_OFF = 'POWER_OFF'
 REBOOT = 'REBOOT'
 
+# outcomes of reconciling a setting with its desired value
+SETTING_UNCHANGED = 'unchanged'
+SETTING_PENDING = 'pending'
+SETTING_SET = 'set'
+
 PRIMARY_STATUS = {
     '0': 'unknown',
     '1': 'ok',
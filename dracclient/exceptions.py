@@ -17,6 +17,7 @@ class BaseClientException(Exception):
     msg_fmt = 'An unknown exception occurred'
 
     def __init__(self, message=None, **kwargs):
+        self.kwargs = kwargs
         message = self.msg_fmt % kwargs
         super(BaseClientException, self).__init__(message)
 
@@ -47,10 +48,19 @@ class InvalidParameterValue(BaseClientException):
     msg_fmt = '%(reason)s'
 
 
+class InvalidAttributeValues(DRACOperationFailed, InvalidParameterValue):
+    msg_fmt = DRACOperationFailed.msg_fmt
+
+
 class WSManRequestFailure(BaseClientException):
     msg_fmt = ('WSMan request failed')
 
 
+class DRACCircuitOpen(WSManRequestFailure):
+    msg_fmt = ('Circuit breaker of %(host)s is open after %(failures)s '
+               'consecutive failed requests')
+
+
 class WSManInvalidResponse(BaseClientException):
     msg_fmt = ('Invalid response received. Status code: "%(status_code)s", '
                'reason: "%(reason)s"')
@@ -0,0 +1,445 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Operations run on many nodes in parallel.
+"""
+
+import collections
+import functools
+import logging
+import random
+import threading
+import time
+
+from dracclient import constants
+from dracclient import exceptions
+from dracclient import instrumentation
+from dracclient.resources import bios
+from dracclient.resources import job
+from dracclient.resources import raid
+
+LOG = logging.getLogger(__name__)
+
+# stages of the RAID pipeline, run in this order on each node
+RAID_STAGE_CONVERT = 'convert'
+RAID_STAGE_CREATE = 'create'
+RAID_STAGE_WAIT = 'wait'
+
+# stages of the power operations, run in this order on each node
+POWER_STAGE_DELAY = 'delay'
+POWER_STAGE_REQUEST = 'request'
+POWER_STAGE_WAIT = 'wait'
+
+
+class HostResult(object):
+    """Outcome of a fleet operation on a node"""
+
+    def __init__(self, host):
+        """Creates HostResult object
+
+        :param host: hostname or IP of the DRAC interface of the node
+        """
+        self.host = host
+        self.result = None
+        self.error = None
+        # stage -> number of seconds, in the order the stages were run
+        self.timings = collections.OrderedDict()
+
+    def __repr__(self):
+        return ('HostResult(host=%(host)r, result=%(result)r, '
+                'error=%(error)r)' % {'host': self.host,
+                                      'result': self.result,
+                                      'error': self.error})
+
+    @property
+    def succeeded(self):
+        """Whether the operation succeeded on the node"""
+        return self.error is None
+
+    @property
+    def duration(self):
+        """Number of seconds spent in the stages run on the node"""
+        return sum(self.timings.values())
+
+    def run_stage(self, stage, func, *args, **kwargs):
+        """Runs a stage of the operation and records its duration
+
+        :param stage: name of the stage
+        :param func: callable running the stage
+        :param args: positional arguments of func
+        :param kwargs: keyword arguments of func
+        :returns: the result of func
+        """
+        start = time.time()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.record_stage(stage, time.time() - start)
+
+    def record_stage(self, stage, duration):
+        """Records the duration of a stage of the operation
+
+        :param stage: name of the stage
+        :param duration: number of seconds spent in the stage
+        """
+        self.timings[stage] = duration
+        LOG.debug('Stage %(stage)s of %(host)s took %(duration).3fs',
+                  {'stage': stage, 'host': self.host, 'duration': duration})
+        instrumentation.emit(instrumentation.FLEET_STAGE, host=self.host,
+                             stage=stage, duration=duration)
+
+
+class _WorkerPool(object):
+    """Threads running submitted tasks, started as needed up to a maximum
+
+    The urgent tasks are run before the others, each kind in the order it
+    was submitted. Tasks may submit other tasks.
+    """
+
+    def __init__(self, size=None):
+        """Creates _WorkerPool object
+
+        :param size: maximum number of threads, or None for no limit
+        """
+        self.size = size
+        self._lock = threading.Lock()
+        self._task_available = threading.Condition(self._lock)
+        self._all_done = threading.Condition(self._lock)
+        self._urgent_tasks = collections.deque()
+        self._tasks = collections.deque()
+        self._threads = []
+        self._idle = 0
+        self._unfinished = 0
+        self._closed = False
+
+    def submit(self, func, urgent=False):
+        """Submits a task
+
+        :param func: callable taking no argument. Its exceptions are logged
+                     and ignored.
+        :param urgent: indicates whether the task should be run before the
+                       tasks which are not urgent
+        """
+        with self._lock:
+            if urgent:
+                self._urgent_tasks.append(func)
+            else:
+                self._tasks.append(func)
+            self._unfinished += 1
+
+            queued = len(self._urgent_tasks) + len(self._tasks)
+            if (queued > self._idle and
+                    (self.size is None or len(self._threads) < self.size)):
+                thread = threading.Thread(target=self._work)
+                thread.daemon = True
+                self._threads.append(thread)
+                thread.start()
+            self._task_available.notify()
+
+    def join(self):
+        """Waits until the submitted tasks are run and stops the threads"""
+        with self._lock:
+            while self._unfinished:
+                self._all_done.wait()
+            self._closed = True
+            self._task_available.notify_all()
+
+        for thread in self._threads:
+            thread.join()
+
+    def _work(self):
+        while True:
+            with self._lock:
+                while not (self._urgent_tasks or self._tasks or
+                           self._closed):
+                    self._idle += 1
+                    self._task_available.wait()
+                    self._idle -= 1
+
+                if self._urgent_tasks:
+                    func = self._urgent_tasks.popleft()
+                elif self._tasks:
+                    func = self._tasks.popleft()
+                else:
+                    return
+
+            try:
+                func()
+            except Exception:
+                LOG.exception('Unexpected error in a fleet task')
+            finally:
+                with self._lock:
+                    self._unfinished -= 1
+                    if not self._unfinished:
+                        self._all_done.notify_all()
+
+
+def run_on_hosts(funcs, max_concurrency=None):
+    """Runs a callable per node concurrently
+
+    The failure of a node does not stop the others.
+
+    :param funcs: a list of (host, callable) tuples. Each callable takes the
+                  HostResult object of its node, and returns the result of
+                  the node.
+    :param max_concurrency: maximum number of nodes handled at the same time,
+                            which is also the number of threads started, or
+                            None for no limit
+    :returns: a list of HostResult objects, in the order of funcs
+    """
+    results = [HostResult(host) for (host, func) in funcs]
+    pool = _WorkerPool(max_concurrency)
+    for ((host, func), result) in zip(funcs, results):
+        pool.submit(functools.partial(_run_on_host, func, result))
+
+    pool.join()
+    return results
+
+
+def _run_on_host(func, result):
+    try:
+        result.result = func(result)
+    except Exception as ex:
+        LOG.error('Operation failed on %(host)s: %(error)s',
+                  {'host': result.host, 'error': ex})
+        result.error = ex
+
+
+def set_power_state(drac_clients, target_state, batch_size=None, stagger=0,
+                    wait=True, timeout=None, interval=None,
+                    max_concurrency=constants.DEFAULT_FLEET_MAX_CONCURRENCY):
+    """Changes the power state of many nodes
+
+    The nodes are dispatched in batches of batch_size nodes, in order, and
+    each batch is dispatched stagger seconds after the previous one, so that
+    the management network and the power distribution units are not hit by
+    all the nodes at once. The requests and the polls of the nodes are run
+    by a pool of at most max_concurrency threads, the requests first. Once
+    its power state change is requested, each node is polled until it
+    reaches the target power state, as wait_for_power_state of DRACClient
+    does, while the next batches are dispatched.
+
+    :param drac_clients: a list of DRACClient objects of the nodes
+    :param target_state: target power state. Valid options are: 'POWER_ON',
+                         'POWER_OFF' and 'REBOOT'.
+    :param batch_size: number of nodes per batch, or None for a single batch
+    :param stagger: number of seconds between the dispatch of two batches
+    :param wait: indicates whether to wait until the nodes reach the target
+                 power state. It can't be set for 'REBOOT'.
+    :param timeout: maximum number of seconds to wait for the power state of
+                    a node. If None, DEFAULT_POWER_WAIT_TIMEOUT_SEC is used.
+    :param interval: number of seconds before the second poll of a node. If
+                     None, DEFAULT_POWER_POLL_INTERVAL_SEC is used.
+    :param max_concurrency: maximum number of nodes requested or polled at
+                            the same time, which is also the number of
+                            threads started, or None for no limit
+    :returns: a list of HostResult objects, in the order of drac_clients. The
+              result of a node is the power state reached if waiting for it,
+              None otherwise. Its timings map the delay before the request
+              of a node of a later batch, the request and the wait to their
+              number of seconds.
+    :raises: InvalidParameterValue on invalid target power state or batch
+             size, or on 'REBOOT' when waiting
+    """
+    if wait:
+        bios.check_waitable_power_state(target_state)
+    else:
+        bios.get_drac_power_state(target_state)
+
+    if batch_size is None:
+        batch_size = max(len(drac_clients), 1)
+    elif batch_size < 1:
+        msg = 'Invalid batch size %r' % batch_size
+        raise exceptions.InvalidParameterValue(reason=msg)
+
+    results = [HostResult(drac_client.client.host)
+               for drac_client in drac_clients]
+    pool = _WorkerPool(max_concurrency)
+    start = time.time()
+
+    def request(drac_client, delayed, result):
+        if delayed:
+            result.record_stage(POWER_STAGE_DELAY, time.time() - start)
+
+        outcome = result.run_stage(POWER_STAGE_REQUEST,
+                                   drac_client.set_power_state, target_state)
+        if not wait:
+            return None
+
+        if outcome is not None and not outcome['changed']:
+            # idempotent client, the node already is in the power state
+            return target_state
+
+        pool.submit(functools.partial(_run_on_host,
+                                      functools.partial(poll, drac_client),
+                                      result))
+
+    def poll(drac_client, result):
+        return result.run_stage(POWER_STAGE_WAIT,
+                                drac_client.wait_for_power_state,
+                                target_state, timeout, interval)
+
+    for (batch, first) in enumerate(range(0, len(drac_clients), batch_size)):
+        delay = start + batch * stagger - time.time()
+        if delay > 0:
+            time.sleep(delay)
+
+        for index in range(first, min(first + batch_size, len(drac_clients))):
+            pool.submit(functools.partial(
+                _run_on_host,
+                functools.partial(request, drac_clients[index], batch > 0),
+                results[index]), urgent=True)
+
+    pool.join()
+    return results
+
+
+def wait_for_power_state(drac_clients, target_state, timeout=None,
+                         interval=None, max_concurrency=None):
+    """Waits until many nodes reach a power state
+
+    The nodes are polled concurrently, each of them as wait_for_power_state
+    of DRACClient does. The first poll of each node is delayed by a random
+    fraction of the interval, so that the polls of the nodes are spread over
+    time instead of being sent at once.
+
+    :param drac_clients: a list of DRACClient objects of the nodes
+    :param target_state: target power state. Valid options are: 'POWER_ON'
+                         and 'POWER_OFF'.
+    :param timeout: maximum number of seconds to wait for the power state of
+                    a node. If None, DEFAULT_POWER_WAIT_TIMEOUT_SEC is used.
+    :param interval: number of seconds before the second poll of a node. If
+                     None, DEFAULT_POWER_POLL_INTERVAL_SEC is used.
+    :param max_concurrency: maximum number of nodes polled at the same time,
+                            or None for no limit
+    :returns: a list of HostResult objects, in the order of drac_clients. The
+              result of a node is the power state reached.
+    :raises: InvalidParameterValue on invalid target power state, or on
+             'REBOOT'
+    """
+    bios.check_waitable_power_state(target_state)
+
+    if interval is None:
+        interval = constants.DEFAULT_POWER_POLL_INTERVAL_SEC
+
+    def wait(drac_client, result):
+        return result.run_stage(POWER_STAGE_WAIT, _wait_for_power_state,
+                                drac_client, target_state, timeout, interval)
+
+    return run_on_hosts([(drac_client.client.host,
+                          functools.partial(wait, drac_client))
+                         for drac_client in drac_clients], max_concurrency)
+
+
+def _wait_for_power_state(drac_client, target_state, timeout, interval):
+    time.sleep(random.uniform(0, interval))
+    return drac_client.wait_for_power_state(target_state, timeout, interval)
+
+
+class RAIDPipeline(object):
+    """RAID layouts applied to many nodes in parallel
+
+    The nodes are handled concurrently. Each node applies its layouts with
+    DRACClient.apply_raid_layout in timed stages. The physical disks are
+    first converted to RAID mode, committed with a reboot and waited for.
+    The virtual disks are then created, one config job is created per RAID
+    controller changed, with a reboot attached to the last one, and the jobs
+    are waited for. The RAID controllers of a node are set concurrently. A
+    rack is then provisioned in about the time of its slowest node.
+    """
+
+    def __init__(self, reboot=True, wait=True, timeout=None, interval=None,
+                 max_concurrency=None):
+        """Creates RAIDPipeline object
+
+        :param reboot: indicates whether a RebootJob should be created along
+                       with the last config job of each node or not.
+                       Converting disks requires a reboot, and fails the
+                       node otherwise.
+        :param wait: indicates whether to wait for the config jobs creating
+                     the virtual disks to finish. The conversion jobs are
+                     always waited for.
+        :param timeout: maximum number of seconds to wait for the jobs of a
+                        node. If None, DEFAULT_JOB_WAIT_TIMEOUT_SEC is used.
+        :param interval: number of seconds between polls of the jobs. If None,
+                         DEFAULT_JOB_POLL_INTERVAL_SEC is used.
+        :param max_concurrency: maximum number of nodes handled at the same
+                                time, or None for no limit
+        """
+        self.reboot = reboot
+        self.wait = wait
+        self.timeout = timeout
+        self.interval = interval
+        self.max_concurrency = max_concurrency
+        # DRACClient -> list of RAIDLayout objects, in the order added
+        self._layouts = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._layouts)
+
+    def add(self, drac_client, layout):
+        """Records a RAID layout to apply to a node
+
+        The layouts added for the same node are applied together, in order.
+
+        :param drac_client: a DRACClient object of the node
+        :param layout: a RAIDLayout object, e.g. as returned by
+                       solve_raid_layout
+        :returns: the pipeline
+        """
+        self._layouts.setdefault(drac_client, []).append(layout)
+        return self
+
+    def run(self):
+        """Applies the recorded layouts
+
+        :returns: a list of HostResult objects, in the order the nodes were
+                  added. The result of a node is the list of its Job objects
+                  once finished, or the list of the ids of its jobs if not
+                  waiting for them. Its timings map the stages run to their
+                  number of seconds.
+        """
+        funcs = [(drac_client.client.host,
+                  functools.partial(self._run_host, drac_client, layouts))
+                 for (drac_client, layouts) in self._layouts.items()]
+        return run_on_hosts(funcs, self.max_concurrency)
+
+    def _run_host(self, drac_client, layouts, result):
+        conversions = collections.OrderedDict()
+        virtual_disks = []
+        for layout in layouts:
+            for (raid_controller, disk_ids) in layout.conversions.items():
+                conversions.setdefault(raid_controller, []).extend(disk_ids)
+            virtual_disks.extend(layout.virtual_disks)
+
+        job_ids = []
+        if conversions:
+            # the virtual disks can only be created on converted disks
+            job_ids.extend(result.run_stage(
+                RAID_STAGE_CONVERT, drac_client.apply_raid_layout,
+                raid.RAIDLayout(conversions, []), self.reboot, self.timeout,
+                self.interval))
+
+        if virtual_disks:
+            job_ids.extend(result.run_stage(
+                RAID_STAGE_CREATE, drac_client.apply_raid_layout,
+                raid.RAIDLayout({}, virtual_disks), self.reboot))
+
+        if not self.wait or not job_ids:
+            return job_ids
+
+        jobs = result.run_stage(RAID_STAGE_WAIT, drac_client.wait_for_jobs,
+                                job_ids, self.timeout, self.interval)
+        job.check_jobs(jobs)
+        return jobs
@@ -0,0 +1,72 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Hooks for reporting internal events of the client to metrics systems.
+"""
+
+import logging
+import threading
+
+LOG = logging.getLogger(__name__)
+
+# events
+CONCURRENCY_WAIT = 'concurrency_wait'
+CONCURRENCY_LIMIT = 'concurrency_limit'
+CIRCUIT_STATE = 'circuit_state'
+RATE_LIMIT_WAIT = 'rate_limit_wait'
+FLEET_STAGE = 'fleet_stage'
+
+_listeners = ()
+_lock = threading.Lock()
+
+
+def register_listener(listener):
+    """Registers a listener of the events
+
+    :param listener: a callable accepting the name of the event as first
+                     argument and its payload as keyword arguments. It is
+                     called synchronously by the thread emitting the event.
+    """
+    global _listeners
+
+    with _lock:
+        _listeners = _listeners + (listener,)
+
+
+def unregister_listener(listener):
+    """Unregisters a listener of the events
+
+    :param listener: a callable previously passed to register_listener
+    """
+    global _listeners
+
+    with _lock:
+        _listeners = tuple(registered for registered in _listeners
+                           if registered != listener)
+
+
+def emit(event, **payload):
+    """Reports an event to the registered listeners
+
+    Failures of the listeners are logged and otherwise ignored.
+
+    :param event: name of the event
+    :param payload: details of the event
+    """
+    for listener in _listeners:
+        try:
+            listener(event, **payload)
+        except Exception:
+            LOG.exception('Listener %(listener)r failed on event %(event)s',
+                          {'listener': listener, 'event': event})
@@ -0,0 +1,403 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Limits on the requests sent to a DRAC, shared by the clients of a process.
+"""
+
+import collections
+import contextlib
+import logging
+import math
+import threading
+import time
+import weakref
+
+from dracclient import constants
+
+LOG = logging.getLogger(__name__)
+
+# priority classes of the requests
+PRIORITY_HIGH = 'high'
+PRIORITY_LOW = 'low'
+
+_limiters = weakref.WeakValueDictionary()
+_limiters_lock = threading.Lock()
+_rate_limiters = weakref.WeakValueDictionary()
+_global_rate_limiter = None
+_local = threading.local()
+
+
+@contextlib.contextmanager
+def priority(value):
+    """Sets the priority class of the requests sent by the current thread
+
+    Without it, invoke requests have high priority and enumerate and pull
+    requests have low priority.
+
+    :param value: PRIORITY_HIGH or PRIORITY_LOW
+    """
+    previous = getattr(_local, 'priority', None)
+    _local.priority = value
+    try:
+        yield
+    finally:
+        _local.priority = previous
+
+
+def get_priority(default=PRIORITY_HIGH):
+    """Returns the priority class of the requests sent by the current thread
+
+    :param default: priority class of the request when none was set with
+                    priority
+    :returns: PRIORITY_HIGH or PRIORITY_LOW
+    """
+    return getattr(_local, 'priority', None) or default
+
+
+class ConcurrencyLimiter(object):
+    """Semaphore granting the slots by priority class
+
+    Within a priority class, the slots are granted in the order they were
+    requested. High priority requests are served ahead of the low priority
+    ones, but at most max_overtakes times in a row while low priority requests
+    are waiting, so that they are never starved.
+    """
+
+    def __init__(self, limit,
+                 max_overtakes=constants.DEFAULT_WSMAN_MAX_OVERTAKES):
+        """Creates ConcurrencyLimiter object
+
+        :param limit: maximum number of slots held at the same time
+        :param max_overtakes: number of high priority requests served in a row
+                              while low priority requests are waiting
+        """
+        self.limit = limit
+        # limit requested when created, which the adaptive limit departs from
+        self.initial_limit = limit
+        self.max_overtakes = max_overtakes
+        self._active = 0
+        self._waiters = {PRIORITY_HIGH: collections.deque(),
+                         PRIORITY_LOW: collections.deque()}
+        self._overtakes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def active(self):
+        """Number of slots currently held"""
+        return self._active
+
+    @property
+    def waiting(self):
+        """Number of threads waiting for a slot"""
+        return sum(len(waiters) for waiters in self._waiters.values())
+
+    def acquire(self, priority=PRIORITY_HIGH):
+        """Waits until a slot is granted
+
+        A slot is never granted ahead of a thread of the same priority class
+        that asked for one earlier.
+
+        :param priority: priority class of the request, PRIORITY_HIGH or
+                         PRIORITY_LOW
+        """
+        with self._lock:
+            if not self.waiting and self._active < self.limit:
+                self._active += 1
+                return
+
+            waiter = threading.Event()
+            self._waiters[priority].append(waiter)
+
+        # the slot is handed over by the thread releasing it
+        waiter.wait()
+
+    def release(self):
+        """Releases a slot granted by acquire"""
+        with self._lock:
+            self._active -= 1
+            self._grant()
+
+    def _grant(self):
+        while self._active < self.limit:
+            waiter = self._next_waiter()
+            if waiter is None:
+                break
+
+            self._active += 1
+            waiter.set()
+
+    def _next_waiter(self):
+        high = self._waiters[PRIORITY_HIGH]
+        low = self._waiters[PRIORITY_LOW]
+        if low and (not high or self._overtakes >= self.max_overtakes):
+            self._overtakes = 0
+            return low.popleft()
+
+        if high:
+            if low:
+                self._overtakes += 1
+            return high.popleft()
+
+    def record_success(self, latency):
+        """Records a request completed by the DRAC
+
+        :param latency: number of seconds taken by the request
+        :returns: whether the limit changed
+        """
+        return False
+
+    def record_failure(self):
+        """Records a request the DRAC failed to handle
+
+        :returns: whether the limit changed
+        """
+        return False
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+
+class AdaptiveConcurrencyLimiter(ConcurrencyLimiter):
+    """Concurrency limiter learning the limit a DRAC can sustain
+
+    The limit is raised additively, by one slot once as many requests as the
+    limit have succeeded, as long as the latency stays healthy. It is cut
+    multiplicatively when a request fails or its latency exceeds the average
+    latency by latency_spike_factor. Cuts are at least one average latency
+    apart, so that a burst of failures of concurrent requests only counts
+    once.
+    """
+
+    def __init__(self, limit, min_limit=1,
+                 max_limit=constants.DEFAULT_WSMAN_ADAPTIVE_MAX_CONCURRENCY,
+                 backoff=0.5, latency_spike_factor=3.0, smoothing=0.1):
+        """Creates AdaptiveConcurrencyLimiter object
+
+        :param limit: initial limit
+        :param min_limit: lowest limit
+        :param max_limit: highest limit
+        :param backoff: factor applied to the limit on failures
+        :param latency_spike_factor: ratio to the average latency above which
+                                     the latency of a request is a spike
+        :param smoothing: weight of the latest request in the average latency
+        """
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.latency_spike_factor = latency_spike_factor
+        self.smoothing = smoothing
+        self.latency = None
+        self._last_decrease = None
+        super(AdaptiveConcurrencyLimiter, self).__init__(limit)
+
+    @property
+    def limit(self):
+        return max(self.min_limit, int(self._limit))
+
+    @limit.setter
+    def limit(self, value):
+        self._limit = float(value)
+
+    def record_success(self, latency):
+        with self._lock:
+            spike = (self.latency is not None and
+                     latency > self.latency * self.latency_spike_factor)
+            if self.latency is None:
+                self.latency = latency
+            else:
+                self.latency += self.smoothing * (latency - self.latency)
+
+            if spike:
+                return self._decrease()
+
+            old_limit = self.limit
+            self._limit = min(float(self.max_limit),
+                              self._limit + 1.0 / old_limit)
+            self._grant()
+            return self.limit != old_limit
+
+    def record_failure(self):
+        with self._lock:
+            return self._decrease()
+
+    def _decrease(self):
+        now = time.time()
+        if (self._last_decrease is not None and
+                now - self._last_decrease < (self.latency or 0)):
+            return False
+
+        self._last_decrease = now
+        old_limit = self.limit
+        self._limit = max(float(self.min_limit), self._limit * self.backoff)
+        return self.limit != old_limit
+
+
+def get_concurrency_limiter(host, port, limit, adaptive=False):
+    """Returns the concurrency limiter shared by the clients of a DRAC
+
+    The limiter lives as long as a client references it. The limit passed by
+    the client creating it applies to all the clients of the DRAC, and a
+    warning is logged when a later client asks for another limit or mode.
+
+    :param host: hostname or IP of the DRAC interface
+    :param port: port of the DRAC interface
+    :param limit: maximum number of concurrent requests to the DRAC, or the
+                  initial one if adaptive
+    :param adaptive: whether the limit should adapt to the errors and
+                     latency of the DRAC
+    :returns: a ConcurrencyLimiter object
+    """
+    key = (host, int(port))
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            if adaptive:
+                limiter = AdaptiveConcurrencyLimiter(limit)
+            else:
+                limiter = ConcurrencyLimiter(limit)
+            _limiters[key] = limiter
+        elif (limiter.initial_limit != limit or
+              _is_adaptive(limiter) != adaptive):
+            LOG.warning('The concurrency limit of %(host)s:%(port)s is '
+                        'already %(limit)s%(mode)s, ignoring the requested '
+                        '%(requested)s%(requested_mode)s',
+                        {'host': host, 'port': port,
+                         'limit': limiter.initial_limit,
+                         'mode': _mode(_is_adaptive(limiter)),
+                         'requested': limit,
+                         'requested_mode': _mode(adaptive)})
+
+    return limiter
+
+
+def _is_adaptive(limiter):
+    return isinstance(limiter, AdaptiveConcurrencyLimiter)
+
+
+def _mode(adaptive):
+    return ' (adaptive)' if adaptive else ''
+
+
+class TokenBucket(object):
+    """Token bucket limiting the rate of the requests
+
+    The bucket holds up to burst tokens and is refilled with rate tokens per
+    second. Every request takes a token, and waits for it when the bucket is
+    empty. The waiting requests are served in the order they arrived.
+    """
+
+    def __init__(self, rate, burst=None):
+        """Creates TokenBucket object
+
+        :param rate: number of requests per second
+        :param burst: number of requests that can be sent at once after the
+                      bucket was idle. Defaults to the requests of one second.
+        """
+        self.rate = float(rate)
+        if burst is None:
+            burst = max(1, int(math.ceil(rate)))
+        self.burst = burst
+        # negative while requests are waiting for their token
+        self._tokens = float(burst)
+        self._updated = time.time()
+        self._lock = threading.Lock()
+
+    def _delay(self):
+        now = time.time()
+        self._tokens = min(float(self.burst),
+                           self._tokens + max(0, now - self._updated) *
+                           self.rate)
+        self._updated = now
+        return max(0.0, (1 - self._tokens) / self.rate)
+
+    def acquire(self, blocking=True, timeout=None):
+        """Takes a token from the bucket
+
+        :param blocking: whether to wait for a token when the bucket is empty
+        :param timeout: maximum number of seconds to wait for a token, or None
+                        to wait as long as needed
+        :returns: whether a token was taken
+        """
+        with self._lock:
+            delay = self._delay()
+            if delay > 0 and (not blocking or
+                              (timeout is not None and delay > timeout)):
+                return False
+
+            self._tokens -= 1
+
+        if delay > 0:
+            time.sleep(delay)
+        return True
+
+    def reserve(self):
+        """Takes a token from the bucket without waiting for it
+
+        Meant for callers that cannot block, such as event loops, which are
+        expected to wait for the returned delay before sending the request.
+
+        :returns: number of seconds to wait before sending the request
+        """
+        with self._lock:
+            delay = self._delay()
+            self._tokens -= 1
+            return delay
+
+
+def get_rate_limiter(host, port, rate, burst=None):
+    """Returns the token bucket shared by the clients of a DRAC
+
+    The bucket lives as long as a client references it. The rate passed by
+    the client creating it applies to all the clients of the DRAC.
+
+    :param host: hostname or IP of the DRAC interface
+    :param port: port of the DRAC interface
+    :param rate: number of requests per second to the DRAC
+    :param burst: number of requests that can be sent at once to the DRAC
+    :returns: a TokenBucket object
+    """
+    key = (host, int(port))
+    with _limiters_lock:
+        bucket = _rate_limiters.get(key)
+        if bucket is None:
+            bucket = TokenBucket(rate, burst)
+            _rate_limiters[key] = bucket
+
+    return bucket
+
+
+def set_global_rate_limit(rate, burst=None):
+    """Limits the rate of the requests sent to all the DRACs by the process
+
+    :param rate: number of requests per second, or None for no limit
+    :param burst: number of requests that can be sent at once
+    """
+    global _global_rate_limiter
+
+    if rate is None:
+        _global_rate_limiter = None
+    else:
+        _global_rate_limiter = TokenBucket(rate, burst)
+
+
+def get_global_rate_limiter():
+    """Returns the token bucket of the requests sent by the process
+
+    :returns: a TokenBucket object, or None if there is no global limit
+    """
+    return _global_rate_limiter
@@ -0,0 +1,245 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Plans of BIOS, boot order and RAID changes applied with a single reboot.
+"""
+
+import collections
+import functools
+import logging
+
+from dracclient import exceptions
+from dracclient.resources import bios
+from dracclient.resources import job
+from dracclient.resources import raid
+from dracclient.resources import uris
+from dracclient import utils
+
+LOG = logging.getLogger(__name__)
+
+
+class ApplyPlan(object):
+    """Changes to apply to a node with a single reboot
+
+    The changes are only recorded until apply is called. The BIOS settings
+    and boot order changes are then set and committed by a single BIOS config
+    job, and the RAID changes by one config job per RAID controller. Only the
+    last config job requests a reboot, during which all of them are run.
+    """
+
+    def __init__(self, client):
+        """Creates ApplyPlan object
+
+        :param client: an instance of WSManClient
+        """
+        self.client = client
+        self.job_ids = []
+        self._bios_settings = {}
+        self._boot_orders = collections.OrderedDict()
+        self._raid_changes = collections.OrderedDict()
+
+    def __len__(self):
+        return (len(self._bios_settings) + len(self._boot_orders) +
+                sum(len(changes) for changes in self._raid_changes.values()))
+
+    def set_bios_settings(self, settings):
+        """Records BIOS settings to set
+
+        :param settings: a dictionary containing the proposed values, with
+                         each key being the name of attribute and the value
+                         being the proposed value.
+        :returns: the plan
+        """
+        self._bios_settings.update(settings)
+        return self
+
+    def change_boot_device_order(self, boot_mode, boot_device_list):
+        """Records a change of the boot device sequence for a boot mode
+
+        :param boot_mode: boot mode for which the boot device list is to be
+                          changed
+        :param boot_device_list: a list of boot device ids in an order
+                                 representing the desired boot sequence
+        :returns: the plan
+        """
+        self._boot_orders[boot_mode] = list(boot_device_list)
+        return self
+
+    def convert_physical_disks(self, raid_controller, physical_disks,
+                               raid_enable=True):
+        """Records a change of the operational mode of physical disks
+
+        :param raid_controller: the FQDD ID of the RAID controller
+        :param physical_disks: list of FQDD ID strings of the physical disks
+               to update
+        :param raid_enable: boolean flag, set to True if the disk is to
+               become part of the RAID.
+        :returns: the plan
+        """
+        self._add_raid_change(raid_controller, 'convert_physical_disks',
+                              physical_disks, raid_enable)
+        return self
+
+    def create_virtual_disk(self, raid_controller, physical_disks, raid_level,
+                            size_mb, disk_name=None, span_length=None,
+                            span_depth=None):
+        """Records the creation of a virtual disk
+
+        :param raid_controller: id of the RAID controller
+        :param physical_disks: ids of the physical disks
+        :param raid_level: RAID level of the virtual disk
+        :param size_mb: size of the virtual disk in megabytes
+        :param disk_name: name of the virtual disk (optional)
+        :param span_length: number of disks per span (optional)
+        :param span_depth: number of spans in virtual disk (optional)
+        :returns: the plan
+        """
+        self._add_raid_change(raid_controller, 'create_virtual_disk',
+                              raid_controller, physical_disks, raid_level,
+                              size_mb, disk_name, span_length, span_depth)
+        return self
+
+    def delete_virtual_disk(self, virtual_disk, raid_controller=None):
+        """Records the deletion of a virtual disk
+
+        :param virtual_disk: id of the virtual disk
+        :param raid_controller: id of the RAID controller. If None, it is
+                                taken from the id of the virtual disk.
+        :returns: the plan
+        :raises: InvalidParameterValue if the RAID controller can't be
+                 determined
+        """
+        if raid_controller is None:
+            if ':' not in virtual_disk:
+                msg = ('Unable to determine the RAID controller of virtual '
+                       'disk %s' % virtual_disk)
+                raise exceptions.InvalidParameterValue(reason=msg)
+
+            raid_controller = virtual_disk.split(':', 1)[1]
+
+        self._add_raid_change(raid_controller, 'delete_virtual_disk',
+                              virtual_disk)
+        return self
+
+    def validate(self, validator):
+        """Validates the recorded RAID changes without sending any request
+
+        The changes of each RAID controller are validated in the order they
+        were recorded, as if the previous ones were applied.
+
+        :param validator: a RAIDValidator object, e.g. as returned by
+                          get_raid_validator. It records the validated
+                          changes.
+        :returns: the plan
+        :raises: InvalidParameterValue on the first invalid RAID change
+        """
+        for changes in self._raid_changes.values():
+            for (method, args) in changes:
+                getattr(validator, method)(*args)
+
+        return self
+
+    def _add_raid_change(self, raid_controller, method, *args):
+        self._raid_changes.setdefault(raid_controller, []).append(
+            (method, args))
+
+    def apply(self, reboot=True):
+        """Applies the recorded changes
+
+        The changes are set in the order they were recorded, those of
+        different RAID controllers concurrently, then the config jobs are
+        created. The recorded changes are cleared afterwards.
+
+        :param reboot: indicates whether a RebootJob should be created along
+                       with the last config job or not
+        :returns: a list of the ids of the created jobs
+        :raises: WSManRequestFailure on request failures
+        :raises: WSManInvalidResponse when receiving invalid response
+        :raises: DRACOperationFailed on error reported back by the DRAC
+                 interface
+        :raises: DRACUnexpectedReturnValue on return value mismatch
+        :raises: InvalidParameterValue on invalid input parameter
+        """
+        targets = []
+
+        bios_commit_required = False
+        if self._bios_settings:
+            bios_cfg = bios.BIOSConfiguration(self.client)
+            result = bios_cfg.set_bios_settings(self._bios_settings)
+            bios_commit_required = result['commit_required']
+
+        if self._boot_orders:
+            boot_mgmt = bios.BootManagement(self.client)
+            for (boot_mode, boot_device_list) in self._boot_orders.items():
+                boot_mgmt.change_boot_device_order(boot_mode,
+                                                   boot_device_list)
+            bios_commit_required = True
+
+        if bios_commit_required:
+            targets.append((uris.DCIM_BIOSService, 'DCIM_BIOSService',
+                            'DCIM:BIOSService', bios.BIOS_DEVICE_FQDD))
+
+        raid_mgmt = raid.RAIDManagement(self.client)
+
+        def set_raid_changes(changes):
+            commit_required = False
+            for (method, args) in changes:
+                result = getattr(raid_mgmt, method)(*args)
+                commit_required = commit_required or result['commit_required']
+
+            return commit_required
+
+        # the RAID controllers are independent, so they are set concurrently
+        funcs = [functools.partial(set_raid_changes, changes)
+                 for changes in self._raid_changes.values()]
+        for (raid_controller, commit_required) in zip(
+                self._raid_changes, utils.run_concurrently(funcs)):
+            if commit_required:
+                targets.append((uris.DCIM_RAIDService, 'DCIM_RAIDService',
+                                'DCIM:RAIDService', raid_controller))
+
+        job_mgmt = job.JobManagement(self.client)
+        job_ids = []
+        for (index, target) in enumerate(targets):
+            (resource_uri, cim_creation_class_name, cim_name,
+             target_fqdd) = target
+            job_ids.append(job_mgmt.create_config_job(
+                resource_uri=resource_uri,
+                cim_creation_class_name=cim_creation_class_name,
+                cim_name=cim_name, target=target_fqdd,
+                reboot=(reboot and index == len(targets) - 1)))
+
+        LOG.debug('Created config jobs %r', job_ids)
+
+        self._bios_settings = {}
+        self._boot_orders.clear()
+        self._raid_changes.clear()
+        self.job_ids = job_ids
+        return job_ids
+
+    def wait(self, timeout=None, interval=None):
+        """Waits until the jobs created by apply are finished
+
+        :param timeout: maximum number of seconds to wait for the jobs. If
+                        None, DEFAULT_JOB_WAIT_TIMEOUT_SEC is used.
+        :param interval: number of seconds between polls. If None,
+                         DEFAULT_JOB_POLL_INTERVAL_SEC is used.
+        :returns: a list of Job objects in the order the jobs were created
+        :raises: WSManRequestFailure on request failures
+        :raises: WSManInvalidResponse when receiving invalid response
+        :raises: DRACOperationFailed on error reported back by the DRAC
+                 interface or timeout
+        """
+        return job.JobManagement(self.client).wait_for_jobs(
+            self.job_ids, timeout, interval)
@@ -0,0 +1,169 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Registry of DRACClient objects shared by the tasks of a long-running service.
+"""
+
+import collections
+import hashlib
+import logging
+import threading
+import time
+
+from dracclient import client as drac_client
+from dracclient import constants
+
+LOG = logging.getLogger(__name__)
+
+_default_registry = None
+_default_registry_lock = threading.Lock()
+
+
+def _credential_fingerprint(password):
+    if not isinstance(password, bytes):
+        password = password.encode('utf-8')
+    return hashlib.sha256(password).hexdigest()
+
+
+class ClientRegistry(object):
+    """Thread-safe registry of shared DRACClient objects
+
+    Clients are keyed by host, port, username and a fingerprint of the
+    password, so that the same client, along with its open connections and
+    cached state, is handed out to every task targeting the same node with the
+    same credentials. The least recently used clients are evicted when the
+    registry is full, and clients are evicted after being idle for too long.
+    The connections of the evicted clients are closed.
+    """
+
+    def __init__(self, max_size=constants.DEFAULT_CLIENT_REGISTRY_MAX_SIZE,
+                 idle_timeout=(
+                     constants.DEFAULT_CLIENT_REGISTRY_IDLE_TIMEOUT_SEC)):
+        """Creates ClientRegistry object
+
+        :param max_size: maximum number of clients kept in the registry
+        :param idle_timeout: number of seconds after which an unused client
+                             is evicted, or None to keep clients until the
+                             registry is full
+        """
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        # (host, port, username, fingerprint) -> [client, last_used], in
+        # least recently used order
+        self._clients = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._clients)
+
+    def get(self, host, username, password, port=443, **kwargs):
+        """Returns the shared client of a node
+
+        :param host: hostname or IP of the DRAC interface
+        :param username: username for accessing the DRAC interface
+        :param password: password for accessing the DRAC interface
+        :param port: port for accessing the DRAC interface
+        :param kwargs: additional arguments of DRACClient, only used when a
+                       new client is created
+        :returns: a DRACClient object. Its client attribute is the shared
+                  WSManClient object.
+        """
+        key = (host, port, username, _credential_fingerprint(password))
+        now = time.time()
+        with self._lock:
+            entry = self._clients.pop(key, None)
+            evicted = self._pop_idle(now)
+            if entry is None:
+                LOG.debug('Creating shared client for %(host)s:%(port)s',
+                          {'host': host, 'port': port})
+                entry = [drac_client.DRACClient(host, username, password,
+                                                port=port, **kwargs), now]
+            else:
+                entry[1] = now
+
+            self._clients[key] = entry
+            while len(self._clients) > self.max_size:
+                evicted.append(self._clients.popitem(last=False)[1][0])
+
+        self._close(evicted)
+        return entry[0]
+
+    def remove(self, host, username, password, port=443):
+        """Evicts the shared client of a node
+
+        :param host: hostname or IP of the DRAC interface
+        :param username: username for accessing the DRAC interface
+        :param password: password for accessing the DRAC interface
+        :param port: port for accessing the DRAC interface
+        """
+        key = (host, port, username, _credential_fingerprint(password))
+        with self._lock:
+            entry = self._clients.pop(key, None)
+
+        if entry is not None:
+            self._close([entry[0]])
+
+    def evict_idle(self):
+        """Evicts the clients idle for longer than idle_timeout"""
+        with self._lock:
+            evicted = self._pop_idle(time.time())
+
+        self._close(evicted)
+
+    def clear(self):
+        """Evicts all the clients"""
+        with self._lock:
+            evicted = [entry[0] for entry in self._clients.values()]
+            self._clients.clear()
+
+        self._close(evicted)
+
+    def _pop_idle(self, now):
+        evicted = []
+        if self.idle_timeout is None:
+            return evicted
+
+        deadline = now - self.idle_timeout
+        while self._clients:
+            key = next(iter(self._clients))
+            if self._clients[key][1] > deadline:
+                break
+
+            evicted.append(self._clients.pop(key)[0])
+
+        return evicted
+
+    def _close(self, clients):
+        for client in clients:
+            try:
+                client.close()
+            except Exception as ex:
+                LOG.warning('Failed to close client of %(host)s: %(error)s',
+                            {'host': client.client.host, 'error': ex})
+
+
+def get_default_registry():
+    """Returns the process-wide client registry
+
+    :returns: a ClientRegistry object, created on first use with the default
+              settings
+    """
+    global _default_registry
+
+    if _default_registry is None:
+        with _default_registry_lock:
+            if _default_registry is None:
+                _default_registry = ClientRegistry()
+
+    return _default_registry
@@ -14,9 +14,11 @@
 import collections
 import logging
 import re
+import time
 
 from dracclient import constants
 from dracclient import exceptions
+from dracclient.resources import job
 from dracclient.resources import lifecycle_controller
 from dracclient.resources import uris
 from dracclient import utils
@@ -24,6 +26,9 @@ from dracclient import wsman
 
 LOG = logging.getLogger(__name__)
 
+BIOS_DEVICE_FQDD = 'BIOS.Setup.1-1'
+BIOS_CONFIG_JOB_NAME = 'ConfigBIOS:' + BIOS_DEVICE_FQDD
+
 POWER_STATES = {
     '2': constants.POWER_ON,
     '3': constants.POWER_OFF,
@@ -43,7 +48,7 @@ BOOT_MODE_IS_NEXT = {
     '3': True    # is next for single use (one time boot only)
 }
 
-LC_CONTROLLER_VERSION_12G = (2, 0, 0)
+LC_CONTROLLER_VERSION_12G = lifecycle_controller.LC_CONTROLLER_VERSION_12G
 
 BootMode = collections.namedtuple('BootMode', ['id', 'name', 'is_current',
                                                'is_next'])
@@ -63,9 +68,11 @@ class PowerManagement(object):
         """
         self.client = client
 
-    def get_power_state(self):
+    def get_power_state(self, wait_for_idrac=True):
         """Returns the current power state of the node
 
+        :param wait_for_idrac: indicates whether to wait for the iDRAC to be
+                               ready before reading the power state
         :returns: power state of the node, one of 'POWER_ON', 'POWER_OFF' or
                   'REBOOT'
         :raises: WSManRequestFailure on request failures
@@ -76,33 +83,48 @@ class PowerManagement(object):
 
         filter_query = ('select EnabledState from DCIM_ComputerSystem')
         doc = self.client.enumerate(uris.DCIM_ComputerSystem,
-                                    filter_query=filter_query)
+                                    filter_query=filter_query,
+                                    wait_for_idrac=wait_for_idrac)
         enabled_state = utils.find_xml(doc, 'EnabledState',
                                        uris.DCIM_ComputerSystem)
 
         return POWER_STATES[enabled_state.text]
 
-    def set_power_state(self, target_state):
+    def set_power_state(self, target_state, wait=False, timeout=None):
         """Turns the server power on/off or do a reboot
 
+        In idempotent mode, the power state is read first and nothing is
+        requested if the node is already powered on or off as requested.
+
         :param target_state: target power state. Valid options are: 'POWER_ON',
                              'POWER_OFF' and 'REBOOT'.
+        :param wait: indicates whether to wait until the node reaches the
+                     target power state, as wait_for_power_state does. It
+                     can't be set for 'REBOOT'.
+        :param timeout: maximum number of seconds to wait for the power state.
+                        If None, DEFAULT_POWER_WAIT_TIMEOUT_SEC is used.
+        :returns: in idempotent mode, a dictionary containing the changed key
+                  with a boolean value indicating whether a power state change
+                  was requested. None otherwise.
         :raises: WSManRequestFailure on request failures
         :raises: WSManInvalidResponse when receiving invalid response
         :raises: DRACOperationFailed on error reported back by the DRAC
                  interface
         :raises: DRACUnexpectedReturnValue on return value mismatch
-        :raises: InvalidParameterValue on invalid target power state
+        :raises: DRACOperationFailed on timeout waiting for the power state
+        :raises: InvalidParameterValue on invalid target power state, or on
+                 'REBOOT' when waiting
         """
 
-        try:
-            drac_requested_state = REVERSE_POWER_STATES[target_state]
-        except KeyError:
-            msg = ("'%(target_state)s' is not supported. "
-                   "Supported power states: %(supported_power_states)r") % {
-                       'target_state': target_state,
-                       'supported_power_states': list(REVERSE_POWER_STATES)}
-            raise exceptions.InvalidParameterValue(reason=msg)
+        self.check_power_state(target_state, wait)
+        drac_requested_state = get_drac_power_state(target_state)
+
+        idempotent = self.client.idempotent
+        if (idempotent and target_state != constants.REBOOT and
+                self.get_power_state() == target_state):
+            LOG.debug('Node %(host)s is already in power state %(state)s',
+                      {'host': self.client.host, 'state': target_state})
+            return {'changed': False}
 
         selectors = {'CreationClassName': 'DCIM_ComputerSystem',
                      'Name': 'srv:system'}
@@ -111,6 +133,80 @@ class PowerManagement(object):
         self.client.invoke(uris.DCIM_ComputerSystem, 'RequestStateChange',
                            selectors, properties)
 
+        if wait:
+            self.wait_for_power_state(target_state, timeout)
+
+        if idempotent:
+            return {'changed': True}
+
+    def check_power_state(self, target_state, wait=False):
+        """Checks a target power state without sending any request
+
+        :param target_state: target power state. Valid options are: 'POWER_ON',
+                             'POWER_OFF' and 'REBOOT'.
+        :param wait: indicates whether the power state is to be waited for,
+                     which 'REBOOT' can't be.
+        :raises: InvalidParameterValue on invalid target power state, or on
+                 'REBOOT' when waiting
+        """
+        if wait:
+            check_waitable_power_state(target_state)
+        else:
+            get_drac_power_state(target_state)
+
+    def wait_for_power_state(self, target_state, timeout=None, interval=None):
+        """Waits until the node reaches a power state
+
+        Each poll is a single read of the power state. The polls do not wait
+        for the iDRAC to be ready, as it may not be while the node is powered
+        on or off, and the interval between them doubles after each poll, up
+        to DEFAULT_POWER_POLL_MAX_INTERVAL_SEC seconds.
+
+        :param target_state: target power state. Valid options are: 'POWER_ON'
+                             and 'POWER_OFF'. A node may remain powered on
+                             while it reboots, so 'REBOOT' can't be waited
+                             for.
+        :param timeout: maximum number of seconds to wait for the power state.
+                        If None, DEFAULT_POWER_WAIT_TIMEOUT_SEC is used.
+        :param interval: number of seconds before the second poll. If None,
+                         DEFAULT_POWER_POLL_INTERVAL_SEC is used.
+        :returns: the power state reached
+        :raises: WSManRequestFailure on request failures
+        :raises: WSManInvalidResponse when receiving invalid response
+        :raises: DRACOperationFailed on error reported back by the DRAC
+                 interface or timeout
+        :raises: InvalidParameterValue on invalid target power state
+        """
+
+        check_waitable_power_state(target_state)
+
+        if timeout is None:
+            timeout = constants.DEFAULT_POWER_WAIT_TIMEOUT_SEC
+
+        if interval is None:
+            interval = constants.DEFAULT_POWER_POLL_INTERVAL_SEC
+
+        deadline = time.time() + timeout
+        while True:
+            power_state = self.get_power_state(wait_for_idrac=False)
+            if power_state == target_state:
+                return power_state
+
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                err_msg = ('Timed out waiting for %(host)s to reach power '
+                           'state %(target)s, last power state %(state)s' %
+                           {'host': self.client.host, 'target': target_state,
+                            'state': power_state})
+                LOG.error(err_msg)
+                raise exceptions.DRACOperationFailed(drac_messages=err_msg)
+
+            LOG.debug('Waiting for %(host)s to reach power state %(target)s',
+                      {'host': self.client.host, 'target': target_state})
+            time.sleep(min(interval, remaining))
+            interval = min(interval * 2,
+                           constants.DEFAULT_POWER_POLL_MAX_INTERVAL_SEC)
+
 
 class BootManagement(object):
 
@@ -157,22 +253,31 @@ class BootManagement(object):
         drac_boot_devices = utils.find_xml(doc, 'DCIM_BootSourceSetting',
                                            uris.DCIM_BootSourceSetting,
                                            find_all=True)
-        try:
-            boot_devices = [self._parse_drac_boot_device(drac_boot_device)
-                            for drac_boot_device in drac_boot_devices]
-        except AttributeError:
-            # DRAC 11g doesn't have the BootSourceType attribute on the
-            # DCIM_BootSourceSetting resource
-            controller_version = (
-                lifecycle_controller.LifecycleControllerManagement(
-                    self.client).get_version())
-
-            if controller_version < LC_CONTROLLER_VERSION_12G:
+
+        # DRAC 11g doesn't have the BootSourceType attribute on the
+        # DCIM_BootSourceSetting resource
+        capabilities = self.client.capabilities
+        if (capabilities is not None and
+                capabilities.lc_version < LC_CONTROLLER_VERSION_12G):
+            boot_devices = [
+                self._parse_drac_boot_device_11g(drac_boot_device)
+                for drac_boot_device in drac_boot_devices]
+        else:
+            try:
                 boot_devices = [
-                    self._parse_drac_boot_device_11g(drac_boot_device)
+                    self._parse_drac_boot_device(drac_boot_device)
                     for drac_boot_device in drac_boot_devices]
-            else:
-                raise
+            except AttributeError:
+                capabilities = (
+                    lifecycle_controller.LifecycleControllerManagement(
+                        self.client).get_capabilities())
+
+                if capabilities.lc_version < LC_CONTROLLER_VERSION_12G:
+                    boot_devices = [
+                        self._parse_drac_boot_device_11g(drac_boot_device)
+                        for drac_boot_device in drac_boot_devices]
+                else:
+                    raise
 
         # group devices by boot mode
         boot_devices_per_mode = {device.boot_mode: []
@@ -190,10 +295,17 @@ class BootManagement(object):
     def change_boot_device_order(self, boot_mode, boot_device_list):
         """Changes the boot device sequence for a boot mode
 
+        In idempotent mode, the boot devices of the boot mode are read first
+        and nothing is changed if their pending sequence already is the
+        requested one.
+
         :param boot_mode: boot mode for which the boot device list is to be
                           changed
         :param boot_device_list: a list of boot device ids in an order
                                  representing the desired boot sequence
+        :returns: in idempotent mode, a dictionary containing the changed key
+                  with a boolean value indicating whether the boot sequence
+                  was changed. None otherwise.
         :raises: WSManRequestFailure on request failures
         :raises: WSManInvalidResponse when receiving invalid response
         :raises: DRACOperationFailed on error reported back by the DRAC
@@ -201,6 +313,21 @@ class BootManagement(object):
         :raises: DRACUnexpectedReturnValue on return value mismatch
         """
 
+        idempotent = self.client.idempotent
+        if idempotent:
+            if isinstance(boot_device_list, list):
+                requested_sequence = boot_device_list
+            else:
+                requested_sequence = [boot_device_list]
+
+            if self._list_pending_boot_sequence(boot_mode) == (
+                    requested_sequence):
+                LOG.debug('Boot sequence of %(mode)s of %(host)s is already '
+                          '%(sequence)r', {'mode': boot_mode,
+                                           'host': self.client.host,
+                                           'sequence': requested_sequence})
+                return {'changed': False}
+
         selectors = {'InstanceID': boot_mode}
         properties = {'source': boot_device_list}
 
@@ -208,6 +335,33 @@ class BootManagement(object):
                            'ChangeBootOrderByInstanceID', selectors,
                            properties, expected_return_value=utils.RET_SUCCESS)
 
+        if idempotent:
+            return {'changed': True}
+
+    def _list_pending_boot_sequence(self, boot_mode):
+        capabilities = self.client.capabilities
+        if (capabilities is not None and
+                capabilities.lc_version < LC_CONTROLLER_VERSION_12G):
+            # DRAC 11g can't filter on the boot mode
+            boot_devices = self.list_boot_devices().get(boot_mode, [])
+        else:
+            utils.check_filter_values([boot_mode], 'boot mode')
+            filter_query = ('select * from DCIM_BootSourceSetting where '
+                            'BootSourceType="%s"' % boot_mode)
+            doc = self.client.enumerate(uris.DCIM_BootSourceSetting,
+                                        filter_query=filter_query)
+            drac_boot_devices = utils.find_xml(doc, 'DCIM_BootSourceSetting',
+                                               uris.DCIM_BootSourceSetting,
+                                               find_all=True)
+            boot_devices = sorted(
+                (device for device in (
+                    self._parse_drac_boot_device(drac_boot_device)
+                    for drac_boot_device in drac_boot_devices)
+                 if device.boot_mode == boot_mode),
+                key=lambda device: device.pending_assigned_sequence)
+
+        return [device.id for device in boot_devices]
+
     def _parse_drac_boot_mode(self, drac_boot_mode):
         return BootMode(
             id=self._get_boot_mode_attr(drac_boot_mode, 'InstanceID'),
@@ -257,9 +411,12 @@ class BootManagement(object):
                                              attr_name)
 
 
-class BIOSAttribute(object):
+class BIOSAttribute(utils.FrozenSlotsObject):
     """Generic BIOS attribute class"""
 
+    __slots__ = ('name', 'instance_id', 'current_value', 'pending_value',
+                 'read_only')
+
     def __init__(self, name, instance_id, current_value, pending_value,
                  read_only):
         """Creates BIOSAttribute object
@@ -271,17 +428,11 @@ class BIOSAttribute(object):
                 an unprocessed change (eg. config job not completed)
         :param read_only: indicates whether this BIOS attribute can be changed
         """
-        self.name = name
-        self.instance_id = instance_id
-        self.current_value = current_value
-        self.pending_value = pending_value
-        self.read_only = read_only
-
-    def __eq__(self, other):
-        return self.__dict__ == other.__dict__
-
-    def __ne__(self, other):
-        return not self.__eq__(other)
+        self._set_fields(name=utils.intern_string(name),
+                         instance_id=instance_id,
+                         current_value=current_value,
+                         pending_value=pending_value,
+                         read_only=read_only)
 
     @classmethod
     def parse(cls, namespace, bios_attr_xml):
@@ -298,13 +449,16 @@ class BIOSAttribute(object):
         read_only = utils.get_wsman_resource_attr(
             bios_attr_xml, namespace, 'IsReadOnly')
 
-        return cls(name, instance_id, current_value, pending_value,
+        return cls(name, utils.pooled(instance_id),
+                   utils.pooled(current_value), utils.pooled(pending_value),
                    (read_only == 'true'))
 
 
 class BIOSEnumerableAttribute(BIOSAttribute):
     """Enumerable BIOS attribute class"""
 
+    __slots__ = ('possible_values',)
+
     namespace = uris.DCIM_BIOSEnumeration
 
     def __init__(self, name, instance_id, current_value, pending_value,
@@ -322,7 +476,7 @@ class BIOSEnumerableAttribute(BIOSAttribute):
         super(BIOSEnumerableAttribute, self).__init__(name, instance_id,
                                                       current_value,
                                                       pending_value, read_only)
-        self.possible_values = possible_values
+        self._set_fields(possible_values=utils.shared_tuple(possible_values))
 
     @classmethod
     def parse(cls, bios_attr_xml):
@@ -345,13 +499,15 @@ class BIOSEnumerableAttribute(BIOSAttribute):
                    " It must be in %(possible_values)r.") % {
                        'attr': self.name,
                        'val': new_value,
-                       'possible_values': self.possible_values}
+                       'possible_values': list(self.possible_values)}
             return msg
 
 
 class BIOSStringAttribute(BIOSAttribute):
     """String BIOS attribute class"""
 
+    __slots__ = ('min_length', 'max_length', 'pcre_regex')
+
     namespace = uris.DCIM_BIOSString
 
     def __init__(self, name, instance_id, current_value, pending_value,
@@ -371,9 +527,8 @@ class BIOSStringAttribute(BIOSAttribute):
         super(BIOSStringAttribute, self).__init__(name, instance_id,
                                                   current_value, pending_value,
                                                   read_only)
-        self.min_length = min_length
-        self.max_length = max_length
-        self.pcre_regex = pcre_regex
+        self._set_fields(min_length=min_length, max_length=max_length,
+                         pcre_regex=pcre_regex)
 
     @classmethod
     def parse(cls, bios_attr_xml):
@@ -384,8 +539,8 @@ class BIOSStringAttribute(BIOSAttribute):
             bios_attr_xml, cls.namespace, 'MinLength'))
         max_length = int(utils.get_wsman_resource_attr(
             bios_attr_xml, cls.namespace, 'MaxLength'))
-        pcre_regex = utils.get_wsman_resource_attr(
-            bios_attr_xml, cls.namespace, 'ValueExpression', nullable=True)
+        pcre_regex = utils.pooled(utils.get_wsman_resource_attr(
+            bios_attr_xml, cls.namespace, 'ValueExpression', nullable=True))
 
         return cls(bios_attr.name, bios_attr.instance_id,
                    bios_attr.current_value, bios_attr.pending_value,
@@ -408,6 +563,8 @@ class BIOSStringAttribute(BIOSAttribute):
 class BIOSIntegerAttribute(BIOSAttribute):
     """Integer BIOS attribute class"""
 
+    __slots__ = ('lower_bound', 'upper_bound')
+
     namespace = uris.DCIM_BIOSInteger
 
     def __init__(self, name, instance_id, current_value, pending_value,
@@ -425,8 +582,7 @@ class BIOSIntegerAttribute(BIOSAttribute):
         super(BIOSIntegerAttribute, self).__init__(name, instance_id,
                                                    current_value,
                                                    pending_value, read_only)
-        self.lower_bound = lower_bound
-        self.upper_bound = upper_bound
+        self._set_fields(lower_bound=lower_bound, upper_bound=upper_bound)
 
     @classmethod
     def parse(cls, bios_attr_xml):
@@ -438,19 +594,26 @@ class BIOSIntegerAttribute(BIOSAttribute):
         upper_bound = utils.get_wsman_resource_attr(
             bios_attr_xml, cls.namespace, 'UpperBound')
 
-        if bios_attr.current_value:
-            bios_attr.current_value = int(bios_attr.current_value)
-        if bios_attr.pending_value:
-            bios_attr.pending_value = int(bios_attr.pending_value)
+        current_value = bios_attr.current_value
+        if current_value:
+            current_value = int(current_value)
+        pending_value = bios_attr.pending_value
+        if pending_value:
+            pending_value = int(pending_value)
 
-        return cls(bios_attr.name, bios_attr.instance_id,
-                   bios_attr.current_value, bios_attr.pending_value,
-                   bios_attr.read_only, int(lower_bound), int(upper_bound))
+        return cls(bios_attr.name, bios_attr.instance_id, current_value,
+                   pending_value, bios_attr.read_only, int(lower_bound),
+                   int(upper_bound))
 
     def validate(self, new_value):
         """Validates new value"""
 
-        val = int(new_value)
+        try:
+            val = int(new_value)
+        except (TypeError, ValueError):
+            return ("Attribute '%(attr)s' cannot be set to value '%(val)s'."
+                    " It must be an integer.") % {'attr': self.name,
+                                                  'val': new_value}
         if val < self.lower_bound or val > self.upper_bound:
             msg = ('Attribute %(attr)s cannot be set to value %(val)d.'
                    ' It must be between %(lower)d and %(upper)d.') % {
@@ -461,6 +624,11 @@ class BIOSIntegerAttribute(BIOSAttribute):
             return msg
 
 
+BIOS_NAMESPACES = [(uris.DCIM_BIOSEnumeration, BIOSEnumerableAttribute),
+                   (uris.DCIM_BIOSString, BIOSStringAttribute),
+                   (uris.DCIM_BIOSInteger, BIOSIntegerAttribute)]
+
+
 class BIOSConfiguration(object):
 
     def __init__(self, client):
@@ -485,10 +653,7 @@ class BIOSConfiguration(object):
         """
 
         result = {}
-        namespaces = [(uris.DCIM_BIOSEnumeration, BIOSEnumerableAttribute),
-                      (uris.DCIM_BIOSString, BIOSStringAttribute),
-                      (uris.DCIM_BIOSInteger, BIOSIntegerAttribute)]
-        for (namespace, attr_cls) in namespaces:
+        for (namespace, attr_cls) in BIOS_NAMESPACES:
             attribs = self._get_config(namespace, attr_cls, by_name)
             if not set(result).isdisjoint(set(attribs)):
                 raise exceptions.DRACOperationFailed(
@@ -497,10 +662,12 @@ class BIOSConfiguration(object):
             result.update(attribs)
         return result
 
-    def _get_config(self, resource, attr_cls, by_name):
+    def _get_config(self, resource, attr_cls, by_name, filter_query=None,
+                    wait_for_idrac=True):
         result = {}
 
-        doc = self.client.enumerate(resource)
+        doc = self.client.enumerate(resource, filter_query=filter_query,
+                                    wait_for_idrac=wait_for_idrac)
         items = doc.find('.//{%s}Items' % wsman.NS_WSMAN)
 
         for item in items:
@@ -512,6 +679,38 @@ class BIOSConfiguration(object):
 
         return result
 
+    def _list_bios_settings_by_names(self, names):
+        # Most settings are enumerations, so the namespaces are queried in
+        # turn and only for the attributes not found yet.
+        result = {}
+        remaining = set(names)
+        for (namespace, attr_cls) in BIOS_NAMESPACES:
+            if not remaining:
+                break
+
+            filter_query = _build_attribute_filter_query(namespace, remaining)
+            attribs = self._get_config(namespace, attr_cls, True,
+                                       filter_query=filter_query,
+                                       wait_for_idrac=False)
+            result.update(attribs)
+            remaining -= set(attribs)
+
+        return result
+
+    def _set_bios_attributes(self, new_settings, attrib_names):
+        selectors = {'CreationClassName': 'DCIM_BIOSService',
+                     'Name': 'DCIM:BIOSService',
+                     'SystemCreationClassName': 'DCIM_ComputerSystem',
+                     'SystemName': 'DCIM:ComputerSystem'}
+        properties = {'Target': BIOS_DEVICE_FQDD,
+                      'AttributeName': attrib_names,
+                      'AttributeValue': [new_settings[attr] for attr
+                                         in attrib_names]}
+        doc = self.client.invoke(uris.DCIM_BIOSService, 'SetAttributes',
+                                 selectors, properties)
+
+        return utils.is_reboot_required(doc, uris.DCIM_BIOSService)
+
     def set_bios_settings(self, new_settings):
         """Sets the BIOS configuration
 
@@ -519,12 +718,18 @@ class BIOSConfiguration(object):
         attributes passed in. For the values to be applied, a config job must
         be created and the node must be rebooted.
 
+        In idempotent mode, only the attributes passed in are read, and the
+        attributes whose pending value already is the proposed one are left
+        alone as well.
+
         :param new_settings: a dictionary containing the proposed values, with
                              each key being the name of attribute and the
                              value being the proposed value.
         :returns: a dictionary containing the commit_needed key with a boolean
                   value indicating whether a config job must be created for the
-                  values to be applied.
+                  values to be applied. In idempotent mode, it also contains
+                  the changed key with a boolean value indicating whether any
+                  attribute was set.
         :raises: WSManRequestFailure on request failures
         :raises: WSManInvalidResponse when receiving invalid response
         :raises: DRACOperationFailed on error reported back by the DRAC
@@ -533,68 +738,150 @@ class BIOSConfiguration(object):
         :raises: InvalidParameterValue on invalid BIOS attribute
         """
 
-        current_settings = self.list_bios_settings(by_name=True)
-        # BIOS settings are returned as dict indexed by InstanceID.
-        # However DCIM_BIOSService requires attribute name, not instance id
-        # so recreate this as a dict indexed by attribute name
-        # TODO(anish) : Enable this code if/when by_name gets deprecated
-        # bios_settings = self.list_bios_settings(by_name=False)
-        # current_settings = dict((value.name, value)
-        #                         for key, value in bios_settings.items())
-        unknown_keys = set(new_settings) - set(current_settings)
-        if unknown_keys:
-            msg = ('Unknown BIOS attributes found: %(unknown_keys)r' %
-                   {'unknown_keys': unknown_keys})
-            raise exceptions.InvalidParameterValue(reason=msg)
-
-        read_only_keys = []
-        unchanged_attribs = []
-        invalid_attribs_msgs = []
-        attrib_names = []
-        candidates = set(new_settings)
-
-        for attr in candidates:
-            if str(new_settings[attr]) == str(
-                    current_settings[attr].current_value):
-                unchanged_attribs.append(attr)
-            elif current_settings[attr].read_only:
-                read_only_keys.append(attr)
-            else:
-                validation_msg = current_settings[attr].validate(
-                    new_settings[attr])
-                if validation_msg is None:
-                    attrib_names.append(attr)
-                else:
-                    invalid_attribs_msgs.append(validation_msg)
+        idempotent = self.client.idempotent
+        if idempotent:
+            current_settings = self._list_bios_settings_by_names(new_settings)
+            attrib_names, unchanged_attribs = utils.check_attribute_settings(
+                new_settings, current_settings, _is_effective_value, 'BIOS')
+        else:
+            current_settings = self.list_bios_settings(by_name=True)
+            # BIOS settings are returned as dict indexed by InstanceID.
+            # However DCIM_BIOSService requires attribute name, not instance
+            # id so recreate this as a dict indexed by attribute name
+            # TODO(anish) : Enable this code if/when by_name gets deprecated
+            # bios_settings = self.list_bios_settings(by_name=False)
+            # current_settings = dict((value.name, value)
+            #                         for key, value in bios_settings.items())
+            attrib_names, unchanged_attribs = utils.check_attribute_settings(
+                new_settings, current_settings, kind='BIOS')
 
         if unchanged_attribs:
             LOG.warning('Ignoring unchanged BIOS attributes: %r',
                         unchanged_attribs)
 
-        if invalid_attribs_msgs or read_only_keys:
-            if read_only_keys:
-                read_only_msg = ['Cannot set read-only BIOS attributes: %r.'
-                                 % read_only_keys]
-            else:
-                read_only_msg = []
+        if not attrib_names:
+            result = {'commit_required': False}
+        else:
+            result = {'commit_required': self._set_bios_attributes(
+                new_settings, attrib_names)}
 
-            drac_messages = '\n'.join(invalid_attribs_msgs + read_only_msg)
-            raise exceptions.DRACOperationFailed(
-                drac_messages=drac_messages)
+        if idempotent:
+            result['changed'] = bool(attrib_names)
 
-        if not attrib_names:
-            return {'commit_required': False}
+        return result
 
-        selectors = {'CreationClassName': 'DCIM_BIOSService',
-                     'Name': 'DCIM:BIOSService',
-                     'SystemCreationClassName': 'DCIM_ComputerSystem',
-                     'SystemName': 'DCIM:ComputerSystem'}
-        properties = {'Target': 'BIOS.Setup.1-1',
-                      'AttributeName': attrib_names,
-                      'AttributeValue': [new_settings[attr] for attr
-                                         in attrib_names]}
-        doc = self.client.invoke(uris.DCIM_BIOSService, 'SetAttributes',
-                                 selectors, properties)
+    def reconcile_bios_settings(self, desired, reboot=False):
+        """Brings the BIOS configuration to the desired state
+
+        Only the attributes in the desired state are read. An attribute is
+        left alone when its pending value, or its current value if nothing is
+        pending, already matches the desired one. The other attributes are set
+        with a single SetAttributes call and at most one config job is created
+        to apply the changes. A host that is already compliant is not written
+        to at all.
+
+        :param desired: a dictionary containing the desired values, with each
+                        key being the name of attribute and the value being
+                        the desired value.
+        :param reboot: indicates whether a RebootJob should also be created or
+                       not, when a config job is created
+        :returns: a dictionary containing the changed key with a boolean value
+                  indicating whether anything was written, the job_id key with
+                  the id of the config job applying the changes or None, and
+                  the attributes key with a dictionary mapping the name of
+                  each attribute to its outcome: 'unchanged', 'pending' if the
+                  desired value is already waiting to be applied, or 'set'.
+        :raises: WSManRequestFailure on request failures
+        :raises: WSManInvalidResponse when receiving invalid response
+        :raises: DRACOperationFailed on error reported back by the DRAC
+                 interface
+        :raises: DRACUnexpectedReturnValue on return value mismatch
+        :raises: InvalidParameterValue on invalid BIOS attribute
+        """
+
+        current_settings = self._list_bios_settings_by_names(desired)
+        attrib_names, unchanged_attribs = utils.check_attribute_settings(
+            desired, current_settings, _is_effective_value, 'BIOS')
 
-        return {'commit_required': utils.is_reboot_required(
-            doc, uris.DCIM_BIOSService)}
+        outcomes = {}
+        for attr in unchanged_attribs:
+            if current_settings[attr].pending_value is None:
+                outcomes[attr] = constants.SETTING_UNCHANGED
+            else:
+                outcomes[attr] = constants.SETTING_PENDING
+        for attr in attrib_names:
+            outcomes[attr] = constants.SETTING_SET
+
+        job_mgmt = job.JobManagement(self.client)
+        job_id = None
+        commit_required = False
+        if attrib_names:
+            commit_required = self._set_bios_attributes(desired,
+                                                        attrib_names)
+        elif constants.SETTING_PENDING in outcomes.values():
+            # The pending values may already be scheduled for application.
+            bios_jobs = [drac_job for drac_job
+                         in job_mgmt.list_jobs(only_unfinished=True)
+                         if drac_job.name == BIOS_CONFIG_JOB_NAME]
+            if bios_jobs:
+                job_id = bios_jobs[0].id
+            else:
+                commit_required = True
+
+        if commit_required:
+            job_id = job_mgmt.create_config_job(
+                resource_uri=uris.DCIM_BIOSService,
+                cim_creation_class_name='DCIM_BIOSService',
+                cim_name='DCIM:BIOSService', target=BIOS_DEVICE_FQDD,
+                reboot=reboot)
+
+        return {'changed': bool(attrib_names) or commit_required,
+                'job_id': job_id,
+                'attributes': outcomes}
+
+
+def get_drac_power_state(target_state):
+    """Returns the DRAC value of a power state
+
+    :param target_state: power state, e.g. 'POWER_ON'
+    :returns: the RequestedState value of the power state
+    :raises: InvalidParameterValue on unknown power state
+    """
+    try:
+        return REVERSE_POWER_STATES[target_state]
+    except KeyError:
+        msg = ("'%(target_state)s' is not supported. "
+               "Supported power states: %(supported_power_states)r") % {
+                   'target_state': target_state,
+                   'supported_power_states': list(REVERSE_POWER_STATES)}
+        raise exceptions.InvalidParameterValue(reason=msg)
+
+
+def check_waitable_power_state(target_state):
+    """Checks that a power state can be waited for
+
+    :param target_state: power state, e.g. 'POWER_ON'
+    :raises: InvalidParameterValue on unknown power state, or on 'REBOOT',
+             as a node may remain powered on while it reboots
+    """
+    get_drac_power_state(target_state)
+    if target_state == constants.REBOOT:
+        msg = ("Waiting for power state '%(target_state)s' is not supported, "
+               "the node may remain powered on while it reboots" %
+               {'target_state': target_state})
+        raise exceptions.InvalidParameterValue(reason=msg)
+
+
+def _is_effective_value(attr, value):
+    # the pending value, if any, is the one the attribute is going to take
+    if attr.pending_value is not None:
+        return str(value) == str(attr.pending_value)
+    return str(value) == str(attr.current_value)
+
+
+def _build_attribute_filter_query(resource_uri, names):
+    utils.check_filter_values(names, 'BIOS attribute names')
+    class_name = resource_uri.rsplit('/', 1)[-1]
+    conditions = ' or '.join('AttributeName="%s"' % name
+                             for name in sorted(names))
+    return 'select * from %s where %s' % (class_name, conditions)
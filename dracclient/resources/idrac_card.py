@@ -11,10 +11,14 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import logging
+
 from dracclient.resources import uris
 from dracclient import utils
 from dracclient import wsman
 
+LOG = logging.getLogger(__name__)
+
 
 class iDRACCardConfiguration(object):
 
@@ -47,6 +51,45 @@ class iDRACCardConfiguration(object):
             result.update(attribs)
         return result
 
+    def set_idrac_settings(self, new_settings):
+        """Sets the iDRACCard configuration
+
+        To be more precise, it sets the pending_value parameter for each of the
+        attributes passed in. The attributes are validated against the current
+        settings, the unchanged ones are skipped and the others are set with a
+        single SetAttributes call per iDRAC card.
+
+        :param new_settings: a dictionary containing the proposed values, with
+                             each key being the InstanceID of the attribute,
+                             as returned by list_idrac_settings, and the value
+                             being the proposed value.
+        :returns: a dictionary containing the commit_required key with a
+                  boolean value indicating whether a config job must be
+                  created for the values to be applied.
+        :raises: WSManRequestFailure on request failures
+        :raises: WSManInvalidResponse when receiving invalid response
+        :raises: DRACOperationFailed on error reported back by the DRAC
+                 interface or on invalid values
+        :raises: DRACUnexpectedReturnValue on return value mismatch
+        :raises: InvalidParameterValue on unknown iDRACCard attribute or
+                 invalid values
+        """
+        current_settings = self.list_idrac_settings()
+        attrib_keys, unchanged_attribs = utils.check_attribute_settings(
+            new_settings, current_settings)
+
+        if unchanged_attribs:
+            LOG.warning('Ignoring unchanged iDRACCard attributes: %r',
+                        unchanged_attribs)
+
+        selectors = {'CreationClassName': 'DCIM_iDRACCardService',
+                     'Name': 'DCIM:iDRACCardService',
+                     'SystemCreationClassName': 'DCIM_ComputerSystem',
+                     'SystemName': 'DCIM:ComputerSystem'}
+        return {'commit_required': utils.set_attributes_by_target(
+            self.client, uris.DCIM_iDRACCardService, selectors,
+            new_settings, current_settings, attrib_keys)}
+
     def _get_config(self, resource, attr_cls):
         result = {}
         doc = self.client.enumerate(resource)
@@ -60,9 +103,12 @@ class iDRACCardConfiguration(object):
         return result
 
 
-class iDRACCardAttribute(object):
+class iDRACCardAttribute(utils.FrozenSlotsObject):
     """Generic iDRACCard attribute class"""
 
+    __slots__ = ('name', 'instance_id', 'current_value', 'pending_value',
+                 'read_only', 'fqdd', 'group_id')
+
     def __init__(self, name, instance_id, current_value, pending_value,
                  read_only, fqdd, group_id):
         """Creates iDRACCardAttribute object
@@ -78,16 +124,11 @@ class iDRACCardAttribute(object):
                 Attribute
         :param group_id: GroupID of the iDRACCard Attribute
         """
-        self.name = name
-        self.instance_id = instance_id
-        self.current_value = current_value
-        self.pending_value = pending_value
-        self.read_only = read_only
-        self.fqdd = fqdd
-        self.group_id = group_id
-
-    def __eq__(self, other):
-        return self.__dict__ == other.__dict__
+        self._set_fields(name=utils.intern_string(name),
+                         instance_id=instance_id,
+                         current_value=current_value,
+                         pending_value=pending_value,
+                         read_only=read_only, fqdd=fqdd, group_id=group_id)
 
     @classmethod
     def parse(cls, namespace, idrac_attr_xml):
@@ -108,13 +149,17 @@ class iDRACCardAttribute(object):
         group_id = utils.get_wsman_resource_attr(
             idrac_attr_xml, namespace, 'GroupID')
 
-        return cls(name, instance_id, current_value, pending_value,
-                   (read_only == 'true'), fqdd, group_id)
+        return cls(name, utils.pooled(instance_id),
+                   utils.pooled(current_value), utils.pooled(pending_value),
+                   (read_only == 'true'), utils.pooled(fqdd),
+                   utils.pooled(group_id))
 
 
 class iDRACCardEnumerableAttribute(iDRACCardAttribute):
     """Enumerable iDRACCard attribute class"""
 
+    __slots__ = ('possible_values',)
+
     namespace = uris.DCIM_iDRACCardEnumeration
 
     def __init__(self, name, instance_id, current_value, pending_value,
@@ -139,7 +184,7 @@ class iDRACCardEnumerableAttribute(iDRACCardAttribute):
                                                            pending_value,
                                                            read_only, fqdd,
                                                            group_id)
-        self.possible_values = possible_values
+        self._set_fields(possible_values=utils.shared_tuple(possible_values))
 
     @classmethod
     def parse(cls, idrac_attr_xml):
@@ -163,13 +208,15 @@ class iDRACCardEnumerableAttribute(iDRACCardAttribute):
                    " It must be in %(possible_values)r.") % {
                        'attr': self.name,
                        'val': new_value,
-                       'possible_values': self.possible_values}
+                       'possible_values': list(self.possible_values)}
             return msg
 
 
 class iDRACCardStringAttribute(iDRACCardAttribute):
     """String iDRACCard attribute class"""
 
+    __slots__ = ('min_length', 'max_length')
+
     namespace = uris.DCIM_iDRACCardString
 
     def __init__(self, name, instance_id, current_value, pending_value,
@@ -194,8 +241,7 @@ class iDRACCardStringAttribute(iDRACCardAttribute):
                                                        pending_value,
                                                        read_only, fqdd,
                                                        group_id)
-        self.min_length = min_length
-        self.max_length = max_length
+        self._set_fields(min_length=min_length, max_length=max_length)
 
     @classmethod
     def parse(cls, idrac_attr_xml):
@@ -212,10 +258,26 @@ class iDRACCardStringAttribute(iDRACCardAttribute):
                    idrac_attr.read_only, idrac_attr.fqdd, idrac_attr.group_id,
                    min_length, max_length)
 
+    def validate(self, new_value):
+        """Validates new value"""
+
+        length = len(str(new_value))
+        if length < self.min_length or length > self.max_length:
+            msg = ("Attribute '%(attr)s' cannot be set to a value of length "
+                   "%(length)d. Its length must be between %(min)d and "
+                   "%(max)d.") % {
+                       'attr': self.name,
+                       'length': length,
+                       'min': self.min_length,
+                       'max': self.max_length}
+            return msg
+
 
 class iDRACCardIntegerAttribute(iDRACCardAttribute):
     """Integer iDRACCard attribute class"""
 
+    __slots__ = ('lower_bound', 'upper_bound')
+
     namespace = uris.DCIM_iDRACCardInteger
 
     def __init__(self, name, instance_id, current_value, pending_value,
@@ -240,8 +302,7 @@ class iDRACCardIntegerAttribute(iDRACCardAttribute):
                                                         pending_value,
                                                         read_only, fqdd,
                                                         group_id)
-        self.lower_bound = lower_bound
-        self.upper_bound = upper_bound
+        self._set_fields(lower_bound=lower_bound, upper_bound=upper_bound)
 
     @classmethod
     def parse(cls, idrac_attr_xml):
@@ -253,20 +314,26 @@ class iDRACCardIntegerAttribute(iDRACCardAttribute):
         upper_bound = utils.get_wsman_resource_attr(
             idrac_attr_xml, cls.namespace, 'UpperBound')
 
-        if idrac_attr.current_value:
-            idrac_attr.current_value = int(idrac_attr.current_value)
-        if idrac_attr.pending_value:
-            idrac_attr.pending_value = int(idrac_attr.pending_value)
+        current_value = idrac_attr.current_value
+        if current_value:
+            current_value = int(current_value)
+        pending_value = idrac_attr.pending_value
+        if pending_value:
+            pending_value = int(pending_value)
 
-        return cls(idrac_attr.name, idrac_attr.instance_id,
-                   idrac_attr.current_value, idrac_attr.pending_value,
-                   idrac_attr.read_only, idrac_attr.fqdd, idrac_attr.group_id,
-                   int(lower_bound), int(upper_bound))
+        return cls(idrac_attr.name, idrac_attr.instance_id, current_value,
+                   pending_value, idrac_attr.read_only, idrac_attr.fqdd,
+                   idrac_attr.group_id, int(lower_bound), int(upper_bound))
 
     def validate(self, new_value):
         """Validates new value"""
 
-        val = int(new_value)
+        try:
+            val = int(new_value)
+        except (TypeError, ValueError):
+            return ("Attribute '%(attr)s' cannot be set to value '%(val)s'."
+                    " It must be an integer.") % {'attr': self.name,
+                                                  'val': new_value}
         if val < self.lower_bound or val > self.upper_bound:
             msg = ('Attribute %(attr)s cannot be set to value %(val)d.'
                    ' It must be between %(lower)d and %(upper)d.') % {
@@ -89,10 +89,10 @@ class InventoryManagement(object):
         arch64 = (CPU_CHARACTERISTICS_64BIT == drac_characteristics)
 
         return CPU(
-            id=self._get_cpu_attr(cpu, 'FQDD'),
+            id=utils.pooled(self._get_cpu_attr(cpu, 'FQDD')),
             cores=int(self._get_cpu_attr(cpu, 'NumberOfProcessorCores')),
             speed_mhz=int(self._get_cpu_attr(cpu, 'CurrentClockSpeed')),
-            model=self._get_cpu_attr(cpu, 'Model'),
+            model=utils.pooled(self._get_cpu_attr(cpu, 'Model')),
             status=constants.PRIMARY_STATUS[
                 self._get_cpu_attr(cpu, 'PrimaryStatus')],
             ht_enabled=bool(self._get_cpu_attr(cpu, 'HyperThreadingEnabled',
@@ -155,7 +155,7 @@ class InventoryManagement(object):
         return [self._parse_drac_nic(nic) for nic in drac_nics]
 
     def _parse_drac_nic(self, drac_nic):
-        fqdd = self._get_nic_attr(drac_nic, 'FQDD')
+        fqdd = utils.pooled(self._get_nic_attr(drac_nic, 'FQDD'))
         drac_speed = self._get_nic_attr(drac_nic, 'LinkSpeed')
         drac_duplex = self._get_nic_attr(drac_nic, 'LinkDuplex')
 
@@ -165,7 +165,8 @@ class InventoryManagement(object):
             model=self._get_nic_attr(drac_nic, 'ProductName'),
             speed_mbps=NIC_LINK_SPEED_MBPS[drac_speed],
             duplex=NIC_LINK_DUPLEX[drac_duplex],
-            media_type=self._get_nic_attr(drac_nic, 'MediaType'))
+            media_type=utils.pooled(self._get_nic_attr(drac_nic,
+                                                       'MediaType')))
 
     def _get_nic_attr(self, drac_nic, attr_name):
         return utils.get_wsman_resource_attr(drac_nic, uris.DCIM_NICView,
@@ -13,7 +13,10 @@
 
 import collections
 import logging
+import time
 
+from dracclient import constants
+from dracclient import exceptions
 from dracclient.resources import uris
 from dracclient import utils
 from dracclient import wsman
@@ -42,6 +45,36 @@ class Job(JobTuple):
         return self.status
 
 
+UNFINISHED_JOBS_CONDITION = ('Name != "CLEARALL" and '
+                             'JobStatus != "Reboot Completed" and '
+                             'JobStatus != "Reboot Failed" and '
+                             'JobStatus != "Completed" and '
+                             'JobStatus != "Completed with Errors" and '
+                             'JobStatus != "Failed"')
+
+UNFINISHED_JOBS_FILTER_QUERY = ('select * from DCIM_LifecycleJob where %s'
+                                % UNFINISHED_JOBS_CONDITION)
+
+FAILED_JOB_STATUSES = ('Failed', 'Completed with Errors')
+
+
+def check_jobs(jobs):
+    """Checks that finished jobs did not fail
+
+    :param jobs: a list of Job objects, as returned by wait_for_jobs. The jobs
+                 not found are None and ignored.
+    :raises: DRACOperationFailed listing the failed jobs
+    """
+    failed_jobs = [drac_job for drac_job in jobs
+                   if drac_job is not None and
+                   drac_job.status in FAILED_JOB_STATUSES]
+    if failed_jobs:
+        raise exceptions.DRACOperationFailed(
+            drac_messages=['Job %(id)s %(status)s: %(message)s' %
+                           drac_job._asdict()
+                           for drac_job in failed_jobs])
+
+
 class JobManagement(object):
 
     def __init__(self, client):
@@ -65,13 +98,7 @@ class JobManagement(object):
 
         filter_query = None
         if only_unfinished:
-            filter_query = ('select * from DCIM_LifecycleJob '
-                            'where Name != "CLEARALL" and '
-                            'JobStatus != "Reboot Completed" and '
-                            'JobStatus != "Reboot Failed" and '
-                            'JobStatus != "Completed" and '
-                            'JobStatus != "Completed with Errors" and '
-                            'JobStatus != "Failed"')
+            filter_query = UNFINISHED_JOBS_FILTER_QUERY
 
         doc = self.client.enumerate(uris.DCIM_LifecycleJob,
                                     filter_query=filter_query)
@@ -81,6 +108,26 @@ class JobManagement(object):
 
         return [self._parse_drac_job(drac_job) for drac_job in drac_jobs]
 
+    def count_jobs(self, only_unfinished=False):
+        """Returns the number of jobs in the job queue
+
+        The jobs are not listed when the DRAC provides an estimate of their
+        number.
+
+        :param only_unfinished: indicates whether only unfinished jobs should
+                                be counted
+        :returns: the number of jobs
+        :raises: WSManRequestFailure on request failures
+        :raises: WSManInvalidResponse when receiving invalid response
+        """
+
+        condition = None
+        if only_unfinished:
+            condition = UNFINISHED_JOBS_CONDITION
+
+        return self.client.count(uris.DCIM_LifecycleJob, 'InstanceID',
+                                 condition=condition)
+
     def get_job(self, job_id):
         """Returns a job from the job queue
 
@@ -104,6 +151,57 @@ class JobManagement(object):
         if drac_job is not None:
             return self._parse_drac_job(drac_job)
 
+    def wait_for_jobs(self, job_ids, timeout=None, interval=None):
+        """Waits until all the jobs are finished
+
+        The job queue is polled for unfinished jobs, so that the cost of a
+        poll does not depend on the number of jobs waited for. The polls do not
+        wait for the iDRAC to be ready, as it is not while the jobs are run.
+
+        :param job_ids: ids of the jobs
+        :param timeout: maximum number of seconds to wait for the jobs. If
+                        None, DEFAULT_JOB_WAIT_TIMEOUT_SEC is used.
+        :param interval: number of seconds between polls. If None,
+                         DEFAULT_JOB_POLL_INTERVAL_SEC is used.
+        :returns: a list of Job objects in the order of job_ids
+        :raises: WSManRequestFailure on request failures
+        :raises: WSManInvalidResponse when receiving invalid response
+        :raises: DRACOperationFailed on error reported back by the DRAC
+                 interface or timeout
+        """
+
+        if timeout is None:
+            timeout = constants.DEFAULT_JOB_WAIT_TIMEOUT_SEC
+
+        if interval is None:
+            interval = constants.DEFAULT_JOB_POLL_INTERVAL_SEC
+
+        job_ids = list(job_ids)
+        deadline = time.time() + timeout
+        while True:
+            doc = self.client.enumerate(
+                uris.DCIM_LifecycleJob,
+                filter_query=UNFINISHED_JOBS_FILTER_QUERY,
+                wait_for_idrac=False)
+            drac_jobs = utils.find_xml(doc, 'DCIM_LifecycleJob',
+                                       uris.DCIM_LifecycleJob, find_all=True)
+            unfinished = set(self._get_job_attr(drac_job, 'InstanceID')
+                             for drac_job in drac_jobs)
+            if unfinished.isdisjoint(job_ids):
+                break
+
+            if time.time() >= deadline:
+                err_msg = ('Timed out waiting for jobs %r to finish' %
+                           sorted(unfinished.intersection(job_ids)))
+                LOG.error(err_msg)
+                raise exceptions.DRACOperationFailed(drac_messages=err_msg)
+
+            LOG.debug('Waiting for jobs %r to finish',
+                      sorted(unfinished.intersection(job_ids)))
+            time.sleep(interval)
+
+        return [self.get_job(job_id) for job_id in job_ids]
+
     def create_config_job(self, resource_uri, cim_creation_class_name,
                           cim_name, target,
                           cim_system_creation_class_name='DCIM_ComputerSystem',
@@ -11,10 +11,22 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
+import logging
+import re
+
 from dracclient.resources import uris
 from dracclient import utils
 from dracclient import wsman
 
+LOG = logging.getLogger(__name__)
+
+LC_CONTROLLER_VERSION_12G = (2, 0, 0)
+
+Capabilities = collections.namedtuple(
+    'Capabilities',
+    ['lc_version', 'generation', 'model', 'bios_version'])
+
 
 class LifecycleControllerManagement(object):
 
@@ -28,6 +40,9 @@ class LifecycleControllerManagement(object):
     def get_version(self):
         """Returns the Lifecycle controller version
 
+        The capabilities of the node cached on the client are refreshed as
+        well.
+
         :returns: Lifecycle controller version as a tuple of integers
         :raises: WSManRequestFailure on request failures
         :raises: WSManInvalidResponse when receiving invalid response
@@ -35,11 +50,53 @@ class LifecycleControllerManagement(object):
                  interface
         """
 
-        doc = self.client.enumerate(uris.DCIM_SystemView, wait_for_idrac=False)
-        lc_version_str = utils.find_xml(doc, 'LifecycleControllerVersion',
-                                        uris.DCIM_SystemView).text
+        return self.get_capabilities(refresh=True).lc_version
+
+    def get_capabilities(self, refresh=False):
+        """Returns the capabilities of the node
+
+        The capabilities are read once and cached on the client, so that the
+        resource managers sharing the client can choose how to query the node
+        without issuing extra requests.
+
+        :param refresh: indicates whether the capabilities should be read
+                        again from the node, even if already cached
+        :returns: a Capabilities object
+        :raises: WSManRequestFailure on request failures
+        :raises: WSManInvalidResponse when receiving invalid response
+        :raises: DRACOperationFailed on error reported back by the DRAC
+                 interface
+        """
 
-        return tuple(map(int, (lc_version_str.split('.'))))
+        if self.client.capabilities is not None and not refresh:
+            return self.client.capabilities
+
+        doc = self.client.enumerate(uris.DCIM_SystemView, wait_for_idrac=False)
+        lc_version_str = self._get_system_view_attr(
+            doc, 'LifecycleControllerVersion')
+        lc_version = tuple(map(int, (lc_version_str.split('.'))))
+
+        generation = None
+        generation_str = self._get_system_view_attr(doc, 'SystemGeneration')
+        if generation_str is not None:
+            match = re.match(r'(\d+)G', generation_str)
+            if match:
+                generation = int(match.group(1))
+        if generation is None and lc_version < LC_CONTROLLER_VERSION_12G:
+            generation = 11
+
+        capabilities = Capabilities(
+            lc_version=lc_version,
+            generation=generation,
+            model=self._get_system_view_attr(doc, 'Model'),
+            bios_version=self._get_system_view_attr(doc, 'BIOSVersionString'))
+        self.client.capabilities = capabilities
+        return capabilities
+
+    def _get_system_view_attr(self, doc, attr_name):
+        elem = utils.find_xml(doc, attr_name, uris.DCIM_SystemView)
+        if elem is not None:
+            return elem.text
 
 
 class LCConfiguration(object):
@@ -70,6 +127,54 @@ class LCConfiguration(object):
             result.update(attribs)
         return result
 
+    def set_lifecycle_settings(self, new_settings):
+        """Sets the LC configuration
+
+        To be more precise, it sets the pending_value parameter for each of the
+        attributes passed in. The attributes are validated against the current
+        settings, the unchanged ones are skipped and the others are set with a
+        single SetAttributes call.
+
+        :param new_settings: a dictionary containing the proposed values, with
+                             each key being the InstanceID of the attribute,
+                             as returned by list_lifecycle_settings, and the
+                             value being the proposed value.
+        :returns: a dictionary containing the commit_required key with a
+                  boolean value indicating whether a config job must be
+                  created for the values to be applied.
+        :raises: WSManRequestFailure on request failures
+        :raises: WSManInvalidResponse when receiving invalid response
+        :raises: DRACOperationFailed on error reported back by the DRAC
+                 interface or on invalid values
+        :raises: DRACUnexpectedReturnValue on return value mismatch
+        :raises: InvalidParameterValue on unknown LC attribute or invalid
+                 values
+        """
+        current_settings = self.list_lifecycle_settings()
+        attrib_keys, unchanged_attribs = utils.check_attribute_settings(
+            new_settings, current_settings)
+
+        if unchanged_attribs:
+            LOG.warning('Ignoring unchanged LC attributes: %r',
+                        unchanged_attribs)
+
+        if not attrib_keys:
+            return {'commit_required': False}
+
+        selectors = {'CreationClassName': 'DCIM_LCService',
+                     'Name': 'DCIM:LCService',
+                     'SystemCreationClassName': 'DCIM_ComputerSystem',
+                     'SystemName': 'DCIM:ComputerSystem'}
+        properties = {'AttributeName': [current_settings[key].name
+                                        for key in attrib_keys],
+                      'AttributeValue': [new_settings[key]
+                                         for key in attrib_keys]}
+        doc = self.client.invoke(uris.DCIM_LCService, 'SetAttributes',
+                                 selectors, properties)
+
+        return {'commit_required': utils.is_commit_required(
+            doc, uris.DCIM_LCService)}
+
     def _get_config(self, resource, attr_cls):
         result = {}
 
@@ -83,9 +188,12 @@ class LCConfiguration(object):
         return result
 
 
-class LCAttribute(object):
+class LCAttribute(utils.FrozenSlotsObject):
     """Generic LC attribute class"""
 
+    __slots__ = ('name', 'instance_id', 'current_value', 'pending_value',
+                 'read_only')
+
     def __init__(self, name, instance_id, current_value, pending_value,
                  read_only):
         """Creates LCAttribute object
@@ -97,14 +205,11 @@ class LCAttribute(object):
                 an unprocessed change (eg. config job not completed)
         :param read_only: indicates whether this LC attribute can be changed
         """
-        self.name = name
-        self.instance_id = instance_id
-        self.current_value = current_value
-        self.pending_value = pending_value
-        self.read_only = read_only
-
-    def __eq__(self, other):
-        return self.__dict__ == other.__dict__
+        self._set_fields(name=utils.intern_string(name),
+                         instance_id=instance_id,
+                         current_value=current_value,
+                         pending_value=pending_value,
+                         read_only=read_only)
 
     @classmethod
     def parse(cls, namespace, lifecycle_attr_xml):
@@ -121,13 +226,16 @@ class LCAttribute(object):
         read_only = utils.get_wsman_resource_attr(
             lifecycle_attr_xml, namespace, 'IsReadOnly')
 
-        return cls(name, instance_id, current_value, pending_value,
+        return cls(name, utils.pooled(instance_id),
+                   utils.pooled(current_value), utils.pooled(pending_value),
                    (read_only == 'true'))
 
 
 class LCEnumerableAttribute(LCAttribute):
     """Enumerable LC attribute class"""
 
+    __slots__ = ('possible_values',)
+
     namespace = uris.DCIM_LCEnumeration
 
     def __init__(self, name, instance_id, current_value, pending_value,
@@ -145,7 +253,7 @@ class LCEnumerableAttribute(LCAttribute):
         super(LCEnumerableAttribute, self).__init__(name, instance_id,
                                                     current_value,
                                                     pending_value, read_only)
-        self.possible_values = possible_values
+        self._set_fields(possible_values=utils.shared_tuple(possible_values))
 
     @classmethod
     def parse(cls, lifecycle_attr_xml):
@@ -161,10 +269,23 @@ class LCEnumerableAttribute(LCAttribute):
                    lifecycle_attr.current_value, lifecycle_attr.pending_value,
                    lifecycle_attr.read_only, possible_values)
 
+    def validate(self, new_value):
+        """Validates new value"""
+
+        if str(new_value) not in self.possible_values:
+            msg = ("Attribute '%(attr)s' cannot be set to value '%(val)s'."
+                   " It must be in %(possible_values)r.") % {
+                       'attr': self.name,
+                       'val': new_value,
+                       'possible_values': list(self.possible_values)}
+            return msg
+
 
 class LCStringAttribute(LCAttribute):
     """String LC attribute class"""
 
+    __slots__ = ('min_length', 'max_length')
+
     namespace = uris.DCIM_LCString
 
     def __init__(self, name, instance_id, current_value, pending_value,
@@ -183,8 +304,7 @@ class LCStringAttribute(LCAttribute):
         super(LCStringAttribute, self).__init__(name, instance_id,
                                                 current_value, pending_value,
                                                 read_only)
-        self.min_length = min_length
-        self.max_length = max_length
+        self._set_fields(min_length=min_length, max_length=max_length)
 
     @classmethod
     def parse(cls, lifecycle_attr_xml):
@@ -199,3 +319,17 @@ class LCStringAttribute(LCAttribute):
         return cls(lifecycle_attr.name, lifecycle_attr.instance_id,
                    lifecycle_attr.current_value, lifecycle_attr.pending_value,
                    lifecycle_attr.read_only, min_length, max_length)
+
+    def validate(self, new_value):
+        """Validates new value"""
+
+        length = len(str(new_value))
+        if length < self.min_length or length > self.max_length:
+            msg = ("Attribute '%(attr)s' cannot be set to a value of length "
+                   "%(length)d. Its length must be between %(min)d and "
+                   "%(max)d.") % {
+                       'attr': self.name,
+                       'length': length,
+                       'min': self.min_length,
+                       'max': self.max_length}
+            return msg
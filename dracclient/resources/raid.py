@@ -11,6 +11,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import bisect
 import collections
 import logging
 
@@ -34,6 +35,27 @@ RAID_LEVELS = {
 
 REVERSE_RAID_LEVELS = dict((v, k) for (k, v) in RAID_LEVELS.items())
 
+RAIDLevelLayout = collections.namedtuple(
+    'RAIDLevelLayout',
+    ['min_span_length', 'max_span_length', 'parity_disks', 'mirrored',
+     'spanned'])
+
+# the disk layouts of the RAID levels a virtual disk can be created with:
+# the number of disks per span, the number of parity disks per span, whether
+# the data is mirrored and whether the virtual disk has several spans
+RAID_LEVEL_LAYOUTS = {
+    '0': RAIDLevelLayout(1, 32, 0, False, False),
+    '1': RAIDLevelLayout(2, 2, 0, True, False),
+    '5': RAIDLevelLayout(3, 32, 1, False, False),
+    '6': RAIDLevelLayout(4, 32, 2, False, False),
+    '1+0': RAIDLevelLayout(2, 2, 0, True, True),
+    '5+0': RAIDLevelLayout(3, 32, 1, False, True),
+    '6+0': RAIDLevelLayout(4, 32, 2, False, True),
+}
+
+# maximum number of spans of a virtual disk
+MAX_SPAN_DEPTH = 8
+
 DISK_RAID_STATUS = {
     '0': 'unknown',
     '1': 'ready',
@@ -174,6 +196,19 @@ class RAIDManagement(object):
         return [self._parse_drac_raid_controller(controller)
                 for controller in drac_raid_controllers]
 
+    def count_raid_controllers(self):
+        """Returns the number of RAID controllers
+
+        They are not listed when the DRAC provides an estimate of their
+        number.
+
+        :returns: the number of RAID controllers
+        :raises: WSManRequestFailure on request failures
+        :raises: WSManInvalidResponse when receiving invalid response
+        """
+
+        return self.client.count(uris.DCIM_ControllerView, 'FQDD')
+
     def _parse_drac_raid_controller(self, drac_controller):
         return RAIDController(
             id=self._get_raid_controller_attr(drac_controller, 'FQDD'),
@@ -214,6 +249,19 @@ class RAIDManagement(object):
         return [self._parse_drac_virtual_disk(disk)
                 for disk in drac_virtual_disks]
 
+    def count_virtual_disks(self):
+        """Returns the number of virtual disks
+
+        They are not listed when the DRAC provides an estimate of their
+        number.
+
+        :returns: the number of virtual disks
+        :raises: WSManRequestFailure on request failures
+        :raises: WSManInvalidResponse when receiving invalid response
+        """
+
+        return self.client.count(uris.DCIM_VirtualDiskView, 'FQDD')
+
     def _parse_drac_virtual_disk(self, drac_disk):
         fqdd = self._get_virtual_disk_attr(drac_disk, 'FQDD')
         drac_raid_level = self._get_virtual_disk_attr(drac_disk, 'RAIDTypes')
@@ -272,6 +320,19 @@ class RAIDManagement(object):
         return [self._parse_drac_physical_disk(disk)
                 for disk in drac_physical_disks]
 
+    def count_physical_disks(self):
+        """Returns the number of physical disks
+
+        They are not listed when the DRAC provides an estimate of their
+        number.
+
+        :returns: the number of physical disks
+        :raises: WSManRequestFailure on request failures
+        :raises: WSManInvalidResponse when receiving invalid response
+        """
+
+        return self.client.count(uris.DCIM_PhysicalDiskView, 'FQDD')
+
     def _parse_drac_physical_disk(self, drac_disk):
         fqdd = self._get_physical_disk_attr(drac_disk, 'FQDD')
         size_b = self._get_physical_disk_attr(drac_disk, 'SizeInBytes')
@@ -285,21 +346,22 @@ class RAIDManagement(object):
                                                          'BusProtocol')
 
         return PhysicalDisk(
-            id=fqdd,
-            description=self._get_physical_disk_attr(drac_disk,
-                                                     'DeviceDescription'),
-            controller=fqdd.split(':')[-1],
-            manufacturer=self._get_physical_disk_attr(drac_disk,
-                                                      'Manufacturer'),
-            model=self._get_physical_disk_attr(drac_disk, 'Model'),
+            id=utils.pooled(fqdd),
+            description=utils.pooled(self._get_physical_disk_attr(
+                drac_disk, 'DeviceDescription')),
+            controller=utils.pooled(fqdd.split(':')[-1]),
+            manufacturer=utils.pooled(self._get_physical_disk_attr(
+                drac_disk, 'Manufacturer')),
+            model=utils.pooled(self._get_physical_disk_attr(drac_disk,
+                                                            'Model')),
             media_type=PHYSICAL_DISK_MEDIA_TYPE[drac_media_type],
             interface_type=PHYSICAL_DISK_BUS_PROTOCOL[drac_bus_protocol],
             size_mb=int(size_b) / 2 ** 20,
             free_size_mb=int(free_size_b) / 2 ** 20,
             serial_number=self._get_physical_disk_attr(drac_disk,
                                                        'SerialNumber'),
-            firmware_version=self._get_physical_disk_attr(drac_disk,
-                                                          'Revision'),
+            firmware_version=utils.pooled(self._get_physical_disk_attr(
+                drac_disk, 'Revision')),
             status=constants.PRIMARY_STATUS[drac_status],
             raid_status=DISK_RAID_STATUS[drac_raid_status],
             sas_address=self._get_physical_disk_attr(drac_disk, 'SASAddress'))
@@ -308,6 +370,87 @@ class RAIDManagement(object):
         return utils.get_wsman_resource_attr(
             drac_disk, uris.DCIM_PhysicalDiskView, attr_name, nullable=True)
 
+    def get_raid_topology(self):
+        """Returns the RAID controllers, physical and virtual disks together
+
+        The three views are listed concurrently. They are listed again once
+        if a change between the listings made them inconsistent, e.g. a
+        virtual disk referencing a physical disk missing from its listing.
+
+        :returns: a RAIDTopology object
+        :raises: WSManRequestFailure on request failures
+        :raises: WSManInvalidResponse when receiving invalid response
+        :raises: DRACOperationFailed on error reported back by the DRAC
+                 interface, or if the views are still inconsistent when
+                 listed again
+        """
+        for attempt in range(2):
+            topology = RAIDTopology(*utils.run_concurrently(
+                [self.list_raid_controllers, self.list_physical_disks,
+                 self.list_virtual_disks]))
+            if topology.is_consistent():
+                return topology
+
+            LOG.warning('The RAID views of %s are inconsistent, as the RAID '
+                        'configuration changed while they were listed',
+                        self.client.host)
+
+        raise exceptions.DRACOperationFailed(
+            drac_messages=['The RAID views of %s remained inconsistent, as '
+                           'the RAID configuration kept changing while they '
+                           'were listed' % self.client.host])
+
+    def solve_raid_layout(self, raid_level, size_mb=None, raid_controller=None,
+                          media_type=None, interface_type=None,
+                          disk_name=None, include_non_raid=False,
+                          topology=None):
+        """Computes the virtual disks to create for a logical layout
+
+        :param raid_level: RAID level of the virtual disks
+        :param size_mb: size of the single virtual disk to create in
+                        megabytes. If None, the matching disks of each RAID
+                        controller are used up.
+        :param raid_controller: id of the RAID controller to use, or None for
+                                any
+        :param media_type: media type of the physical disks to use, 'hdd' or
+                           'ssd', or None for any
+        :param interface_type: interface type of the physical disks to use,
+                               e.g. 'sas', or None for any
+        :param disk_name: name of the virtual disks (optional)
+        :param include_non_raid: indicates whether the physical disks in
+                                 non-RAID mode can be used, once converted
+        :param topology: a RAIDTopology object. If None, the topology is
+                         listed.
+        :returns: a RAIDLayout object
+        :raises: WSManRequestFailure on request failures
+        :raises: WSManInvalidResponse when receiving invalid response
+        :raises: DRACOperationFailed on error reported back by the DRAC
+                 interface
+        :raises: InvalidParameterValue if no layout fits the request
+        """
+        if topology is None:
+            topology = self.get_raid_topology()
+
+        return solve_raid_layout(
+            topology, raid_level, size_mb=size_mb,
+            raid_controller=raid_controller, media_type=media_type,
+            interface_type=interface_type, disk_name=disk_name,
+            include_non_raid=include_non_raid)
+
+    def get_raid_validator(self):
+        """Returns a validator of RAID operations for the current state
+
+        :returns: a RAIDValidator object
+        :raises: WSManRequestFailure on request failures
+        :raises: WSManInvalidResponse when receiving invalid response
+        :raises: DRACOperationFailed on error reported back by the DRAC
+                 interface
+        """
+        topology = self.get_raid_topology()
+        return RAIDValidator(topology.raid_controllers,
+                             topology.physical_disks,
+                             topology.virtual_disks)
+
     def convert_physical_disks(self, physical_disks, raid_enable):
         """Converts a list of physical disks into or out of RAID mode.
 
@@ -320,8 +463,27 @@ class RAIDManagement(object):
                listed disks
         :returns: a dictionary containing the commit_needed key with a boolean
                   value indicating whether a config job must be created for the
-                  values to be applied.
+                  values to be applied. In idempotent mode, the RAID status of
+                  the disks is read first, only the disks not in the
+                  requested mode yet are converted, and the dictionary also
+                  contains the changed key with a boolean value indicating
+                  whether any disk was converted.
         """
+        idempotent = self.client.idempotent
+        if idempotent:
+            if physical_disks:
+                raid_statuses = self._get_raid_statuses(physical_disks)
+                # unknown disks are left for the DRAC to reject
+                physical_disks = [
+                    disk_id for disk_id in physical_disks
+                    if (raid_statuses.get(disk_id) is None or
+                        (raid_statuses[disk_id] == 'non-RAID') ==
+                        raid_enable)]
+            if not physical_disks:
+                LOG.debug('Physical disks of %s are already in the requested '
+                          'mode', self.client.host)
+                return {'commit_required': False, 'changed': False}
+
         invocation = 'ConvertToRAID' if raid_enable else 'ConvertToNonRAID'
 
         selectors = {'SystemCreationClassName': 'DCIM_ComputerSystem',
@@ -335,8 +497,30 @@ class RAIDManagement(object):
                                  selectors, properties,
                                  expected_return_value=utils.RET_SUCCESS)
 
-        return {'commit_required':
-                utils.is_reboot_required(doc, uris.DCIM_RAIDService)}
+        result = {'commit_required':
+                  utils.is_reboot_required(doc, uris.DCIM_RAIDService)}
+        if idempotent:
+            result['changed'] = True
+
+        return result
+
+    def _get_raid_statuses(self, physical_disks):
+        utils.check_filter_values(physical_disks, 'physical disk ids')
+        conditions = ' or '.join('FQDD="%s"' % disk_id
+                                 for disk_id in physical_disks)
+        filter_query = ('select FQDD, RaidStatus from DCIM_PhysicalDiskView '
+                        'where %s' % conditions)
+        doc = self.client.enumerate(uris.DCIM_PhysicalDiskView,
+                                    filter_query=filter_query)
+        drac_physical_disks = utils.find_xml(doc, 'DCIM_PhysicalDiskView',
+                                             uris.DCIM_PhysicalDiskView,
+                                             find_all=True)
+
+        return dict(
+            (self._get_physical_disk_attr(drac_disk, 'FQDD'),
+             DISK_RAID_STATUS[self._get_physical_disk_attr(drac_disk,
+                                                           'RaidStatus')])
+            for drac_disk in drac_physical_disks)
 
     def create_virtual_disk(self, raid_controller, physical_disks, raid_level,
                             size_mb, disk_name=None, span_length=None,
@@ -458,3 +642,712 @@ class RAIDManagement(object):
 
         return {'commit_required': utils.is_reboot_required(
             doc, uris.DCIM_RAIDService)}
+
+
+class RAIDTopology(object):
+    """Read-only snapshot of the RAID configuration of a node
+
+    The RAID controllers, physical disks and virtual disks are indexed once,
+    so that the cross references between them are looked up in constant
+    time. The lookup methods return tuples in the order of the listings.
+    """
+
+    def __init__(self, raid_controllers, physical_disks, virtual_disks):
+        """Creates RAIDTopology object
+
+        :param raid_controllers: a list of RAIDController objects
+        :param physical_disks: a list of PhysicalDisk objects
+        :param virtual_disks: a list of VirtualDisk objects
+        """
+        self._raid_controllers = tuple(raid_controllers)
+        self._physical_disks = tuple(physical_disks)
+        self._virtual_disks = tuple(virtual_disks)
+
+        physical_disks_by_controller = collections.defaultdict(list)
+        physical_disks_by_raid_status = collections.defaultdict(list)
+        for disk in self._physical_disks:
+            physical_disks_by_controller[disk.controller].append(disk)
+            physical_disks_by_raid_status[disk.raid_status].append(disk)
+
+        virtual_disks_by_controller = collections.defaultdict(list)
+        virtual_disks_by_physical_disk = collections.defaultdict(list)
+        for disk in self._virtual_disks:
+            virtual_disks_by_controller[disk.controller].append(disk)
+            for physical_disk_id in disk.physical_disks:
+                virtual_disks_by_physical_disk[physical_disk_id].append(disk)
+
+        self._controllers_by_id = dict(
+            (controller.id, controller)
+            for controller in self._raid_controllers)
+        self._physical_disks_by_id = dict(
+            (disk.id, disk) for disk in self._physical_disks)
+        self._virtual_disks_by_id = dict(
+            (disk.id, disk) for disk in self._virtual_disks)
+        self._physical_disks_by_controller = _freeze(
+            physical_disks_by_controller)
+        self._virtual_disks_by_controller = _freeze(
+            virtual_disks_by_controller)
+        self._virtual_disks_by_physical_disk = _freeze(
+            virtual_disks_by_physical_disk)
+        self._physical_disks_by_raid_status = _freeze(
+            physical_disks_by_raid_status)
+
+    def __repr__(self):
+        return ('%s(raid_controllers=%d, physical_disks=%d, '
+                'virtual_disks=%d)' % (type(self).__name__,
+                                       len(self._raid_controllers),
+                                       len(self._physical_disks),
+                                       len(self._virtual_disks)))
+
+    def __eq__(self, other):
+        if not isinstance(other, RAIDTopology):
+            return NotImplemented
+        return self._listings() == other._listings()
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+    def __hash__(self):
+        # the disks hold lists, so only their ids are hashed
+        return hash(tuple(tuple(item.id for item in listing)
+                          for listing in self._listings()))
+
+    def _listings(self):
+        return (self._raid_controllers, self._physical_disks,
+                self._virtual_disks)
+
+    @property
+    def raid_controllers(self):
+        """Tuple of the RAIDController objects listed"""
+        return self._raid_controllers
+
+    @property
+    def physical_disks(self):
+        """Tuple of the PhysicalDisk objects listed"""
+        return self._physical_disks
+
+    @property
+    def virtual_disks(self):
+        """Tuple of the VirtualDisk objects listed"""
+        return self._virtual_disks
+
+    def get_raid_controller(self, raid_controller):
+        """Returns a RAID controller by id, or None if unknown"""
+        return self._controllers_by_id.get(raid_controller)
+
+    def get_physical_disk(self, physical_disk):
+        """Returns a physical disk by id, or None if unknown"""
+        return self._physical_disks_by_id.get(physical_disk)
+
+    def get_virtual_disk(self, virtual_disk):
+        """Returns a virtual disk by id, or None if unknown"""
+        return self._virtual_disks_by_id.get(virtual_disk)
+
+    def get_physical_disks(self, raid_controller=None, raid_status=None):
+        """Returns the physical disks of a RAID controller and RAID status
+
+        :param raid_controller: id of the RAID controller, or None for all of
+                                them
+        :param raid_status: RAID status of the disks, e.g. 'ready', or None
+                            for any
+        :returns: a tuple of PhysicalDisk objects
+        """
+        if raid_controller is None and raid_status is None:
+            return self.physical_disks
+        elif raid_status is None:
+            return self._physical_disks_by_controller.get(raid_controller, ())
+
+        disks = self._physical_disks_by_raid_status.get(raid_status, ())
+        if raid_controller is None:
+            return disks
+
+        return tuple(disk for disk in disks
+                     if disk.controller == raid_controller)
+
+    def get_virtual_disks(self, raid_controller=None):
+        """Returns the virtual disks of a RAID controller
+
+        :param raid_controller: id of the RAID controller, or None for all of
+                                them
+        :returns: a tuple of VirtualDisk objects
+        """
+        if raid_controller is None:
+            return self.virtual_disks
+
+        return self._virtual_disks_by_controller.get(raid_controller, ())
+
+    def get_owning_virtual_disks(self, physical_disk):
+        """Returns the virtual disks a physical disk belongs to
+
+        :param physical_disk: id of the physical disk
+        :returns: a tuple of VirtualDisk objects, empty for a free disk
+        """
+        return self._virtual_disks_by_physical_disk.get(physical_disk, ())
+
+    def get_member_disks(self, virtual_disk):
+        """Returns the physical disks of a virtual disk
+
+        :param virtual_disk: id of the virtual disk
+        :returns: a tuple of the PhysicalDisk objects listed
+        """
+        disk = self._virtual_disks_by_id.get(virtual_disk)
+        if disk is None:
+            return ()
+
+        return tuple(self._physical_disks_by_id[disk_id]
+                     for disk_id in disk.physical_disks
+                     if disk_id in self._physical_disks_by_id)
+
+    def is_consistent(self):
+        """Checks whether the cross references between the listings hold
+
+        :returns: False if a disk references a RAID controller, or a virtual
+                  disk references a physical disk, missing from its listing
+        """
+        controller_ids = set(self._controllers_by_id)
+        if (not controller_ids.issuperset(self._physical_disks_by_controller)
+                or not controller_ids.issuperset(
+                    self._virtual_disks_by_controller)):
+            return False
+
+        return all(disk_id in self._physical_disks_by_id
+                   for disk_id in self._virtual_disks_by_physical_disk)
+
+
+def _freeze(index):
+    return dict((key, tuple(values)) for (key, values) in index.items())
+
+
+VirtualDiskSpec = collections.namedtuple(
+    'VirtualDiskSpec',
+    ['raid_controller', 'physical_disks', 'raid_level', 'size_mb',
+     'disk_name', 'span_length', 'span_depth'])
+
+
+class RAIDLayout(object):
+    """Disk conversions and virtual disks computed for a logical layout"""
+
+    def __init__(self, conversions, virtual_disks):
+        """Creates RAIDLayout object
+
+        :param conversions: a dictionary mapping the ids of RAID controllers
+                            to the ids of their physical disks to convert to
+                            RAID mode
+        :param virtual_disks: a list of VirtualDiskSpec objects, whose fields
+                              are the parameters of create_virtual_disk
+        """
+        self.conversions = conversions
+        self.virtual_disks = virtual_disks
+
+    def __len__(self):
+        return len(self.virtual_disks)
+
+    @property
+    def raid_controllers(self):
+        """Ids of the RAID controllers changed by the layout, in order"""
+        raid_controllers = collections.OrderedDict()
+        for raid_controller in self.conversions:
+            raid_controllers[raid_controller] = True
+        for spec in self.virtual_disks:
+            raid_controllers[spec.raid_controller] = True
+
+        return list(raid_controllers)
+
+    def add_to_plan(self, plan):
+        """Records the changes of the layout in a plan
+
+        Applying the plan creates one config job per RAID controller, and the
+        changes are applied by a single reboot. The virtual disks can only be
+        created once the disks are converted, so a layout doing both must be
+        applied in two plans, as done by apply_raid_layout.
+
+        :param plan: an ApplyPlan object
+        :returns: the plan
+        :raises: InvalidParameterValue if the layout both converts disks and
+                 creates virtual disks
+        """
+        if self.conversions and self.virtual_disks:
+            msg = ('The physical disks of the layout must be converted to '
+                   'RAID mode before its virtual disks are created')
+            raise exceptions.InvalidParameterValue(reason=msg)
+
+        self.add_conversions_to_plan(plan)
+        return self.add_virtual_disks_to_plan(plan)
+
+    def add_conversions_to_plan(self, plan):
+        """Records the conversions of physical disks of the layout in a plan
+
+        :param plan: an ApplyPlan object
+        :returns: the plan
+        """
+        for (raid_controller, disk_ids) in self.conversions.items():
+            plan.convert_physical_disks(raid_controller, disk_ids, True)
+
+        return plan
+
+    def add_virtual_disks_to_plan(self, plan):
+        """Records the creations of virtual disks of the layout in a plan
+
+        :param plan: an ApplyPlan object
+        :returns: the plan
+        """
+        for spec in self.virtual_disks:
+            plan.create_virtual_disk(**spec._asdict())
+
+        return plan
+
+
+def solve_raid_layout(topology, raid_level, size_mb=None,
+                      raid_controller=None, media_type=None,
+                      interface_type=None, disk_name=None,
+                      include_non_raid=False):
+    """Computes the virtual disks to create for a logical layout
+
+    No request is sent. Physical disks can only be combined when they are on
+    the same RAID controller and of the same media and interface types. The
+    free physical disks in ready state, and in non-RAID mode if requested,
+    are considered.
+
+    Without size_mb, the disks of each combination are used up: the virtual
+    disks storing the most data are created, one after the other, from the
+    disks with the most free space. With size_mb, a single virtual disk is
+    created, on the fewest disks possible, using the disks with the least
+    free space that is sufficient.
+
+    :param topology: a RAIDTopology object
+    :param raid_level: RAID level of the virtual disks
+    :param size_mb: size of the single virtual disk to create in megabytes.
+                    If None, the matching disks are used up.
+    :param raid_controller: id of the RAID controller to use, or None for any
+    :param media_type: media type of the physical disks to use, 'hdd' or
+                       'ssd', or None for any
+    :param interface_type: interface type of the physical disks to use, e.g.
+                           'sas', or None for any
+    :param disk_name: name of the virtual disks (optional). A counter is
+                      appended when several virtual disks are created.
+    :param include_non_raid: indicates whether the physical disks in non-RAID
+                             mode can be used, once converted
+    :returns: a RAIDLayout object
+    :raises: InvalidParameterValue if no layout fits the request
+    """
+    raid_level = str(raid_level)
+    layout = RAID_LEVEL_LAYOUTS.get(raid_level)
+    if layout is None:
+        raise exceptions.InvalidParameterValue(
+            reason="'raid_level' %s is invalid" % raid_level)
+
+    raid_statuses = ['ready']
+    if include_non_raid:
+        raid_statuses.append('non-RAID')
+
+    groups = collections.OrderedDict()
+    for status in raid_statuses:
+        for disk in topology.get_physical_disks(raid_controller, status):
+            if (media_type not in (None, disk.media_type) or
+                    interface_type not in (None, disk.interface_type) or
+                    disk.free_size_mb <= 0 or
+                    topology.get_owning_virtual_disks(disk.id)):
+                continue
+
+            key = (disk.controller, disk.media_type, disk.interface_type)
+            groups.setdefault(key, []).append(disk)
+
+    geometries = _get_geometries(raid_level, layout)
+    if size_mb is None:
+        specs = []
+        for ((controller, _, _), disks) in groups.items():
+            specs.extend(_fill_disks(controller, disks, raid_level,
+                                     geometries))
+    else:
+        specs = _fit_disks(groups, raid_level, int(size_mb), geometries)
+
+    if not specs:
+        msg = ('No layout of RAID level %(level)s fits the free physical '
+               'disks' % {'level': raid_level})
+        raise exceptions.InvalidParameterValue(reason=msg)
+
+    if disk_name is not None:
+        if len(specs) == 1:
+            specs = [specs[0]._replace(disk_name=disk_name)]
+        else:
+            specs = [spec._replace(disk_name='%s-%d' % (disk_name, index))
+                     for (index, spec) in enumerate(specs)]
+
+    used_disk_ids = set()
+    for spec in specs:
+        used_disk_ids.update(spec.physical_disks)
+
+    conversions = collections.OrderedDict()
+    for disk in topology.get_physical_disks(raid_status='non-RAID'):
+        if disk.id in used_disk_ids:
+            conversions.setdefault(disk.controller, []).append(disk.id)
+
+    return RAIDLayout(conversions, specs)
+
+
+def _get_geometries(raid_level, layout):
+    # the (span_length, span_depth, data disk count) of the valid layouts,
+    # preferring the ones storing the most data on the fewest disks
+    if layout.spanned:
+        span_depths = range(2, MAX_SPAN_DEPTH + 1)
+    else:
+        span_depths = [1]
+
+    geometries = []
+    for span_depth in span_depths:
+        for span_length in range(layout.min_span_length,
+                                 layout.max_span_length + 1):
+            geometries.append((span_length, span_depth, get_data_disk_count(
+                raid_level, span_length, span_depth)))
+
+    geometries.sort(key=lambda geometry: (-geometry[2],
+                                          geometry[0] * geometry[1]))
+    return geometries
+
+
+def _fill_disks(raid_controller, disks, raid_level, geometries):
+    specs = []
+    disks = sorted(disks, key=lambda disk: -disk.free_size_mb)
+    while disks:
+        for (span_length, span_depth, data_disks) in geometries:
+            if span_length * span_depth <= len(disks):
+                break
+        else:
+            break
+
+        members = disks[:span_length * span_depth]
+        disks = disks[span_length * span_depth:]
+        specs.append(VirtualDiskSpec(
+            raid_controller=raid_controller,
+            physical_disks=[disk.id for disk in members],
+            raid_level=raid_level,
+            size_mb=int(members[-1].free_size_mb) * data_disks,
+            disk_name=None, span_length=span_length, span_depth=span_depth))
+
+    return specs
+
+
+def _fit_disks(groups, raid_level, size_mb, geometries):
+    # the geometries using the fewest disks first, then storing the most data
+    geometries = sorted(geometries, key=lambda geometry: (
+        geometry[0] * geometry[1], -geometry[2]))
+
+    best = None
+    for ((raid_controller, _, _), disks) in groups.items():
+        disks = sorted(disks, key=lambda disk: disk.free_size_mb)
+        free_sizes = [disk.free_size_mb for disk in disks]
+        for (span_length, span_depth, data_disks) in geometries:
+            count = span_length * span_depth
+            if best is not None and count > best[0]:
+                break
+
+            size_per_disk_mb = -(-size_mb // data_disks)
+            start = bisect.bisect_left(free_sizes, size_per_disk_mb)
+            if len(disks) - start < count:
+                continue
+
+            members = disks[start:start + count]
+            waste = sum(disk.free_size_mb for disk in members) - (
+                size_per_disk_mb * count)
+            if best is None or (count, waste) < best[:2]:
+                best = (count, waste, VirtualDiskSpec(
+                    raid_controller=raid_controller,
+                    physical_disks=[disk.id for disk in members],
+                    raid_level=raid_level, size_mb=size_mb, disk_name=None,
+                    span_length=span_length, span_depth=span_depth))
+            break
+
+    return [best[2]] if best is not None else []
+
+
+def get_data_disk_count(raid_level, span_length, span_depth):
+    """Returns the number of physical disks holding the data of a layout
+
+    The size of a virtual disk is spread over these disks, the others hold
+    mirrored or parity data.
+
+    :param raid_level: RAID level of the virtual disk
+    :param span_length: number of disks per span
+    :param span_depth: number of spans in virtual disk
+    :returns: the number of physical disks, at least 1
+    """
+    layout = RAID_LEVEL_LAYOUTS[str(raid_level)]
+    if layout.mirrored:
+        count = span_length * span_depth // 2
+    else:
+        count = (span_length - layout.parity_disks) * span_depth
+
+    return max(count, 1)
+
+
+class RAIDValidator(object):
+    """Validates RAID operations locally before they are sent
+
+    The operations are checked against the RAID controllers, physical disks
+    and virtual disks the validator was created with, without sending any
+    request. The changes of every valid operation are recorded, so that a
+    whole layout, e.g. disk conversions followed by the creation of virtual
+    disks, can be validated as if it was applied step by step.
+    """
+
+    def __init__(self, raid_controllers, physical_disks, virtual_disks=()):
+        """Creates RAIDValidator object
+
+        :param raid_controllers: a list of RAIDController objects
+        :param physical_disks: a list of PhysicalDisk objects
+        :param virtual_disks: a list of VirtualDisk objects
+        """
+        self.raid_controllers = set(controller.id
+                                    for controller in raid_controllers)
+        self.physical_disks = dict((disk.id, disk) for disk in physical_disks)
+        self.virtual_disks = dict((disk.id, disk) for disk in virtual_disks)
+
+    def convert_physical_disks(self, physical_disks, raid_enable):
+        """Validates the conversion of physical disks into or out of RAID mode
+
+        Disks already in the requested mode are accepted.
+
+        :param physical_disks: list of FQDD ID strings of the physical disks
+               to update
+        :param raid_enable: boolean flag, set to True if the disk is to
+               become part of the RAID.
+        :raises: InvalidParameterValue if the conversion would fail
+        """
+        error_msgs = []
+        if not physical_disks:
+            error_msgs.append("'physical_disks' is not supplied")
+
+        (from_status, to_status) = (('non-RAID', 'ready') if raid_enable
+                                    else ('ready', 'non-RAID'))
+        for disk_id in physical_disks or []:
+            disk = self.physical_disks.get(disk_id)
+            if disk is None:
+                error_msgs.append('physical disk %s is unknown' % disk_id)
+            elif disk.raid_status not in (from_status, to_status):
+                error_msgs.append(
+                    'physical disk %(disk)s cannot be converted to %(mode)s '
+                    'mode in state %(state)s' % {'disk': disk_id,
+                                                 'mode': to_status,
+                                                 'state': disk.raid_status})
+
+        self._raise_on_errors(error_msgs)
+
+        for disk_id in physical_disks:
+            self._update_disk(disk_id, raid_status=to_status)
+
+    def create_virtual_disk(self, raid_controller, physical_disks, raid_level,
+                            size_mb, disk_name=None, span_length=None,
+                            span_depth=None):
+        """Validates the creation of a virtual disk
+
+        The physical disks must be known, on the RAID controller, in ready or
+        online state and of the same media and interface types. Their number
+        must match the RAID level, span_length and span_depth, and each of
+        them must have the free space its share of size_mb requires. When not
+        given, span_depth defaults to 1 and span_length to the number of disks
+        for the RAID levels without spans. For the spanned RAID levels,
+        span_length defaults to 2 for 1+0 and span_depth to 2 otherwise.
+
+        :param raid_controller: id of the RAID controller
+        :param physical_disks: ids of the physical disks
+        :param raid_level: RAID level of the virtual disk
+        :param size_mb: size of the virtual disk in megabytes
+        :param disk_name: name of the virtual disk (optional)
+        :param span_length: number of disks per span (optional)
+        :param span_depth: number of spans in virtual disk (optional)
+        :raises: InvalidParameterValue if the creation would fail
+        """
+        self._check_parameters(raid_controller, physical_disks, raid_level,
+                               size_mb, span_length, span_depth)
+
+        error_msgs = []
+        disks = self._check_physical_disks(raid_controller, physical_disks,
+                                           error_msgs)
+        (span_length, span_depth) = self._get_spans(
+            RAID_LEVEL_LAYOUTS[str(raid_level)], len(physical_disks),
+            span_length, span_depth, error_msgs)
+        self._raise_on_errors(error_msgs)
+
+        size_per_disk_mb = -(-int(size_mb) // get_data_disk_count(
+            raid_level, span_length, span_depth))
+        for disk in disks:
+            if disk.free_size_mb < size_per_disk_mb:
+                error_msgs.append(
+                    'physical disk %(disk)s has %(free)d MB free, %(size)d '
+                    'MB are needed' % {'disk': disk.id,
+                                       'free': disk.free_size_mb,
+                                       'size': size_per_disk_mb})
+        self._raise_on_errors(error_msgs)
+
+        for disk in disks:
+            self._update_disk(
+                disk.id, free_size_mb=disk.free_size_mb - size_per_disk_mb,
+                raid_status='online')
+
+    def delete_virtual_disk(self, virtual_disk):
+        """Validates the deletion of a virtual disk
+
+        :param virtual_disk: id of the virtual disk
+        :raises: InvalidParameterValue if the virtual disk is unknown
+        """
+        disk = self.virtual_disks.pop(virtual_disk, None)
+        if disk is None:
+            self._raise_on_errors(['virtual disk %s is unknown' %
+                                   virtual_disk])
+
+        used_disk_ids = set()
+        for other_disk in self.virtual_disks.values():
+            used_disk_ids.update(other_disk.physical_disks)
+
+        if disk.raid_level in RAID_LEVEL_LAYOUTS:
+            data_disk_count = get_data_disk_count(
+                disk.raid_level, disk.span_length, disk.span_depth)
+        else:
+            # a non-RAID virtual disk has no layout, its size is held by its
+            # physical disks themselves
+            data_disk_count = max(len(disk.physical_disks), 1)
+        share_mb = disk.size_mb / data_disk_count
+        for disk_id in disk.physical_disks:
+            physical_disk = self.physical_disks.get(disk_id)
+            if physical_disk is None:
+                continue
+
+            free_size_mb = physical_disk.free_size_mb + share_mb
+            if (disk_id in used_disk_ids or
+                    free_size_mb < physical_disk.size_mb):
+                # the disk still holds other virtual disks
+                self._update_disk(disk_id, free_size_mb=min(
+                    physical_disk.size_mb, free_size_mb))
+            else:
+                self._update_disk(disk_id,
+                                  free_size_mb=physical_disk.size_mb,
+                                  raid_status='ready')
+
+    def _check_parameters(self, raid_controller, physical_disks, raid_level,
+                          size_mb, span_length, span_depth):
+        error_msgs = []
+
+        if not raid_controller:
+            error_msgs.append("'raid_controller' is not supplied")
+        elif raid_controller not in self.raid_controllers:
+            error_msgs.append('RAID controller %s is unknown' %
+                              raid_controller)
+
+        if not physical_disks:
+            error_msgs.append("'physical_disks' is not supplied")
+        elif len(set(physical_disks)) != len(physical_disks):
+            error_msgs.append("'physical_disks' contains duplicates")
+
+        if str(raid_level) not in RAID_LEVEL_LAYOUTS:
+            error_msgs.append("'raid_level' is invalid")
+
+        integer_values = [(size_mb, 'size_mb')]
+        if not size_mb:
+            error_msgs.append("'size_mb' is not supplied")
+            integer_values = []
+        for (value, name) in [(span_length, 'span_length'),
+                              (span_depth, 'span_depth')]:
+            if value is not None:
+                integer_values.append((value, name))
+
+        for (value, name) in integer_values:
+            value_error_msgs = []
+            utils.validate_integer_value(value, name, value_error_msgs)
+            if not value_error_msgs and int(value) < 1:
+                value_error_msgs.append("'%s' must be positive" % name)
+            error_msgs.extend(value_error_msgs)
+
+        self._raise_on_errors(error_msgs)
+
+    def _check_physical_disks(self, raid_controller, physical_disks,
+                              error_msgs):
+        disks = []
+        for disk_id in physical_disks:
+            disk = self.physical_disks.get(disk_id)
+            if disk is None:
+                error_msgs.append('physical disk %s is unknown' % disk_id)
+                continue
+
+            disks.append(disk)
+            if disk.controller != raid_controller:
+                error_msgs.append(
+                    'physical disk %(disk)s is not on RAID controller '
+                    '%(controller)s' % {'disk': disk_id,
+                                        'controller': raid_controller})
+            if disk.raid_status == 'non-RAID':
+                error_msgs.append('physical disk %s is in non-RAID mode and '
+                                  'must be converted first' % disk_id)
+            elif disk.raid_status not in ('ready', 'online'):
+                error_msgs.append('physical disk %(disk)s is %(state)s' %
+                                  {'disk': disk_id,
+                                   'state': disk.raid_status})
+
+        for attr in ('media_type', 'interface_type'):
+            values = set(getattr(disk, attr) for disk in disks)
+            if len(values) > 1:
+                error_msgs.append('physical disks of different %(attr)s '
+                                  'cannot be mixed: %(values)s' %
+                                  {'attr': attr.replace('_', ' '),
+                                   'values': ', '.join(sorted(values))})
+
+        return disks
+
+    def _get_spans(self, layout, disk_count, span_length, span_depth,
+                   error_msgs):
+        if span_length is not None:
+            span_length = int(span_length)
+        if span_depth is not None:
+            span_depth = int(span_depth)
+
+        if not layout.spanned:
+            span_depth = 1 if span_depth is None else span_depth
+            span_length = disk_count if span_length is None else span_length
+        elif span_length is None and span_depth is None:
+            if layout.mirrored:
+                span_length = layout.min_span_length
+            else:
+                span_depth = 2
+
+        if span_length is None:
+            span_length = disk_count // span_depth
+        elif span_depth is None:
+            span_depth = disk_count // span_length
+
+        self._check_spans(layout, disk_count, span_length, span_depth,
+                          error_msgs)
+        return (span_length, span_depth)
+
+    def _check_spans(self, layout, disk_count, span_length, span_depth,
+                     error_msgs):
+        if span_length * span_depth != disk_count:
+            error_msgs.append(
+                '%(count)d physical disks cannot be split in %(depth)d spans '
+                'of %(length)d disks' % {'count': disk_count,
+                                         'depth': span_depth,
+                                         'length': span_length})
+        if span_length < layout.min_span_length:
+            error_msgs.append('spans need at least %d physical disks' %
+                              layout.min_span_length)
+        if span_length > layout.max_span_length:
+            error_msgs.append('spans have at most %d physical disks' %
+                              layout.max_span_length)
+        if layout.spanned and span_depth < 2:
+            error_msgs.append('spanned RAID levels need at least 2 spans')
+        elif span_depth > MAX_SPAN_DEPTH:
+            error_msgs.append('virtual disks have at most %d spans' %
+                              MAX_SPAN_DEPTH)
+        elif not layout.spanned and span_depth != 1:
+            error_msgs.append('RAID levels without spans need a single span')
+
+    def _update_disk(self, disk_id, **kwargs):
+        self.physical_disks[disk_id] = self.physical_disks[disk_id]._replace(
+            **kwargs)
+
+    def _raise_on_errors(self, error_msgs):
+        if error_msgs:
+            msg = ('The following errors were encountered while validating '
+                   'the RAID operation: %r') % ','.join(error_msgs)
+            raise exceptions.InvalidParameterValue(reason=msg)
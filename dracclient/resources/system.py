@@ -11,10 +11,14 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import logging
+
 from dracclient.resources import uris
 from dracclient import utils
 from dracclient import wsman
 
+LOG = logging.getLogger(__name__)
+
 
 class SystemConfiguration(object):
 
@@ -45,6 +49,45 @@ class SystemConfiguration(object):
             result.update(attribs)
         return result
 
+    def set_system_settings(self, new_settings):
+        """Sets the System configuration
+
+        To be more precise, it sets the pending_value parameter for each of the
+        attributes passed in. The attributes are validated against the current
+        settings, the unchanged ones are skipped and the others are set with a
+        single SetAttributes call per system.
+
+        :param new_settings: a dictionary containing the proposed values, with
+                             each key being the InstanceID of the attribute,
+                             as returned by list_system_settings, and the value
+                             being the proposed value.
+        :returns: a dictionary containing the commit_required key with a
+                  boolean value indicating whether a config job must be
+                  created for the values to be applied.
+        :raises: WSManRequestFailure on request failures
+        :raises: WSManInvalidResponse when receiving invalid response
+        :raises: DRACOperationFailed on error reported back by the DRAC
+                 interface or on invalid values
+        :raises: DRACUnexpectedReturnValue on return value mismatch
+        :raises: InvalidParameterValue on unknown System attribute or invalid
+                 values
+        """
+        current_settings = self.list_system_settings()
+        attrib_keys, unchanged_attribs = utils.check_attribute_settings(
+            new_settings, current_settings)
+
+        if unchanged_attribs:
+            LOG.warning('Ignoring unchanged System attributes: %r',
+                        unchanged_attribs)
+
+        selectors = {'CreationClassName': 'DCIM_SystemManagementService',
+                     'Name': 'DCIM:SystemManagementService',
+                     'SystemCreationClassName': 'DCIM_ComputerSystem',
+                     'SystemName': 'DCIM:ComputerSystem'}
+        return {'commit_required': utils.set_attributes_by_target(
+            self.client, uris.DCIM_SystemManagementService, selectors,
+            new_settings, current_settings, attrib_keys)}
+
     def _get_config(self, resource, attr_cls):
         result = {}
 
@@ -59,9 +102,12 @@ class SystemConfiguration(object):
         return result
 
 
-class SystemAttribute(object):
+class SystemAttribute(utils.FrozenSlotsObject):
     """Generic System attribute class"""
 
+    __slots__ = ('name', 'instance_id', 'current_value', 'pending_value',
+                 'read_only', 'fqdd', 'group_id')
+
     def __init__(self, name, instance_id, current_value, pending_value,
                  read_only, fqdd, group_id):
         """Creates SystemAttribute object
@@ -76,19 +122,11 @@ class SystemAttribute(object):
         :param fqdd: Fully Qualified Device Description of the System attribute
         :param group_id: GroupID of System attribute
         """
-        self.name = name
-        self.instance_id = instance_id
-        self.current_value = current_value
-        self.pending_value = pending_value
-        self.read_only = read_only
-        self.fqdd = fqdd
-        self.group_id = group_id
-
-    def __eq__(self, other):
-        return self.__dict__ == other.__dict__
-
-    def __ne__(self, other):
-        return not self.__eq__(other)
+        self._set_fields(name=utils.intern_string(name),
+                         instance_id=instance_id,
+                         current_value=current_value,
+                         pending_value=pending_value,
+                         read_only=read_only, fqdd=fqdd, group_id=group_id)
 
     @classmethod
     def parse(cls, namespace, system_attr_xml):
@@ -109,13 +147,17 @@ class SystemAttribute(object):
         group_id = utils.get_wsman_resource_attr(
             system_attr_xml, namespace, 'GroupID')
 
-        return cls(name, instance_id, current_value, pending_value,
-                   (read_only == 'true'), fqdd, group_id)
+        return cls(name, utils.pooled(instance_id),
+                   utils.pooled(current_value), utils.pooled(pending_value),
+                   (read_only == 'true'), utils.pooled(fqdd),
+                   utils.pooled(group_id))
 
 
 class SystemEnumerableAttribute(SystemAttribute):
     """Enumerable System attribute class"""
 
+    __slots__ = ('possible_values',)
+
     namespace = uris.DCIM_SystemEnumeration
 
     def __init__(self, name, instance_id, current_value, pending_value,
@@ -139,7 +181,7 @@ class SystemEnumerableAttribute(SystemAttribute):
                                                         pending_value,
                                                         read_only, fqdd,
                                                         group_id)
-        self.possible_values = possible_values
+        self._set_fields(possible_values=utils.shared_tuple(possible_values))
 
     @classmethod
     def parse(cls, system_attr_xml):
@@ -164,13 +206,15 @@ class SystemEnumerableAttribute(SystemAttribute):
                    " It must be in %(possible_values)r.") % {
                        'attr': self.name,
                        'val': new_value,
-                       'possible_values': self.possible_values}
+                       'possible_values': list(self.possible_values)}
             return msg
 
 
 class SystemStringAttribute(SystemAttribute):
     """String System attribute class"""
 
+    __slots__ = ('min_length', 'max_length')
+
     namespace = uris.DCIM_SystemString
 
     def __init__(self, name, instance_id, current_value, pending_value,
@@ -193,8 +237,7 @@ class SystemStringAttribute(SystemAttribute):
                                                     current_value,
                                                     pending_value, read_only,
                                                     fqdd, group_id)
-        self.min_length = min_length
-        self.max_length = max_length
+        self._set_fields(min_length=min_length, max_length=max_length)
 
     @classmethod
     def parse(cls, system_attr_xml):
@@ -212,10 +255,26 @@ class SystemStringAttribute(SystemAttribute):
                    system_attr.read_only, system_attr.fqdd,
                    system_attr.group_id, min_length, max_length)
 
+    def validate(self, new_value):
+        """Validates new value"""
+
+        length = len(str(new_value))
+        if length < self.min_length or length > self.max_length:
+            msg = ("Attribute '%(attr)s' cannot be set to a value of length "
+                   "%(length)d. Its length must be between %(min)d and "
+                   "%(max)d.") % {
+                       'attr': self.name,
+                       'length': length,
+                       'min': self.min_length,
+                       'max': self.max_length}
+            return msg
+
 
 class SystemIntegerAttribute(SystemAttribute):
     """Integer System attribute class"""
 
+    __slots__ = ('lower_bound', 'upper_bound')
+
     namespace = uris.DCIM_SystemInteger
 
     def __init__(self, name, instance_id, current_value, pending_value,
@@ -238,8 +297,7 @@ class SystemIntegerAttribute(SystemAttribute):
                                                      current_value,
                                                      pending_value, read_only,
                                                      fqdd, group_id)
-        self.lower_bound = lower_bound
-        self.upper_bound = upper_bound
+        self._set_fields(lower_bound=lower_bound, upper_bound=upper_bound)
 
     @classmethod
     def parse(cls, system_attr_xml):
@@ -251,29 +309,37 @@ class SystemIntegerAttribute(SystemAttribute):
         upper_bound = utils.get_wsman_resource_attr(
             system_attr_xml, cls.namespace, 'UpperBound', nullable=True)
 
-        if system_attr.current_value:
-            system_attr.current_value = int(system_attr.current_value)
-        if system_attr.pending_value:
-            system_attr.pending_value = int(system_attr.pending_value)
+        current_value = system_attr.current_value
+        if current_value:
+            current_value = int(current_value)
+        pending_value = system_attr.pending_value
+        if pending_value:
+            pending_value = int(pending_value)
 
         if lower_bound:
             lower_bound = int(lower_bound)
         if upper_bound:
             upper_bound = int(upper_bound)
-        return cls(system_attr.name, system_attr.instance_id,
-                   system_attr.current_value, system_attr.pending_value,
-                   system_attr.read_only, system_attr.fqdd,
+        return cls(system_attr.name, system_attr.instance_id, current_value,
+                   pending_value, system_attr.read_only, system_attr.fqdd,
                    system_attr.group_id, lower_bound, upper_bound)
 
     def validate(self, new_value):
         """Validates new value"""
 
-        val = int(new_value)
-        if val < self.lower_bound or val > self.upper_bound:
+        try:
+            val = int(new_value)
+        except (TypeError, ValueError):
+            return ("Attribute '%(attr)s' cannot be set to value '%(val)s'."
+                    " It must be an integer.") % {'attr': self.name,
+                                                  'val': new_value}
+        # the bounds of some System attributes are not reported
+        if ((self.lower_bound is not None and val < self.lower_bound) or
+                (self.upper_bound is not None and val > self.upper_bound)):
             msg = ('Attribute %(attr)s cannot be set to value %(val)d.'
-                   ' It must be between %(lower)d and %(upper)d.') % {
+                   ' It must be between %(lower)s and %(upper)s.') % {
                        'attr': self.name,
-                       'val': new_value,
+                       'val': val,
                        'lower': self.lower_bound,
                        'upper': self.upper_bound}
             return msg
@@ -85,6 +85,9 @@ DCIM_SystemView = ('http://schemas.dell.com/wbem/wscim/1/cim-schema/2/'
 DCIM_SystemEnumeration = ('http://schemas.dell.com/wbem/wscim/1/cim-schema/2/'
                           'DCIM_SystemEnumeration')
 
+DCIM_SystemManagementService = ('http://schemas.dell.com/wbem/wscim/1/'
+                                'cim-schema/2/DCIM_SystemManagementService')
+
 DCIM_SystemString = ('http://schemas.dell.com/wbem/wscim/1/cim-schema/2/'
                      'DCIM_SystemString')
 
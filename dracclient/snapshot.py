@@ -0,0 +1,194 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Copy-on-write snapshots of settings over a baseline shared per hardware model.
+"""
+
+import threading
+
+try:
+    from collections import abc as collections_abc
+except ImportError:
+    # Python 2
+    import collections as collections_abc
+
+
+class _Missing(object):
+
+    def __repr__(self):
+        return 'MISSING'
+
+
+# marker of the entries missing from either side of SettingsSnapshot.diff
+MISSING = _Missing()
+
+_DELETED = object()
+
+
+class SettingsSnapshot(collections_abc.Mapping):
+    """Read-only settings of a host stored as an overlay over a baseline
+
+    The snapshot behaves like the dictionary returned by the list_*_settings
+    methods. Only the entries that differ from the baseline are stored in the
+    snapshot itself, the rest is looked up in the baseline, which is shared
+    by every snapshot of the same hardware model and firmware version.
+    """
+
+    def __init__(self, baseline, overlay, baseline_key=None):
+        """Creates SettingsSnapshot object
+
+        :param baseline: dictionary with the baseline settings. It must not
+                         be modified once snapshots reference it.
+        :param overlay: dictionary with the entries that differ from the
+                        baseline. Entries missing from the host are mapped
+                        to the module level _DELETED marker.
+        :param baseline_key: the (model, firmware_version) tuple identifying
+                             the baseline
+        """
+        self._baseline = baseline
+        self._overlay = overlay
+        self.baseline_key = baseline_key
+        deleted = sum(1 for value in overlay.values() if value is _DELETED)
+        added = sum(1 for key in overlay if key not in baseline)
+        self._len = len(baseline) + added - deleted
+
+    def __getitem__(self, key):
+        value = self._overlay.get(key, MISSING)
+        if value is _DELETED:
+            raise KeyError(key)
+        if value is not MISSING:
+            return value
+        return self._baseline[key]
+
+    def __contains__(self, key):
+        value = self._overlay.get(key, MISSING)
+        if value is MISSING:
+            return key in self._baseline
+        return value is not _DELETED
+
+    def __iter__(self):
+        for key in self._baseline:
+            if self._overlay.get(key) is not _DELETED:
+                yield key
+        for (key, value) in self._overlay.items():
+            if key not in self._baseline and value is not _DELETED:
+                yield key
+
+    def __len__(self):
+        return self._len
+
+    def __repr__(self):
+        return '%s(%r, drift=%d)' % (type(self).__name__, self.baseline_key,
+                                     len(self._overlay))
+
+    @property
+    def drift(self):
+        """Number of entries that differ from the baseline"""
+        return len(self._overlay)
+
+    def diff(self):
+        """Returns the entries that differ from the baseline
+
+        Runs in time proportional to the number of differing entries.
+
+        :returns: a dictionary mapping the key of each differing entry to a
+                  (baseline_value, value) tuple. Entries missing from either
+                  side are reported as the module level MISSING marker, so
+                  that they are told apart from entries set to None.
+        """
+        result = {}
+        for (key, value) in self._overlay.items():
+            if value is _DELETED:
+                value = MISSING
+            result[key] = (self._baseline.get(key, MISSING), value)
+
+        return result
+
+
+class SnapshotStore(object):
+    """Store of settings baselines keyed by hardware model and firmware
+
+    The first settings recorded for a (model, firmware_version) pair become
+    the baseline of that pair. Snapshots of later hosts only hold what
+    differs from it, so that the memory used grows with the configuration
+    drift rather than with the size of the fleet.
+    """
+
+    def __init__(self):
+        self._baselines = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._baselines)
+
+    def snapshot(self, model, firmware_version, settings):
+        """Creates a snapshot of the settings of a host
+
+        :param model: model of the host
+        :param firmware_version: firmware version of the host
+        :param settings: dictionary of settings, as returned by one of the
+                         list_*_settings methods
+        :returns: a SettingsSnapshot object
+        """
+        key = (model, firmware_version)
+        with self._lock:
+            baseline = self._baselines.get(key)
+            if baseline is None:
+                baseline = self._baselines[key] = dict(settings)
+
+        overlay = {}
+        in_baseline = 0
+        for (name, value) in settings.items():
+            baseline_value = baseline.get(name, MISSING)
+            if baseline_value is not MISSING:
+                in_baseline += 1
+            if baseline_value is MISSING or baseline_value != value:
+                overlay[name] = value
+
+        if in_baseline != len(baseline):
+            for name in baseline:
+                if name not in settings:
+                    overlay[name] = _DELETED
+
+        return SettingsSnapshot(baseline, overlay, key)
+
+    def get_baseline(self, model, firmware_version):
+        """Returns the baseline of a model and firmware version
+
+        :param model: model of the host
+        :param firmware_version: firmware version of the host
+        :returns: a SettingsSnapshot object without drift, or None if no
+                  baseline was recorded
+        """
+        key = (model, firmware_version)
+        baseline = self._baselines.get(key)
+        if baseline is not None:
+            return SettingsSnapshot(baseline, {}, key)
+
+    def set_baseline(self, model, firmware_version, settings):
+        """Replaces the baseline of a model and firmware version
+
+        Snapshots created earlier keep referencing the previous baseline.
+
+        :param model: model of the host
+        :param firmware_version: firmware version of the host
+        :param settings: dictionary of settings
+        """
+        with self._lock:
+            self._baselines[(model, firmware_version)] = dict(settings)
+
+    def clear(self):
+        """Drops all baselines"""
+        with self._lock:
+            self._baselines.clear()
@@ -0,0 +1,146 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import threading
+
+import lxml.etree
+import mock
+import requests_mock
+
+from dracclient import batch
+import dracclient.client
+from dracclient import exceptions
+from dracclient.resources import uris
+from dracclient.tests import base
+from dracclient.tests import utils as test_utils
+
+
+@requests_mock.Mocker()
+@mock.patch.object(dracclient.client.WSManClient, 'wait_until_idrac_is_ready',
+                   spec_set=True, autospec=True)
+@mock.patch.object(dracclient.client.WSManClient, 'invoke', spec_set=True,
+                   autospec=True)
+class OperationBatchTestCase(base.BaseTest):
+
+    def setUp(self):
+        super(OperationBatchTestCase, self).setUp()
+        self.drac_client = dracclient.client.DRACClient(
+            **test_utils.FAKE_ENDPOINT)
+
+    def _mock_bios_settings(self, mock_requests, mock_invoke):
+        mock_requests.post('https://1.2.3.4:443/wsman', [
+            {'text': test_utils.BIOSEnumerations[
+                uris.DCIM_BIOSEnumeration]['ok']},
+            {'text': test_utils.BIOSEnumerations[
+                uris.DCIM_BIOSString]['ok']},
+            {'text': test_utils.BIOSEnumerations[
+                uris.DCIM_BIOSInteger]['ok']}])
+        mock_invoke.return_value = lxml.etree.fromstring(
+            test_utils.BIOSInvocations[uris.DCIM_BIOSService][
+                'SetAttributes']['ok'])
+
+    def test_batch(self, mock_requests, mock_invoke,
+                   mock_wait_until_idrac_is_ready):
+        self._mock_bios_settings(mock_requests, mock_invoke)
+
+        with self.drac_client.batch() as operations:
+            result = self.drac_client.set_bios_settings(
+                {'ProcVirtualization': 'Disabled'})
+            other_result = self.drac_client.set_bios_settings(
+                {'MemTest': 'Enabled', 'ProcVirtualization': 'Disabled'})
+
+            self.assertEqual(2, len(operations))
+            self.assertFalse(mock_requests.called)
+            self.assertFalse(mock_invoke.called)
+
+        self.assertEqual({'commit_required': True}, operations.result)
+        self.assertIs(operations.result, result)
+        self.assertIs(operations.result, other_result)
+        self.assertEqual(3, mock_requests.call_count)
+        mock_invoke.assert_called_once_with(
+            mock.ANY, uris.DCIM_BIOSService, 'SetAttributes', mock.ANY,
+            mock.ANY)
+        properties = mock_invoke.call_args[0][4]
+        self.assertEqual(
+            {'MemTest': 'Enabled', 'ProcVirtualization': 'Disabled'},
+            dict(zip(properties['AttributeName'],
+                     properties['AttributeValue'])))
+        self.assertIsNone(batch.get_batch(self.drac_client.client))
+
+    def test_batch_conflict(self, mock_requests, mock_invoke,
+                            mock_wait_until_idrac_is_ready):
+        def provision():
+            with self.drac_client.batch():
+                self.drac_client.set_bios_settings(
+                    {'ProcVirtualization': 'Disabled'})
+                self.drac_client.set_bios_settings(
+                    {'MemTest': 'Enabled', 'ProcVirtualization': 'Enabled'})
+
+        self.assertRaisesRegexp(exceptions.InvalidParameterValue,
+                                'ProcVirtualization', provision)
+        self.assertFalse(mock_requests.called)
+        self.assertFalse(mock_invoke.called)
+
+    def test_batch_exception(self, mock_requests, mock_invoke,
+                             mock_wait_until_idrac_is_ready):
+        def provision():
+            with self.drac_client.batch():
+                self.drac_client.set_bios_settings(
+                    {'ProcVirtualization': 'Disabled'})
+                raise exceptions.DRACOperationFailed(drac_messages='boom')
+
+        self.assertRaises(exceptions.DRACOperationFailed, provision)
+        self.assertFalse(mock_requests.called)
+        self.assertFalse(mock_invoke.called)
+        self.assertIsNone(batch.get_batch(self.drac_client.client))
+
+    def test_batch_nested(self, mock_requests, mock_invoke,
+                          mock_wait_until_idrac_is_ready):
+        self._mock_bios_settings(mock_requests, mock_invoke)
+
+        with self.drac_client.batch() as operations:
+            with self.drac_client.batch() as nested_operations:
+                self.drac_client.set_bios_settings(
+                    {'ProcVirtualization': 'Disabled'})
+
+            self.assertIs(operations, nested_operations)
+            self.assertFalse(mock_invoke.called)
+
+        mock_invoke.assert_called_once_with(
+            mock.ANY, uris.DCIM_BIOSService, 'SetAttributes', mock.ANY,
+            mock.ANY)
+
+    def test_batch_other_thread(self, mock_requests, mock_invoke,
+                                mock_wait_until_idrac_is_ready):
+        self._mock_bios_settings(mock_requests, mock_invoke)
+
+        with self.drac_client.batch() as operations:
+            thread = threading.Thread(
+                target=self.drac_client.set_bios_settings,
+                args=({'ProcVirtualization': 'Disabled'},))
+            thread.start()
+            thread.join()
+
+            self.assertEqual(0, len(operations))
+            mock_invoke.assert_called_once_with(
+                mock.ANY, uris.DCIM_BIOSService, 'SetAttributes', mock.ANY,
+                mock.ANY)
+
+    def test_batch_empty(self, mock_requests, mock_invoke,
+                         mock_wait_until_idrac_is_ready):
+        with self.drac_client.batch() as operations:
+            pass
+
+        self.assertEqual({'commit_required': False}, operations.result)
+        self.assertFalse(mock_requests.called)
+        self.assertFalse(mock_invoke.called)
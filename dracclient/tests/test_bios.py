@@ -38,6 +38,11 @@ class ClientPowerManagementTestCase(base.BaseTest):
         self.drac_client = dracclient.client.DRACClient(
             **test_utils.FAKE_ENDPOINT)
 
+    def _power_state_response(self, enabled_state):
+        return test_utils.BIOSEnumerations[uris.DCIM_ComputerSystem][
+            'ok'].replace('<n1:EnabledState>2<',
+                          '<n1:EnabledState>%s<' % enabled_state)
+
     def test_get_power_state(self, mock_requests,
                              mock_wait_until_idrac_is_ready):
         mock_requests.post(
@@ -70,6 +75,138 @@ class ClientPowerManagementTestCase(base.BaseTest):
         self.assertRaises(exceptions.InvalidParameterValue,
                           self.drac_client.set_power_state, 'foo')
 
+    @mock.patch('time.sleep', autospec=True)
+    def test_set_power_state_wait(self, mock_requests, mock_sleep,
+                                  mock_wait_until_idrac_is_ready):
+        mock_requests.post('https://1.2.3.4:443/wsman', [
+            {'text': test_utils.BIOSInvocations[uris.DCIM_ComputerSystem][
+                'RequestStateChange']['ok']},
+            {'text': self._power_state_response('3')},
+            {'text': test_utils.BIOSEnumerations[
+                uris.DCIM_ComputerSystem]['ok']}])
+
+        self.assertIsNone(self.drac_client.set_power_state('POWER_ON',
+                                                           wait=True))
+        self.assertEqual(3, mock_requests.call_count)
+        mock_sleep.assert_called_once_with(2)
+
+    @mock.patch('time.sleep', autospec=True)
+    def test_wait_for_power_state(self, mock_requests, mock_sleep,
+                                  mock_wait_until_idrac_is_ready):
+        mock_requests.post('https://1.2.3.4:443/wsman', [
+            {'text': self._power_state_response('3')},
+            {'text': self._power_state_response('3')},
+            {'text': self._power_state_response('3')},
+            {'text': test_utils.BIOSEnumerations[
+                uris.DCIM_ComputerSystem]['ok']}])
+
+        self.assertEqual('POWER_ON',
+                         self.drac_client.wait_for_power_state('POWER_ON',
+                                                               interval=10))
+        self.assertEqual([mock.call(10), mock.call(20), mock.call(30)],
+                         mock_sleep.call_args_list)
+        self.assertIn('select EnabledState from DCIM_ComputerSystem',
+                      mock_requests.last_request.text)
+        self.assertFalse(mock_wait_until_idrac_is_ready.called)
+
+    @mock.patch('time.time', autospec=True)
+    @mock.patch('time.sleep', autospec=True)
+    def test_wait_for_power_state_timeout(self, mock_requests, mock_sleep,
+                                          mock_time,
+                                          mock_wait_until_idrac_is_ready):
+        clock = [0]
+        mock_time.side_effect = lambda: clock[0]
+        mock_sleep.side_effect = (
+            lambda seconds: clock.__setitem__(0, clock[0] + seconds))
+        mock_requests.post('https://1.2.3.4:443/wsman',
+                           text=self._power_state_response('3'))
+
+        self.assertRaisesRegexp(
+            exceptions.DRACOperationFailed, 'last power state POWER_OFF',
+            self.drac_client.wait_for_power_state, 'POWER_ON', timeout=10,
+            interval=4)
+        self.assertEqual([mock.call(4), mock.call(6)],
+                         mock_sleep.call_args_list)
+
+    def test_wait_for_power_state_reboot(self, mock_requests,
+                                         mock_wait_until_idrac_is_ready):
+        self.assertRaises(exceptions.InvalidParameterValue,
+                          self.drac_client.wait_for_power_state, 'REBOOT')
+        self.assertFalse(mock_requests.called)
+
+    def test_set_power_state_wait_reboot(self, mock_requests,
+                                         mock_wait_until_idrac_is_ready):
+        self.assertRaises(exceptions.InvalidParameterValue,
+                          self.drac_client.set_power_state, 'REBOOT',
+                          wait=True)
+        self.assertFalse(mock_requests.called)
+
+    def test_power_management_set_power_state_wait_reboot(
+            self, mock_requests, mock_wait_until_idrac_is_ready):
+        power_mgmt = bios.PowerManagement(self.drac_client.client)
+
+        self.assertRaises(exceptions.InvalidParameterValue,
+                          power_mgmt.set_power_state, 'REBOOT', wait=True)
+        self.assertFalse(mock_requests.called)
+
+    def test_power_management_check_power_state(
+            self, mock_requests, mock_wait_until_idrac_is_ready):
+        power_mgmt = bios.PowerManagement(self.drac_client.client)
+
+        power_mgmt.check_power_state('REBOOT')
+        power_mgmt.check_power_state('POWER_OFF', wait=True)
+        self.assertRaises(exceptions.InvalidParameterValue,
+                          power_mgmt.check_power_state, 'REBOOT', wait=True)
+        self.assertRaises(exceptions.InvalidParameterValue,
+                          power_mgmt.check_power_state, 'foo')
+        self.assertFalse(mock_requests.called)
+
+    def test_wait_for_power_state_invalid_target_state(
+            self, mock_requests, mock_wait_until_idrac_is_ready):
+        self.assertRaises(exceptions.InvalidParameterValue,
+                          self.drac_client.wait_for_power_state, 'foo')
+        self.assertFalse(mock_requests.called)
+
+    def test_set_power_state_idempotent_unchanged(
+            self, mock_requests, mock_wait_until_idrac_is_ready):
+        drac_client = dracclient.client.DRACClient(
+            idempotent=True, **test_utils.FAKE_ENDPOINT)
+        mock_requests.post(
+            'https://1.2.3.4:443/wsman',
+            text=test_utils.BIOSEnumerations[uris.DCIM_ComputerSystem]['ok'])
+
+        self.assertEqual({'changed': False},
+                         drac_client.set_power_state('POWER_ON'))
+        self.assertEqual(1, mock_requests.call_count)
+
+    def test_set_power_state_idempotent_changed(
+            self, mock_requests, mock_wait_until_idrac_is_ready):
+        drac_client = dracclient.client.DRACClient(
+            idempotent=True, **test_utils.FAKE_ENDPOINT)
+        mock_requests.post('https://1.2.3.4:443/wsman', [
+            {'text': test_utils.BIOSEnumerations[
+                uris.DCIM_ComputerSystem]['ok']},
+            {'text': test_utils.BIOSInvocations[uris.DCIM_ComputerSystem][
+                'RequestStateChange']['ok']}])
+
+        self.assertEqual({'changed': True},
+                         drac_client.set_power_state('POWER_OFF'))
+        self.assertEqual(2, mock_requests.call_count)
+        self.assertIn('RequestStateChange', mock_requests.last_request.text)
+
+    def test_set_power_state_idempotent_reboot(
+            self, mock_requests, mock_wait_until_idrac_is_ready):
+        drac_client = dracclient.client.DRACClient(
+            idempotent=True, **test_utils.FAKE_ENDPOINT)
+        mock_requests.post(
+            'https://1.2.3.4:443/wsman',
+            text=test_utils.BIOSInvocations[
+                uris.DCIM_ComputerSystem]['RequestStateChange']['ok'])
+
+        self.assertEqual({'changed': True},
+                         drac_client.set_power_state('REBOOT'))
+        self.assertEqual(1, mock_requests.call_count)
+
 
 @requests_mock.Mocker()
 @mock.patch.object(dracclient.client.WSManClient, 'wait_until_idrac_is_ready',
@@ -126,9 +263,9 @@ class ClientBootManagementTestCase(base.BaseTest):
             2,  boot_devices['IPL'][2].pending_assigned_sequence)
 
     @mock.patch.object(lifecycle_controller.LifecycleControllerManagement,
-                       'get_version', spec_set=True, autospec=True)
+                       'get_capabilities', spec_set=True, autospec=True)
     def test_list_boot_devices_11g(self, mock_requests,
-                                   mock_get_lifecycle_controller_version,
+                                   mock_get_capabilities,
                                    mock_wait_until_idrac_is_ready):
         expected_boot_device = bios.BootDevice(
             id=('IPL:NIC.Embedded.1-1:082927b7c62a9f52ef0d65a33416d76c'),
@@ -142,7 +279,8 @@ class ClientBootManagementTestCase(base.BaseTest):
             'https://1.2.3.4:443/wsman',
             text=test_utils.BIOSEnumerations[
                 uris.DCIM_BootSourceSetting]['ok-11g'])
-        mock_get_lifecycle_controller_version.return_value = (1, 0, 0)
+        mock_get_capabilities.return_value = (
+            lifecycle_controller.Capabilities((1, 0, 0), 11, None, None))
 
         boot_devices = self.drac_client.list_boot_devices()
 
@@ -159,6 +297,26 @@ class ClientBootManagementTestCase(base.BaseTest):
         self.assertEqual(
             2,  boot_devices['IPL'][2].pending_assigned_sequence)
 
+    def test_list_boot_devices_11g_cached_capabilities(
+            self, mock_requests, mock_wait_until_idrac_is_ready):
+        mock_requests.post('https://1.2.3.4:443/wsman', [
+            {'text': test_utils.BIOSEnumerations[
+                uris.DCIM_BootSourceSetting]['ok-11g']},
+            {'text': test_utils.LifecycleControllerEnumerations[
+                uris.DCIM_SystemView]['11g']},
+            {'text': test_utils.BIOSEnumerations[
+                uris.DCIM_BootSourceSetting]['ok-11g']}])
+
+        first_boot_devices = self.drac_client.list_boot_devices()
+        with mock.patch.object(bios.BootManagement, '_parse_drac_boot_device',
+                               spec_set=True,
+                               autospec=True) as mock_parse_12g:
+            boot_devices = self.drac_client.list_boot_devices()
+
+        self.assertEqual(first_boot_devices, boot_devices)
+        self.assertFalse(mock_parse_12g.called)
+        self.assertEqual(3, mock_requests.call_count)
+
     def test_change_boot_device_order(self, mock_requests,
                                       mock_wait_until_idrac_is_ready):
         mock_requests.post(
@@ -200,6 +358,59 @@ class ClientBootManagementTestCase(base.BaseTest):
             exceptions.DRACOperationFailed,
             self.drac_client.change_boot_device_order, 'IPL', 'foo')
 
+    def test_change_boot_device_order_idempotent_unchanged(
+            self, mock_requests, mock_wait_until_idrac_is_ready):
+        drac_client = dracclient.client.DRACClient(
+            idempotent=True, **test_utils.FAKE_ENDPOINT)
+        mock_requests.post(
+            'https://1.2.3.4:443/wsman',
+            text=test_utils.BIOSEnumerations[
+                uris.DCIM_BootSourceSetting]['ok'])
+        boot_device_list = [
+            'IPL:BIOS.Setup.1-1#BootSeq#NIC.Embedded.1-1-1#'
+            'fbeeb18f19fd4e768c941e66af4fc424',
+            'IPL:BIOS.Setup.1-1#BootSeq#Optical.SATAEmbedded.E-1#'
+            '9cfba379c4a2890f7f419c75db47d605',
+            'IPL:BIOS.Setup.1-1#BootSeq#HardDisk.List.1-1#'
+            'c9203080df84781e2ca3d512883dee6f']
+
+        result = drac_client.change_boot_device_order('IPL',
+                                                      boot_device_list)
+
+        self.assertEqual({'changed': False}, result)
+        self.assertEqual(1, mock_requests.call_count)
+        self.assertIn('select * from DCIM_BootSourceSetting where '
+                      'BootSourceType="IPL"', mock_requests.last_request.text)
+
+    def test_change_boot_device_order_idempotent_changed(
+            self, mock_requests, mock_wait_until_idrac_is_ready):
+        drac_client = dracclient.client.DRACClient(
+            idempotent=True, **test_utils.FAKE_ENDPOINT)
+        mock_requests.post('https://1.2.3.4:443/wsman', [
+            {'text': test_utils.BIOSEnumerations[
+                uris.DCIM_BootSourceSetting]['ok']},
+            {'text': test_utils.BIOSInvocations[uris.DCIM_BootConfigSetting][
+                'ChangeBootOrderByInstanceID']['ok']}])
+
+        result = drac_client.change_boot_device_order(
+            'IPL', 'IPL:BIOS.Setup.1-1#BootSeq#NIC.Embedded.1-1-1#'
+                   'fbeeb18f19fd4e768c941e66af4fc424')
+
+        self.assertEqual({'changed': True}, result)
+        self.assertEqual(2, mock_requests.call_count)
+        self.assertIn('ChangeBootOrderByInstanceID',
+                      mock_requests.last_request.text)
+
+    def test_change_boot_device_order_idempotent_invalid_boot_mode(
+            self, mock_requests, mock_wait_until_idrac_is_ready):
+        drac_client = dracclient.client.DRACClient(
+            idempotent=True, **test_utils.FAKE_ENDPOINT)
+
+        self.assertRaises(exceptions.InvalidParameterValue,
+                          drac_client.change_boot_device_order,
+                          'IPL" or BootSourceType="UEFI', 'foo')
+        self.assertEqual(0, mock_requests.call_count)
+
 
 @requests_mock.Mocker()
 @mock.patch.object(dracclient.client.WSManClient, 'wait_until_idrac_is_ready',
@@ -322,6 +533,25 @@ class ClientBIOSConfigurationTestCase(base.BaseTest):
         self.assertRaises(exceptions.DRACOperationFailed,
                           self.drac_client.list_bios_settings, by_name=True)
 
+    def test_list_bios_settings_compact_attributes(
+            self, mock_requests, mock_wait_until_idrac_is_ready):
+        mock_requests.post('https://1.2.3.4:443/wsman', [
+            {'text': test_utils.BIOSEnumerations[
+                uris.DCIM_BIOSEnumeration]['ok']},
+            {'text': test_utils.BIOSEnumerations[
+                uris.DCIM_BIOSString]['ok']},
+            {'text': test_utils.BIOSEnumerations[
+                uris.DCIM_BIOSInteger]['ok']}])
+
+        bios_settings = self.drac_client.list_bios_settings()
+
+        for attr in bios_settings.values():
+            self.assertFalse(hasattr(attr, '__dict__'))
+        self.assertRaises(AttributeError, setattr,
+                          bios_settings['MemTest'], 'current_value', 'foo')
+        self.assertIs(bios_settings['MemTest'].possible_values,
+                      bios_settings['ProcVirtualization'].possible_values)
+
     @mock.patch.object(dracclient.client.WSManClient, 'invoke',
                        spec_set=True, autospec=True)
     def test_set_bios_settings(self, mock_requests, mock_invoke,
@@ -460,6 +690,22 @@ class ClientBIOSConfigurationTestCase(base.BaseTest):
             exceptions.DRACOperationFailed, re.escape(expected_message),
             self.drac_client.set_bios_settings, {'Proc1NumCores': -42})
 
+    def test_set_bios_settings_with_non_integer_value(
+            self, mock_requests, mock_wait_until_idrac_is_ready):
+        expected_message = ("Attribute 'Proc1NumCores' cannot be set to value "
+                            "'foo'. It must be an integer.")
+        mock_requests.post('https://1.2.3.4:443/wsman', [
+            {'text': test_utils.BIOSEnumerations[
+                uris.DCIM_BIOSEnumeration]['ok']},
+            {'text': test_utils.BIOSEnumerations[
+                uris.DCIM_BIOSString]['ok']},
+            {'text': test_utils.BIOSEnumerations[
+                uris.DCIM_BIOSInteger]['mutable']}])
+
+        self.assertRaisesRegexp(
+            exceptions.InvalidParameterValue, re.escape(expected_message),
+            self.drac_client.set_bios_settings, {'Proc1NumCores': 'foo'})
+
 
 class ClientBIOSChangesTestCase(base.BaseTest):
 
@@ -498,3 +744,195 @@ class ClientBIOSChangesTestCase(base.BaseTest):
             mock.ANY, resource_uri=uris.DCIM_BIOSService,
             cim_creation_class_name='DCIM_BIOSService',
             cim_name='DCIM:BIOSService', target='BIOS.Setup.1-1')
+
+
+@requests_mock.Mocker()
+@mock.patch.object(dracclient.client.WSManClient, 'wait_until_idrac_is_ready',
+                   spec_set=True, autospec=True)
+class ClientBIOSIdempotentTestCase(base.BaseTest):
+
+    def setUp(self):
+        super(ClientBIOSIdempotentTestCase, self).setUp()
+        self.drac_client = dracclient.client.DRACClient(
+            idempotent=True, **test_utils.FAKE_ENDPOINT)
+
+    def test_set_bios_settings_pending(self, mock_requests,
+                                       mock_wait_until_idrac_is_ready):
+        mock_requests.post('https://1.2.3.4:443/wsman', [
+            {'text': test_utils.BIOSEnumerations[
+                uris.DCIM_BIOSEnumeration]['pending']}])
+
+        result = self.drac_client.set_bios_settings(
+            {'ProcVirtualization': 'Disabled'})
+
+        self.assertEqual({'commit_required': False, 'changed': False},
+                         result)
+        self.assertEqual(1, mock_requests.call_count)
+        self.assertIn('where AttributeName="ProcVirtualization"',
+                      mock_requests.last_request.text)
+
+    def test_set_bios_settings_changed(self, mock_requests,
+                                       mock_wait_until_idrac_is_ready):
+        mock_requests.post('https://1.2.3.4:443/wsman', [
+            {'text': test_utils.BIOSEnumerations[
+                uris.DCIM_BIOSEnumeration]['ok']},
+            {'text': test_utils.BIOSInvocations[
+                uris.DCIM_BIOSService]['SetAttributes']['ok']}])
+
+        result = self.drac_client.set_bios_settings(
+            {'MemTest': 'Disabled', 'ProcVirtualization': 'Disabled'})
+
+        self.assertEqual({'commit_required': True, 'changed': True}, result)
+        self.assertEqual(2, mock_requests.call_count)
+        self.assertIn('SetAttributes', mock_requests.last_request.text)
+        self.assertNotIn('MemTest', mock_requests.last_request.text)
+
+    def test_set_bios_settings_unknown(self, mock_requests,
+                                       mock_wait_until_idrac_is_ready):
+        mock_requests.post('https://1.2.3.4:443/wsman', [
+            {'text': test_utils.BIOSEnumerations[
+                uris.DCIM_BIOSEnumeration]['ok']},
+            {'text': test_utils.BIOSEnumerations[
+                uris.DCIM_BIOSString]['ok']},
+            {'text': test_utils.BIOSEnumerations[
+                uris.DCIM_BIOSInteger]['ok']}])
+
+        self.assertRaises(exceptions.InvalidParameterValue,
+                          self.drac_client.set_bios_settings, {'foo': 'bar'})
+
+    def test_set_bios_settings_invalid_name(self, mock_requests,
+                                            mock_wait_until_idrac_is_ready):
+        self.assertRaisesRegexp(
+            exceptions.InvalidParameterValue, 'Invalid BIOS attribute names',
+            self.drac_client.set_bios_settings,
+            {'MemTest" or AttributeName="ProcVirtualization': 'Disabled'})
+        self.assertEqual(0, mock_requests.call_count)
+
+
+@requests_mock.Mocker()
+@mock.patch.object(dracclient.client.WSManClient, 'wait_until_idrac_is_ready',
+                   spec_set=True, autospec=True)
+class ClientBIOSReconcileTestCase(base.BaseTest):
+
+    def setUp(self):
+        super(ClientBIOSReconcileTestCase, self).setUp()
+        self.drac_client = dracclient.client.DRACClient(
+            **test_utils.FAKE_ENDPOINT)
+
+    def test_reconcile_bios_compliant(self, mock_requests,
+                                      mock_wait_until_idrac_is_ready):
+        mock_requests.post('https://1.2.3.4:443/wsman', [
+            {'text': test_utils.BIOSEnumerations[
+                uris.DCIM_BIOSEnumeration]['ok']}])
+
+        result = self.drac_client.reconcile_bios(
+            {'MemTest': 'Disabled', 'ProcVirtualization': 'Enabled'})
+
+        self.assertEqual({'changed': False, 'job_id': None,
+                          'attributes': {'MemTest': 'unchanged',
+                                         'ProcVirtualization': 'unchanged'}},
+                         result)
+        self.assertEqual(1, mock_requests.call_count)
+        self.assertIn('select * from DCIM_BIOSEnumeration where '
+                      'AttributeName="MemTest" or '
+                      'AttributeName="ProcVirtualization"',
+                      mock_requests.last_request.text)
+        self.assertFalse(mock_wait_until_idrac_is_ready.called)
+
+    def test_reconcile_bios_across_namespaces(
+            self, mock_requests, mock_wait_until_idrac_is_ready):
+        mock_requests.post('https://1.2.3.4:443/wsman', [
+            {'text': test_utils.BIOSEnumerations[
+                uris.DCIM_BIOSEnumeration]['ok']},
+            {'text': test_utils.BIOSEnumerations[
+                uris.DCIM_BIOSString]['ok']}])
+
+        result = self.drac_client.reconcile_bios(
+            {'MemTest': 'Disabled', 'SystemModelName': 'PowerEdge R320'})
+
+        self.assertEqual({'MemTest': 'unchanged',
+                          'SystemModelName': 'unchanged'},
+                         result['attributes'])
+        self.assertEqual(2, mock_requests.call_count)
+        self.assertIn('where AttributeName="SystemModelName"',
+                      mock_requests.last_request.text)
+
+    def test_reconcile_bios_set(self, mock_requests,
+                                mock_wait_until_idrac_is_ready):
+        mock_requests.post('https://1.2.3.4:443/wsman', [
+            {'text': test_utils.BIOSEnumerations[
+                uris.DCIM_BIOSEnumeration]['ok']},
+            {'text': test_utils.BIOSInvocations[
+                uris.DCIM_BIOSService]['SetAttributes']['ok']},
+            {'text': test_utils.JobInvocations[uris.DCIM_BIOSService][
+                'CreateTargetedConfigJob']['ok']}])
+
+        result = self.drac_client.reconcile_bios(
+            {'MemTest': 'Disabled', 'ProcVirtualization': 'Disabled'},
+            reboot=True)
+
+        self.assertEqual({'changed': True, 'job_id': 'JID_442507917525',
+                          'attributes': {'MemTest': 'unchanged',
+                                         'ProcVirtualization': 'set'}},
+                         result)
+        self.assertEqual(3, mock_requests.call_count)
+        self.assertIn('RebootJobType', mock_requests.last_request.text)
+
+    def test_reconcile_bios_pending_with_scheduled_job(
+            self, mock_requests, mock_wait_until_idrac_is_ready):
+        mock_requests.post('https://1.2.3.4:443/wsman', [
+            {'text': test_utils.BIOSEnumerations[
+                uris.DCIM_BIOSEnumeration]['pending']},
+            {'text': test_utils.JobEnumerations[
+                uris.DCIM_LifecycleJob]['unfinished']}])
+
+        result = self.drac_client.reconcile_bios(
+            {'ProcVirtualization': 'Disabled'})
+
+        self.assertEqual({'changed': False, 'job_id': 'JID_442507917525',
+                          'attributes': {'ProcVirtualization': 'pending'}},
+                         result)
+        self.assertEqual(2, mock_requests.call_count)
+
+    def test_reconcile_bios_pending_without_job(
+            self, mock_requests, mock_wait_until_idrac_is_ready):
+        mock_requests.post('https://1.2.3.4:443/wsman', [
+            {'text': test_utils.BIOSEnumerations[
+                uris.DCIM_BIOSEnumeration]['pending']},
+            {'text': test_utils.JobEnumerations[
+                uris.DCIM_LifecycleJob]['not_found']},
+            {'text': test_utils.JobInvocations[uris.DCIM_BIOSService][
+                'CreateTargetedConfigJob']['ok']}])
+
+        result = self.drac_client.reconcile_bios(
+            {'ProcVirtualization': 'Disabled'})
+
+        self.assertEqual({'changed': True, 'job_id': 'JID_442507917525',
+                          'attributes': {'ProcVirtualization': 'pending'}},
+                         result)
+
+    def test_reconcile_bios_overrides_pending_value(
+            self, mock_requests, mock_wait_until_idrac_is_ready):
+        mock_requests.post('https://1.2.3.4:443/wsman', [
+            {'text': test_utils.BIOSEnumerations[
+                uris.DCIM_BIOSEnumeration]['pending']},
+            {'text': test_utils.BIOSInvocations[
+                uris.DCIM_BIOSService]['SetAttributes']['ok']},
+            {'text': test_utils.JobInvocations[uris.DCIM_BIOSService][
+                'CreateTargetedConfigJob']['ok']}])
+
+        result = self.drac_client.reconcile_bios(
+            {'ProcVirtualization': 'Enabled'})
+
+        self.assertEqual({'ProcVirtualization': 'set'}, result['attributes'])
+
+    def test_reconcile_bios_with_invalid_value(
+            self, mock_requests, mock_wait_until_idrac_is_ready):
+        mock_requests.post('https://1.2.3.4:443/wsman', [
+            {'text': test_utils.BIOSEnumerations[
+                uris.DCIM_BIOSEnumeration]['ok']}])
+
+        self.assertRaises(exceptions.DRACOperationFailed,
+                          self.drac_client.reconcile_bios,
+                          {'MemTest': 'foo'})
+        self.assertEqual(1, mock_requests.call_count)
@@ -0,0 +1,172 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+import requests.exceptions
+import requests_mock
+
+from dracclient import breaker
+import dracclient.client
+from dracclient import exceptions
+from dracclient import instrumentation
+from dracclient.tests import base
+import dracclient.wsman
+
+
+@mock.patch('time.time', autospec=True, return_value=1000)
+class CircuitBreakerTestCase(base.BaseTest):
+
+    def setUp(self):
+        super(CircuitBreakerTestCase, self).setUp()
+        self.breaker = breaker.CircuitBreaker('1.2.3.4', 2, reset_timeout=60)
+
+    def test_open(self, mock_time):
+        self.breaker.before_request()
+        self.assertIsNone(self.breaker.record(False))
+        self.breaker.before_request()
+        self.assertEqual(breaker.OPEN, self.breaker.record(False))
+
+        self.assertEqual(breaker.OPEN, self.breaker.state)
+        self.assertRaises(exceptions.DRACCircuitOpen,
+                          self.breaker.before_request)
+
+    def test_success_resets_failures(self, mock_time):
+        self.breaker.record(False)
+        self.breaker.record(True)
+        self.breaker.record(False)
+
+        self.assertEqual(breaker.CLOSED, self.breaker.state)
+        self.assertEqual(1, self.breaker.failures)
+
+    def test_half_open_probe(self, mock_time):
+        self.breaker.record(False)
+        self.breaker.record(False)
+        mock_time.return_value = 1060
+
+        self.assertEqual(breaker.HALF_OPEN, self.breaker.state)
+        self.breaker.before_request()
+        self.assertRaises(exceptions.DRACCircuitOpen,
+                          self.breaker.before_request)
+        self.assertEqual(breaker.CLOSED, self.breaker.record(True))
+        self.breaker.before_request()
+
+    def test_half_open_probe_failed(self, mock_time):
+        self.breaker.record(False)
+        self.breaker.record(False)
+        mock_time.return_value = 1060
+        self.breaker.before_request()
+
+        self.assertEqual(breaker.OPEN, self.breaker.record(False))
+        mock_time.return_value = 1100
+        self.assertRaises(exceptions.DRACCircuitOpen,
+                          self.breaker.before_request)
+
+    def test_reset(self, mock_time):
+        self.breaker.record(False)
+        self.breaker.record(False)
+
+        self.breaker.reset()
+
+        self.assertEqual(breaker.CLOSED, self.breaker.state)
+        self.breaker.before_request()
+
+    def test_get_circuit_breaker(self, mock_time):
+        circuit_breaker = breaker.get_circuit_breaker('10.0.1.1', '443', 2)
+
+        self.assertIs(circuit_breaker,
+                      breaker.get_circuit_breaker('10.0.1.1', 443, 5))
+        self.assertEqual(2, circuit_breaker.failure_threshold)
+        self.assertIsNot(circuit_breaker,
+                         breaker.get_circuit_breaker('10.0.1.2', 443, 2))
+
+    def test_get_circuit_state(self, mock_time):
+        circuit_breaker = breaker.get_circuit_breaker('10.0.1.3', 443, 1)
+        circuit_breaker.record(False)
+
+        self.assertEqual(breaker.OPEN, breaker.get_circuit_state('10.0.1.3'))
+        self.assertEqual(breaker.CLOSED,
+                         breaker.get_circuit_state('10.0.1.4'))
+
+
+@requests_mock.Mocker()
+class CircuitBreakerClientTestCase(base.BaseTest):
+
+    def setUp(self):
+        super(CircuitBreakerClientTestCase, self).setUp()
+        self.client = dracclient.wsman.Client(
+            '10.0.1.5', 'admin', 's3cr3t', ssl_retries=2, breaker_threshold=2)
+        # the breaker of the DRAC is shared with the clients of other tests
+        self.client._breaker = breaker.CircuitBreaker('10.0.1.5', 2)
+
+    def test_unreachable(self, mock_requests):
+        mock_requests.post('https://10.0.1.5:443/wsman',
+                           exc=requests.exceptions.ConnectionError)
+        listener = mock.Mock()
+        instrumentation.register_listener(listener)
+        self.addCleanup(instrumentation.unregister_listener, listener)
+
+        for request in range(2):
+            self.assertRaises(exceptions.WSManRequestFailure,
+                              self.client.enumerate, 'resource')
+
+        self.assertEqual(4, mock_requests.call_count)
+        self.assertEqual(breaker.OPEN, self.client.circuit_state)
+        self.assertRaises(exceptions.DRACCircuitOpen,
+                          self.client.enumerate, 'resource')
+        self.assertEqual(4, mock_requests.call_count)
+        listener.assert_any_call(instrumentation.CIRCUIT_STATE,
+                                 host='10.0.1.5', port=443,
+                                 state=breaker.OPEN)
+
+    def test_service_unavailable(self, mock_requests):
+        mock_requests.post('https://10.0.1.5:443/wsman', status_code=503)
+
+        for request in range(2):
+            self.assertRaises(exceptions.WSManInvalidResponse,
+                              self.client.enumerate, 'resource')
+
+        self.assertEqual(breaker.OPEN, self.client.circuit_state)
+
+    def test_error_response(self, mock_requests):
+        mock_requests.post('https://10.0.1.5:443/wsman', status_code=500)
+
+        for request in range(2):
+            self.assertRaises(exceptions.WSManInvalidResponse,
+                              self.client.enumerate, 'resource')
+
+        self.assertEqual(breaker.CLOSED, self.client.circuit_state)
+
+    @mock.patch('time.time', autospec=True, return_value=1000)
+    def test_recovered(self, mock_requests, mock_time):
+        mock_requests.post('https://10.0.1.5:443/wsman',
+                           [{'exc': requests.exceptions.ConnectionError}] * 4 +
+                           [{'text': '<result>yay!</result>'}])
+        for request in range(2):
+            self.assertRaises(exceptions.WSManRequestFailure,
+                              self.client.enumerate, 'resource')
+        mock_time.return_value = 1060
+
+        self.client.enumerate('resource', auto_pull=False)
+
+        self.assertEqual(breaker.CLOSED, self.client.circuit_state)
+
+    def test_disabled(self, mock_requests):
+        client = dracclient.wsman.Client('10.0.1.5', 'admin', 's3cr3t')
+
+        self.assertIsNone(client.circuit_state)
+
+    def test_get_circuit_state(self, mock_requests):
+        client = dracclient.client.DRACClient('10.0.1.6', 'admin', 's3cr3t',
+                                              breaker_threshold=3)
+
+        self.assertEqual(breaker.CLOSED, client.get_circuit_state())
@@ -11,20 +11,227 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import threading
+import time
+
+import lxml.etree
 import mock
 import requests_mock
 
 import dracclient.client
 from dracclient import constants
 from dracclient import exceptions
+from dracclient.resources import bios
 from dracclient.resources import uris
 from dracclient.tests import base
 from dracclient.tests import utils as test_utils
+import dracclient.wsman
+
+
+class DRACClientTestCase(base.BaseTest):
+
+    def test_managers_created_on_first_use(self):
+        client = dracclient.client.DRACClient(**test_utils.FAKE_ENDPOINT)
+
+        self.assertNotIn('_bios_cfg', vars(client))
+
+        bios_cfg = client._bios_cfg
+
+        self.assertIsInstance(bios_cfg, bios.BIOSConfiguration)
+        self.assertIs(client.client, bios_cfg.client)
+        self.assertIs(bios_cfg, client._bios_cfg)
+        self.assertIn('_bios_cfg', vars(client))
+        self.assertNotIn('_raid_mgmt', vars(client))
+
+    def test_managers_per_client(self):
+        client = dracclient.client.DRACClient(**test_utils.FAKE_ENDPOINT)
+        other_client = dracclient.client.DRACClient(
+            **test_utils.FAKE_ENDPOINT)
+
+        self.assertIsNot(client._job_mgmt, other_client._job_mgmt)
+        self.assertIs(other_client.client, other_client._job_mgmt.client)
+
+
+def _wait_for(condition):
+    for attempt in range(500):
+        if condition():
+            return
+        time.sleep(0.01)
+    raise AssertionError('condition not met')
+
+
+class _Interrupt(BaseException):
+    pass
+
+
+class SingleFlightTestCase(base.BaseTest):
+
+    def setUp(self):
+        super(SingleFlightTestCase, self).setUp()
+        self.single_flight = dracclient.client._SingleFlight()
+        self.release = threading.Event()
+        self.calls = 0
+
+    def _call(self, result=None, error=None):
+        self.calls += 1
+        self.release.wait()
+        if error is not None:
+            raise error
+        return result
+
+    def _follow(self, key, copy_result=None):
+        outcome = {}
+
+        def follower():
+            try:
+                outcome['result'] = self.single_flight.do(
+                    key, lambda: self._call('other'), copy_result)
+            except BaseException as ex:
+                outcome['error'] = ex
+
+        thread = threading.Thread(target=follower)
+        thread.start()
+        _wait_for(lambda: self.single_flight._calls[key].followers == 1)
+        return thread, outcome
+
+    def test_do(self):
+        result = {'foo': 'bar'}
+        leader = threading.Thread(target=self.single_flight.do,
+                                  args=('key', lambda: self._call(result),
+                                        dict))
+        leader.start()
+        _wait_for(lambda: self.calls == 1)
+
+        thread, outcome = self._follow('key', dict)
+        self.release.set()
+        leader.join()
+        thread.join()
+
+        self.assertEqual(1, self.calls)
+        self.assertEqual(result, outcome['result'])
+        self.assertIsNot(result, outcome['result'])
+        self.assertEqual({}, self.single_flight._calls)
+
+    def test_do_error(self):
+        error = exceptions.WSManRequestFailure()
+        leader = threading.Thread(
+            target=self.assertRaises,
+            args=(exceptions.WSManRequestFailure, self.single_flight.do,
+                  'key', lambda: self._call(error=error)))
+        leader.start()
+        _wait_for(lambda: self.calls == 1)
+
+        thread, outcome = self._follow('key')
+        self.release.set()
+        leader.join()
+        thread.join()
+
+        self.assertIsInstance(outcome['error'],
+                              exceptions.WSManRequestFailure)
+        self.assertIsNot(error, outcome['error'])
+        self.assertEqual(str(error), str(outcome['error']))
+        self.assertEqual({}, self.single_flight._calls)
+
+    def test_copy_error(self):
+        error = exceptions.DRACOperationFailed(drac_messages=['foo'])
+
+        copied = dracclient.client._copy_error(error)
+
+        self.assertIsInstance(copied, exceptions.DRACOperationFailed)
+        self.assertIsNot(error, copied)
+        self.assertEqual(str(error), str(copied))
+        self.assertEqual(error.kwargs, copied.kwargs)
+        self.assertIsNone(getattr(copied, '__traceback__', None))
+
+    def test_do_interrupted(self):
+        error = _Interrupt()
+        leader = threading.Thread(
+            target=self.assertRaises,
+            args=(_Interrupt, self.single_flight.do,
+                  'key', lambda: self._call(error=error)))
+        leader.start()
+        _wait_for(lambda: self.calls == 1)
+
+        thread, outcome = self._follow('key')
+        self.release.set()
+        leader.join()
+        thread.join()
+
+        # the follower issues the call again instead of being interrupted
+        self.assertEqual('other', outcome['result'])
+        self.assertNotIn('error', outcome)
+        self.assertEqual(2, self.calls)
+        self.assertEqual({}, self.single_flight._calls)
+
+    def test_do_not_cached(self):
+        self.release.set()
+
+        self.assertEqual('foo', self.single_flight.do('key',
+                                                      lambda: 'foo'))
+        self.assertEqual('bar', self.single_flight.do('key',
+                                                      lambda: 'bar'))
 
 
 @requests_mock.Mocker()
 class WSManClientTestCase(base.BaseTest):
 
+    def test_enumerate_coalesced(self, mock_requests):
+        release = threading.Event()
+
+        def respond(request, context):
+            release.wait()
+            return '<result>yay!</result>'
+
+        mock_requests.post('https://1.2.3.4:443/wsman', text=respond)
+        client = dracclient.client.WSManClient(**test_utils.FAKE_ENDPOINT)
+        results = []
+
+        def enumerate_resource():
+            results.append(client.enumerate('http://resource',
+                                            wait_for_idrac=False))
+
+        threads = [threading.Thread(target=enumerate_resource)
+                   for thread in range(2)]
+        threads[0].start()
+        _wait_for(lambda: mock_requests.call_count == 1)
+        threads[1].start()
+        _wait_for(lambda: any(call.followers == 1
+                              for call in client._reads._calls.values()))
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(1, mock_requests.call_count)
+        self.assertEqual(lxml.etree.tostring(results[0]),
+                         lxml.etree.tostring(results[1]))
+        self.assertIsNot(results[0], results[1])
+
+    def test_is_idrac_ready_coalesced(self, mock_requests):
+        release = threading.Event()
+
+        def respond(request, context):
+            release.wait()
+            return test_utils.LifecycleControllerInvocations[
+                uris.DCIM_LCService]['GetRemoteServicesAPIStatus']['is_ready']
+
+        mock_requests.post('https://1.2.3.4:443/wsman', text=respond)
+        client = dracclient.client.WSManClient(**test_utils.FAKE_ENDPOINT)
+        results = []
+        threads = [threading.Thread(
+            target=lambda: results.append(client.is_idrac_ready()))
+            for thread in range(2)]
+        threads[0].start()
+        _wait_for(lambda: mock_requests.call_count == 1)
+        threads[1].start()
+        _wait_for(lambda: any(call.followers == 1
+                              for call in client._reads._calls.values()))
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(1, mock_requests.call_count)
+        self.assertEqual([True, True], results)
+
     @mock.patch.object(dracclient.client.WSManClient,
                        'wait_until_idrac_is_ready', spec_set=True,
                        autospec=True)
@@ -50,6 +257,55 @@ class WSManClientTestCase(base.BaseTest):
         self.assertFalse(mock_wait_until_idrac_is_ready.called)
         self.assertEqual('yay!', resp.text)
 
+    @mock.patch.object(dracclient.client.WSManClient,
+                       'wait_until_idrac_is_ready', spec_set=True,
+                       autospec=True)
+    def test_count(self, mock_requests, mock_wait_until_idrac_is_ready):
+        mock_requests.post(
+            'https://1.2.3.4:443/wsman',
+            [{'text': test_utils.WSManEnumerations['count_estimate']['ok']},
+             {'text': test_utils.WSManEnumerations['release']['ok']}])
+
+        client = dracclient.client.WSManClient(**test_utils.FAKE_ENDPOINT)
+        count = client.count('http://resource/Foo', 'InstanceID')
+
+        self.assertEqual(42, count)
+        mock_wait_until_idrac_is_ready.assert_called_once_with(client)
+        self.assertEqual(2, mock_requests.call_count)
+        enum_xml = lxml.etree.fromstring(
+            mock_requests.request_history[0].body)
+        self.assertIsNone(enum_xml.find(
+            './/{%s}Filter' % dracclient.wsman.NS_WSMAN))
+
+    @mock.patch.object(dracclient.client.WSManClient,
+                       'wait_until_idrac_is_ready', spec_set=True,
+                       autospec=True)
+    def test_count_without_estimate(self, mock_requests,
+                                    mock_wait_until_idrac_is_ready):
+        mock_requests.post(
+            'https://1.2.3.4:443/wsman',
+            [{'text': test_utils.WSManEnumerations['count_estimate'][
+                'unsupported']},
+             {'text': test_utils.WSManEnumerations['release']['ok']},
+             {'text': test_utils.JobEnumerations[uris.DCIM_LifecycleJob][
+                 'ok']}])
+
+        client = dracclient.client.WSManClient(**test_utils.FAKE_ENDPOINT)
+        count = client.count(uris.DCIM_LifecycleJob, 'InstanceID',
+                             condition='Name != "CLEARALL"')
+
+        self.assertEqual(6, count)
+        mock_wait_until_idrac_is_ready.assert_called_once_with(client)
+        self.assertEqual(3, mock_requests.call_count)
+        filters = [
+            lxml.etree.fromstring(request.body).find(
+                './/{%s}Filter' % dracclient.wsman.NS_WSMAN)
+            for request in mock_requests.request_history]
+        self.assertEqual('select * from DCIM_LifecycleJob '
+                         'where Name != "CLEARALL"', filters[0].text)
+        self.assertEqual('select InstanceID from DCIM_LifecycleJob '
+                         'where Name != "CLEARALL"', filters[2].text)
+
     @mock.patch.object(dracclient.client.WSManClient,
                        'wait_until_idrac_is_ready', spec_set=True,
                        autospec=True)
@@ -126,6 +382,84 @@ class WSManClientTestCase(base.BaseTest):
                           'http://resource', 'Foo',
                           expected_return_value='4242', wait_for_idrac=False)
 
+    @mock.patch.object(dracclient.client.WSManClient,
+                       'wait_until_idrac_is_ready', spec_set=True,
+                       autospec=True)
+    def test_enumerate_optimistic_ready(self, mock_requests,
+                                        mock_wait_until_idrac_is_ready):
+        mock_requests.post('https://1.2.3.4:443/wsman',
+                           text='<result>yay!</result>')
+
+        client = dracclient.client.WSManClient(optimistic_ready=True,
+                                               **test_utils.FAKE_ENDPOINT)
+        resp = client.enumerate('http://resource')
+        self.assertFalse(mock_wait_until_idrac_is_ready.called)
+        self.assertEqual(1, mock_requests.call_count)
+        self.assertEqual('yay!', resp.text)
+
+    @mock.patch.object(dracclient.client.WSManClient,
+                       'wait_until_idrac_is_ready', spec_set=True,
+                       autospec=True)
+    def test_enumerate_optimistic_ready_unavailable(
+            self, mock_requests, mock_wait_until_idrac_is_ready):
+        mock_requests.post('https://1.2.3.4:443/wsman',
+                           [{'status_code': 503},
+                            {'text': '<result>yay!</result>'}])
+
+        client = dracclient.client.WSManClient(optimistic_ready=True,
+                                               **test_utils.FAKE_ENDPOINT)
+        resp = client.enumerate('http://resource')
+        mock_wait_until_idrac_is_ready.assert_called_once_with(client)
+        self.assertEqual(2, mock_requests.call_count)
+        self.assertEqual('yay!', resp.text)
+
+    @mock.patch.object(dracclient.client.WSManClient,
+                       'wait_until_idrac_is_ready', spec_set=True,
+                       autospec=True)
+    def test_invoke_optimistic_ready_busy(self, mock_requests,
+                                          mock_wait_until_idrac_is_ready):
+        busy_xml = """
+<response xmlns:n1="http://resource">
+    <n1:ReturnValue>2</n1:ReturnValue>
+    <n1:Message>Lifecycle Controller is currently in use.</n1:Message>
+</response>
+"""  # noqa
+        xml = """
+<response xmlns:n1="http://resource">
+    <n1:ReturnValue>42</n1:ReturnValue>
+    <result>yay!</result>
+</response>
+"""  # noqa
+        mock_requests.post('https://1.2.3.4:443/wsman',
+                           [{'text': busy_xml}, {'text': xml}])
+
+        client = dracclient.client.WSManClient(optimistic_ready=True,
+                                               **test_utils.FAKE_ENDPOINT)
+        resp = client.invoke('http://resource', 'Foo')
+        mock_wait_until_idrac_is_ready.assert_called_once_with(client)
+        self.assertEqual(2, mock_requests.call_count)
+        self.assertEqual('yay!', resp.find('result').text)
+
+    @mock.patch.object(dracclient.client.WSManClient,
+                       'wait_until_idrac_is_ready', spec_set=True,
+                       autospec=True)
+    def test_invoke_optimistic_ready_error(self, mock_requests,
+                                           mock_wait_until_idrac_is_ready):
+        xml = """
+<response xmlns:n1="http://resource">
+    <n1:ReturnValue>2</n1:ReturnValue>
+    <n1:Message>The command failed to set RequestedState</n1:Message>
+</response>
+"""  # noqa
+        mock_requests.post('https://1.2.3.4:443/wsman', text=xml)
+
+        client = dracclient.client.WSManClient(optimistic_ready=True,
+                                               **test_utils.FAKE_ENDPOINT)
+        self.assertRaises(exceptions.DRACOperationFailed, client.invoke,
+                          'http://resource', 'Foo')
+        self.assertFalse(mock_wait_until_idrac_is_ready.called)
+        self.assertEqual(1, mock_requests.call_count)
+
     def test_is_idrac_ready_ready(self, mock_requests):
         expected_text = test_utils.LifecycleControllerInvocations[
             uris.DCIM_LCService]['GetRemoteServicesAPIStatus']['is_ready']
@@ -0,0 +1,590 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import functools
+import threading
+
+import mock
+
+import dracclient.client
+from dracclient import constants
+from dracclient import exceptions
+from dracclient import fleet
+from dracclient import instrumentation
+from dracclient.resources import job
+from dracclient.resources import raid
+from dracclient.tests import base
+
+
+def _job(job_id, status='Completed'):
+    return job.Job(id=job_id, name='Config:RAID', start_time='TIME_NOW',
+                   until_time='TIME_NA', message='Done', status=status,
+                   percent_complete='100')
+
+
+def _spec(raid_controller, bays, disk_name=None):
+    return raid.VirtualDiskSpec(
+        raid_controller=raid_controller,
+        physical_disks=['Disk.Bay.%d:Enclosure.Internal.0-1:%s' %
+                        (bay, raid_controller) for bay in bays],
+        raid_level='1', size_mb=1000, disk_name=disk_name, span_length=2,
+        span_depth=1)
+
+
+class RunOnHostsTestCase(base.BaseTest):
+
+    def test_run_on_hosts(self):
+        def fail(result):
+            raise exceptions.WSManRequestFailure('boom')
+
+        results = fleet.run_on_hosts([('10.0.0.1', lambda result: 1),
+                                      ('10.0.0.2', fail),
+                                      ('10.0.0.3', lambda result: 3)])
+
+        self.assertEqual(['10.0.0.1', '10.0.0.2', '10.0.0.3'],
+                         [result.host for result in results])
+        self.assertEqual([1, None, 3], [result.result for result in results])
+        self.assertEqual([True, False, True],
+                         [result.succeeded for result in results])
+        self.assertIsInstance(results[1].error,
+                              exceptions.WSManRequestFailure)
+
+    def test_run_on_hosts_max_concurrency(self):
+        lock = threading.Lock()
+        running = [0]
+        peaks = []
+
+        def run(result):
+            with lock:
+                running[0] += 1
+                peaks.append(running[0])
+            result.run_stage('sleep', threading.Event().wait, 0.01)
+            with lock:
+                running[0] -= 1
+
+        results = fleet.run_on_hosts(
+            [('10.0.0.%d' % index, run) for index in range(6)],
+            max_concurrency=2)
+
+        self.assertEqual(2, max(peaks))
+        self.assertTrue(all(result.succeeded for result in results))
+
+    def test_run_on_hosts_threads(self):
+        threads = set()
+
+        def run(result):
+            threads.add(threading.current_thread())
+
+        fleet.run_on_hosts([('10.0.0.%d' % index, run)
+                            for index in range(20)], max_concurrency=3)
+
+        self.assertLessEqual(len(threads), 3)
+
+    @mock.patch.object(fleet, 'time', autospec=True)
+    def test_run_stage(self, mock_time):
+        # only the clock of the fleet module is faked, as logging reads the
+        # global one as well
+        mock_time.time.side_effect = [10, 12.5]
+        listener = mock.Mock()
+        instrumentation.register_listener(listener)
+        self.addCleanup(instrumentation.unregister_listener, listener)
+        result = fleet.HostResult('10.0.0.1')
+
+        self.assertEqual(3, result.run_stage('stage', lambda x: x + 1, 2))
+
+        self.assertEqual({'stage': 2.5}, result.timings)
+        self.assertEqual(2.5, result.duration)
+        listener.assert_called_once_with(instrumentation.FLEET_STAGE,
+                                         host='10.0.0.1', stage='stage',
+                                         duration=2.5)
+
+
+class WorkerPoolTestCase(base.BaseTest):
+
+    def test_submit(self):
+        release = threading.Event()
+        done = []
+        pool = fleet._WorkerPool(2)
+        for index in range(5):
+            pool.submit(functools.partial(
+                lambda index: release.wait() and done.append(index), index))
+
+        self.assertEqual(2, len(pool._threads))
+        release.set()
+        pool.join()
+
+        self.assertEqual(list(range(5)), sorted(done))
+        self.assertFalse(any(thread.is_alive() for thread in pool._threads))
+
+    def test_submit_urgent(self):
+        release = threading.Event()
+        done = []
+        pool = fleet._WorkerPool(1)
+        pool.submit(release.wait)
+        pool.submit(lambda: done.append('normal'))
+        pool.submit(lambda: done.append('urgent'), urgent=True)
+        release.set()
+        pool.join()
+
+        self.assertEqual(['urgent', 'normal'], done)
+
+    def test_submit_from_task(self):
+        done = []
+        pool = fleet._WorkerPool(1)
+        pool.submit(lambda: pool.submit(lambda: done.append('nested')))
+        pool.join()
+
+        self.assertEqual(['nested'], done)
+
+    def test_task_error(self):
+        done = []
+        pool = fleet._WorkerPool(1)
+        pool.submit(lambda: 1 / 0)
+        pool.submit(lambda: done.append('next'))
+        pool.join()
+
+        self.assertEqual(['next'], done)
+
+
+@mock.patch('time.time', autospec=True, return_value=1000)
+@mock.patch('time.sleep', autospec=True)
+@mock.patch.object(dracclient.client.DRACClient, 'wait_for_power_state',
+                   spec_set=True, autospec=True, return_value='POWER_ON')
+@mock.patch.object(dracclient.client.DRACClient, 'set_power_state',
+                   spec_set=True, autospec=True)
+class SetPowerStateTestCase(base.BaseTest):
+
+    def setUp(self):
+        super(SetPowerStateTestCase, self).setUp()
+        self.drac_clients = [
+            dracclient.client.DRACClient('10.2.0.%d' % index, 'admin',
+                                         's3cr3t')
+            for index in range(1, 6)]
+
+    def test_set_power_state(self, mock_set_power_state,
+                             mock_wait_for_power_state, mock_sleep,
+                             mock_time):
+        results = fleet.set_power_state(self.drac_clients, 'POWER_ON',
+                                        batch_size=2, stagger=10, timeout=300,
+                                        interval=5)
+
+        self.assertEqual(['POWER_ON'] * 5,
+                         [result.result for result in results])
+        self.assertEqual(
+            [['request', 'wait']] * 2 + [['delay', 'request', 'wait']] * 3,
+            [list(result.timings) for result in results])
+        # the batches are dispatched by the calling thread
+        self.assertEqual([mock.call(10), mock.call(20)],
+                         mock_sleep.call_args_list)
+        for drac_client in self.drac_clients:
+            mock_set_power_state.assert_any_call(drac_client, 'POWER_ON')
+            mock_wait_for_power_state.assert_any_call(drac_client,
+                                                      'POWER_ON', 300, 5)
+
+    def test_set_power_state_single_batch(self, mock_set_power_state,
+                                          mock_wait_for_power_state,
+                                          mock_sleep, mock_time):
+        results = fleet.set_power_state(self.drac_clients, 'POWER_OFF',
+                                        stagger=10, wait=False)
+
+        self.assertEqual([None] * 5, [result.result for result in results])
+        self.assertEqual([['request']] * 5,
+                         [list(result.timings) for result in results])
+        self.assertFalse(mock_sleep.called)
+        self.assertFalse(mock_wait_for_power_state.called)
+
+    def test_set_power_state_unchanged(self, mock_set_power_state,
+                                       mock_wait_for_power_state, mock_sleep,
+                                       mock_time):
+        mock_set_power_state.return_value = {'changed': False}
+
+        results = fleet.set_power_state(self.drac_clients[:1], 'POWER_ON')
+
+        self.assertEqual('POWER_ON', results[0].result)
+        self.assertFalse(mock_wait_for_power_state.called)
+
+    def test_set_power_state_failure(self, mock_set_power_state,
+                                     mock_wait_for_power_state, mock_sleep,
+                                     mock_time):
+        def set_power_state(drac_client, target_state):
+            if drac_client is self.drac_clients[0]:
+                raise exceptions.WSManRequestFailure('boom')
+
+        mock_set_power_state.side_effect = set_power_state
+
+        results = fleet.set_power_state(self.drac_clients, 'POWER_OFF')
+
+        self.assertEqual([False] + [True] * 4,
+                         [result.succeeded for result in results])
+        self.assertEqual(['request'], list(results[0].timings))
+        self.assertEqual(4, mock_wait_for_power_state.call_count)
+
+    def test_set_power_state_reboot(self, mock_set_power_state,
+                                    mock_wait_for_power_state, mock_sleep,
+                                    mock_time):
+        results = fleet.set_power_state(self.drac_clients, 'REBOOT',
+                                        wait=False)
+
+        self.assertEqual([True] * 5, [result.succeeded for result in results])
+        self.assertFalse(mock_wait_for_power_state.called)
+
+    def test_set_power_state_reboot_wait(self, mock_set_power_state,
+                                         mock_wait_for_power_state,
+                                         mock_sleep, mock_time):
+        self.assertRaises(exceptions.InvalidParameterValue,
+                          fleet.set_power_state, self.drac_clients, 'REBOOT')
+        self.assertFalse(mock_set_power_state.called)
+
+    def test_set_power_state_max_concurrency(self, mock_set_power_state,
+                                             mock_wait_for_power_state,
+                                             mock_sleep, mock_time):
+        threads = set()
+
+        def wait_for_power_state(drac_client, target_state, timeout,
+                                 interval):
+            threads.add(threading.current_thread())
+            return target_state
+
+        mock_wait_for_power_state.side_effect = wait_for_power_state
+        mock_set_power_state.side_effect = (
+            lambda drac_client, target_state:
+            threads.add(threading.current_thread()))
+
+        results = fleet.set_power_state(self.drac_clients, 'POWER_ON',
+                                        batch_size=1, stagger=10,
+                                        max_concurrency=2)
+
+        self.assertEqual(['POWER_ON'] * 5,
+                         [result.result for result in results])
+        self.assertLessEqual(len(threads), 2)
+        self.assertNotIn(threading.current_thread(), threads)
+
+    def test_set_power_state_invalid(self, mock_set_power_state,
+                                     mock_wait_for_power_state, mock_sleep,
+                                     mock_time):
+        self.assertRaises(exceptions.InvalidParameterValue,
+                          fleet.set_power_state, self.drac_clients, 'foo')
+        self.assertRaises(exceptions.InvalidParameterValue,
+                          fleet.set_power_state, self.drac_clients,
+                          'POWER_ON', batch_size=0)
+        self.assertFalse(mock_set_power_state.called)
+
+
+@mock.patch('time.sleep', autospec=True)
+@mock.patch.object(dracclient.client.DRACClient, 'wait_for_power_state',
+                   spec_set=True, autospec=True, return_value='POWER_ON')
+class WaitForPowerStateTestCase(base.BaseTest):
+
+    def setUp(self):
+        super(WaitForPowerStateTestCase, self).setUp()
+        self.drac_clients = [
+            dracclient.client.DRACClient('10.2.0.%d' % index, 'admin',
+                                         's3cr3t')
+            for index in (1, 2, 3)]
+
+    def test_wait_for_power_state(self, mock_wait_for_power_state,
+                                  mock_sleep):
+        results = fleet.wait_for_power_state(self.drac_clients, 'POWER_ON',
+                                             timeout=300, interval=5)
+
+        self.assertEqual(['POWER_ON'] * 3,
+                         [result.result for result in results])
+        self.assertEqual([['wait']] * 3,
+                         [list(result.timings) for result in results])
+        for drac_client in self.drac_clients:
+            mock_wait_for_power_state.assert_any_call(drac_client,
+                                                      'POWER_ON', 300, 5)
+        # the first polls are spread over the interval
+        self.assertEqual(3, mock_sleep.call_count)
+        for call in mock_sleep.call_args_list:
+            self.assertTrue(0 <= call[0][0] <= 5)
+
+    def test_wait_for_power_state_reboot(self, mock_wait_for_power_state,
+                                         mock_sleep):
+        self.assertRaises(exceptions.InvalidParameterValue,
+                          fleet.wait_for_power_state, self.drac_clients,
+                          'REBOOT')
+        self.assertFalse(mock_wait_for_power_state.called)
+
+    def test_wait_for_power_state_timeout(self, mock_wait_for_power_state,
+                                          mock_sleep):
+        def wait_for_power_state(drac_client, target_state, timeout,
+                                 interval):
+            if drac_client is self.drac_clients[1]:
+                raise exceptions.DRACOperationFailed(drac_messages='timeout')
+            return target_state
+
+        mock_wait_for_power_state.side_effect = wait_for_power_state
+
+        results = fleet.wait_for_power_state(self.drac_clients, 'POWER_OFF')
+
+        self.assertEqual([True, False, True],
+                         [result.succeeded for result in results])
+        self.assertEqual('POWER_OFF', results[2].result)
+        mock_wait_for_power_state.assert_any_call(
+            self.drac_clients[0], 'POWER_OFF', None,
+            constants.DEFAULT_POWER_POLL_INTERVAL_SEC)
+
+
+@mock.patch.object(job.JobManagement, 'wait_for_jobs', spec_set=True,
+                   autospec=True)
+@mock.patch.object(job.JobManagement, 'create_config_job', spec_set=True,
+                   autospec=True)
+@mock.patch.object(raid.RAIDManagement, 'create_virtual_disk',
+                   spec_set=True, autospec=True,
+                   return_value={'commit_required': True})
+@mock.patch.object(raid.RAIDManagement, 'convert_physical_disks',
+                   spec_set=True, autospec=True,
+                   return_value={'commit_required': True})
+class RAIDPipelineTestCase(base.BaseTest):
+
+    def setUp(self):
+        super(RAIDPipelineTestCase, self).setUp()
+        self.drac_clients = [
+            dracclient.client.DRACClient('10.2.0.%d' % index, 'admin',
+                                         's3cr3t')
+            for index in (1, 2)]
+
+    def _create_config_job(self, job_mgmt, target, reboot=False, **kwargs):
+        return 'JID_%s_%s' % (job_mgmt.client.host[-1], target.split('.')[1])
+
+    def _wait_for_jobs(self, job_mgmt, job_ids, timeout=None, interval=None):
+        return [_job(job_id) for job_id in job_ids]
+
+    def _calls(self, mock_method, drac_client):
+        return [call for call in mock_method.call_args_list
+                if call[0][0].client is drac_client.client]
+
+    def test_run(self, mock_convert_physical_disks, mock_create_virtual_disk,
+                 mock_create_config_job, mock_wait_for_jobs):
+        mock_create_config_job.side_effect = self._create_config_job
+        mock_wait_for_jobs.side_effect = self._wait_for_jobs
+        disk = 'Disk.Bay.0:Enclosure.Internal.0-1:RAID.Slot.2-1'
+        layouts = [
+            raid.RAIDLayout({'RAID.Slot.2-1': [disk]},
+                            [_spec('RAID.Integrated.1-1', (0, 1), 'os'),
+                             _spec('RAID.Integrated.1-1', (2, 3), 'data'),
+                             _spec('RAID.Slot.2-1', (0, 1))]),
+            raid.RAIDLayout({}, [_spec('RAID.Integrated.1-1', (0, 1))])]
+        pipeline = fleet.RAIDPipeline(timeout=60, interval=1)
+        for (drac_client, layout) in zip(self.drac_clients, layouts):
+            pipeline.add(drac_client, layout)
+
+        results = pipeline.run()
+
+        self.assertEqual(['10.2.0.1', '10.2.0.2'],
+                         [result.host for result in results])
+        self.assertEqual(
+            [['JID_1_Slot', 'JID_1_Integrated', 'JID_1_Slot'],
+             ['JID_2_Integrated']],
+            [[drac_job.id for drac_job in result.result]
+             for result in results])
+        self.assertEqual(['convert', 'create', 'wait'],
+                         list(results[0].timings))
+        self.assertEqual(['create', 'wait'], list(results[1].timings))
+        mock_convert_physical_disks.assert_called_once_with(
+            mock.ANY, [disk], True)
+        self.assertEqual(
+            ['os', 'data'],
+            [call[0][5] for call
+             in self._calls(mock_create_virtual_disk, self.drac_clients[0])
+             if call[0][1] == 'RAID.Integrated.1-1'])
+        self.assertEqual(
+            [('RAID.Slot.2-1', True), ('RAID.Integrated.1-1', False),
+             ('RAID.Slot.2-1', True)],
+            [(call[1]['target'], call[1]['reboot']) for call
+             in self._calls(mock_create_config_job, self.drac_clients[0])])
+        self.assertEqual(
+            [('RAID.Integrated.1-1', True)],
+            [(call[1]['target'], call[1]['reboot']) for call
+             in self._calls(mock_create_config_job, self.drac_clients[1])])
+        self.assertEqual(
+            [mock.call(mock.ANY, ['JID_1_Slot'], 60, 1),
+             mock.call(mock.ANY,
+                       ['JID_1_Slot', 'JID_1_Integrated', 'JID_1_Slot'],
+                       60, 1)],
+            self._calls(mock_wait_for_jobs, self.drac_clients[0]))
+
+    def test_run_converts_before_creating(self, mock_convert_physical_disks,
+                                          mock_create_virtual_disk,
+                                          mock_create_config_job,
+                                          mock_wait_for_jobs):
+        calls = []
+        mock_convert_physical_disks.side_effect = (
+            lambda *args: calls.append('convert') or
+            {'commit_required': True})
+        mock_create_virtual_disk.side_effect = (
+            lambda *args: calls.append('create') or
+            {'commit_required': True})
+
+        def create_config_job(job_mgmt, reboot=False, **kwargs):
+            calls.append(('commit', reboot))
+            return self._create_config_job(job_mgmt, reboot=reboot, **kwargs)
+
+        def wait_for_jobs(job_mgmt, job_ids, timeout=None, interval=None):
+            calls.append('wait')
+            return self._wait_for_jobs(job_mgmt, job_ids)
+
+        mock_create_config_job.side_effect = create_config_job
+        mock_wait_for_jobs.side_effect = wait_for_jobs
+        disk = 'Disk.Bay.0:Enclosure.Internal.0-1:RAID.Integrated.1-1'
+        pipeline = fleet.RAIDPipeline()
+        pipeline.add(self.drac_clients[0],
+                     raid.RAIDLayout({'RAID.Integrated.1-1': [disk]},
+                                     [_spec('RAID.Integrated.1-1', (0, 1))]))
+
+        results = pipeline.run()
+
+        self.assertTrue(results[0].succeeded)
+        self.assertEqual(['convert', ('commit', True), 'wait', 'create',
+                          ('commit', True), 'wait'], calls)
+
+    def test_run_conversion_failed(self, mock_convert_physical_disks,
+                                   mock_create_virtual_disk,
+                                   mock_create_config_job,
+                                   mock_wait_for_jobs):
+        mock_create_config_job.side_effect = self._create_config_job
+        mock_wait_for_jobs.return_value = [_job('JID_1_Integrated',
+                                                status='Failed')]
+        disk = 'Disk.Bay.0:Enclosure.Internal.0-1:RAID.Integrated.1-1'
+        pipeline = fleet.RAIDPipeline()
+        pipeline.add(self.drac_clients[0],
+                     raid.RAIDLayout({'RAID.Integrated.1-1': [disk]},
+                                     [_spec('RAID.Integrated.1-1', (0, 1))]))
+
+        results = pipeline.run()
+
+        self.assertIsInstance(results[0].error,
+                              exceptions.DRACOperationFailed)
+        self.assertEqual(['convert'], list(results[0].timings))
+        self.assertFalse(mock_create_virtual_disk.called)
+
+    def test_run_conversion_without_reboot(self, mock_convert_physical_disks,
+                                           mock_create_virtual_disk,
+                                           mock_create_config_job,
+                                           mock_wait_for_jobs):
+        disk = 'Disk.Bay.0:Enclosure.Internal.0-1:RAID.Integrated.1-1'
+        pipeline = fleet.RAIDPipeline(reboot=False)
+        pipeline.add(self.drac_clients[0],
+                     raid.RAIDLayout({'RAID.Integrated.1-1': [disk]}, []))
+
+        results = pipeline.run()
+
+        self.assertIsInstance(results[0].error,
+                              exceptions.InvalidParameterValue)
+        self.assertFalse(mock_convert_physical_disks.called)
+
+    def test_run_no_wait(self, mock_convert_physical_disks,
+                         mock_create_virtual_disk, mock_create_config_job,
+                         mock_wait_for_jobs):
+        mock_create_config_job.side_effect = self._create_config_job
+        pipeline = fleet.RAIDPipeline(reboot=False, wait=False)
+        pipeline.add(self.drac_clients[0],
+                     raid.RAIDLayout({}, [_spec('RAID.Integrated.1-1',
+                                                (0, 1))]))
+
+        results = pipeline.run()
+
+        self.assertEqual(['JID_1_Integrated'], results[0].result)
+        self.assertEqual(['create'], list(results[0].timings))
+        mock_create_config_job.assert_called_once_with(
+            mock.ANY, resource_uri=mock.ANY,
+            cim_creation_class_name='DCIM_RAIDService',
+            cim_name='DCIM:RAIDService', target='RAID.Integrated.1-1',
+            reboot=False)
+        self.assertFalse(mock_wait_for_jobs.called)
+
+    def test_run_no_commit_required(self, mock_convert_physical_disks,
+                                    mock_create_virtual_disk,
+                                    mock_create_config_job,
+                                    mock_wait_for_jobs):
+        mock_convert_physical_disks.return_value = {'commit_required': False}
+        disk = 'Disk.Bay.0:Enclosure.Internal.0-1:RAID.Integrated.1-1'
+        pipeline = fleet.RAIDPipeline()
+        pipeline.add(self.drac_clients[0],
+                     raid.RAIDLayout({'RAID.Integrated.1-1': [disk]}, []))
+
+        results = pipeline.run()
+
+        self.assertEqual([], results[0].result)
+        self.assertEqual(['convert'], list(results[0].timings))
+        self.assertFalse(mock_create_config_job.called)
+        self.assertFalse(mock_wait_for_jobs.called)
+
+    def test_run_merges_layouts(self, mock_convert_physical_disks,
+                                mock_create_virtual_disk,
+                                mock_create_config_job, mock_wait_for_jobs):
+        mock_create_config_job.side_effect = self._create_config_job
+        mock_wait_for_jobs.side_effect = self._wait_for_jobs
+        pipeline = fleet.RAIDPipeline()
+        pipeline.add(self.drac_clients[0],
+                     raid.RAIDLayout({}, [_spec('RAID.Integrated.1-1',
+                                                (0, 1), 'os')]))
+        pipeline.add(self.drac_clients[0],
+                     raid.RAIDLayout({}, [_spec('RAID.Integrated.1-1',
+                                                (2, 3), 'data')]))
+
+        results = pipeline.run()
+
+        self.assertEqual(1, len(pipeline))
+        self.assertEqual(1, len(results))
+        self.assertEqual(['os', 'data'],
+                         [call[0][5] for call
+                          in mock_create_virtual_disk.call_args_list])
+        self.assertEqual(1, mock_create_config_job.call_count)
+
+    def test_run_host_failure(self, mock_convert_physical_disks,
+                              mock_create_virtual_disk,
+                              mock_create_config_job, mock_wait_for_jobs):
+        def create_virtual_disk(raid_mgmt, *args):
+            if raid_mgmt.client is self.drac_clients[0].client:
+                raise exceptions.DRACOperationFailed(drac_messages='boom')
+            return {'commit_required': True}
+
+        mock_create_virtual_disk.side_effect = create_virtual_disk
+        mock_create_config_job.side_effect = self._create_config_job
+        mock_wait_for_jobs.side_effect = self._wait_for_jobs
+        pipeline = fleet.RAIDPipeline()
+        for drac_client in self.drac_clients:
+            pipeline.add(drac_client,
+                         raid.RAIDLayout({}, [_spec('RAID.Integrated.1-1',
+                                                    (0, 1))]))
+
+        results = pipeline.run()
+
+        self.assertIsInstance(results[0].error,
+                              exceptions.DRACOperationFailed)
+        self.assertEqual(['create'], list(results[0].timings))
+        self.assertTrue(results[1].succeeded)
+        self.assertEqual(
+            ['RAID.Integrated.1-1'],
+            [call[1]['target'] for call
+             in self._calls(mock_create_config_job, self.drac_clients[1])])
+
+    def test_run_job_failed(self, mock_convert_physical_disks,
+                            mock_create_virtual_disk, mock_create_config_job,
+                            mock_wait_for_jobs):
+        mock_create_config_job.side_effect = self._create_config_job
+        mock_wait_for_jobs.return_value = [_job('JID_1_Integrated',
+                                                status='Failed')]
+        pipeline = fleet.RAIDPipeline()
+        pipeline.add(self.drac_clients[0],
+                     raid.RAIDLayout({}, [_spec('RAID.Integrated.1-1',
+                                                (0, 1))]))
+
+        results = pipeline.run()
+
+        self.assertIsInstance(results[0].error,
+                              exceptions.DRACOperationFailed)
+        self.assertIn('JID_1_Integrated', str(results[0].error))
+        self.assertEqual(['create', 'wait'], list(results[0].timings))
@@ -11,10 +11,12 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import lxml.etree
 import mock
 import requests_mock
 
 import dracclient.client
+from dracclient import exceptions
 from dracclient.resources import idrac_card
 from dracclient.resources import uris
 from dracclient.tests import base
@@ -88,3 +90,106 @@ class ClientiDRACCardConfigurationTestCase(base.BaseTest):
         self.assertIn('iDRAC.Embedded.1#SSH.1#Port', idrac_settings)
         self.assertEqual(expected_integer_attr, idrac_settings[
                          'iDRAC.Embedded.1#SSH.1#Port'])
+
+    def _mock_idrac_settings(self, mock_requests):
+        mock_requests.post('https://1.2.3.4:443/wsman', [
+            {'text': test_utils.iDracCardEnumerations[
+                uris.DCIM_iDRACCardEnumeration]['ok']},
+            {'text': test_utils.iDracCardEnumerations[
+                uris.DCIM_iDRACCardString]['ok']},
+            {'text': test_utils.iDracCardEnumerations[
+                uris.DCIM_iDRACCardInteger]['ok']}])
+
+    @requests_mock.Mocker()
+    @mock.patch.object(dracclient.client.WSManClient,
+                       'wait_until_idrac_is_ready', spec_set=True,
+                       autospec=True)
+    @mock.patch.object(dracclient.client.WSManClient, 'invoke',
+                       spec_set=True, autospec=True)
+    def test_set_idrac_settings(self, mock_requests, mock_invoke,
+                                mock_wait_until_idrac_is_ready):
+        expected_selectors = {'CreationClassName': 'DCIM_iDRACCardService',
+                              'SystemName': 'DCIM:ComputerSystem',
+                              'Name': 'DCIM:iDRACCardService',
+                              'SystemCreationClassName': 'DCIM_ComputerSystem'}
+        expected_properties = {'Target': 'iDRAC.Embedded.1',
+                               'AttributeName': ['NIC.1#DNSRacName',
+                                                 'NIC.1#Enable',
+                                                 'SSH.1#Port'],
+                               'AttributeValue': ['idrac-new', 'Disabled',
+                                                  2222]}
+        self._mock_idrac_settings(mock_requests)
+        mock_invoke.return_value = lxml.etree.fromstring(
+            test_utils.iDracCardInvocations[uris.DCIM_iDRACCardService][
+                'SetAttributes']['ok'])
+
+        result = self.drac_client.set_idrac_settings(
+            {'iDRAC.Embedded.1#NIC.1#Enable': 'Disabled',
+             'iDRAC.Embedded.1#NIC.1#DNSRacName': 'idrac-new',
+             'iDRAC.Embedded.1#NIC.1#Selection': 'Dedicated',
+             'iDRAC.Embedded.1#SSH.1#Port': 2222})
+
+        self.assertEqual({'commit_required': True}, result)
+        mock_invoke.assert_called_once_with(
+            mock.ANY, uris.DCIM_iDRACCardService, 'SetAttributes',
+            expected_selectors, expected_properties)
+
+    @requests_mock.Mocker()
+    @mock.patch.object(dracclient.client.WSManClient,
+                       'wait_until_idrac_is_ready', spec_set=True,
+                       autospec=True)
+    @mock.patch.object(dracclient.client.WSManClient, 'invoke',
+                       spec_set=True, autospec=True)
+    def test_set_idrac_settings_with_unchanged_attr(
+            self, mock_requests, mock_invoke, mock_wait_until_idrac_is_ready):
+        self._mock_idrac_settings(mock_requests)
+
+        result = self.drac_client.set_idrac_settings(
+            {'iDRAC.Embedded.1#SSH.1#Port': '22'})
+
+        self.assertEqual({'commit_required': False}, result)
+        self.assertFalse(mock_invoke.called)
+
+    @requests_mock.Mocker()
+    @mock.patch.object(dracclient.client.WSManClient,
+                       'wait_until_idrac_is_ready', spec_set=True,
+                       autospec=True)
+    def test_set_idrac_settings_with_unknown_attr(
+            self, mock_requests, mock_wait_until_idrac_is_ready):
+        self._mock_idrac_settings(mock_requests)
+
+        self.assertRaises(exceptions.InvalidParameterValue,
+                          self.drac_client.set_idrac_settings,
+                          {'iDRAC.Embedded.1#SSH.1#foo': 'bar'})
+
+    @requests_mock.Mocker()
+    @mock.patch.object(dracclient.client.WSManClient,
+                       'wait_until_idrac_is_ready', spec_set=True,
+                       autospec=True)
+    def test_set_idrac_settings_with_invalid_values(
+            self, mock_requests, mock_wait_until_idrac_is_ready):
+        self._mock_idrac_settings(mock_requests)
+
+        self.assertRaisesRegexp(
+            exceptions.DRACOperationFailed,
+            "(?s)'DNSRacName'.*length 64.*'Enable'.*65536.*read-only.*"
+            "Info.1#Version",
+            self.drac_client.set_idrac_settings,
+            {'iDRAC.Embedded.1#Info.1#Version': '3.00.00.00',
+             'iDRAC.Embedded.1#NIC.1#Enable': 'foo',
+             'iDRAC.Embedded.1#NIC.1#DNSRacName': 'x' * 64,
+             'iDRAC.Embedded.1#SSH.1#Port': 65536})
+
+    @requests_mock.Mocker()
+    @mock.patch.object(dracclient.client.WSManClient,
+                       'wait_until_idrac_is_ready', spec_set=True,
+                       autospec=True)
+    def test_set_idrac_settings_with_non_integer_value(
+            self, mock_requests, mock_wait_until_idrac_is_ready):
+        self._mock_idrac_settings(mock_requests)
+
+        self.assertRaisesRegexp(
+            exceptions.InvalidParameterValue,
+            "'Port' cannot be set to value 'foo'",
+            self.drac_client.set_idrac_settings,
+            {'iDRAC.Embedded.1#SSH.1#Port': 'foo'})
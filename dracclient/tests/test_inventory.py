@@ -20,6 +20,7 @@ import dracclient.resources.job
 from dracclient.resources import uris
 from dracclient.tests import base
 from dracclient.tests import utils as test_utils
+from dracclient import utils
 
 
 @requests_mock.Mocker()
@@ -129,3 +130,18 @@ class ClientInventoryManagementTestCase(base.BaseTest):
         self.assertEqual(
             expected_nics,
             self.drac_client.list_nics())
+
+    def test_list_nics_with_interning(self, mock_requests,
+                                      mock_wait_until_idrac_is_ready):
+        self.addCleanup(utils.disable_interning)
+        utils.enable_interning()
+        mock_requests.post(
+            'https://1.2.3.4:443/wsman',
+            text=test_utils.InventoryEnumerations[uris.DCIM_NICView]['ok'])
+
+        nics = self.drac_client.list_nics()
+        other_nics = self.drac_client.list_nics()
+
+        self.assertEqual(nics, other_nics)
+        self.assertIs(nics[0].id, other_nics[0].id)
+        self.assertIs(nics[0].media_type, other_nics[0].media_type)
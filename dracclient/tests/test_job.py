@@ -11,6 +11,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import itertools
+
 import lxml.etree
 import mock
 import requests_mock
@@ -63,6 +65,33 @@ class ClientJobManagementTestCase(base.BaseTest):
             mock.ANY, uris.DCIM_LifecycleJob,
             filter_query=expected_filter_query)
 
+    @mock.patch.object(dracclient.client.WSManClient, 'count',
+                       spec_set=True, autospec=True)
+    def test_count_jobs(self, mock_count):
+        mock_count.return_value = 6
+
+        self.assertEqual(6, self.drac_client.count_jobs())
+
+        mock_count.assert_called_once_with(
+            mock.ANY, uris.DCIM_LifecycleJob, 'InstanceID', condition=None)
+
+    @mock.patch.object(dracclient.client.WSManClient, 'count',
+                       spec_set=True, autospec=True)
+    def test_count_jobs_only_unfinished(self, mock_count):
+        expected_condition = ('Name != "CLEARALL" and '
+                              'JobStatus != "Reboot Completed" and '
+                              'JobStatus != "Reboot Failed" and '
+                              'JobStatus != "Completed" and '
+                              'JobStatus != "Completed with Errors" and '
+                              'JobStatus != "Failed"')
+        mock_count.return_value = 2
+
+        self.assertEqual(2, self.drac_client.count_jobs(only_unfinished=True))
+
+        mock_count.assert_called_once_with(
+            mock.ANY, uris.DCIM_LifecycleJob, 'InstanceID',
+            condition=expected_condition)
+
     @mock.patch.object(dracclient.client.WSManClient, 'enumerate',
                        spec_set=True, autospec=True)
     def test_get_job(self, mock_enumerate):
@@ -102,6 +131,62 @@ class ClientJobManagementTestCase(base.BaseTest):
             filter_query=expected_filter_query)
         self.assertIsNone(job)
 
+    @mock.patch('time.sleep', autospec=True)
+    @mock.patch.object(dracclient.client.WSManClient, 'enumerate',
+                       spec_set=True, autospec=True)
+    def test_wait_for_jobs(self, mock_enumerate, mock_sleep):
+        unfinished = lxml.etree.fromstring(
+            test_utils.JobEnumerations[uris.DCIM_LifecycleJob]['unfinished'])
+        not_found = lxml.etree.fromstring(
+            test_utils.JobEnumerations[uris.DCIM_LifecycleJob]['not_found'])
+        finished = lxml.etree.fromstring(
+            test_utils.JobEnumerations[uris.DCIM_LifecycleJob]['ok'])
+        mock_enumerate.side_effect = [unfinished, unfinished, not_found,
+                                      finished]
+
+        jobs = self.drac_client.wait_for_jobs(['JID_442507917525'],
+                                              interval=5)
+
+        self.assertEqual(1, len(jobs))
+        self.assertEqual(2, mock_sleep.call_count)
+        mock_sleep.assert_called_with(5)
+        mock_enumerate.assert_any_call(
+            mock.ANY, uris.DCIM_LifecycleJob,
+            filter_query=dracclient.resources.job.UNFINISHED_JOBS_FILTER_QUERY,
+            wait_for_idrac=False)
+        mock_enumerate.assert_called_with(
+            mock.ANY, uris.DCIM_LifecycleJob,
+            filter_query=('select * from DCIM_LifecycleJob'
+                          ' where InstanceID="JID_442507917525"'))
+
+    @mock.patch('time.sleep', autospec=True)
+    @mock.patch.object(dracclient.client.WSManClient, 'enumerate',
+                       spec_set=True, autospec=True)
+    def test_wait_for_jobs_other_jobs_unfinished(self, mock_enumerate,
+                                                 mock_sleep):
+        mock_enumerate.return_value = lxml.etree.fromstring(
+            test_utils.JobEnumerations[uris.DCIM_LifecycleJob]['unfinished'])
+
+        jobs = self.drac_client.wait_for_jobs(['JID_001436912645'])
+
+        self.assertEqual(1, len(jobs))
+        self.assertFalse(mock_sleep.called)
+
+    @mock.patch('time.time', autospec=True)
+    @mock.patch('time.sleep', autospec=True)
+    @mock.patch.object(dracclient.client.WSManClient, 'enumerate',
+                       spec_set=True, autospec=True)
+    def test_wait_for_jobs_timeout(self, mock_enumerate, mock_sleep,
+                                   mock_time):
+        mock_time.side_effect = itertools.chain([0, 5], itertools.repeat(11))
+        mock_enumerate.return_value = lxml.etree.fromstring(
+            test_utils.JobEnumerations[uris.DCIM_LifecycleJob]['unfinished'])
+
+        self.assertRaises(exceptions.DRACOperationFailed,
+                          self.drac_client.wait_for_jobs,
+                          ['JID_442507917525'], timeout=10)
+        self.assertEqual(1, mock_sleep.call_count)
+
     @mock.patch.object(dracclient.client.WSManClient, 'invoke',
                        spec_set=True, autospec=True)
     def test_create_config_job(self, mock_invoke):
@@ -11,10 +11,12 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import lxml.etree
 import mock
 import requests_mock
 
 import dracclient.client
+from dracclient import exceptions
 from dracclient.resources import lifecycle_controller
 from dracclient.resources import uris
 from dracclient.tests import base
@@ -39,6 +41,53 @@ class ClientLifecycleControllerManagementTestCase(base.BaseTest):
 
         self.assertEqual((2, 1, 0), version)
 
+    @requests_mock.Mocker()
+    def test_get_capabilities(self, mock_requests):
+        expected_capabilities = lifecycle_controller.Capabilities(
+            lc_version=(2, 1, 0), generation=12, model='PowerEdge R320',
+            bios_version='2.4.2')
+        mock_requests.post(
+            'https://1.2.3.4:443/wsman',
+            text=test_utils.LifecycleControllerEnumerations[
+                uris.DCIM_SystemView]['ok'])
+
+        capabilities = self.drac_client.get_capabilities()
+        cached_capabilities = self.drac_client.get_capabilities()
+
+        self.assertEqual(expected_capabilities, capabilities)
+        self.assertIs(capabilities, cached_capabilities)
+        self.assertEqual(1, mock_requests.call_count)
+
+    @requests_mock.Mocker()
+    def test_get_capabilities_11g(self, mock_requests):
+        expected_capabilities = lifecycle_controller.Capabilities(
+            lc_version=(1, 5, 5, 27), generation=11, model='PowerEdge R410',
+            bios_version='1.6.0')
+        mock_requests.post(
+            'https://1.2.3.4:443/wsman',
+            text=test_utils.LifecycleControllerEnumerations[
+                uris.DCIM_SystemView]['11g'])
+
+        capabilities = self.drac_client.get_capabilities()
+
+        self.assertEqual(expected_capabilities, capabilities)
+
+    @requests_mock.Mocker()
+    def test_get_capabilities_refresh(self, mock_requests):
+        mock_requests.post('https://1.2.3.4:443/wsman', [
+            {'text': test_utils.LifecycleControllerEnumerations[
+                uris.DCIM_SystemView]['11g']},
+            {'text': test_utils.LifecycleControllerEnumerations[
+                uris.DCIM_SystemView]['ok']}])
+
+        self.drac_client.get_capabilities()
+        version = self.drac_client.get_lifecycle_controller_version()
+
+        self.assertEqual((2, 1, 0), version)
+        self.assertEqual((2, 1, 0),
+                         self.drac_client.get_capabilities().lc_version)
+        self.assertEqual(2, mock_requests.call_count)
+
 
 class ClientLCConfigurationTestCase(base.BaseTest):
 
@@ -89,3 +138,72 @@ class ClientLCConfigurationTestCase(base.BaseTest):
             lifecycle_settings)
         self.assertEqual(expected_string_attr,
                          lifecycle_settings['LifecycleController.Embedded.1#LCAttributes.1#SystemID'])  # noqa
+
+    def _mock_lifecycle_settings(self, mock_requests):
+        mock_requests.post('https://1.2.3.4:443/wsman', [
+            {'text': test_utils.LifecycleControllerEnumerations[
+                uris.DCIM_LCEnumeration]['ok']},
+            {'text': test_utils.LifecycleControllerEnumerations[
+                uris.DCIM_LCString]['ok']}])
+
+    @requests_mock.Mocker()
+    @mock.patch.object(dracclient.client.WSManClient,
+                       'wait_until_idrac_is_ready', spec_set=True,
+                       autospec=True)
+    @mock.patch.object(dracclient.client.WSManClient, 'invoke',
+                       spec_set=True, autospec=True)
+    def test_set_lifecycle_settings(self, mock_requests, mock_invoke,
+                                    mock_wait_until_idrac_is_ready):
+        expected_selectors = {'CreationClassName': 'DCIM_LCService',
+                              'SystemName': 'DCIM:ComputerSystem',
+                              'Name': 'DCIM:LCService',
+                              'SystemCreationClassName': 'DCIM_ComputerSystem'}
+        expected_properties = {'AttributeName': [
+                                   'Collect System Inventory on Restart',
+                                   'Provisioning Server'],
+                               'AttributeValue': ['Disabled', '10.0.0.1']}
+        self._mock_lifecycle_settings(mock_requests)
+        mock_invoke.return_value = lxml.etree.fromstring(
+            test_utils.LifecycleControllerInvocations[uris.DCIM_LCService][
+                'SetAttributes']['ok'])
+
+        result = self.drac_client.set_lifecycle_settings(
+            {'LifecycleController.Embedded.1#LCAttributes.1#CollectSystemInventoryOnRestart': 'Disabled',  # noqa
+             'LifecycleController.Embedded.1#LCAttributes.1#LifecycleControllerState': 'Enabled',  # noqa
+             'LifecycleController.Embedded.1#LCAttributes.1#ProvisioningServer': '10.0.0.1'})  # noqa
+
+        self.assertEqual({'commit_required': True}, result)
+        mock_invoke.assert_called_once_with(
+            mock.ANY, uris.DCIM_LCService, 'SetAttributes',
+            expected_selectors, expected_properties)
+
+    @requests_mock.Mocker()
+    @mock.patch.object(dracclient.client.WSManClient,
+                       'wait_until_idrac_is_ready', spec_set=True,
+                       autospec=True)
+    @mock.patch.object(dracclient.client.WSManClient, 'invoke',
+                       spec_set=True, autospec=True)
+    def test_set_lifecycle_settings_with_unchanged_attr(
+            self, mock_requests, mock_invoke, mock_wait_until_idrac_is_ready):
+        self._mock_lifecycle_settings(mock_requests)
+
+        result = self.drac_client.set_lifecycle_settings(
+            {'LifecycleController.Embedded.1#LCAttributes.1#LifecycleControllerState': 'Enabled'})  # noqa
+
+        self.assertEqual({'commit_required': False}, result)
+        self.assertFalse(mock_invoke.called)
+
+    @requests_mock.Mocker()
+    @mock.patch.object(dracclient.client.WSManClient,
+                       'wait_until_idrac_is_ready', spec_set=True,
+                       autospec=True)
+    def test_set_lifecycle_settings_with_invalid_values(
+            self, mock_requests, mock_wait_until_idrac_is_ready):
+        self._mock_lifecycle_settings(mock_requests)
+
+        self.assertRaisesRegexp(
+            exceptions.DRACOperationFailed,
+            "(?s)'Collect System Inventory on Restart'.*'foo'.*read-only",
+            self.drac_client.set_lifecycle_settings,
+            {'LifecycleController.Embedded.1#LCAttributes.1#CollectSystemInventoryOnRestart': 'foo',  # noqa
+             'LifecycleController.Embedded.1#LCAttributes.1#SystemID': '640'})  # noqa
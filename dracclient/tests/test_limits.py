@@ -0,0 +1,484 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import threading
+import time
+
+import mock
+import requests.exceptions
+import requests_mock
+
+from dracclient import exceptions
+from dracclient import instrumentation
+from dracclient import limits
+from dracclient.tests import base
+from dracclient.tests import utils as test_utils
+import dracclient.client
+import dracclient.resources.bios
+import dracclient.wsman
+
+
+def _wait_for(condition):
+    for attempt in range(500):
+        if condition():
+            return
+        time.sleep(0.01)
+    raise AssertionError('condition not met')
+
+
+class ConcurrencyLimiterTestCase(base.BaseTest):
+
+    def test_acquire_release(self):
+        limiter = limits.ConcurrencyLimiter(2)
+
+        limiter.acquire()
+        with limiter:
+            self.assertEqual(2, limiter.active)
+        limiter.release()
+
+        self.assertEqual(0, limiter.active)
+
+    def test_fifo(self):
+        limiter = limits.ConcurrencyLimiter(1)
+        order = []
+
+        def worker(index):
+            with limiter:
+                order.append(index)
+
+        limiter.acquire()
+        threads = []
+        for index in range(3):
+            thread = threading.Thread(target=worker, args=(index,))
+            thread.start()
+            threads.append(thread)
+            _wait_for(lambda: limiter.waiting == index + 1)
+
+        limiter.release()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual([0, 1, 2], order)
+        self.assertEqual(0, limiter.active)
+        self.assertEqual(0, limiter.waiting)
+
+    def _serve(self, limiter, priorities):
+        order = []
+
+        def worker(index, priority):
+            limiter.acquire(priority)
+            order.append(index)
+            limiter.release()
+
+        limiter.acquire()
+        threads = []
+        for index, priority in enumerate(priorities):
+            thread = threading.Thread(target=worker, args=(index, priority))
+            thread.start()
+            threads.append(thread)
+            _wait_for(lambda: limiter.waiting == index + 1)
+
+        limiter.release()
+        for thread in threads:
+            thread.join()
+
+        return order
+
+    def test_priority(self):
+        limiter = limits.ConcurrencyLimiter(1)
+
+        order = self._serve(limiter, [limits.PRIORITY_LOW,
+                                      limits.PRIORITY_LOW,
+                                      limits.PRIORITY_HIGH])
+
+        self.assertEqual([2, 0, 1], order)
+
+    def test_priority_starvation(self):
+        limiter = limits.ConcurrencyLimiter(1, max_overtakes=2)
+
+        order = self._serve(limiter, [limits.PRIORITY_LOW,
+                                      limits.PRIORITY_HIGH,
+                                      limits.PRIORITY_HIGH,
+                                      limits.PRIORITY_HIGH,
+                                      limits.PRIORITY_LOW])
+
+        self.assertEqual([1, 2, 0, 3, 4], order)
+
+    def test_get_concurrency_limiter(self):
+        limiter = limits.get_concurrency_limiter('10.0.0.1', '443', 2)
+
+        self.assertIs(limiter,
+                      limits.get_concurrency_limiter('10.0.0.1', 443, 5))
+        self.assertEqual(2, limiter.limit)
+        self.assertIsNot(limiter,
+                         limits.get_concurrency_limiter('10.0.0.2', 443, 2))
+
+    @mock.patch.object(limits, 'LOG', autospec=True)
+    def test_get_concurrency_limiter_mismatch(self, mock_log):
+        limiter = limits.get_concurrency_limiter('10.0.0.6', 443, 2)
+
+        self.assertIs(limiter,
+                      limits.get_concurrency_limiter('10.0.0.6', 443, 2))
+        self.assertFalse(mock_log.warning.called)
+
+        self.assertIs(limiter,
+                      limits.get_concurrency_limiter('10.0.0.6', 443, 3))
+        self.assertIs(limiter,
+                      limits.get_concurrency_limiter('10.0.0.6', 443, 2,
+                                                     adaptive=True))
+        self.assertEqual(2, mock_log.warning.call_count)
+        self.assertEqual(2, limiter.limit)
+
+    def test_no_limit_by_default(self):
+        client = dracclient.wsman.Client('10.0.0.7', 'admin', 's3cr3t')
+
+        self.assertIsNone(client._limiter)
+
+    def test_adaptive_without_limit(self):
+        client = dracclient.wsman.Client('10.0.0.8', 'admin', 's3cr3t',
+                                         adaptive_concurrency=True)
+
+        self.assertIsInstance(client._limiter,
+                              limits.AdaptiveConcurrencyLimiter)
+        self.assertEqual(4, client._limiter.limit)
+
+
+class PriorityTestCase(base.BaseTest):
+
+    def test_priority(self):
+        self.assertEqual(limits.PRIORITY_LOW,
+                         limits.get_priority(limits.PRIORITY_LOW))
+
+        with limits.priority(limits.PRIORITY_HIGH):
+            self.assertEqual(limits.PRIORITY_HIGH,
+                             limits.get_priority(limits.PRIORITY_LOW))
+            with limits.priority(limits.PRIORITY_LOW):
+                self.assertEqual(limits.PRIORITY_LOW, limits.get_priority())
+            self.assertEqual(limits.PRIORITY_HIGH,
+                             limits.get_priority(limits.PRIORITY_LOW))
+
+        self.assertEqual(limits.PRIORITY_HIGH, limits.get_priority())
+
+    @requests_mock.Mocker()
+    @mock.patch.object(limits.ConcurrencyLimiter, 'acquire', spec_set=True,
+                       autospec=True)
+    def test_request_priority(self, mock_requests, mock_acquire):
+        mock_requests.post('https://10.0.0.5:443/wsman',
+                           text='<result>yay!</result>')
+        client = dracclient.wsman.Client('10.0.0.5', 'admin', 's3cr3t',
+                                         max_concurrency=4)
+
+        client.enumerate('resource', auto_pull=False)
+        client.invoke('http://resource', 'Method', {}, {})
+        with limits.priority(limits.PRIORITY_HIGH):
+            client.pull('resource', 'context')
+
+        self.assertEqual([mock.call(mock.ANY, limits.PRIORITY_LOW),
+                          mock.call(mock.ANY, limits.PRIORITY_HIGH),
+                          mock.call(mock.ANY, limits.PRIORITY_HIGH)],
+                         mock_acquire.call_args_list)
+
+    @mock.patch.object(dracclient.resources.bios.PowerManagement,
+                       'set_power_state', spec_set=True, autospec=True)
+    def test_set_power_state_priority(self, mock_set_power_state):
+        priorities = []
+        mock_set_power_state.side_effect = (
+            lambda *args: priorities.append(
+                limits.get_priority(limits.PRIORITY_LOW)))
+        client = dracclient.client.DRACClient(**test_utils.FAKE_ENDPOINT)
+
+        client.set_power_state('POWER_ON')
+        with limits.priority(limits.PRIORITY_LOW):
+            client.set_power_state('POWER_OFF')
+
+        self.assertEqual([limits.PRIORITY_HIGH, limits.PRIORITY_LOW],
+                         priorities)
+
+
+class AdaptiveConcurrencyLimiterTestCase(base.BaseTest):
+
+    def setUp(self):
+        super(AdaptiveConcurrencyLimiterTestCase, self).setUp()
+        self.limiter = limits.AdaptiveConcurrencyLimiter(2, max_limit=4)
+
+    def test_additive_increase(self):
+        self.assertFalse(self.limiter.record_success(0.1))
+        self.assertTrue(self.limiter.record_success(0.1))
+        self.assertEqual(3, self.limiter.limit)
+
+        for request in range(3):
+            self.limiter.record_success(0.1)
+        self.assertEqual(4, self.limiter.limit)
+
+        for request in range(10):
+            self.limiter.record_success(0.1)
+        self.assertEqual(4, self.limiter.limit)
+
+    def test_increase_grants_waiting_slot(self):
+        self.limiter.acquire()
+        self.limiter.acquire()
+        thread = threading.Thread(target=self.limiter.acquire)
+        thread.start()
+        _wait_for(lambda: self.limiter.waiting == 1)
+
+        self.limiter.record_success(0.1)
+        self.limiter.record_success(0.1)
+        thread.join()
+
+        self.assertEqual(3, self.limiter.active)
+
+    def test_multiplicative_decrease(self):
+        limiter = limits.AdaptiveConcurrencyLimiter(8, max_limit=16)
+
+        self.assertTrue(limiter.record_failure())
+        self.assertEqual(4, limiter.limit)
+
+    @mock.patch('time.time', autospec=True)
+    def test_decrease_cooldown(self, mock_time):
+        mock_time.return_value = 1000
+        limiter = limits.AdaptiveConcurrencyLimiter(8, max_limit=16)
+        limiter.record_success(2)
+
+        self.assertTrue(limiter.record_failure())
+        mock_time.return_value = 1001
+        self.assertFalse(limiter.record_failure())
+        mock_time.return_value = 1003
+        self.assertTrue(limiter.record_failure())
+        self.assertEqual(2, limiter.limit)
+
+    def test_decrease_to_min_limit(self):
+        self.limiter.record_failure()
+        self.limiter.latency = None
+
+        self.assertFalse(self.limiter.record_failure())
+        self.assertEqual(1, self.limiter.limit)
+
+    def test_latency_spike(self):
+        self.limiter.record_success(0.1)
+
+        self.assertTrue(self.limiter.record_success(1.0))
+        self.assertEqual(1, self.limiter.limit)
+
+    def test_get_concurrency_limiter_adaptive(self):
+        limiter = limits.get_concurrency_limiter('10.0.0.3', 443, 2,
+                                                 adaptive=True)
+
+        self.assertIsInstance(limiter, limits.AdaptiveConcurrencyLimiter)
+        self.assertEqual(2, limiter.limit)
+
+
+@requests_mock.Mocker()
+class AdaptiveConcurrencyClientTestCase(base.BaseTest):
+
+    def setUp(self):
+        super(AdaptiveConcurrencyClientTestCase, self).setUp()
+        self.client = dracclient.wsman.Client(
+            '10.0.0.4', 'admin', 's3cr3t', ssl_retries=1, max_concurrency=4,
+            adaptive_concurrency=True)
+        # the limiter of the DRAC is shared with the clients of other tests
+        self.client._limiter = limits.AdaptiveConcurrencyLimiter(4)
+
+    def test_service_unavailable(self, mock_requests):
+        mock_requests.post('https://10.0.0.4:443/wsman', status_code=503)
+        listener = mock.Mock()
+        instrumentation.register_listener(listener)
+        self.addCleanup(instrumentation.unregister_listener, listener)
+
+        self.assertRaises(exceptions.WSManInvalidResponse,
+                          self.client.enumerate, 'resource')
+        self.assertEqual(2, self.client._limiter.limit)
+        listener.assert_any_call(instrumentation.CONCURRENCY_LIMIT,
+                                 host='10.0.0.4', port=443, limit=2)
+
+    def test_connection_error(self, mock_requests):
+        mock_requests.post('https://10.0.0.4:443/wsman',
+                           exc=requests.exceptions.SSLError)
+
+        self.assertRaises(exceptions.WSManRequestFailure,
+                          self.client.enumerate, 'resource')
+        self.assertEqual(2, self.client._limiter.limit)
+
+    def test_success(self, mock_requests):
+        mock_requests.post('https://10.0.0.4:443/wsman',
+                           text='<result>yay!</result>')
+
+        for request in range(4):
+            self.client.enumerate('resource', auto_pull=False)
+
+        self.assertEqual(5, self.client._limiter.limit)
+
+
+@mock.patch('time.sleep', autospec=True)
+@mock.patch('time.time', autospec=True, return_value=1000)
+class TokenBucketTestCase(base.BaseTest):
+
+    def test_acquire(self, mock_time, mock_sleep):
+        bucket = limits.TokenBucket(2, burst=2)
+
+        for request in range(3):
+            self.assertTrue(bucket.acquire())
+
+        mock_sleep.assert_called_once_with(0.5)
+
+    def test_acquire_non_blocking(self, mock_time, mock_sleep):
+        bucket = limits.TokenBucket(1, burst=1)
+
+        self.assertTrue(bucket.acquire(blocking=False))
+        self.assertFalse(bucket.acquire(blocking=False))
+        self.assertFalse(bucket.acquire(timeout=0.5))
+        mock_time.return_value = 1001
+        self.assertTrue(bucket.acquire(blocking=False))
+        self.assertFalse(mock_sleep.called)
+
+    def test_reserve(self, mock_time, mock_sleep):
+        bucket = limits.TokenBucket(2, burst=1)
+
+        self.assertEqual([0, 0.5, 1.0],
+                         [bucket.reserve() for request in range(3)])
+        mock_time.return_value = 1001
+        self.assertEqual(0.5, bucket.reserve())
+
+    def test_refill(self, mock_time, mock_sleep):
+        bucket = limits.TokenBucket(10, burst=3)
+        for request in range(3):
+            bucket.reserve()
+        mock_time.return_value = 1100
+
+        self.assertEqual([0, 0, 0, 0.1],
+                         [bucket.reserve() for request in range(4)])
+
+    def test_default_burst(self, mock_time, mock_sleep):
+        self.assertEqual(3, limits.TokenBucket(2.5).burst)
+        self.assertEqual(1, limits.TokenBucket(0.2).burst)
+
+    def test_get_rate_limiter(self, mock_time, mock_sleep):
+        bucket = limits.get_rate_limiter('10.0.0.6', '443', 2)
+
+        self.assertIs(bucket, limits.get_rate_limiter('10.0.0.6', 443, 5))
+        self.assertEqual(2, bucket.rate)
+        self.assertIsNot(bucket, limits.get_rate_limiter('10.0.0.7', 443, 2))
+
+    def test_set_global_rate_limit(self, mock_time, mock_sleep):
+        self.addCleanup(limits.set_global_rate_limit, None)
+
+        limits.set_global_rate_limit(100, burst=10)
+
+        self.assertEqual(100, limits.get_global_rate_limiter().rate)
+        self.assertEqual(10, limits.get_global_rate_limiter().burst)
+        limits.set_global_rate_limit(None)
+        self.assertIsNone(limits.get_global_rate_limiter())
+
+
+@requests_mock.Mocker()
+@mock.patch('time.sleep', autospec=True)
+@mock.patch('time.time', autospec=True, return_value=1000)
+class RateLimitClientTestCase(base.BaseTest):
+
+    def _client(self, **kwargs):
+        client = dracclient.wsman.Client('10.0.0.8', 'admin', 's3cr3t',
+                                         max_concurrency=None, **kwargs)
+        if client._rate_limiter is not None:
+            # the bucket of the DRAC is shared with the clients of other tests
+            client._rate_limiter = limits.TokenBucket(
+                client._rate_limiter.rate, client._rate_limiter.burst)
+        return client
+
+    def test_rate_limit(self, mock_requests, mock_time, mock_sleep):
+        mock_requests.post('https://10.0.0.8:443/wsman',
+                           text='<result>yay!</result>')
+        listener = mock.Mock()
+        instrumentation.register_listener(listener)
+        self.addCleanup(instrumentation.unregister_listener, listener)
+        client = self._client(rate_limit=4, rate_burst=1)
+
+        client.enumerate('resource', auto_pull=False)
+        client.invoke('http://resource', 'Method', {}, {})
+
+        mock_sleep.assert_called_once_with(0.25)
+        # only the throttled request is reported
+        listener.assert_called_once_with(instrumentation.RATE_LIMIT_WAIT,
+                                         host='10.0.0.8', port=443, wait=0.25)
+
+    def test_global_rate_limit(self, mock_requests, mock_time, mock_sleep):
+        mock_requests.post('https://10.0.0.8:443/wsman',
+                           text='<result>yay!</result>')
+        self.addCleanup(limits.set_global_rate_limit, None)
+        limits.set_global_rate_limit(1)
+        client = self._client(rate_limit=4, rate_burst=2)
+
+        client.enumerate('resource', auto_pull=False)
+        client.enumerate('resource', auto_pull=False)
+
+        mock_sleep.assert_called_once_with(1.0)
+
+    def test_no_rate_limit(self, mock_requests, mock_time, mock_sleep):
+        mock_requests.post('https://10.0.0.8:443/wsman',
+                           text='<result>yay!</result>')
+        client = self._client()
+
+        for request in range(5):
+            client.enumerate('resource', auto_pull=False)
+
+        self.assertFalse(mock_sleep.called)
+
+
+class InstrumentationTestCase(base.BaseTest):
+
+    def setUp(self):
+        super(InstrumentationTestCase, self).setUp()
+        self.events = []
+        instrumentation.register_listener(self._listener)
+        self.addCleanup(instrumentation.unregister_listener, self._listener)
+
+    def _listener(self, event, **payload):
+        self.events.append((event, payload))
+
+    def test_emit(self):
+        instrumentation.emit('foo', bar=42)
+
+        self.assertEqual([('foo', {'bar': 42})], self.events)
+
+    def test_emit_with_failing_listener(self):
+        def failing_listener(event, **payload):
+            raise ValueError('boom')
+
+        instrumentation.register_listener(failing_listener)
+        self.addCleanup(instrumentation.unregister_listener,
+                        failing_listener)
+
+        instrumentation.emit('foo')
+
+        self.assertEqual([('foo', {})], self.events)
+
+    def test_unregister_listener(self):
+        instrumentation.unregister_listener(self._listener)
+
+        instrumentation.emit('foo')
+
+        self.assertEqual([], self.events)
+
+    @requests_mock.Mocker()
+    def test_concurrency_wait(self, mock_requests):
+        mock_requests.post('https://1.2.3.4:443/wsman',
+                           text='<result>yay!</result>')
+        client = dracclient.wsman.Client(max_concurrency=4,
+                                         **test_utils.FAKE_ENDPOINT)
+
+        client.enumerate('resource', auto_pull=False)
+
+        self.assertEqual(1, len(self.events))
+        (event, payload) = self.events[0]
+        self.assertEqual(instrumentation.CONCURRENCY_WAIT, event)
+        self.assertEqual('1.2.3.4', payload['host'])
+        self.assertGreaterEqual(payload['wait'], 0)
+        self.assertEqual(0, client._limiter.active)
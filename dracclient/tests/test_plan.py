@@ -0,0 +1,153 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+
+import dracclient.client
+from dracclient import exceptions
+from dracclient.resources import bios
+from dracclient.resources import job
+from dracclient.resources import raid
+from dracclient.resources import uris
+from dracclient.tests import base
+from dracclient.tests import utils as test_utils
+
+
+@mock.patch.object(job.JobManagement, 'create_config_job', spec_set=True,
+                   autospec=True)
+@mock.patch.object(raid.RAIDManagement, 'delete_virtual_disk', spec_set=True,
+                   autospec=True, return_value={'commit_required': True})
+@mock.patch.object(raid.RAIDManagement, 'create_virtual_disk', spec_set=True,
+                   autospec=True, return_value={'commit_required': True})
+@mock.patch.object(bios.BootManagement, 'change_boot_device_order',
+                   spec_set=True, autospec=True)
+@mock.patch.object(bios.BIOSConfiguration, 'set_bios_settings',
+                   spec_set=True, autospec=True,
+                   return_value={'commit_required': True})
+class ApplyPlanTestCase(base.BaseTest):
+
+    def setUp(self):
+        super(ApplyPlanTestCase, self).setUp()
+        self.drac_client = dracclient.client.DRACClient(
+            **test_utils.FAKE_ENDPOINT)
+
+    def test_apply(self, mock_set_bios_settings,
+                   mock_change_boot_device_order, mock_create_virtual_disk,
+                   mock_delete_virtual_disk, mock_create_config_job):
+        mock_create_config_job.side_effect = ['JID_1', 'JID_2', 'JID_3']
+        plan = self.drac_client.plan()
+        plan.set_bios_settings({'ProcVirtualization': 'Disabled'})
+        plan.change_boot_device_order('IPL', ['NIC.Embedded.1-1-1'])
+        plan.create_virtual_disk('RAID.Integrated.1-1',
+                                 ['Disk.Bay.0:Enclosure.Internal.0-1:'
+                                  'RAID.Integrated.1-1'], '0', 1024)
+        plan.delete_virtual_disk('Disk.Virtual.0:RAID.Slot.2-1')
+
+        self.assertEqual(4, len(plan))
+
+        job_ids = plan.apply()
+
+        self.assertEqual(['JID_1', 'JID_2', 'JID_3'], job_ids)
+        self.assertEqual(0, len(plan))
+        mock_set_bios_settings.assert_called_once_with(
+            mock.ANY, {'ProcVirtualization': 'Disabled'})
+        mock_change_boot_device_order.assert_called_once_with(
+            mock.ANY, 'IPL', ['NIC.Embedded.1-1-1'])
+        mock_create_virtual_disk.assert_called_once_with(
+            mock.ANY, 'RAID.Integrated.1-1',
+            ['Disk.Bay.0:Enclosure.Internal.0-1:RAID.Integrated.1-1'], '0',
+            1024, None, None, None)
+        mock_delete_virtual_disk.assert_called_once_with(
+            mock.ANY, 'Disk.Virtual.0:RAID.Slot.2-1')
+        self.assertEqual([
+            mock.call(mock.ANY, resource_uri=uris.DCIM_BIOSService,
+                      cim_creation_class_name='DCIM_BIOSService',
+                      cim_name='DCIM:BIOSService', target='BIOS.Setup.1-1',
+                      reboot=False),
+            mock.call(mock.ANY, resource_uri=uris.DCIM_RAIDService,
+                      cim_creation_class_name='DCIM_RAIDService',
+                      cim_name='DCIM:RAIDService',
+                      target='RAID.Integrated.1-1', reboot=False),
+            mock.call(mock.ANY, resource_uri=uris.DCIM_RAIDService,
+                      cim_creation_class_name='DCIM_RAIDService',
+                      cim_name='DCIM:RAIDService', target='RAID.Slot.2-1',
+                      reboot=True)], mock_create_config_job.call_args_list)
+
+    def test_apply_without_reboot(self, mock_set_bios_settings,
+                                  mock_change_boot_device_order,
+                                  mock_create_virtual_disk,
+                                  mock_delete_virtual_disk,
+                                  mock_create_config_job):
+        plan = self.drac_client.plan()
+        plan.delete_virtual_disk('Disk.Virtual.0:RAID.Integrated.1-1')
+
+        plan.apply(reboot=False)
+
+        mock_create_config_job.assert_called_once_with(
+            mock.ANY, resource_uri=uris.DCIM_RAIDService,
+            cim_creation_class_name='DCIM_RAIDService',
+            cim_name='DCIM:RAIDService', target='RAID.Integrated.1-1',
+            reboot=False)
+        self.assertFalse(mock_set_bios_settings.called)
+
+    def test_apply_unchanged_bios_settings(self, mock_set_bios_settings,
+                                           mock_change_boot_device_order,
+                                           mock_create_virtual_disk,
+                                           mock_delete_virtual_disk,
+                                           mock_create_config_job):
+        mock_set_bios_settings.return_value = {'commit_required': False}
+        plan = self.drac_client.plan()
+        plan.set_bios_settings({'ProcVirtualization': 'Enabled'})
+
+        self.assertEqual([], plan.apply())
+        self.assertFalse(mock_create_config_job.called)
+
+    def test_delete_virtual_disk_unknown_controller(
+            self, mock_set_bios_settings, mock_change_boot_device_order,
+            mock_create_virtual_disk, mock_delete_virtual_disk,
+            mock_create_config_job):
+        plan = self.drac_client.plan()
+
+        self.assertRaises(exceptions.InvalidParameterValue,
+                          plan.delete_virtual_disk, 'Disk.Virtual.0')
+
+    @mock.patch.object(job.JobManagement, 'wait_for_jobs', spec_set=True,
+                       autospec=True)
+    def test_wait(self, mock_wait_for_jobs, mock_set_bios_settings,
+                  mock_change_boot_device_order, mock_create_virtual_disk,
+                  mock_delete_virtual_disk, mock_create_config_job):
+        mock_create_config_job.return_value = 'JID_1'
+        plan = self.drac_client.plan()
+        plan.set_bios_settings({'ProcVirtualization': 'Disabled'}).apply()
+
+        plan.wait(timeout=600)
+
+        mock_wait_for_jobs.assert_called_once_with(mock.ANY, ['JID_1'], 600,
+                                                   None)
+
+    def test_validate(self, mock_set_bios_settings,
+                      mock_change_boot_device_order, mock_create_virtual_disk,
+                      mock_delete_virtual_disk, mock_create_config_job):
+        validator = mock.Mock(spec=raid.RAIDValidator)
+        plan = self.drac_client.plan()
+        plan.convert_physical_disks('RAID.Integrated.1-1', ['disk1'])
+        plan.create_virtual_disk('RAID.Integrated.1-1', ['disk1'], '0', 1024)
+
+        self.assertIs(plan, plan.validate(validator))
+
+        validator.assert_has_calls([
+            mock.call.convert_physical_disks(['disk1'], True),
+            mock.call.create_virtual_disk('RAID.Integrated.1-1', ['disk1'],
+                                          '0', 1024, None, None, None)])
+        self.assertEqual(2, len(plan))
+        self.assertFalse(mock_create_virtual_disk.called)
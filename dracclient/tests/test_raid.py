@@ -18,6 +18,7 @@ import requests_mock
 
 import dracclient.client
 from dracclient import exceptions
+import dracclient.plan
 import dracclient.resources.job
 from dracclient.resources import raid
 from dracclient.resources import uris
@@ -142,6 +143,55 @@ class ClientRAIDManagementTestCase(base.BaseTest):
         self.assertIn(expected_physical_disk,
                       self.drac_client.list_physical_disks())
 
+    @mock.patch.object(dracclient.client.WSManClient,
+                       'wait_until_idrac_is_ready', spec_set=True,
+                       autospec=True)
+    def test_count_physical_disks(self, mock_requests,
+                                  mock_wait_until_idrac_is_ready):
+        mock_requests.post(
+            'https://1.2.3.4:443/wsman',
+            [{'text': test_utils.WSManEnumerations['count_estimate']['ok']},
+             {'text': test_utils.WSManEnumerations['release']['ok']}])
+
+        self.assertEqual(42, self.drac_client.count_physical_disks())
+        self.assertEqual(2, mock_requests.call_count)
+
+    @mock.patch.object(dracclient.client.WSManClient,
+                       'wait_until_idrac_is_ready', spec_set=True,
+                       autospec=True)
+    def test_count_physical_disks_without_estimate(
+            self, mock_requests, mock_wait_until_idrac_is_ready):
+        mock_requests.post(
+            'https://1.2.3.4:443/wsman',
+            [{'text': test_utils.WSManEnumerations['count_estimate'][
+                'unsupported']},
+             {'text': test_utils.WSManEnumerations['release']['ok']},
+             {'text': test_utils.RAIDEnumerations[
+                 uris.DCIM_PhysicalDiskView]['ok']}])
+
+        self.assertEqual(3, self.drac_client.count_physical_disks())
+        self.assertEqual(3, mock_requests.call_count)
+
+    @mock.patch.object(dracclient.client.WSManClient, 'count',
+                       spec_set=True, autospec=True)
+    def test_count_raid_controllers(self, mock_requests, mock_count):
+        mock_count.return_value = 1
+
+        self.assertEqual(1, self.drac_client.count_raid_controllers())
+
+        mock_count.assert_called_once_with(
+            mock.ANY, uris.DCIM_ControllerView, 'FQDD')
+
+    @mock.patch.object(dracclient.client.WSManClient, 'count',
+                       spec_set=True, autospec=True)
+    def test_count_virtual_disks(self, mock_requests, mock_count):
+        mock_count.return_value = 1
+
+        self.assertEqual(1, self.drac_client.count_virtual_disks())
+
+        mock_count.assert_called_once_with(
+            mock.ANY, uris.DCIM_VirtualDiskView, 'FQDD')
+
     # Verify that various client convert_physical_disks calls to dracclient
     # result in a WSMan.invoke with appropriate parameters
     def _random_term(self):
@@ -284,6 +334,93 @@ class ClientRAIDManagementTestCase(base.BaseTest):
             expected_selectors, expected_properties,
             expected_return_value=utils.RET_SUCCESS)
 
+    @mock.patch.object(dracclient.client.WSManClient,
+                       'wait_until_idrac_is_ready', spec_set=True,
+                       autospec=True)
+    @mock.patch.object(dracclient.client.WSManClient, 'invoke',
+                       spec_set=True, autospec=True)
+    def test_convert_physical_disks_idempotent_unchanged(
+            self, mock_requests, mock_invoke, mock_wait_until_idrac_is_ready):
+        drac_client = dracclient.client.DRACClient(
+            idempotent=True, **test_utils.FAKE_ENDPOINT)
+        mock_requests.post(
+            'https://1.2.3.4:443/wsman',
+            text=test_utils.RAIDEnumerations[uris.DCIM_PhysicalDiskView]['ok'])
+
+        result = drac_client.convert_physical_disks(
+            raid_controller='RAID.Integrated.1-1',
+            physical_disks=['Disk.Direct.2:RAID.Integrated.1-1'],
+            raid_enable=True)
+
+        self.assertEqual({'commit_required': False, 'changed': False},
+                         result)
+        self.assertIn('select FQDD, RaidStatus from DCIM_PhysicalDiskView '
+                      'where FQDD="Disk.Direct.2:RAID.Integrated.1-1"',
+                      mock_requests.last_request.text)
+        self.assertFalse(mock_invoke.called)
+
+    @mock.patch.object(dracclient.client.WSManClient,
+                       'wait_until_idrac_is_ready', spec_set=True,
+                       autospec=True)
+    @mock.patch.object(dracclient.client.WSManClient, 'invoke',
+                       spec_set=True, autospec=True)
+    def test_convert_physical_disks_idempotent_changed(
+            self, mock_requests, mock_invoke, mock_wait_until_idrac_is_ready):
+        drac_client = dracclient.client.DRACClient(
+            idempotent=True, **test_utils.FAKE_ENDPOINT)
+        mock_requests.post(
+            'https://1.2.3.4:443/wsman',
+            text=test_utils.RAIDEnumerations[uris.DCIM_PhysicalDiskView]['ok'])
+        mock_invoke.return_value = lxml.etree.fromstring(
+            test_utils.RAIDInvocations[uris.DCIM_RAIDService][
+                'ConvertToRAID']['ok'])
+
+        result = drac_client.convert_physical_disks(
+            raid_controller='RAID.Integrated.1-1',
+            physical_disks=['Disk.Direct.2:RAID.Integrated.1-1',
+                            'Disk.Bay.9:Enclosure.Internal.0-1'],
+            raid_enable=False)
+
+        self.assertEqual({'commit_required': True, 'changed': True}, result)
+        mock_invoke.assert_called_once_with(
+            mock.ANY, uris.DCIM_RAIDService, 'ConvertToNonRAID', mock.ANY,
+            {'PDArray': ['Disk.Direct.2:RAID.Integrated.1-1',
+                         'Disk.Bay.9:Enclosure.Internal.0-1']},
+            expected_return_value=utils.RET_SUCCESS)
+
+    @mock.patch.object(dracclient.client.WSManClient, 'invoke',
+                       spec_set=True, autospec=True)
+    def test_convert_physical_disks_idempotent_empty(self, mock_requests,
+                                                     mock_invoke):
+        drac_client = dracclient.client.DRACClient(
+            idempotent=True, **test_utils.FAKE_ENDPOINT)
+
+        result = drac_client.convert_physical_disks(
+            raid_controller='RAID.Integrated.1-1', physical_disks=[],
+            raid_enable=True)
+
+        self.assertEqual({'commit_required': False, 'changed': False},
+                         result)
+        self.assertEqual(0, mock_requests.call_count)
+        self.assertFalse(mock_invoke.called)
+
+    @mock.patch.object(dracclient.client.WSManClient, 'invoke',
+                       spec_set=True, autospec=True)
+    def test_convert_physical_disks_idempotent_invalid_id(self,
+                                                          mock_requests,
+                                                          mock_invoke):
+        drac_client = dracclient.client.DRACClient(
+            idempotent=True, **test_utils.FAKE_ENDPOINT)
+
+        self.assertRaises(
+            exceptions.InvalidParameterValue,
+            drac_client.convert_physical_disks,
+            raid_controller='RAID.Integrated.1-1',
+            physical_disks=['Disk.Direct.2" or FQDD="foo'],
+            raid_enable=True)
+        self.assertEqual(0, mock_requests.call_count)
+        self.assertFalse(mock_invoke.called)
+
     @mock.patch.object(dracclient.client.WSManClient,
                        'wait_until_idrac_is_ready', spec_set=True,
                        autospec=True)
@@ -495,3 +632,697 @@ class ClientRAIDManagementTestCase(base.BaseTest):
             mock.ANY, resource_uri=uris.DCIM_RAIDService,
             cim_creation_class_name='DCIM_RAIDService',
             cim_name='DCIM:RAIDService', target='controller')
+
+    @mock.patch.object(dracclient.client.WSManClient,
+                       'wait_until_idrac_is_ready', spec_set=True,
+                       autospec=True)
+    def test_get_raid_validator(self, mock_requests,
+                                mock_wait_until_idrac_is_ready):
+        def enumerate_view(request, context):
+            # the views are enumerated concurrently
+            for resource_uri in (uris.DCIM_ControllerView,
+                                 uris.DCIM_PhysicalDiskView,
+                                 uris.DCIM_VirtualDiskView):
+                if '%s<' % resource_uri in request.text:
+                    return test_utils.RAIDEnumerations[resource_uri]['ok']
+
+        mock_requests.post('https://1.2.3.4:443/wsman', text=enumerate_view)
+
+        validator = self.drac_client.get_raid_validator()
+
+        self.assertEqual(3, mock_requests.call_count)
+        self.assertIn('RAID.Integrated.1-1', validator.raid_controllers)
+        self.assertIn('Disk.Bay.1:Enclosure.Internal.0-1:RAID.Integrated.1-1',
+                      validator.physical_disks)
+        self.assertIn('Disk.Virtual.0:RAID.Integrated.1-1',
+                      validator.virtual_disks)
+
+
+def _physical_disk(bay, controller='RAID.Integrated.1-1', media_type='hdd',
+                   size_mb=571776, free_size_mb=571776, raid_status='ready'):
+    return raid.PhysicalDisk(
+        id='Disk.Bay.%d:Enclosure.Internal.0-1:%s' % (bay, controller),
+        description='Disk %d' % bay,
+        controller=controller,
+        manufacturer='SEAGATE',
+        model='ST600MM0006',
+        media_type=media_type,
+        interface_type='sas',
+        size_mb=size_mb,
+        free_size_mb=free_size_mb,
+        serial_number='S0M3EY2Z',
+        firmware_version='LS0A',
+        status='ok',
+        raid_status=raid_status,
+        sas_address='5000C5007764F409')
+
+
+class RAIDValidatorTestCase(base.BaseTest):
+
+    def setUp(self):
+        super(RAIDValidatorTestCase, self).setUp()
+        self.controller = raid.RAIDController(
+            id='RAID.Integrated.1-1', description='Integrated RAID '
+            'Controller 1', manufacturer='DELL', model='PERC H710 Mini',
+            primary_status='ok', firmware_version='21.3.0-0009', bus='1')
+        self.disks = [_physical_disk(bay) for bay in range(8)]
+        self.disk_ids = [disk.id for disk in self.disks]
+        self.validator = raid.RAIDValidator([self.controller], self.disks)
+
+    def _assert_invalid(self, regex, *args, **kwargs):
+        self.assertRaisesRegexp(exceptions.InvalidParameterValue, regex,
+                                self.validator.create_virtual_disk,
+                                'RAID.Integrated.1-1', *args, **kwargs)
+
+    def test_create_virtual_disk(self):
+        self.validator.create_virtual_disk(
+            'RAID.Integrated.1-1', self.disk_ids[:4], '5', 300000)
+
+        disk = self.validator.physical_disks[self.disk_ids[0]]
+        self.assertEqual('online', disk.raid_status)
+        self.assertEqual(571776 - 100000, disk.free_size_mb)
+        disk = self.validator.physical_disks[self.disk_ids[4]]
+        self.assertEqual('ready', disk.raid_status)
+
+    def test_create_virtual_disk_spanned(self):
+        self.validator.create_virtual_disk(
+            'RAID.Integrated.1-1', self.disk_ids, '6+0', 800000,
+            span_length=4, span_depth=2)
+
+        disk = self.validator.physical_disks[self.disk_ids[0]]
+        self.assertEqual(571776 - 200000, disk.free_size_mb)
+
+    def test_create_virtual_disk_raid_10_default_spans(self):
+        self.validator.create_virtual_disk(
+            'RAID.Integrated.1-1', self.disk_ids[:4], '1+0', 200000)
+
+        disk = self.validator.physical_disks[self.disk_ids[0]]
+        self.assertEqual(571776 - 100000, disk.free_size_mb)
+
+    def test_create_virtual_disk_unknown_controller(self):
+        self.assertRaisesRegexp(
+            exceptions.InvalidParameterValue, 'RAID controller foo is unknown',
+            self.validator.create_virtual_disk, 'foo', self.disk_ids[:2], '1',
+            1000)
+
+    def test_create_virtual_disk_wrong_controller(self):
+        disk = _physical_disk(0, controller='RAID.Slot.1-1')
+        self.validator = raid.RAIDValidator([self.controller], [disk])
+
+        self._assert_invalid('is not on RAID controller RAID.Integrated.1-1',
+                             [disk.id], '0', 1000)
+
+    def test_create_virtual_disk_unknown_disk(self):
+        self._assert_invalid('physical disk foo is unknown',
+                             self.disk_ids[:1] + ['foo'], '1', 1000)
+
+    def test_create_virtual_disk_duplicate_disks(self):
+        self._assert_invalid('duplicates', self.disk_ids[:1] * 2, '1', 1000)
+
+    def test_create_virtual_disk_non_raid_disk(self):
+        self.validator.physical_disks[self.disk_ids[0]] = _physical_disk(
+            0, raid_status='non-RAID')
+
+        self._assert_invalid('must be converted first', self.disk_ids[:2],
+                             '1', 1000)
+
+    def test_create_virtual_disk_failed_disk(self):
+        self.validator.physical_disks[self.disk_ids[0]] = _physical_disk(
+            0, raid_status='failed')
+
+        self._assert_invalid('is failed', self.disk_ids[:2], '1', 1000)
+
+    def test_create_virtual_disk_mixed_media(self):
+        self.validator.physical_disks[self.disk_ids[0]] = _physical_disk(
+            0, media_type='ssd')
+
+        self._assert_invalid('media type cannot be mixed: hdd, ssd',
+                             self.disk_ids[:2], '1', 1000)
+
+    def test_create_virtual_disk_insufficient_free_size(self):
+        self._assert_invalid('has 571776 MB free, 571777 MB are needed',
+                             self.disk_ids[:2], '1', 571777)
+
+    def test_create_virtual_disk_too_few_disks(self):
+        self._assert_invalid('need at least 4 physical disks',
+                             self.disk_ids[:3], '6', 1000)
+
+    def test_create_virtual_disk_too_many_disks(self):
+        self._assert_invalid('at most 2 physical disks', self.disk_ids[:3],
+                             '1', 1000)
+
+    def test_create_virtual_disk_wrong_spans(self):
+        self._assert_invalid('8 physical disks cannot be split in 3 spans of '
+                             '3 disks', self.disk_ids, '5+0', 1000,
+                             span_length=3, span_depth=3)
+
+    def test_create_virtual_disk_single_span(self):
+        self._assert_invalid('at least 2 spans', self.disk_ids[:4], '5+0',
+                             1000, span_length=4, span_depth=1)
+
+    def test_create_virtual_disk_invalid_raid_level(self):
+        self._assert_invalid("'raid_level' is invalid", self.disk_ids[:2],
+                             'non-raid', 1000)
+
+    def test_create_virtual_disk_invalid_size(self):
+        self._assert_invalid("'size_mb' is not an integer value",
+                             self.disk_ids[:2], '1', 'foo')
+
+    def test_create_virtual_disk_negative_span_length(self):
+        self._assert_invalid("'span_length' must be positive",
+                             self.disk_ids[:2], '1', 1000, span_length=-2)
+
+    def test_create_virtual_disks_free_size_consumed(self):
+        self.validator.create_virtual_disk(
+            'RAID.Integrated.1-1', self.disk_ids[:2], '1', 500000)
+
+        self._assert_invalid('has 71776 MB free', self.disk_ids[:2], '1',
+                             100000)
+
+    def test_convert_physical_disks(self):
+        self.validator.physical_disks[self.disk_ids[0]] = _physical_disk(
+            0, raid_status='non-RAID')
+
+        self.validator.convert_physical_disks(self.disk_ids[:2], True)
+        self.validator.create_virtual_disk(
+            'RAID.Integrated.1-1', self.disk_ids[:2], '1', 1000)
+
+    def test_convert_physical_disks_online(self):
+        self.validator.create_virtual_disk(
+            'RAID.Integrated.1-1', self.disk_ids[:2], '1', 1000)
+
+        self.assertRaisesRegexp(
+            exceptions.InvalidParameterValue,
+            'cannot be converted to non-RAID mode in state online',
+            self.validator.convert_physical_disks, self.disk_ids[:1], False)
+
+    def test_delete_virtual_disk(self):
+        virtual_disk = raid.VirtualDisk(
+            id='Disk.Virtual.0:RAID.Integrated.1-1', name='disk 0',
+            description='Virtual Disk 0', controller='RAID.Integrated.1-1',
+            raid_level='1', size_mb=571776, status='ok', raid_status='online',
+            span_depth=1, span_length=2, pending_operations=None,
+            physical_disks=self.disk_ids[:2])
+        disks = [_physical_disk(bay, free_size_mb=0, raid_status='online')
+                 for bay in range(2)]
+        self.validator = raid.RAIDValidator([self.controller], disks,
+                                            [virtual_disk])
+
+        self.validator.delete_virtual_disk(virtual_disk.id)
+
+        self.validator.create_virtual_disk(
+            'RAID.Integrated.1-1', self.disk_ids[:2], '0', 571776 * 2)
+        self.assertRaisesRegexp(
+            exceptions.InvalidParameterValue, 'virtual disk foo is unknown',
+            self.validator.delete_virtual_disk, 'foo')
+
+    def test_delete_non_raid_virtual_disk(self):
+        virtual_disk = raid.VirtualDisk(
+            id='Disk.Virtual.0:RAID.Integrated.1-1', name='disk 0',
+            description='Virtual Disk 0', controller='RAID.Integrated.1-1',
+            raid_level='non-raid', size_mb=571776, status='ok',
+            raid_status='online', span_depth=1, span_length=1,
+            pending_operations=None, physical_disks=self.disk_ids[:1])
+        disks = [_physical_disk(0, free_size_mb=0, raid_status='online')]
+        self.validator = raid.RAIDValidator([self.controller], disks,
+                                            [virtual_disk])
+
+        self.validator.delete_virtual_disk(virtual_disk.id)
+
+        disk = self.validator.physical_disks[self.disk_ids[0]]
+        self.assertEqual(571776, disk.free_size_mb)
+        self.assertEqual('ready', disk.raid_status)
+
+
+def _virtual_disk(index, physical_disks, controller='RAID.Integrated.1-1'):
+    return raid.VirtualDisk(
+        id='Disk.Virtual.%d:%s' % (index, controller), name='disk %d' % index,
+        description='Virtual Disk %d' % index, controller=controller,
+        raid_level='1', size_mb=100000, status='ok', raid_status='online',
+        span_depth=1, span_length=len(physical_disks),
+        pending_operations=None, physical_disks=physical_disks)
+
+
+class RAIDTopologyTestCase(base.BaseTest):
+
+    def setUp(self):
+        super(RAIDTopologyTestCase, self).setUp()
+        self.controllers = [
+            raid.RAIDController(
+                id=controller_id, description=controller_id,
+                manufacturer='DELL', model='PERC H710 Mini',
+                primary_status='ok', firmware_version='21.3.0-0009', bus='1')
+            for controller_id in ('RAID.Integrated.1-1', 'RAID.Slot.2-1')]
+        self.disks = (
+            [_physical_disk(bay, raid_status='online') for bay in range(2)] +
+            [_physical_disk(bay) for bay in range(2, 4)] +
+            [_physical_disk(bay, controller='RAID.Slot.2-1')
+             for bay in range(2)])
+        self.virtual_disks = [
+            _virtual_disk(0, [disk.id for disk in self.disks[:2]])]
+        self.topology = raid.RAIDTopology(self.controllers, self.disks,
+                                          self.virtual_disks)
+
+    def test_lookups(self):
+        self.assertEqual(self.controllers[1],
+                         self.topology.get_raid_controller('RAID.Slot.2-1'))
+        self.assertEqual(self.disks[2],
+                         self.topology.get_physical_disk(self.disks[2].id))
+        self.assertEqual(
+            self.virtual_disks[0],
+            self.topology.get_virtual_disk(
+                'Disk.Virtual.0:RAID.Integrated.1-1'))
+        self.assertIsNone(self.topology.get_physical_disk('foo'))
+
+    def test_get_physical_disks(self):
+        self.assertEqual(tuple(self.disks), self.topology.get_physical_disks())
+        self.assertEqual(
+            tuple(self.disks[:4]),
+            self.topology.get_physical_disks('RAID.Integrated.1-1'))
+        self.assertEqual(tuple(self.disks[2:]),
+                         self.topology.get_physical_disks(raid_status='ready'))
+        self.assertEqual(
+            tuple(self.disks[2:4]),
+            self.topology.get_physical_disks('RAID.Integrated.1-1', 'ready'))
+        self.assertEqual((), self.topology.get_physical_disks('foo'))
+
+    def test_get_virtual_disks(self):
+        self.assertEqual(
+            tuple(self.virtual_disks),
+            self.topology.get_virtual_disks('RAID.Integrated.1-1'))
+        self.assertEqual((), self.topology.get_virtual_disks('RAID.Slot.2-1'))
+
+    def test_cross_references(self):
+        self.assertEqual(
+            tuple(self.virtual_disks),
+            self.topology.get_owning_virtual_disks(self.disks[0].id))
+        self.assertEqual(
+            (), self.topology.get_owning_virtual_disks(self.disks[2].id))
+        self.assertEqual(
+            tuple(self.disks[:2]),
+            self.topology.get_member_disks(
+                'Disk.Virtual.0:RAID.Integrated.1-1'))
+
+    def test_immutable(self):
+        self.assertRaises(AttributeError, setattr, self.topology,
+                          'physical_disks', ())
+        self.assertIsInstance(self.topology.physical_disks, tuple)
+
+    def test_hash_and_eq(self):
+        topology = raid.RAIDTopology(self.controllers, self.disks,
+                                     self.virtual_disks)
+
+        self.assertEqual(self.topology, topology)
+        self.assertEqual(hash(self.topology), hash(topology))
+        self.assertNotEqual(self.topology,
+                            raid.RAIDTopology(self.controllers, [], []))
+
+    def test_repr(self):
+        self.assertEqual(
+            'RAIDTopology(raid_controllers=%d, physical_disks=%d, '
+            'virtual_disks=%d)' % (len(self.controllers), len(self.disks),
+                                   len(self.virtual_disks)),
+            repr(self.topology))
+
+    def test_is_consistent(self):
+        self.assertTrue(self.topology.is_consistent())
+
+        topology = raid.RAIDTopology(self.controllers, self.disks[2:],
+                                     self.virtual_disks)
+        self.assertFalse(topology.is_consistent())
+
+        topology = raid.RAIDTopology(self.controllers[:1], self.disks, [])
+        self.assertFalse(topology.is_consistent())
+
+
+@mock.patch.object(raid.RAIDManagement, 'list_virtual_disks', spec_set=True,
+                   autospec=True)
+@mock.patch.object(raid.RAIDManagement, 'list_physical_disks', spec_set=True,
+                   autospec=True)
+@mock.patch.object(raid.RAIDManagement, 'list_raid_controllers',
+                   spec_set=True, autospec=True)
+class RAIDManagementTopologyTestCase(base.BaseTest):
+
+    def setUp(self):
+        super(RAIDManagementTopologyTestCase, self).setUp()
+        self.drac_client = dracclient.client.DRACClient(
+            **test_utils.FAKE_ENDPOINT)
+        self.controller = raid.RAIDController(
+            id='RAID.Integrated.1-1', description='Integrated RAID '
+            'Controller 1', manufacturer='DELL', model='PERC H710 Mini',
+            primary_status='ok', firmware_version='21.3.0-0009', bus='1')
+        self.disks = [_physical_disk(bay, raid_status='online')
+                      for bay in range(2)]
+        self.virtual_disk = _virtual_disk(0, [disk.id for disk in self.disks])
+
+    def test_get_raid_topology(self, mock_list_raid_controllers,
+                               mock_list_physical_disks,
+                               mock_list_virtual_disks):
+        mock_list_raid_controllers.return_value = [self.controller]
+        mock_list_physical_disks.return_value = self.disks
+        mock_list_virtual_disks.return_value = [self.virtual_disk]
+
+        topology = self.drac_client.get_raid_topology()
+
+        self.assertEqual((self.controller,), topology.raid_controllers)
+        self.assertEqual(tuple(self.disks), topology.physical_disks)
+        self.assertEqual((self.virtual_disk,), topology.virtual_disks)
+        self.assertEqual(1, mock_list_physical_disks.call_count)
+
+    def test_get_raid_topology_inconsistent(self, mock_list_raid_controllers,
+                                            mock_list_physical_disks,
+                                            mock_list_virtual_disks):
+        mock_list_raid_controllers.return_value = [self.controller]
+        mock_list_physical_disks.side_effect = [self.disks[:1], self.disks]
+        mock_list_virtual_disks.return_value = [self.virtual_disk]
+
+        topology = self.drac_client.get_raid_topology()
+
+        self.assertTrue(topology.is_consistent())
+        self.assertEqual(2, mock_list_physical_disks.call_count)
+
+    def test_get_raid_topology_remains_inconsistent(
+            self, mock_list_raid_controllers, mock_list_physical_disks,
+            mock_list_virtual_disks):
+        mock_list_raid_controllers.return_value = [self.controller]
+        mock_list_physical_disks.return_value = self.disks[:1]
+        mock_list_virtual_disks.return_value = [self.virtual_disk]
+
+        self.assertRaises(exceptions.DRACOperationFailed,
+                          self.drac_client.get_raid_topology)
+        self.assertEqual(2, mock_list_physical_disks.call_count)
+
+    def test_solve_raid_layout(self, mock_list_raid_controllers,
+                               mock_list_physical_disks,
+                               mock_list_virtual_disks):
+        mock_list_raid_controllers.return_value = [self.controller]
+        mock_list_physical_disks.return_value = [
+            _physical_disk(bay) for bay in range(4)]
+        mock_list_virtual_disks.return_value = []
+
+        layout = self.drac_client.solve_raid_layout('1+0', media_type='hdd')
+
+        (spec,) = layout.virtual_disks
+        self.assertEqual(4, len(spec.physical_disks))
+
+    @mock.patch.object(dracclient.plan.ApplyPlan, 'apply', spec_set=True,
+                       autospec=True, return_value=['JID_1'])
+    @mock.patch.object(dracclient.plan.ApplyPlan, 'create_virtual_disk',
+                       spec_set=True, autospec=True)
+    def test_apply_raid_layout(self, mock_create_virtual_disk, mock_apply,
+                               mock_list_raid_controllers,
+                               mock_list_physical_disks,
+                               mock_list_virtual_disks):
+        spec = raid.VirtualDiskSpec(
+            raid_controller='RAID.Integrated.1-1',
+            physical_disks=[disk.id for disk in self.disks], raid_level='1',
+            size_mb=1000, disk_name=None, span_length=2, span_depth=1)
+        layout = raid.RAIDLayout({}, [spec])
+
+        self.assertEqual(['JID_1'],
+                         self.drac_client.apply_raid_layout(layout))
+
+        mock_create_virtual_disk.assert_called_once_with(
+            mock.ANY, **spec._asdict())
+        mock_apply.assert_called_once_with(mock.ANY, reboot=True)
+        self.assertFalse(mock_list_physical_disks.called)
+
+    @mock.patch.object(dracclient.resources.job.JobManagement,
+                       'wait_for_jobs', spec_set=True, autospec=True)
+    @mock.patch.object(dracclient.resources.job.JobManagement,
+                       'create_config_job', spec_set=True, autospec=True)
+    @mock.patch.object(raid.RAIDManagement, 'create_virtual_disk',
+                       spec_set=True, autospec=True)
+    @mock.patch.object(raid.RAIDManagement, 'convert_physical_disks',
+                       spec_set=True, autospec=True)
+    def test_apply_raid_layout_with_conversions(
+            self, mock_convert_physical_disks, mock_create_virtual_disk,
+            mock_create_config_job, mock_wait_for_jobs,
+            mock_list_raid_controllers, mock_list_physical_disks,
+            mock_list_virtual_disks):
+        calls = []
+        disk_ids = [disk.id for disk in self.disks]
+
+        def convert_physical_disks(raid_mgmt, physical_disks, raid_enable):
+            calls.append(('convert', physical_disks))
+            return {'commit_required': True}
+
+        def create_virtual_disk(raid_mgmt, raid_controller, *args):
+            calls.append(('create', raid_controller))
+            return {'commit_required': True}
+
+        def create_config_job(job_mgmt, **kwargs):
+            job_id = 'JID_%d' % len(calls)
+            calls.append(('commit', kwargs['target'], kwargs['reboot']))
+            return job_id
+
+        def wait_for_jobs(job_mgmt, job_ids, timeout, interval):
+            calls.append(('wait', job_ids))
+            return [dracclient.resources.job.Job(
+                id=job_id, name='ConfigRAID:RAID.Integrated.1-1',
+                start_time='TIME_NOW', until_time='TIME_NA', message='Done',
+                status='Completed', percent_complete='100')
+                for job_id in job_ids]
+
+        mock_convert_physical_disks.side_effect = convert_physical_disks
+        mock_create_virtual_disk.side_effect = create_virtual_disk
+        mock_create_config_job.side_effect = create_config_job
+        mock_wait_for_jobs.side_effect = wait_for_jobs
+        spec = raid.VirtualDiskSpec(
+            raid_controller='RAID.Integrated.1-1', physical_disks=disk_ids,
+            raid_level='1', size_mb=1000, disk_name=None, span_length=2,
+            span_depth=1)
+        layout = raid.RAIDLayout({'RAID.Integrated.1-1': disk_ids}, [spec])
+
+        job_ids = self.drac_client.apply_raid_layout(layout, timeout=60)
+
+        self.assertEqual(['JID_1', 'JID_4'], job_ids)
+        self.assertEqual([('convert', disk_ids),
+                          ('commit', 'RAID.Integrated.1-1', True),
+                          ('wait', ['JID_1']),
+                          ('create', 'RAID.Integrated.1-1'),
+                          ('commit', 'RAID.Integrated.1-1', True)], calls)
+        mock_wait_for_jobs.assert_called_once_with(mock.ANY, ['JID_1'], 60,
+                                                   None)
+
+    @mock.patch.object(dracclient.resources.job.JobManagement,
+                       'wait_for_jobs', spec_set=True, autospec=True)
+    @mock.patch.object(dracclient.plan.ApplyPlan, 'apply', spec_set=True,
+                       autospec=True, return_value=['JID_1'])
+    def test_apply_raid_layout_with_failed_conversion(
+            self, mock_apply, mock_wait_for_jobs, mock_list_raid_controllers,
+            mock_list_physical_disks, mock_list_virtual_disks):
+        disk_ids = [disk.id for disk in self.disks]
+        mock_wait_for_jobs.return_value = [dracclient.resources.job.Job(
+            id='JID_1', name='ConfigRAID:RAID.Integrated.1-1',
+            start_time='TIME_NOW', until_time='TIME_NA', message='Boom',
+            status='Failed', percent_complete='100')]
+        spec = raid.VirtualDiskSpec(
+            raid_controller='RAID.Integrated.1-1', physical_disks=disk_ids,
+            raid_level='1', size_mb=1000, disk_name=None, span_length=2,
+            span_depth=1)
+        layout = raid.RAIDLayout({'RAID.Integrated.1-1': disk_ids}, [spec])
+
+        self.assertRaisesRegexp(exceptions.DRACOperationFailed, 'JID_1',
+                                self.drac_client.apply_raid_layout, layout)
+        mock_apply.assert_called_once_with(mock.ANY, reboot=True)
+
+    def test_apply_raid_layout_with_conversions_without_reboot(
+            self, mock_list_raid_controllers, mock_list_physical_disks,
+            mock_list_virtual_disks):
+        layout = raid.RAIDLayout(
+            {'RAID.Integrated.1-1': [disk.id for disk in self.disks]}, [])
+
+        self.assertRaises(exceptions.InvalidParameterValue,
+                          self.drac_client.apply_raid_layout, layout,
+                          reboot=False)
+
+    def test_get_raid_topology_error(self, mock_list_raid_controllers,
+                                     mock_list_physical_disks,
+                                     mock_list_virtual_disks):
+        mock_list_raid_controllers.return_value = [self.controller]
+        mock_list_physical_disks.side_effect = (
+            exceptions.WSManRequestFailure('boom'))
+        mock_list_virtual_disks.return_value = [self.virtual_disk]
+
+        self.assertRaises(exceptions.WSManRequestFailure,
+                          self.drac_client.get_raid_topology)
+
+
+class SolveRAIDLayoutTestCase(base.BaseTest):
+
+    def setUp(self):
+        super(SolveRAIDLayoutTestCase, self).setUp()
+        self.controllers = [
+            raid.RAIDController(
+                id=controller_id, description=controller_id,
+                manufacturer='DELL', model='PERC H730P', primary_status='ok',
+                firmware_version='25.5.5.0005', bus='1')
+            for controller_id in ('RAID.Integrated.1-1', 'RAID.Slot.2-1')]
+
+    def _topology(self, disks, virtual_disks=()):
+        return raid.RAIDTopology(self.controllers, disks, virtual_disks)
+
+    def _validate(self, topology, layout):
+        validator = raid.RAIDValidator(topology.raid_controllers,
+                                       topology.physical_disks,
+                                       topology.virtual_disks)
+        for (raid_controller, disk_ids) in layout.conversions.items():
+            validator.convert_physical_disks(disk_ids, True)
+        for spec in layout.virtual_disks:
+            validator.create_virtual_disk(**spec._asdict())
+
+    def test_fill_per_controller(self):
+        disks = ([_physical_disk(bay, media_type='ssd') for bay in range(40)] +
+                 [_physical_disk(bay) for bay in range(40, 50)] +
+                 [_physical_disk(bay, controller='RAID.Slot.2-1',
+                                 media_type='ssd') for bay in range(20)])
+        topology = self._topology(disks)
+
+        layout = raid.solve_raid_layout(topology, '6', media_type='ssd',
+                                        disk_name='data')
+
+        self.assertEqual(
+            [('RAID.Integrated.1-1', 32, 30 * 571776, 'data-0'),
+             ('RAID.Integrated.1-1', 8, 6 * 571776, 'data-1'),
+             ('RAID.Slot.2-1', 20, 18 * 571776, 'data-2')],
+            [(spec.raid_controller, len(spec.physical_disks), spec.size_mb,
+              spec.disk_name) for spec in layout.virtual_disks])
+        self.assertEqual({}, layout.conversions)
+        self.assertEqual(['RAID.Integrated.1-1', 'RAID.Slot.2-1'],
+                         layout.raid_controllers)
+        self._validate(topology, layout)
+
+    def test_fill_spanned(self):
+        disks = [_physical_disk(bay) for bay in range(13)]
+        topology = self._topology(disks)
+
+        layout = raid.solve_raid_layout(topology, '5+0')
+
+        (spec,) = layout.virtual_disks
+        self.assertEqual((6, 2), (spec.span_length, spec.span_depth))
+        self.assertEqual(10 * 571776, spec.size_mb)
+        self._validate(topology, layout)
+
+    def test_fill_skips_used_disks(self):
+        disks = ([_physical_disk(bay, raid_status='online')
+                  for bay in range(2)] +
+                 [_physical_disk(bay, raid_status='failed')
+                  for bay in range(2, 4)] +
+                 [_physical_disk(bay) for bay in range(4, 6)])
+        topology = self._topology(
+            disks, [_virtual_disk(0, [disk.id for disk in disks[:2]])])
+
+        layout = raid.solve_raid_layout(topology, '1')
+
+        self.assertEqual([[disk.id for disk in disks[4:]]],
+                         [spec.physical_disks
+                          for spec in layout.virtual_disks])
+
+    def test_size(self):
+        disks = ([_physical_disk(bay, size_mb=1000000, free_size_mb=1000000)
+                  for bay in range(4)] +
+                 [_physical_disk(bay, size_mb=200000, free_size_mb=200000)
+                  for bay in range(4, 10)] +
+                 [_physical_disk(bay, size_mb=100000, free_size_mb=100000)
+                  for bay in range(10, 20)])
+        topology = self._topology(disks)
+
+        layout = raid.solve_raid_layout(topology, '1+0', size_mb=400000)
+
+        (spec,) = layout.virtual_disks
+        self.assertEqual((2, 2, 400000),
+                         (spec.span_length, spec.span_depth, spec.size_mb))
+        self.assertEqual([disk.id for disk in disks[4:8]],
+                         spec.physical_disks)
+        self._validate(topology, layout)
+
+    def test_size_more_disks(self):
+        disks = [_physical_disk(bay, size_mb=100000, free_size_mb=100000)
+                 for bay in range(10)]
+        topology = self._topology(disks)
+
+        layout = raid.solve_raid_layout(topology, '5', size_mb=250000)
+
+        (spec,) = layout.virtual_disks
+        self.assertEqual(4, len(spec.physical_disks))
+        self._validate(topology, layout)
+
+    def test_include_non_raid(self):
+        disks = ([_physical_disk(bay, raid_status='non-RAID')
+                  for bay in range(2)] +
+                 [_physical_disk(bay, controller='RAID.Slot.2-1',
+                                 raid_status='non-RAID')
+                  for bay in range(2)])
+        topology = self._topology(disks)
+
+        self.assertRaises(exceptions.InvalidParameterValue,
+                          raid.solve_raid_layout, topology, '1')
+
+        layout = raid.solve_raid_layout(topology, '1',
+                                        raid_controller='RAID.Slot.2-1',
+                                        include_non_raid=True)
+
+        self.assertEqual({'RAID.Slot.2-1': [disk.id for disk in disks[2:]]},
+                         layout.conversions)
+        self._validate(topology, layout)
+
+    def test_no_fit(self):
+        topology = self._topology([_physical_disk(bay) for bay in range(3)])
+
+        self.assertRaises(exceptions.InvalidParameterValue,
+                          raid.solve_raid_layout, topology, '6')
+        self.assertRaises(exceptions.InvalidParameterValue,
+                          raid.solve_raid_layout, topology, '5',
+                          size_mb=571776 * 3)
+        self.assertRaises(exceptions.InvalidParameterValue,
+                          raid.solve_raid_layout, topology, 'non-raid')
+
+    def test_many_disks(self):
+        disks = []
+        for controller in ('RAID.Integrated.1-1', 'RAID.Slot.2-1'):
+            for bay in range(200):
+                disks.append(_physical_disk(
+                    bay, controller=controller,
+                    media_type=('ssd' if bay % 3 else 'hdd'),
+                    free_size_mb=(571776 - bay * 1000)))
+        topology = self._topology(disks)
+
+        for raid_level in raid.RAID_LEVEL_LAYOUTS:
+            layout = raid.solve_raid_layout(topology, raid_level)
+            self._validate(topology, layout)
+
+            layout = raid.solve_raid_layout(topology, raid_level,
+                                            size_mb=500000)
+            self.assertEqual(1, len(layout))
+            self._validate(topology, layout)
+
+    def test_add_to_plan(self):
+        disks = ([_physical_disk(bay, raid_status='non-RAID')
+                  for bay in range(2)])
+        layout = raid.solve_raid_layout(self._topology(disks), '1',
+                                        include_non_raid=True)
+        plan = mock.Mock()
+
+        self.assertRaises(exceptions.InvalidParameterValue,
+                          layout.add_to_plan, plan)
+        self.assertIs(plan, layout.add_conversions_to_plan(plan))
+        plan.convert_physical_disks.assert_called_once_with(
+            'RAID.Integrated.1-1', [disk.id for disk in disks], True)
+        self.assertFalse(plan.create_virtual_disk.called)
+
+        self.assertIs(plan, layout.add_virtual_disks_to_plan(plan))
+        plan.create_virtual_disk.assert_called_once_with(
+            raid_controller='RAID.Integrated.1-1',
+            physical_disks=[disk.id for disk in disks], raid_level='1',
+            size_mb=571776, disk_name=None, span_length=2, span_depth=1)
+
+    def test_add_to_plan_without_conversions(self):
+        layout = raid.solve_raid_layout(
+            self._topology([_physical_disk(bay) for bay in range(2)]), '1')
+        plan = mock.Mock()
+
+        self.assertIs(plan, layout.add_to_plan(plan))
+
+        self.assertFalse(plan.convert_physical_disks.called)
+        self.assertEqual(1, plan.create_virtual_disk.call_count)
@@ -0,0 +1,117 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+
+import dracclient.client
+from dracclient import registry
+from dracclient.tests import base
+
+
+@mock.patch.object(dracclient.client.DRACClient, 'close', spec_set=True,
+                   autospec=True)
+class ClientRegistryTestCase(base.BaseTest):
+
+    def setUp(self):
+        super(ClientRegistryTestCase, self).setUp()
+        self.registry = registry.ClientRegistry(max_size=2, idle_timeout=60)
+
+    def test_get(self, mock_close):
+        client = self.registry.get('1.2.3.4', 'admin', 's3cr3t')
+
+        self.assertIsInstance(client, dracclient.client.DRACClient)
+        self.assertEqual('1.2.3.4', client.client.host)
+        self.assertEqual(443, client.client.port)
+        self.assertIs(client, self.registry.get('1.2.3.4', 'admin', 's3cr3t'))
+        self.assertEqual(1, len(self.registry))
+
+    def test_get_per_credentials(self, mock_close):
+        client = self.registry.get('1.2.3.4', 'admin', 's3cr3t')
+
+        self.assertIsNot(client,
+                         self.registry.get('1.2.3.4', 'admin', 'other'))
+        self.assertIsNot(client,
+                         self.registry.get('1.2.3.4', 'root', 's3cr3t'))
+        self.assertIsNot(client, self.registry.get('1.2.3.4', 'admin',
+                                                   's3cr3t', port=8443))
+
+    def test_get_with_kwargs(self, mock_close):
+        client = self.registry.get('1.2.3.4', 'admin', 's3cr3t',
+                                   ready_retries=5)
+
+        self.assertEqual(5, client.client._ready_retries)
+
+    def test_get_evicts_least_recently_used(self, mock_close):
+        first = self.registry.get('1.2.3.4', 'admin', 's3cr3t')
+        second = self.registry.get('1.2.3.5', 'admin', 's3cr3t')
+        self.registry.get('1.2.3.4', 'admin', 's3cr3t')
+
+        self.registry.get('1.2.3.6', 'admin', 's3cr3t')
+
+        self.assertEqual(2, len(self.registry))
+        mock_close.assert_called_once_with(second)
+        self.assertIs(first, self.registry.get('1.2.3.4', 'admin', 's3cr3t'))
+
+    @mock.patch('time.time', autospec=True)
+    def test_get_evicts_idle(self, mock_time, mock_close):
+        mock_time.return_value = 1000
+        first = self.registry.get('1.2.3.4', 'admin', 's3cr3t')
+        mock_time.return_value = 1030
+        second = self.registry.get('1.2.3.5', 'admin', 's3cr3t')
+        mock_time.return_value = 1070
+
+        self.assertIs(second, self.registry.get('1.2.3.5', 'admin', 's3cr3t'))
+        mock_close.assert_called_once_with(first)
+        self.assertEqual(1, len(self.registry))
+
+    @mock.patch('time.time', autospec=True)
+    def test_evict_idle(self, mock_time, mock_close):
+        mock_time.return_value = 1000
+        client = self.registry.get('1.2.3.4', 'admin', 's3cr3t')
+        mock_time.return_value = 1061
+
+        self.registry.evict_idle()
+
+        mock_close.assert_called_once_with(client)
+        self.assertEqual(0, len(self.registry))
+
+    def test_remove(self, mock_close):
+        client = self.registry.get('1.2.3.4', 'admin', 's3cr3t')
+
+        self.registry.remove('1.2.3.4', 'admin', 's3cr3t')
+
+        mock_close.assert_called_once_with(client)
+        self.assertEqual(0, len(self.registry))
+
+    def test_clear(self, mock_close):
+        self.registry.get('1.2.3.4', 'admin', 's3cr3t')
+        self.registry.get('1.2.3.5', 'admin', 's3cr3t')
+
+        self.registry.clear()
+
+        self.assertEqual(2, mock_close.call_count)
+        self.assertEqual(0, len(self.registry))
+
+    def test_clear_with_close_failure(self, mock_close):
+        mock_close.side_effect = ValueError('boom')
+        self.registry.get('1.2.3.4', 'admin', 's3cr3t')
+
+        self.registry.clear()
+
+        self.assertEqual(0, len(self.registry))
+
+    def test_get_default_registry(self, mock_close):
+        default_registry = registry.get_default_registry()
+
+        self.assertIsInstance(default_registry, registry.ClientRegistry)
+        self.assertIs(default_registry, registry.get_default_registry())
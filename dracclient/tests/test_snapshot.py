@@ -0,0 +1,137 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+import requests_mock
+
+import dracclient.client
+from dracclient.resources import bios
+from dracclient.resources import uris
+from dracclient import snapshot
+from dracclient.tests import base
+from dracclient.tests import utils as test_utils
+
+
+class SnapshotStoreTestCase(base.BaseTest):
+
+    def setUp(self):
+        super(SnapshotStoreTestCase, self).setUp()
+        self.store = snapshot.SnapshotStore()
+        self.baseline = {'foo': 'bar', 'baz': 42, 'qux': None}
+        self.store.snapshot('R630', '2.4.3', self.baseline)
+
+    def test_snapshot_without_drift(self):
+        snap = self.store.snapshot('R630', '2.4.3', dict(self.baseline))
+
+        self.assertEqual(self.baseline, dict(snap))
+        self.assertEqual(3, len(snap))
+        self.assertEqual(0, snap.drift)
+        self.assertEqual({}, snap.diff())
+        self.assertEqual(('R630', '2.4.3'), snap.baseline_key)
+
+    def test_snapshot_with_drift(self):
+        settings = {'foo': 'changed', 'baz': 42, 'new': 'value'}
+
+        snap = self.store.snapshot('R630', '2.4.3', settings)
+
+        self.assertEqual(settings, dict(snap))
+        self.assertEqual(settings, snap)
+        self.assertEqual(3, len(snap))
+        self.assertEqual(3, snap.drift)
+        self.assertEqual('changed', snap['foo'])
+        self.assertEqual(42, snap['baz'])
+        self.assertNotIn('qux', snap)
+        self.assertRaises(KeyError, snap.__getitem__, 'qux')
+        self.assertIsNone(snap.get('qux'))
+        self.assertEqual({'foo': ('bar', 'changed'),
+                          'qux': (None, snapshot.MISSING),
+                          'new': (snapshot.MISSING, 'value')},
+                         snap.diff())
+
+    def test_diff_with_none_value(self):
+        settings = {'foo': None, 'baz': 42}
+
+        snap = self.store.snapshot('R630', '2.4.3', settings)
+
+        self.assertEqual({'foo': ('bar', None),
+                          'qux': (None, snapshot.MISSING)},
+                         snap.diff())
+        self.assertEqual('MISSING', repr(snapshot.MISSING))
+
+    def test_snapshot_per_model_and_firmware(self):
+        settings = {'foo': 'other'}
+
+        snap = self.store.snapshot('R630', '2.5.4', settings)
+
+        self.assertEqual(2, len(self.store))
+        self.assertEqual(0, snap.drift)
+        self.assertEqual(settings, dict(snap))
+
+    def test_get_baseline(self):
+        self.assertEqual(self.baseline,
+                         dict(self.store.get_baseline('R630', '2.4.3')))
+        self.assertIsNone(self.store.get_baseline('R730', '2.4.3'))
+
+    def test_set_baseline(self):
+        old_snap = self.store.snapshot('R630', '2.4.3', {'foo': 'new'})
+
+        self.store.set_baseline('R630', '2.4.3', {'foo': 'new'})
+        snap = self.store.snapshot('R630', '2.4.3', {'foo': 'new'})
+
+        self.assertEqual(0, snap.drift)
+        self.assertEqual({'foo': 'new'}, dict(old_snap))
+
+    def test_clear(self):
+        self.store.clear()
+
+        self.assertEqual(0, len(self.store))
+
+
+@requests_mock.Mocker()
+@mock.patch.object(dracclient.client.WSManClient, 'wait_until_idrac_is_ready',
+                   spec_set=True, autospec=True)
+class BIOSSettingsSnapshotTestCase(base.BaseTest):
+
+    def setUp(self):
+        super(BIOSSettingsSnapshotTestCase, self).setUp()
+        self.drac_client = dracclient.client.DRACClient(
+            **test_utils.FAKE_ENDPOINT)
+
+    def _list_bios_settings(self, mock_requests):
+        mock_requests.post('https://1.2.3.4:443/wsman', [
+            {'text': test_utils.BIOSEnumerations[
+                uris.DCIM_BIOSEnumeration]['ok']},
+            {'text': test_utils.BIOSEnumerations[
+                uris.DCIM_BIOSString]['ok']},
+            {'text': test_utils.BIOSEnumerations[
+                uris.DCIM_BIOSInteger]['ok']}])
+
+        return self.drac_client.list_bios_settings()
+
+    def test_snapshot_bios_settings(self, mock_requests,
+                                    mock_wait_until_idrac_is_ready):
+        store = snapshot.SnapshotStore()
+        baseline = self._list_bios_settings(mock_requests)
+        store.snapshot('R320', '2.4.2', baseline)
+        settings = self._list_bios_settings(mock_requests)
+        mem_test = settings['MemTest']
+        settings['MemTest'] = bios.BIOSEnumerableAttribute(
+            mem_test.name, mem_test.instance_id, mem_test.current_value,
+            'Enabled', mem_test.read_only, mem_test.possible_values)
+
+        snap = store.snapshot('R320', '2.4.2', settings)
+
+        self.assertEqual(1, snap.drift)
+        self.assertEqual(settings, dict(snap))
+        self.assertEqual({'MemTest': (mem_test, settings['MemTest'])},
+                         snap.diff())
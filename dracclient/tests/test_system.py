@@ -11,10 +11,12 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import lxml.etree
 import mock
 import requests_mock
 
 import dracclient.client
+from dracclient import exceptions
 from dracclient.resources import system
 from dracclient.resources import uris
 from dracclient.tests import base
@@ -89,3 +91,94 @@ class ClientSystemConfigurationTestCase(base.BaseTest):
                       system_settings)
         self.assertEqual(expected_integer_attr,
                          system_settings['System.Embedded.1#ServerPwr.1#PowerCapValue'])  # noqa
+
+    def _mock_system_settings(self, mock_requests):
+        mock_requests.post('https://1.2.3.4:443/wsman', [
+            {'text': test_utils.SystemEnumerations[
+                uris.DCIM_SystemEnumeration]['ok']},
+            {'text': test_utils.SystemEnumerations[
+                uris.DCIM_SystemString]['ok']},
+            {'text': test_utils.SystemEnumerations[
+                uris.DCIM_SystemInteger]['ok']}])
+
+    @requests_mock.Mocker()
+    @mock.patch.object(dracclient.client.WSManClient,
+                       'wait_until_idrac_is_ready', spec_set=True,
+                       autospec=True)
+    @mock.patch.object(dracclient.client.WSManClient, 'invoke',
+                       spec_set=True, autospec=True)
+    def test_set_system_settings(self, mock_requests, mock_invoke,
+                                 mock_wait_until_idrac_is_ready):
+        expected_selectors = {
+            'CreationClassName': 'DCIM_SystemManagementService',
+            'SystemName': 'DCIM:ComputerSystem',
+            'Name': 'DCIM:SystemManagementService',
+            'SystemCreationClassName': 'DCIM_ComputerSystem'}
+        expected_properties = {'Target': 'System.Embedded.1',
+                               'AttributeName': ['ServerPwr.1#PowerCapSetting',
+                                                 'ServerPwr.1#PowerCapValue',
+                                                 'ServerTopology.1#RackName'],
+                               'AttributeValue': ['Enabled', 400, 'rack-1']}
+        self._mock_system_settings(mock_requests)
+        mock_invoke.return_value = lxml.etree.fromstring(
+            test_utils.SystemInvocations[uris.DCIM_SystemManagementService][
+                'SetAttributes']['ok'])
+
+        result = self.drac_client.set_system_settings(
+            {'System.Embedded.1#ServerPwr.1#PowerCapSetting': 'Enabled',
+             'System.Embedded.1#ServerPwr.1#PowerCapValue': 400,
+             'System.Embedded.1#ServerTopology.1#RackName': 'rack-1',
+             'System.Embedded.1#ServerTopology.1#RackSlot': 1})
+
+        self.assertEqual({'commit_required': True}, result)
+        mock_invoke.assert_called_once_with(
+            mock.ANY, uris.DCIM_SystemManagementService, 'SetAttributes',
+            expected_selectors, expected_properties)
+
+    @requests_mock.Mocker()
+    @mock.patch.object(dracclient.client.WSManClient,
+                       'wait_until_idrac_is_ready', spec_set=True,
+                       autospec=True)
+    def test_set_system_settings_with_invalid_values(
+            self, mock_requests, mock_wait_until_idrac_is_ready):
+        self._mock_system_settings(mock_requests)
+
+        self.assertRaisesRegexp(
+            exceptions.DRACOperationFailed,
+            "(?s)PowerCapValue.*between 302 and 578.*'RackName'.*length 129",
+            self.drac_client.set_system_settings,
+            {'System.Embedded.1#ServerPwr.1#PowerCapValue': 600,
+             'System.Embedded.1#ServerTopology.1#RackName': 'x' * 129})
+
+    @requests_mock.Mocker()
+    @mock.patch.object(dracclient.client.WSManClient,
+                       'wait_until_idrac_is_ready', spec_set=True,
+                       autospec=True)
+    def test_set_system_settings_with_non_integer_value(
+            self, mock_requests, mock_wait_until_idrac_is_ready):
+        self._mock_system_settings(mock_requests)
+
+        self.assertRaisesRegexp(
+            exceptions.InvalidParameterValue,
+            "'PowerCapValue' cannot be set to value 'foo'",
+            self.drac_client.set_system_settings,
+            {'System.Embedded.1#ServerPwr.1#PowerCapValue': 'foo'})
+
+
+class SystemIntegerAttributeTestCase(base.BaseTest):
+
+    def test_validate_without_bounds(self):
+        attribute = system.SystemIntegerAttribute(
+            name='PowerCapValue',
+            instance_id='System.Embedded.1#ServerPwr.1#PowerCapValue',
+            read_only=False,
+            current_value=555,
+            pending_value=None,
+            fqdd='System.Embedded.1',
+            group_id='ServerPwr.1',
+            lower_bound=None,
+            upper_bound=578)
+
+        self.assertIsNone(attribute.validate(0))
+        self.assertIsNotNone(attribute.validate(600))
+        self.assertIsNotNone(attribute.validate('foo'))
@@ -11,7 +11,10 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import copy
+import pickle
 import re
+import threading
 
 from lxml import etree
 
@@ -166,3 +169,122 @@ class UtilsTestCase(base.BaseTest):
             controllers[0], uris.DCIM_ControllerView, 'DriverVersion',
             nullable=True)
         self.assertEqual(result, [])
+
+    def test_run_concurrently(self):
+        threads = []
+
+        def record(value):
+            threads.append(threading.current_thread())
+            return value
+
+        result = utils.run_concurrently([lambda: record(1),
+                                         lambda: record(2),
+                                         lambda: record(3)])
+
+        self.assertEqual([1, 2, 3], result)
+        self.assertEqual(3, len(set(threads)))
+
+    def test_run_concurrently_error(self):
+        called = []
+
+        def fail():
+            raise exceptions.DRACOperationFailed(drac_messages='boom')
+
+        self.assertRaises(exceptions.DRACOperationFailed,
+                          utils.run_concurrently,
+                          [fail, lambda: called.append(True)])
+        self.assertEqual([True], called)
+
+    def test_run_concurrently_empty(self):
+        self.assertEqual([], utils.run_concurrently([]))
+
+
+class _FakeFrozenObject(utils.FrozenSlotsObject):
+
+    __slots__ = ('foo', 'bar')
+
+    def __init__(self, foo, bar):
+        self._set_fields(foo=foo, bar=bar)
+
+
+class FrozenSlotsObjectTestCase(base.BaseTest):
+
+    def test_no_instance_dict(self):
+        obj = _FakeFrozenObject('foo', 42)
+
+        self.assertFalse(hasattr(obj, '__dict__'))
+        self.assertEqual('foo', obj.foo)
+        self.assertEqual(42, obj.bar)
+
+    def test_immutable(self):
+        obj = _FakeFrozenObject('foo', 42)
+
+        self.assertRaises(AttributeError, setattr, obj, 'foo', 'bar')
+        self.assertRaises(AttributeError, setattr, obj, 'baz', 'bar')
+        self.assertRaises(AttributeError, delattr, obj, 'foo')
+
+    def test_eq(self):
+        self.assertEqual(_FakeFrozenObject('foo', 42),
+                         _FakeFrozenObject('foo', 42))
+        self.assertNotEqual(_FakeFrozenObject('foo', 42),
+                            _FakeFrozenObject('foo', 43))
+        self.assertNotEqual(_FakeFrozenObject('foo', 42), 'foo')
+
+    def test_hash(self):
+        self.assertEqual(hash(_FakeFrozenObject('foo', 42)),
+                         hash(_FakeFrozenObject('foo', 42)))
+
+    def test_copy_and_pickle(self):
+        obj = _FakeFrozenObject('foo', 42)
+
+        self.assertEqual(obj, copy.copy(obj))
+        self.assertEqual(obj, copy.deepcopy(obj))
+        self.assertEqual(obj, pickle.loads(pickle.dumps(obj)))
+
+    def test_repr(self):
+        self.assertEqual("_FakeFrozenObject(foo='foo', bar=42)",
+                         repr(_FakeFrozenObject('foo', 42)))
+
+    def test_shared_tuple(self):
+        values = utils.shared_tuple(['Enabled', 'Disabled'])
+
+        self.assertEqual(('Enabled', 'Disabled'), values)
+        self.assertIs(values, utils.shared_tuple(('Enabled', 'Disabled')))
+
+
+class InternPoolTestCase(base.BaseTest):
+
+    def tearDown(self):
+        super(InternPoolTestCase, self).tearDown()
+        utils.disable_interning()
+
+    def test_intern(self):
+        pool = utils.InternPool()
+        value = pool.intern(''.join(['fo', 'o']))
+
+        self.assertIs(value, pool.intern(''.join(['f', 'oo'])))
+        self.assertIsNone(pool.intern(None))
+        self.assertEqual(1, len(pool))
+
+    def test_intern_tuple(self):
+        pool = utils.InternPool()
+        values = pool.intern((''.join(['fo', 'o']), 'bar'))
+
+        self.assertIs(values, pool.intern((''.join(['f', 'oo']), 'bar')))
+        self.assertIs(values[0], pool.intern(''.join(['f', 'oo'])))
+
+    def test_pooled_disabled(self):
+        value = ''.join(['fo', 'o'])
+
+        self.assertIsNone(utils.get_intern_pool())
+        self.assertIs(value, utils.pooled(value))
+
+    def test_pooled_enabled(self):
+        pool = utils.enable_interning()
+        value = utils.pooled(''.join(['fo', 'o']))
+
+        self.assertIs(pool, utils.get_intern_pool())
+        self.assertIs(value, utils.pooled(''.join(['f', 'oo'])))
+
+        utils.disable_interning()
+        self.assertIsNone(utils.get_intern_pool())
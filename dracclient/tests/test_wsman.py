@@ -12,6 +12,7 @@
 #    under the License.
 
 import collections
+import os
 import uuid
 
 import lxml.etree
@@ -40,6 +41,43 @@ class ClientTestCase(base.BaseTest):
         resp = self.client.enumerate('resource', auto_pull=False)
         self.assertEqual('yay!', resp.text)
 
+    @requests_mock.Mocker()
+    def test_requests_share_session(self, mock_requests):
+        mock_requests.post('https://1.2.3.4:443/wsman',
+                           text='<result>yay!</result>')
+
+        self.client.enumerate('resource', auto_pull=False)
+        session = self.client.session
+        self.client.enumerate('resource', auto_pull=False)
+
+        self.assertIs(session, self.client.session)
+        self.assertEqual(('admin', 's3cr3t'),
+                         (session.auth.username, session.auth.password))
+        self.assertFalse(session.verify)
+        self.assertEqual(2, mock_requests.call_count)
+
+    @requests_mock.Mocker()
+    def test_requests_without_verification_with_ca_bundle(self,
+                                                          mock_requests):
+        mock_requests.post('https://1.2.3.4:443/wsman',
+                           text='<result>yay!</result>')
+
+        with mock.patch.dict(os.environ,
+                             {'REQUESTS_CA_BUNDLE': '/path/to/ca-bundle',
+                              'CURL_CA_BUNDLE': '/path/to/ca-bundle'}):
+            self.client.enumerate('resource', auto_pull=False)
+
+        self.assertFalse(mock_requests.request_history[0].verify)
+
+    def test_close(self):
+        session = self.client.session
+
+        with mock.patch.object(session, 'close', autospec=True) as mock_close:
+            self.client.close()
+
+        mock_close.assert_called_once_with()
+        self.assertIsNot(session, self.client.session)
+
     def test_enumerate_with_request_failure(self):
         self.client = dracclient.wsman.Client('malformed://^@*', 'user',
                                               'pass')
@@ -99,6 +137,63 @@ class ClientTestCase(base.BaseTest):
 
         self.assertEqual('yay!', resp.text)
 
+    @requests_mock.Mocker()
+    def test_estimate_count(self, mock_requests):
+        mock_requests.post(
+            'https://1.2.3.4:443/wsman',
+            [{'text': test_utils.WSManEnumerations['count_estimate']['ok']},
+             {'text': test_utils.WSManEnumerations['release']['ok']}])
+
+        count = self.client.estimate_count('FooResource',
+                                           filter_query='select * from Foo')
+
+        self.assertEqual(42, count)
+        self.assertEqual(2, mock_requests.call_count)
+        enum_xml = lxml.etree.fromstring(
+            mock_requests.request_history[0].body)
+        self.assertIsNotNone(enum_xml.find(
+            './/{%s}RequestTotalItemsCountEstimate'
+            % dracclient.wsman.NS_WSMAN))
+        self.assertEqual([], enum_xml.findall(
+            './/{%s}OptimizeEnumeration' % dracclient.wsman.NS_WSMAN))
+        self.assertEqual('select * from Foo', enum_xml.find(
+            './/{%s}Filter' % dracclient.wsman.NS_WSMAN).text)
+        release_xml = lxml.etree.fromstring(
+            mock_requests.request_history[1].body)
+        self.assertEqual('enum-context-uuid', release_xml.find(
+            './/{%s}Release/{%s}EnumerationContext'
+            % (dracclient.wsman.NS_WSMAN_ENUM,
+               dracclient.wsman.NS_WSMAN_ENUM)).text)
+
+    @requests_mock.Mocker()
+    def test_estimate_count_unsupported(self, mock_requests):
+        mock_requests.post(
+            'https://1.2.3.4:443/wsman',
+            [{'text': test_utils.WSManEnumerations['count_estimate'][
+                'unsupported']},
+             {'text': test_utils.WSManEnumerations['release']['ok']}])
+
+        self.assertIsNone(self.client.estimate_count('FooResource'))
+        self.assertEqual(2, mock_requests.call_count)
+
+    @requests_mock.Mocker()
+    def test_estimate_count_with_release_failure(self, mock_requests):
+        mock_requests.post(
+            'https://1.2.3.4:443/wsman',
+            [{'text': test_utils.WSManEnumerations['count_estimate']['ok']},
+             {'status_code': 500, 'reason': 'dumb request'}])
+
+        self.assertEqual(42, self.client.estimate_count('FooResource'))
+
+    @requests_mock.Mocker()
+    def test_release(self, mock_requests):
+        expected_resp = '<result>yay!</result>'
+        mock_requests.post('https://1.2.3.4:443/wsman', text=expected_resp)
+
+        resp = self.client.release('resource', 'context-uuid')
+
+        self.assertEqual('yay!', resp.text)
+
     @requests_mock.Mocker()
     def test_invoke(self, mock_requests):
         expected_resp = '<result>yay!</result>'
@@ -276,6 +371,58 @@ class PayloadTestCase(base.BaseTest):
                           filter_query='DROP TABLE users',
                           filter_dialect=invalid_dialect)
 
+    def test_build_enum_with_count_estimate(self):
+        payload = dracclient.wsman._EnumeratePayload(
+            'http://host:443/wsman', 'http://resource_uri',
+            count_estimate=True).build()
+        payload_xml = lxml.etree.fromstring(payload)
+
+        header = payload_xml.find('{%s}Header' % dracclient.wsman.NS_SOAP_ENV)
+        self.assertIsNotNone(header.find(
+            '{%s}RequestTotalItemsCountEstimate' % dracclient.wsman.NS_WSMAN))
+
+    def test_build_enum_without_count_estimate(self):
+        payload = dracclient.wsman._EnumeratePayload(
+            'http://host:443/wsman', 'http://resource_uri').build()
+        payload_xml = lxml.etree.fromstring(payload)
+
+        self.assertEqual([], payload_xml.findall(
+            './/{%s}RequestTotalItemsCountEstimate'
+            % dracclient.wsman.NS_WSMAN))
+
+    @mock.patch.object(uuid, 'uuid4', autospec=True)
+    def test_build_release(self, mock_uuid):
+        expected_payload = """<?xml version="1.0" ?>
+<s:Envelope xmlns:s="http://www.w3.org/2003/05/soap-envelope"
+            xmlns:wsa="http://schemas.xmlsoap.org/ws/2004/08/addressing"
+            xmlns:wsman="http://schemas.dmtf.org/wbem/wsman/1/wsman.xsd">
+    <s:Header>
+        <wsa:To s:mustUnderstand="true">http://host:443/wsman</wsa:To>
+        <wsman:ResourceURI s:mustUnderstand="true">http://resource_uri</wsman:ResourceURI>
+        <wsa:MessageID s:mustUnderstand="true">uuid:1234-12</wsa:MessageID>
+        <wsa:ReplyTo>
+            <wsa:Address>http://schemas.xmlsoap.org/ws/2004/08/addressing/role/anonymous</wsa:Address>
+        </wsa:ReplyTo>
+        <wsa:Action s:mustUnderstand="true">http://schemas.xmlsoap.org/ws/2004/09/enumeration/Release</wsa:Action>
+    </s:Header>
+    <s:Body>
+        <wsen:Release xmlns:wsen="http://schemas.xmlsoap.org/ws/2004/09/enumeration">
+            <wsen:EnumerationContext>context-uuid</wsen:EnumerationContext>
+        </wsen:Release>
+    </s:Body>
+</s:Envelope>
+"""  # noqa
+        expected_payload_obj = lxml.objectify.fromstring(expected_payload)
+
+        mock_uuid.return_value = '1234-12'
+        payload = dracclient.wsman._ReleasePayload('http://host:443/wsman',
+                                                   'http://resource_uri',
+                                                   'context-uuid').build()
+        payload_obj = lxml.objectify.fromstring(payload)
+
+        self.assertEqual(lxml.etree.tostring(expected_payload_obj),
+                         lxml.etree.tostring(payload_obj))
+
     @mock.patch.object(uuid, 'uuid4', autospec=True)
     def test_build_pull(self, mock_uuid):
         expected_payload = """<?xml version="1.0" ?>
@@ -40,12 +40,20 @@ WSManEnumerations = {
         load_wsman_xml('wsman-enum_context-2'),
         load_wsman_xml('wsman-enum_context-3'),
         load_wsman_xml('wsman-enum_context-4'),
-    ]
+    ],
+    'count_estimate': {
+        'ok': load_wsman_xml('wsman-enum_count_estimate-ok'),
+        'unsupported': load_wsman_xml('wsman-enum_count_estimate-unsupported'),
+    },
+    'release': {
+        'ok': load_wsman_xml('wsman-release-ok'),
+    },
 }
 
 BIOSEnumerations = {
     uris.DCIM_BIOSEnumeration: {
-        'ok': load_wsman_xml('bios_enumeration-enum-ok')
+        'ok': load_wsman_xml('bios_enumeration-enum-ok'),
+        'pending': load_wsman_xml('bios_enumeration-enum-pending')
     },
     uris.DCIM_BIOSInteger: {
         'mutable': load_wsman_xml('bios_integer-enum-mutable'),
@@ -115,6 +123,7 @@ JobEnumerations = {
     uris.DCIM_LifecycleJob: {
         'ok': load_wsman_xml('lifecycle_job-enum-ok'),
         'not_found': load_wsman_xml('lifecycle_job-enum-not_found'),
+        'unfinished': load_wsman_xml('lifecycle_job-enum-unfinished'),
     },
 }
 
@@ -147,9 +156,19 @@ iDracCardEnumerations = {
     },
 }
 
+iDracCardInvocations = {
+    uris.DCIM_iDRACCardService: {
+        'SetAttributes': {
+            'ok': load_wsman_xml(
+                'idrac_service-invoke-set_attributes-ok'),
+        }
+    }
+}
+
 LifecycleControllerEnumerations = {
     uris.DCIM_SystemView: {
-        'ok': load_wsman_xml('system_view-enum-ok')
+        'ok': load_wsman_xml('system_view-enum-ok'),
+        '11g': load_wsman_xml('system_view-enum-11g')
     },
     uris.DCIM_LCEnumeration: {
         'ok': load_wsman_xml('lc_enumeration-enum-ok')
@@ -165,6 +184,10 @@ LifecycleControllerInvocations = {
             'is_ready': load_wsman_xml('lc_getremoteservicesapistatus_ready'),
             'is_not_ready': load_wsman_xml(
                 'lc_getremoteservicesapistatus_not_ready')
+        },
+        'SetAttributes': {
+            'ok': load_wsman_xml(
+                'lc_service-invoke-set_attributes-ok'),
         }
     }
 }
@@ -215,3 +238,12 @@ SystemEnumerations = {
         'ok': load_wsman_xml('system_integer-enum-ok'),
     }
 }
+
+SystemInvocations = {
+    uris.DCIM_SystemManagementService: {
+        'SetAttributes': {
+            'ok': load_wsman_xml(
+                'system_service-invoke-set_attributes-ok'),
+        }
+    }
+}
@@ -15,8 +15,19 @@
 Common functionalities shared between different DRAC modules.
 """
 
+import collections
+import re
+import sys
+import threading
+
 from dracclient import exceptions
 
+try:
+    _intern = sys.intern
+except AttributeError:
+    # Python 2
+    _intern = intern  # noqa
+
 NS_XMLSchema_Instance = 'http://www.w3.org/2001/XMLSchema-instance'
 
 # ReturnValue constants
@@ -24,6 +35,13 @@ RET_SUCCESS = '0'
 RET_ERROR = '2'
 RET_CREATED = '4096'
 
+# values quoted in the filter queries of enumerations, e.g. FQDDs
+_FILTER_VALUE_RE = re.compile(r'^[A-Za-z0-9_.:-]+$')
+
+_SHARED_TUPLES = {}
+
+_intern_pool = None
+
 
 def find_xml(doc, item, namespace, find_all=False):
     """Find the first or all elements in an ElementTree object.
@@ -134,6 +152,156 @@ def is_reboot_required(doc, resource_uri):
     return reboot_required.text.lower() == 'yes'
 
 
+def is_commit_required(doc, resource_uri):
+    """Check the response document if a config job is needed.
+
+    The SetResult attributes in the response of SetAttributes indicate whether
+    the values were applied right away or are pending until a config job
+    commits them.
+
+    :param doc: the element tree object.
+    :param resource_uri: the resource URI of the namespace.
+    :returns: a boolean value indicating whether a config job is needed.
+    """
+
+    set_results = find_xml(doc, 'SetResult', resource_uri, find_all=True)
+    if any('Pending' in (set_result.text or '')
+           for set_result in set_results):
+        return True
+
+    reboot_required = find_xml(doc, 'RebootRequired', resource_uri)
+    return (reboot_required is not None and
+            reboot_required.text.lower() == 'yes')
+
+
+def check_attribute_settings(new_settings, current_settings,
+                             is_unchanged=None, kind=None):
+    """Validates new values of attributes against their current settings.
+
+    :param new_settings: a dictionary containing the proposed values, with
+                         each key being the key of the attribute in
+                         current_settings.
+    :param current_settings: a dictionary containing the attribute objects.
+                             Their validate method, if any, returns an error
+                             message for an invalid value.
+    :param is_unchanged: callable taking an attribute object and its proposed
+                         value and returning whether the value is unchanged.
+                         By default, the value is compared to the current one.
+    :param kind: kind of the attributes in the error messages, e.g. 'BIOS'
+    :returns: a tuple with the list of the keys of the attributes whose value
+              changes and the list of the keys of the unchanged attributes.
+    :raises: InvalidParameterValue on unknown attributes
+    :raises: InvalidAttributeValues on read-only attributes or invalid values
+    """
+
+    if is_unchanged is None:
+        is_unchanged = _is_current_value
+    attributes = '%s attributes' % kind if kind else 'attributes'
+
+    unknown_keys = set(new_settings) - set(current_settings)
+    if unknown_keys:
+        msg = ('Unknown %(attributes)s found: %(unknown_keys)r' %
+               {'attributes': attributes, 'unknown_keys': unknown_keys})
+        raise exceptions.InvalidParameterValue(reason=msg)
+
+    read_only_keys = []
+    invalid_attribs_msgs = []
+    changed_keys = []
+    unchanged_keys = []
+    for key in sorted(new_settings):
+        attr = current_settings[key]
+        new_value = new_settings[key]
+        if is_unchanged(attr, new_value):
+            unchanged_keys.append(key)
+            continue
+
+        if attr.read_only:
+            read_only_keys.append(key)
+            continue
+
+        validate = getattr(attr, 'validate', None)
+        validation_msg = validate(new_value) if validate else None
+        if validation_msg is None:
+            changed_keys.append(key)
+        else:
+            invalid_attribs_msgs.append(validation_msg)
+
+    if read_only_keys:
+        invalid_attribs_msgs.append('Cannot set read-only %s: %r.'
+                                    % (attributes, read_only_keys))
+
+    if invalid_attribs_msgs:
+        raise exceptions.InvalidAttributeValues(
+            drac_messages='\n'.join(invalid_attribs_msgs))
+
+    return changed_keys, unchanged_keys
+
+
+def _is_current_value(attr, value):
+    return str(value) == str(attr.current_value)
+
+
+def set_attributes_by_target(client, resource_uri, selectors, new_settings,
+                             current_settings, keys):
+    """Sets attributes with one SetAttributes call per target device.
+
+    :param client: an instance of WSManClient
+    :param resource_uri: URI of the service setting the attributes
+    :param selectors: selectors of the service
+    :param new_settings: a dictionary containing the proposed values, with
+                         each key being the key of the attribute in
+                         current_settings.
+    :param current_settings: a dictionary containing the attribute objects,
+                             with their fqdd, group_id and name.
+    :param keys: the keys of the attributes to set
+    :returns: a boolean value indicating whether a config job is needed.
+    :raises: WSManRequestFailure on request failures
+    :raises: WSManInvalidResponse when receiving invalid response
+    :raises: DRACOperationFailed on error reported back by the DRAC
+             interface
+    :raises: DRACUnexpectedReturnValue on return value mismatch
+    """
+
+    targets = collections.OrderedDict()
+    for key in keys:
+        targets.setdefault(current_settings[key].fqdd, []).append(key)
+
+    commit_required = False
+    for (fqdd, target_keys) in targets.items():
+        properties = {'Target': fqdd,
+                      'AttributeName': [
+                          '%s#%s' % (current_settings[key].group_id,
+                                     current_settings[key].name)
+                          for key in target_keys],
+                      'AttributeValue': [new_settings[key]
+                                         for key in target_keys]}
+        doc = client.invoke(resource_uri, 'SetAttributes', selectors,
+                            properties)
+        if is_commit_required(doc, resource_uri):
+            commit_required = True
+
+    return commit_required
+
+
+def check_filter_values(values, description):
+    """Validates values before they are quoted in a filter query.
+
+    :param values: the values, e.g. attribute names or FQDDs.
+    :param description: description of the values in the error message.
+    :raises: InvalidParameterValue on values other than letters, digits,
+             underscores, dots, colons and dashes, which could alter the
+             query.
+    """
+
+    invalid_values = [value for value in values
+                      if not _FILTER_VALUE_RE.match(str(value))]
+    if invalid_values:
+        msg = ('Invalid %(description)s found: %(invalid_values)r' %
+               {'description': description,
+                'invalid_values': sorted(invalid_values)})
+        raise exceptions.InvalidParameterValue(reason=msg)
+
+
 def validate_integer_value(value, attr_name, error_msgs):
     """Validate integer value"""
 
@@ -145,3 +313,217 @@ def validate_integer_value(value, attr_name, error_msgs):
         int(value)
     except ValueError:
         error_msgs.append("'%s' is not an integer value" % attr_name)
+
+
+def run_concurrently(funcs):
+    """Runs callables concurrently, each in its own thread.
+
+    The current thread runs the first callable while the others run in new
+    threads.
+
+    :param funcs: a list of callables taking no argument.
+    :returns: a list with the result of each callable, in the same order.
+    :raises: the exception raised by the first failing callable, in the order
+             of funcs, once all of them have returned.
+    """
+    results = [None] * len(funcs)
+    errors = [None] * len(funcs)
+
+    def run(index):
+        try:
+            results[index] = funcs[index]()
+        except Exception as ex:
+            errors[index] = ex
+
+    threads = [threading.Thread(target=run, args=(index,))
+               for index in range(1, len(funcs))]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+
+    if funcs:
+        run(0)
+
+    for thread in threads:
+        thread.join()
+
+    for error in errors:
+        if error is not None:
+            raise error
+
+    return results
+
+
+def intern_string(value):
+    """Intern a string, so that equal values share a single object.
+
+    :param value: the value to intern. Values other than native strings are
+                  returned unchanged.
+    :returns: the interned value.
+    """
+    if isinstance(value, str):
+        return _intern(value)
+    return value
+
+
+def shared_tuple(values):
+    """Return a canonical tuple for a sequence of strings.
+
+    Equal sequences map to the same tuple object, so that the value lists
+    repeated across many attributes are only stored once.
+
+    :param values: an iterable of values.
+    :returns: a tuple of interned values.
+    """
+    values = tuple(intern_string(value) for value in values)
+    return _SHARED_TUPLES.setdefault(values, values)
+
+
+class InternPool(object):
+    """Pool of canonical instances of repeated immutable values.
+
+    Settings and inventory of identical servers mostly consist of the same
+    strings repeated for every host. Passing parsed values through a shared
+    pool keeps a single instance of each distinct value, so that the memory
+    used by a fleet wide cache grows with the number of distinct values
+    rather than with the number of hosts.
+    """
+
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._values)
+
+    def intern(self, value):
+        """Returns the pooled instance of a value
+
+        :param value: a string, a tuple of strings or None.
+        :returns: the pooled instance equal to value.
+        """
+        if value is None:
+            return value
+        if isinstance(value, tuple):
+            value = tuple(self.intern(item) for item in value)
+
+        try:
+            return self._values[value]
+        except KeyError:
+            with self._lock:
+                return self._values.setdefault(value, value)
+
+    def clear(self):
+        """Drops all pooled values"""
+        with self._lock:
+            self._values.clear()
+
+
+def enable_interning(pool=None):
+    """Enables process wide interning of parsed values.
+
+    Once enabled, the settings attribute parsers and the inventory and RAID
+    parsers pass the values that repeat across hosts (instance ids, FQDDs,
+    group ids, models, etc.) through the pool.
+
+    :param pool: the InternPool to use. If None, a new pool is created.
+    :returns: the InternPool in use.
+    """
+    global _intern_pool
+
+    _intern_pool = pool if pool is not None else InternPool()
+    return _intern_pool
+
+
+def disable_interning():
+    """Disables process wide interning of parsed values."""
+    global _intern_pool
+
+    _intern_pool = None
+
+
+def get_intern_pool():
+    """Returns the InternPool in use, or None if interning is disabled."""
+    return _intern_pool
+
+
+def pooled(value):
+    """Returns the pooled instance of a value if interning is enabled.
+
+    :param value: a string, a tuple of strings or None.
+    :returns: the pooled instance equal to value, or value itself when
+              interning is disabled.
+    """
+    pool = _intern_pool
+    if pool is None:
+        return value
+    return pool.intern(value)
+
+
+class FrozenSlotsObject(object):
+    """Base class for compact, immutable value objects.
+
+    Subclasses declare their fields in __slots__, so that instances don't
+    carry a per-object __dict__. Fields are assigned once in __init__ through
+    _set_fields and cannot be changed afterwards.
+    """
+
+    __slots__ = ()
+
+    _field_names_cache = {}
+
+    def _set_fields(self, **fields):
+        for (name, value) in fields.items():
+            object.__setattr__(self, name, value)
+
+    @classmethod
+    def _field_names(cls):
+        try:
+            return cls._field_names_cache[cls]
+        except KeyError:
+            names = []
+            for klass in reversed(cls.__mro__):
+                for name in klass.__dict__.get('__slots__', ()):
+                    if name not in names:
+                        names.append(name)
+            cls._field_names_cache[cls] = tuple(names)
+            return cls._field_names_cache[cls]
+
+    def _as_dict(self):
+        return dict((name, getattr(self, name, None))
+                    for name in self._field_names())
+
+    def __setattr__(self, name, value):
+        raise AttributeError("'%s' object is immutable" %
+                             type(self).__name__)
+
+    def __delattr__(self, name):
+        raise AttributeError("'%s' object is immutable" %
+                             type(self).__name__)
+
+    def __eq__(self, other):
+        if not isinstance(other, FrozenSlotsObject):
+            return NotImplemented
+        return self._as_dict() == other._as_dict()
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+    def __hash__(self):
+        return hash(tuple(getattr(self, name, None)
+                          for name in self._field_names()))
+
+    def __repr__(self):
+        return '%s(%s)' % (type(self).__name__,
+                           ', '.join('%s=%r' % (name, getattr(self, name,
+                                                              None))
+                                     for name in self._field_names()))
+
+    def __getstate__(self):
+        return self._as_dict()
+
+    def __setstate__(self, state):
+        self._set_fields(**state)
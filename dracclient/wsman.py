@@ -12,14 +12,19 @@
 #    under the License.
 
 import logging
+import threading
 import time
 import uuid
 
 from lxml import etree as ElementTree
+import requests
 import requests.exceptions
 
+from dracclient import breaker
 from dracclient import constants
 from dracclient import exceptions
+from dracclient import instrumentation
+from dracclient import limits
 
 LOG = logging.getLogger(__name__)
 
@@ -45,7 +50,12 @@ class Client(object):
                  protocol='https',
                  ssl_retries=constants.DEFAULT_WSMAN_SSL_ERROR_RETRIES,
                  ssl_retry_delay=(
-                     constants.DEFAULT_WSMAN_SSL_ERROR_RETRY_DELAY_SEC)):
+                     constants.DEFAULT_WSMAN_SSL_ERROR_RETRY_DELAY_SEC),
+                 max_concurrency=None,
+                 adaptive_concurrency=False, breaker_threshold=None,
+                 breaker_reset_timeout=(
+                     constants.DEFAULT_BREAKER_RESET_TIMEOUT_SEC),
+                 rate_limit=None, rate_burst=None):
         """Creates client object
 
         :param host: hostname or IP of the DRAC interface
@@ -57,6 +67,24 @@ class Client(object):
         :param ssl_retries: number of resends to attempt on SSL failures
         :param ssl_retry_delay: number of seconds to wait between
                                 retries on SSL failures
+        :param max_concurrency: maximum number of concurrent requests sent to
+                                the DRAC by all the clients of the process,
+                                or None for no limit
+        :param adaptive_concurrency: whether the concurrency limit should
+                                     adapt to the errors and latency of the
+                                     DRAC, starting from max_concurrency, or
+                                     from 4 if None
+        :param breaker_threshold: number of consecutive failed requests after
+                                  which the requests to the DRAC fail
+                                  immediately, or None to always send them
+        :param breaker_reset_timeout: number of seconds after which a request
+                                      is sent again to a DRAC whose requests
+                                      fail immediately
+        :param rate_limit: maximum number of requests per second sent to the
+                           DRAC by all the clients of the process, or None for
+                           no limit
+        :param rate_burst: number of requests that can be sent to the DRAC at
+                           once, by default the requests of one second
         """
 
         self.host = host
@@ -72,22 +100,159 @@ class Client(object):
             'host': self.host,
             'port': self.port,
             'path': self.path})
+        self._session = None
+        self._session_lock = threading.Lock()
+        self._limiter = None
+        if max_concurrency is None and adaptive_concurrency:
+            max_concurrency = constants.DEFAULT_WSMAN_MAX_CONCURRENCY
+        if max_concurrency is not None:
+            self._limiter = limits.get_concurrency_limiter(
+                host, port, max_concurrency, adaptive_concurrency)
+        self._breaker = None
+        if breaker_threshold is not None:
+            self._breaker = breaker.get_circuit_breaker(
+                host, port, breaker_threshold, breaker_reset_timeout)
+        self._rate_limiter = None
+        if rate_limit is not None:
+            self._rate_limiter = limits.get_rate_limiter(host, port,
+                                                         rate_limit,
+                                                         rate_burst)
+
+    @property
+    def circuit_state(self):
+        """State of the circuit breaker of the DRAC, or None if disabled"""
+        if self._breaker is not None:
+            return self._breaker.state
+
+    @property
+    def session(self):
+        """HTTP session keeping the connections to the DRAC open
+
+        The session is created on first use and shared by the threads using
+        the client.
+        """
+        session = self._session
+        if session is None:
+            with self._session_lock:
+                session = self._session
+                if session is None:
+                    session = requests.Session()
+                    session.auth = requests.auth.HTTPBasicAuth(
+                        self.username, self.password)
+                    # TODO(ifarkas): enable cert verification
+                    # NOTE: the requests also pass verify=False, the
+                    # session setting is overridden by REQUESTS_CA_BUNDLE
+                    session.verify = False
+                    self._session = session
+        return session
+
+    def close(self):
+        """Closes the connections to the DRAC
+
+        The client remains usable, new connections are opened as needed.
+        """
+        with self._session_lock:
+            session = self._session
+            self._session = None
+        if session is not None:
+            session.close()
+
+    def _throttle(self):
+        buckets = [bucket for bucket in (limits.get_global_rate_limiter(),
+                                         self._rate_limiter)
+                   if bucket is not None]
+        if not buckets:
+            return
+
+        delay = max(bucket.reserve() for bucket in buckets)
+        if delay > 0:
+            LOG.debug('Throttling request to %(host)s for %(delay).3f seconds',
+                      {'host': self.host, 'delay': delay})
+            time.sleep(delay)
+            instrumentation.emit(instrumentation.RATE_LIMIT_WAIT,
+                                 host=self.host, port=self.port, wait=delay)
+
+    def _post(self, payload, priority):
+        self._throttle()
+        if self._limiter is None:
+            return self.session.post(self.endpoint, data=payload,
+                                     verify=False)
+
+        start = time.time()
+        self._limiter.acquire(priority)
+        sent = time.time()
+        instrumentation.emit(instrumentation.CONCURRENCY_WAIT,
+                             host=self.host, port=self.port,
+                             wait=sent - start)
+        try:
+            resp = self.session.post(self.endpoint, data=payload,
+                                     verify=False)
+        except (requests.exceptions.ConnectionError,
+                requests.exceptions.Timeout):
+            self._record_request(None)
+            raise
+        else:
+            if resp.status_code == requests.codes.service_unavailable:
+                self._record_request(None)
+            else:
+                self._record_request(time.time() - sent)
+            return resp
+        finally:
+            self._limiter.release()
+
+    def _record_request(self, latency):
+        if latency is None:
+            changed = self._limiter.record_failure()
+        else:
+            changed = self._limiter.record_success(latency)
+
+        if changed:
+            LOG.debug('Concurrency limit of %(host)s changed to %(limit)d',
+                      {'host': self.host, 'limit': self._limiter.limit})
+            instrumentation.emit(instrumentation.CONCURRENCY_LIMIT,
+                                 host=self.host, port=self.port,
+                                 limit=self._limiter.limit)
 
-    def _do_request(self, payload):
+    def _do_request(self, payload, priority=limits.PRIORITY_HIGH):
         payload = payload.build()
+        priority = limits.get_priority(priority)
         LOG.debug('Sending request to %(endpoint)s: %(payload)s',
                   {'endpoint': self.endpoint, 'payload': payload})
 
+        if self._breaker is None:
+            resp = self._send(payload, priority)
+        else:
+            self._breaker.before_request()
+            answered = False
+            try:
+                resp = self._send(payload, priority)
+                answered = (resp.status_code !=
+                            requests.codes.service_unavailable)
+            finally:
+                self._record_answer(answered)
+
+        LOG.debug('Received response from %(endpoint)s: %(payload)s',
+                  {'endpoint': self.endpoint, 'payload': resp.content})
+        if not resp.ok:
+            raise exceptions.WSManInvalidResponse(
+                status_code=resp.status_code,
+                reason=resp.reason)
+        else:
+            return resp
+
+    def _record_answer(self, answered):
+        state = self._breaker.record(answered)
+        if state is not None:
+            LOG.warning('Circuit breaker of %(host)s is %(state)s',
+                        {'host': self.host, 'state': state})
+            instrumentation.emit(instrumentation.CIRCUIT_STATE,
+                                 host=self.host, port=self.port, state=state)
+
+    def _send(self, payload, priority):
         num_tries = 1
         while num_tries <= self.ssl_retries:
             try:
-                resp = requests.post(
-                    self.endpoint,
-                    auth=requests.auth.HTTPBasicAuth(self.username,
-                                                     self.password),
-                    data=payload,
-                    # TODO(ifarkas): enable cert verification
-                    verify=False)
+                resp = self._post(payload, priority)
                 break
             except (requests.exceptions.ConnectionError,
                     requests.exceptions.SSLError) as ex:
@@ -124,17 +289,11 @@ class Client(object):
                 LOG.error(error_msg)
                 raise exceptions.WSManRequestFailure(error_msg)
 
-        LOG.debug('Received response from %(endpoint)s: %(payload)s',
-                  {'endpoint': self.endpoint, 'payload': resp.content})
-        if not resp.ok:
-            raise exceptions.WSManInvalidResponse(
-                status_code=resp.status_code,
-                reason=resp.reason)
-        else:
-            return resp
+        return resp
 
     def enumerate(self, resource_uri, optimization=True, max_elems=100,
-                  auto_pull=True, filter_query=None, filter_dialect='cql'):
+                  auto_pull=True, filter_query=None, filter_dialect='cql',
+                  count_estimate=False):
         """Executes enumerate operation over WSMan.
 
         :param resource_uri: URI of resource to enumerate.
@@ -147,6 +306,10 @@ class Client(object):
         :param filter_query: filter query string.
         :param filter_dialect: filter dialect. Valid options are: 'cql' and
                                'wql'.
+        :param count_estimate: flag to request an estimate of the total
+                               number of items, returned in the
+                               TotalItemsCountEstimate header of the response
+                               if supported.
         :returns: an lxml.etree.Element object of the response received.
         :raises: WSManRequestFailure on request failures
         :raises: WSManInvalidResponse when receiving invalid response
@@ -154,9 +317,10 @@ class Client(object):
 
         payload = _EnumeratePayload(self.endpoint, resource_uri,
                                     optimization, max_elems,
-                                    filter_query, filter_dialect)
+                                    filter_query, filter_dialect,
+                                    count_estimate)
 
-        resp = self._do_request(payload)
+        resp = self._do_request(payload, limits.PRIORITY_LOW)
         resp_xml = ElementTree.fromstring(resp.content)
 
         if auto_pull:
@@ -188,6 +352,66 @@ class Client(object):
         else:
             return resp_xml
 
+    def estimate_count(self, resource_uri, filter_query=None,
+                       filter_dialect='cql'):
+        """Returns an estimate of the number of items of an enumeration.
+
+        Only an enumeration context is requested along with the estimate, no
+        item is pulled, and the context is released.
+
+        :param resource_uri: URI of resource to enumerate.
+        :param filter_query: filter query string.
+        :param filter_dialect: filter dialect. Valid options are: 'cql' and
+                               'wql'.
+        :returns: the estimated number of items, or None if the estimate is
+                  not supported.
+        :raises: WSManRequestFailure on request failures
+        :raises: WSManInvalidResponse when receiving invalid response
+        """
+
+        payload = _EnumeratePayload(self.endpoint, resource_uri,
+                                    optimization=False,
+                                    filter_query=filter_query,
+                                    filter_dialect=filter_dialect,
+                                    count_estimate=True)
+        resp = self._do_request(payload, limits.PRIORITY_LOW)
+        resp_xml = ElementTree.fromstring(resp.content)
+
+        context = self._enum_context(resp_xml)
+        if context is not None:
+            try:
+                self.release(resource_uri, context)
+            except (exceptions.WSManRequestFailure,
+                    exceptions.WSManInvalidResponse) as ex:
+                # the context expires on the DRAC anyway
+                LOG.warning('Failed to release the enumeration context of '
+                            '%(resource_uri)s on %(host)s: %(error)s',
+                            {'resource_uri': resource_uri, 'host': self.host,
+                             'error': ex})
+
+        estimate_elem = resp_xml.find('.//{%s}TotalItemsCountEstimate'
+                                      % NS_WSMAN)
+        if estimate_elem is None or not (estimate_elem.text or '').strip():
+            return None
+
+        return int(estimate_elem.text)
+
+    def release(self, resource_uri, context):
+        """Executes release operation over WSMan.
+
+        :param resource_uri: URI of resource of the enumeration
+        :param context: enumeration context to release
+        :returns: an lxml.etree.Element object of the response received
+        :raises: WSManRequestFailure on request failures
+        :raises: WSManInvalidResponse when receiving invalid response
+        """
+
+        payload = _ReleasePayload(self.endpoint, resource_uri, context)
+        resp = self._do_request(payload, limits.PRIORITY_LOW)
+        resp_xml = ElementTree.fromstring(resp.content)
+
+        return resp_xml
+
     def pull(self, resource_uri, context, max_elems=100):
         """Executes pull operation over WSMan.
 
@@ -201,7 +425,7 @@ class Client(object):
 
         payload = _PullPayload(self.endpoint, resource_uri, context,
                                max_elems)
-        resp = self._do_request(payload)
+        resp = self._do_request(payload, limits.PRIORITY_LOW)
         resp_xml = ElementTree.fromstring(resp.content)
 
         return resp_xml
@@ -279,13 +503,15 @@ class _EnumeratePayload(_Payload):
     """Payload generation for WSMan enumerate operation."""
 
     def __init__(self, endpoint, resource_uri, optimization=True,
-                 max_elems=100, filter_query=None, filter_dialect=None):
+                 max_elems=100, filter_query=None, filter_dialect=None,
+                 count_estimate=False):
         self.endpoint = endpoint
         self.resource_uri = resource_uri
         self.filter_dialect = None
         self.filter_query = None
         self.optimization = optimization
         self.max_elems = max_elems
+        self.count_estimate = count_estimate
 
         if filter_query is not None:
             try:
@@ -304,6 +530,10 @@ class _EnumeratePayload(_Payload):
         action_elem.set('{%s}mustUnderstand' % NS_SOAP_ENV, 'true')
         action_elem.text = NS_WSMAN_ENUM + '/Enumerate'
 
+        if self.count_estimate:
+            ElementTree.SubElement(
+                header, '{%s}RequestTotalItemsCountEstimate' % NS_WSMAN)
+
         return header
 
     def _add_body(self, envelope):
@@ -375,6 +605,37 @@ class _PullPayload(_Payload):
         max_elem_elem.text = str(self.max_elems)
 
 
+class _ReleasePayload(_Payload):
+    """Payload generation for WSMan release operation."""
+
+    def __init__(self, endpoint, resource_uri, context):
+        self.endpoint = endpoint
+        self.resource_uri = resource_uri
+        self.context = context
+
+    def _add_header(self, envelope):
+        header = super(_ReleasePayload, self)._add_header(envelope)
+
+        action_elem = ElementTree.SubElement(header, '{%s}Action' % NS_WS_ADDR)
+        action_elem.set('{%s}mustUnderstand' % NS_SOAP_ENV, 'true')
+        action_elem.text = NS_WSMAN_ENUM + '/Release'
+
+        return header
+
+    def _add_body(self, envelope):
+        body = super(_ReleasePayload, self)._add_body(envelope)
+
+        release_elem = ElementTree.SubElement(body,
+                                              '{%s}Release' % NS_WSMAN_ENUM,
+                                              nsmap={'wsen': NS_WSMAN_ENUM})
+
+        enum_context_elem = ElementTree.SubElement(
+            release_elem, '{%s}EnumerationContext' % NS_WSMAN_ENUM)
+        enum_context_elem.text = self.context
+
+        return body
+
+
 class _InvokePayload(_Payload):
     """Payload generation for WSMan invoke operation."""
 
@@ -0,0 +1,122 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Measures the memory held by parsed settings attributes.
+
+Parses the mocked BIOS and iDRAC card enumerations once per simulated host
+and compares the footprint of the slotted attribute objects with equivalent
+plain objects carrying a __dict__ and a list of possible values, which is how
+the attributes used to be stored.
+
+Usage: PYTHONPATH=. python tools/bench_attribute_memory.py [number of hosts]
+
+Requires Python 3 (tracemalloc).
+"""
+
+import gc
+import sys
+import tracemalloc
+
+from lxml import etree
+
+from dracclient.resources import bios
+from dracclient.resources import idrac_card
+from dracclient.resources import uris
+from dracclient.tests import utils as test_utils
+from dracclient import wsman
+
+NAMESPACES = [
+    (test_utils.BIOSEnumerations[uris.DCIM_BIOSEnumeration]['ok'],
+     bios.BIOSEnumerableAttribute),
+    (test_utils.BIOSEnumerations[uris.DCIM_BIOSString]['ok'],
+     bios.BIOSStringAttribute),
+    (test_utils.BIOSEnumerations[uris.DCIM_BIOSInteger]['ok'],
+     bios.BIOSIntegerAttribute),
+    (test_utils.iDracCardEnumerations[uris.DCIM_iDRACCardEnumeration]['ok'],
+     idrac_card.iDRACCardEnumerableAttribute),
+    (test_utils.iDracCardEnumerations[uris.DCIM_iDRACCardString]['ok'],
+     idrac_card.iDRACCardStringAttribute),
+    (test_utils.iDracCardEnumerations[uris.DCIM_iDRACCardInteger]['ok'],
+     idrac_card.iDRACCardIntegerAttribute),
+]
+
+
+class _DictAttribute(object):
+    """Attribute stored the way it was before it used __slots__."""
+
+    def __init__(self, fields):
+        self.__dict__.update(fields)
+        if 'possible_values' in fields:
+            self.possible_values = list(fields['possible_values'])
+
+
+def _parse_items():
+    items = []
+    for (text, attr_cls) in NAMESPACES:
+        doc = etree.fromstring(text)
+        for item in doc.find('.//{%s}Items' % wsman.NS_WSMAN):
+            items.append((attr_cls, item))
+    return items
+
+
+def _measure(build, hosts):
+    gc.collect()
+    tracemalloc.start()
+    start = tracemalloc.take_snapshot()
+    settings = [build() for host in range(hosts)]
+    end = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    size = sum(stat.size_diff for stat in end.compare_to(start, 'filename'))
+    count = sum(len(host_settings) for host_settings in settings)
+    return size, count
+
+
+def main():
+    hosts = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    items = _parse_items()
+
+    def build_slotted():
+        return dict((attr.instance_id, attr)
+                    for attr in (attr_cls.parse(item)
+                                 for (attr_cls, item) in items))
+
+    # Copy the strings, so that the legacy objects don't benefit from the
+    # interning done by the parsers.
+    def build_legacy():
+        result = {}
+        for (attr_cls, item) in items:
+            fields = attr_cls.parse(item)._as_dict()
+            for (name, value) in fields.items():
+                if isinstance(value, str):
+                    fields[name] = ''.join(list(value))
+                elif isinstance(value, tuple):
+                    fields[name] = [''.join(list(v)) for v in value]
+            result[fields['instance_id']] = _DictAttribute(fields)
+        return result
+
+    legacy_size, count = _measure(build_legacy, hosts)
+    slotted_size, count = _measure(build_slotted, hosts)
+
+    print('hosts: %d, attributes: %d' % (hosts, count))
+    print('legacy:  %10d bytes (%6.1f bytes/attribute)' % (
+        legacy_size, float(legacy_size) / count))
+    print('slotted: %10d bytes (%6.1f bytes/attribute)' % (
+        slotted_size, float(slotted_size) / count))
+    print('reduction: %.1f%%' % (
+        100.0 * (legacy_size - slotted_size) / legacy_size))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Measures the cost of importing dracclient and of creating DRACClient objects.
+
+The import is timed in a fresh interpreter, which also reports the resource
+modules loaded by it. The clients are then created the way a fleet sweep
+does, once with the resource managers left to be built on first use and once
+with all of them built, which is what every client used to cost.
+
+Usage:
+    PYTHONPATH=. python tools/bench_client_construction.py [number of clients]
+
+Requires Python 3 (tracemalloc).
+"""
+
+import gc
+import subprocess
+import sys
+import time
+import tracemalloc
+
+MANAGERS = ['_job_mgmt', '_power_mgmt', '_boot_mgmt', '_bios_cfg',
+            '_lifecycle_mgmt', '_lifecycle_cfg', '_idrac_cfg', '_raid_mgmt',
+            '_system_cfg', '_inventory_mgmt']
+
+IMPORT_SCRIPT = """
+import sys
+import time
+start = time.time()
+import dracclient.client
+print(time.time() - start)
+print(' '.join(sorted(name for name in sys.modules
+                      if name.startswith('dracclient.resources.'))))
+"""
+
+
+def _measure_import():
+    output = subprocess.check_output([sys.executable, '-c', IMPORT_SCRIPT])
+    lines = output.decode().splitlines()
+    return float(lines[0]), lines[1].split() if len(lines) > 1 else []
+
+
+def _measure_construction(clients, eager):
+    import dracclient.client
+
+    def build():
+        client = dracclient.client.DRACClient('1.2.3.4', 'admin', 'secret')
+        if eager:
+            for name in MANAGERS:
+                getattr(client, name)
+        return client
+
+    # import the resource modules before measuring
+    if eager:
+        build()
+
+    gc.collect()
+    tracemalloc.start()
+    start_snapshot = tracemalloc.take_snapshot()
+    start = time.time()
+    result = [build() for client in range(clients)]
+    elapsed = time.time() - start
+    end_snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    size = sum(stat.size_diff
+               for stat in end_snapshot.compare_to(start_snapshot,
+                                                   'filename'))
+    del result
+    return elapsed, size
+
+
+def main():
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+    import_time, modules = _measure_import()
+    print('import dracclient.client: %.1f ms' % (import_time * 1000))
+    print('resource modules loaded: %s' % ' '.join(modules))
+
+    for (label, eager) in [('lazy', False), ('eager', True)]:
+        elapsed, size = _measure_construction(clients, eager)
+        print('%-5s %d clients: %8.1f ms (%5.1f us/client), '
+              '%10d bytes (%6.1f bytes/client)' % (
+                  label, clients, elapsed * 1000,
+                  elapsed * 1000000 / clients, size,
+                  float(size) / clients))
+
+
+if __name__ == '__main__':
+    main()